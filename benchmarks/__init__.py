@@ -0,0 +1 @@
+"""Benchmarks of nestor-api hot paths."""
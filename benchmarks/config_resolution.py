@@ -0,0 +1,29 @@
+"""Micro-benchmark of the configuration variables resolution.
+
+Usage:
+    python -m benchmarks.config_resolution [--sections 500] [--repeat 5]
+"""
+
+import timeit
+
+from benchmarks.synthetic import generate_sections_config, parse_sections_args
+import nestor_api.lib.config as config
+
+
+def main() -> None:
+    """Time `_resolve_variables_deep` on a synthetic configuration."""
+    args = parse_sections_args(__doc__)
+
+    synthetic_config = generate_sections_config(args.sections)
+    # pylint: disable=protected-access
+    timings = timeit.repeat(
+        lambda: config._resolve_variables_deep(synthetic_config), number=1, repeat=args.repeat
+    )
+    print(
+        f"_resolve_variables_deep: {args.sections} sections, "
+        f"best {min(timings) * 1000:.1f} ms, worst {max(timings) * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
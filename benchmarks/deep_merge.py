@@ -0,0 +1,65 @@
+"""Micro-benchmark of `deep_merge` against the former deepcopy-based implementation.
+
+Usage:
+    python -m benchmarks.deep_merge [--sections 500] [--repeat 5]
+"""
+
+import copy
+import functools
+import timeit
+import tracemalloc
+from typing import Callable
+
+from benchmarks.synthetic import generate_sections_config, parse_sections_args
+from nestor_api.utils.dict import deep_merge
+
+
+def legacy_deep_merge(destination: dict, source: dict, concat_lists: bool = False) -> dict:
+    """The previous implementation, deep copying `destination` on every call."""
+
+    def _deep_merge_rec(dest, src):
+        for key in src:
+            if isinstance(dest.get(key), dict) and isinstance(src[key], dict):
+                dest[key] = _deep_merge_rec(dest[key], src[key])
+            elif isinstance(dest.get(key), list) and isinstance(src[key], list) and concat_lists:
+                dest[key].extend(src[key])
+            else:
+                dest[key] = src[key]
+        return dest
+
+    return _deep_merge_rec(copy.deepcopy(destination), source)
+
+
+def _measure_peak_memory(merge: Callable, destination: dict, source: dict) -> int:
+    tracemalloc.start()
+    try:
+        merge(destination, source)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    """Time and measure the memory of merging a deployment into a large project configuration."""
+    args = parse_sections_args(__doc__)
+
+    destination = generate_sections_config(args.sections)
+    # A typical deployment override: a few keys, deep in a single section
+    source = {
+        "env": "production",
+        "section-0": {"variables": {"ope": {"PORT": "80"}}, "resources": {"limits": {"cpu": 1}}},
+    }
+
+    for name, merge in (("legacy", legacy_deep_merge), ("deep_merge", deep_merge)):
+        timings = timeit.repeat(
+            functools.partial(merge, destination, source), number=1, repeat=args.repeat
+        )
+        peak_memory = _measure_peak_memory(merge, destination, source)
+        print(
+            f"{name}: {args.sections} sections, best {min(timings) * 1000:.2f} ms, "
+            f"worst {max(timings) * 1000:.2f} ms, peak memory {peak_memory / 1024:.1f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""Benchmark suite of the configuration loading, the variables resolution and the
+rendering of the Kubernetes manifests, on a synthetic configuration repository.
+
+Each case is timed, its throughput (items per second) and its allocation peak are
+reported, and both are compared with a baseline recorded by a previous run.
+
+Usage:
+    python -m benchmarks.suite [--apps 80] [--processes 3] [--cronjobs 2] [--variables 40]
+        [--depth 3] [--repeat 5] [--case NAME ...] [--baseline benchmarks/baseline.json]
+        [--save-baseline] [--tolerance 0.25]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from benchmarks.synthetic import (
+    SyntheticConfigSize,
+    generate_app_config,
+    generate_deployment_status,
+    generate_project_config,
+    write_config_repository,
+)
+from nestor_api.config.k8s import K8sConfiguration
+import nestor_api.lib.config as config
+import nestor_api.lib.k8s.builders as builders
+import nestor_api.lib.k8s.deployment as deployment
+from nestor_api.utils.dict import deep_merge
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+class BenchmarkCase(NamedTuple):
+    """A benchmarked operation, processing `items` items per run."""
+
+    name: str
+    run: Callable[[], object]
+    items: int
+
+
+class BenchmarkResult(NamedTuple):
+    """The measures of a benchmark case."""
+
+    name: str
+    items: int
+    best_ms: float
+    median_ms: float
+    peak_kib: float
+
+    @property
+    def throughput(self) -> float:
+        """Items processed per second, over the median run."""
+        return self.items / (self.median_ms / 1000) if self.median_ms > 0 else float("inf")
+
+
+def build_cases(config_path: str, size: SyntheticConfigSize) -> List[BenchmarkCase]:
+    """Build the benchmark cases on a synthetic configuration repository."""
+    project_config = generate_project_config(size)
+    apps_config = [generate_app_config(size, app_index) for app_index in range(size.apps)]
+    merged_configs = [deep_merge(project_config, app_config) for app_config in apps_config]
+    deployment_configs = list(config.list_apps_config(config_path).values())
+
+    templates_path = os.path.join(config_path, K8sConfiguration.get_templates_dir())
+    templates = builders.load_templates(templates_path)
+
+    previous_status = generate_deployment_status(size, "1.0.0-sha-a1b2c3d")
+    new_status = generate_deployment_status(size, "1.0.1-sha-e4f5a6b")
+
+    # pylint: disable=protected-access
+    return [
+        BenchmarkCase("list_apps_config", lambda: config.list_apps_config(config_path), size.apps),
+        BenchmarkCase(
+            "_resolve_variables_deep",
+            lambda: [config._resolve_variables_deep(merged) for merged in merged_configs],
+            size.apps,
+        ),
+        BenchmarkCase(
+            "deep_merge",
+            lambda: [deep_merge(project_config, app_config) for app_config in apps_config],
+            size.apps,
+        ),
+        BenchmarkCase("load_templates", lambda: builders.load_templates(templates_path), 1),
+        BenchmarkCase(
+            "build_deployment_yaml",
+            lambda: [
+                builders.build_deployment_yaml(deployment_config, templates, "1.0.1-sha-e4f5a6b")
+                for deployment_config in deployment_configs
+            ],
+            size.apps,
+        ),
+        BenchmarkCase(
+            "compute_diff",
+            lambda: [
+                deployment.get_deployment_statuses_diff(previous_status, new_status)
+                for _ in range(size.apps)
+            ],
+            size.apps,
+        ),
+    ]
+
+
+def _measure_peak_memory(run: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(case: BenchmarkCase, repeat: int) -> BenchmarkResult:
+    """Time a benchmark case and measure its allocation peak."""
+    # Warm up the caches (imports, compiled regular expressions...)
+    case.run()
+    timings = timeit.repeat(case.run, number=1, repeat=repeat)
+    return BenchmarkResult(
+        name=case.name,
+        items=case.items,
+        best_ms=min(timings) * 1000,
+        median_ms=statistics.median(timings) * 1000,
+        peak_kib=_measure_peak_memory(case.run) / 1024,
+    )
+
+
+def compare(
+    result: BenchmarkResult, baseline: Optional[dict], tolerance: float
+) -> Optional[List[str]]:
+    """Returns the regressions of a result against its baseline, `None` without baseline."""
+    if baseline is None:
+        return None
+    regressions = []
+    if result.median_ms > baseline["median_ms"] * (1 + tolerance):
+        regressions.append(f"time x{result.median_ms / baseline['median_ms']:.2f}")
+    if result.peak_kib > baseline["peak_kib"] * (1 + tolerance):
+        regressions.append(f"memory x{result.peak_kib / baseline['peak_kib']:.2f}")
+    return regressions
+
+
+def read_baseline(path: str, size: SyntheticConfigSize) -> Dict[str, dict]:
+    """Read the baseline results, ignored when recorded with another configuration size."""
+    if not os.path.isfile(path):
+        return {}
+    with open(path, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline.get("size") != size._asdict():
+        print(f"Ignoring the baseline {path}: recorded with {baseline.get('size')}")
+        return {}
+    return baseline["results"]
+
+
+def write_baseline(path: str, size: SyntheticConfigSize, results: List[BenchmarkResult]) -> None:
+    """Record the results as the new baseline."""
+    with open(path, "w", encoding="utf-8") as baseline_file:
+        json.dump(
+            {
+                "size": size._asdict(),
+                "results": {
+                    result.name: {"median_ms": result.median_ms, "peak_kib": result.peak_kib}
+                    for result in results
+                },
+            },
+            baseline_file,
+            indent=2,
+            sort_keys=True,
+        )
+        baseline_file.write("\n")
+
+
+def main() -> int:
+    """Run the benchmark suite, returns 1 when a case regressed."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--apps", type=int, default=SyntheticConfigSize().apps)
+    parser.add_argument("--processes", type=int, default=SyntheticConfigSize().processes)
+    parser.add_argument("--cronjobs", type=int, default=SyntheticConfigSize().cronjobs)
+    parser.add_argument("--variables", type=int, default=SyntheticConfigSize().variables)
+    parser.add_argument("--depth", type=int, default=SyntheticConfigSize().depth)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--case", action="append", dest="cases", help="Only run these cases")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="Slowdown ratio tolerated before failing"
+    )
+    args = parser.parse_args()
+
+    size = SyntheticConfigSize(
+        apps=args.apps,
+        processes=args.processes,
+        cronjobs=args.cronjobs,
+        variables=args.variables,
+        depth=args.depth,
+    )
+    baseline = read_baseline(args.baseline, size)
+
+    with tempfile.TemporaryDirectory(prefix="nestor-benchmark-") as config_path:
+        write_config_repository(config_path, size)
+        cases = build_cases(config_path, size)
+        if args.cases:
+            cases = [case for case in cases if case.name in args.cases]
+
+        print(f"Synthetic configuration: {size}")
+        print(f"{'case':<24} {'best':>10} {'median':>10} {'items/s':>12} {'peak':>12}  baseline")
+        results = []
+        has_regressions = False
+        for case in cases:
+            result = run_case(case, args.repeat)
+            results.append(result)
+            regressions = compare(result, baseline.get(case.name), args.tolerance)
+            if regressions is None:
+                verdict = "-"
+            elif regressions:
+                verdict = "REGRESSION " + ", ".join(regressions)
+                has_regressions = True
+            else:
+                verdict = "ok"
+            print(
+                f"{result.name:<24} {result.best_ms:>8.2f}ms {result.median_ms:>8.2f}ms "
+                f"{result.throughput:>12.1f} {result.peak_kib:>9.1f}KiB  {verdict}"
+            )
+
+    if args.save_baseline:
+        write_baseline(args.baseline, size, results)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    return 1 if has_regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
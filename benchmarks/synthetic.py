@@ -0,0 +1,319 @@
+"""Generator of synthetic configuration repositories, shaped like a real nestor config
+and scaled to any number of apps, processes, cronjobs and variables."""
+
+import argparse
+import os
+from typing import List, NamedTuple
+
+import yaml
+
+from nestor_api.config.config import Configuration
+from nestor_api.config.k8s import K8sConfiguration
+
+
+class SyntheticConfigSize(NamedTuple):
+    """The dimensions of a synthetic configuration."""
+
+    apps: int = 80
+    processes: int = 3
+    cronjobs: int = 2
+    variables: int = 40
+    # Number of nested levels of the settings, every level holding references
+    depth: int = 3
+
+
+TEMPLATES = {
+    "deployment": """apiVersion: apps/v1
+kind: Deployment
+metadata:
+  name: {{name}}
+  labels:
+    app: {{app}}
+    process: {{process}}
+    project: {{project}}
+spec:
+  selector:
+    matchLabels:
+      app: {{app}}
+      process: {{process}}
+  template:
+    metadata:
+      labels:
+        app: {{app}}
+        process: {{process}}
+    spec:
+      containers:
+        - name: {{process}}
+          image: {{image}}
+""",
+    "hpa": """apiVersion: autoscaling/v1
+kind: HorizontalPodAutoscaler
+metadata:
+  name: {{name}}
+  labels:
+    app: {{app}}
+    process: {{process}}
+spec:
+  scaleTargetRef:
+    apiVersion: apps/v1
+    kind: Deployment
+    name: {{name}}
+  minReplicas: {{minReplicas}}
+  maxReplicas: {{maxReplicas}}
+  targetCPUUtilizationPercentage: {{targetCPUUtilizationPercentage}}
+""",
+    "anti-affinity-node": """podAntiAffinity:
+  preferredDuringSchedulingIgnoredDuringExecution:
+    - weight: 1
+      podAffinityTerm:
+        labelSelector:
+          matchExpressions:
+            - {key: app, operator: In, values: [{{app}}]}
+            - {key: process, operator: In, values: [{{process}}]}
+        topologyKey: kubernetes.io/hostname
+""",
+    "anti-affinity-zone": """podAntiAffinity:
+  preferredDuringSchedulingIgnoredDuringExecution:
+    - weight: 1
+      podAffinityTerm:
+        labelSelector:
+          matchExpressions:
+            - {key: app, operator: In, values: [{{app}}]}
+            - {key: process, operator: In, values: [{{process}}]}
+        topologyKey: failure-domain.beta.kubernetes.io/zone
+""",
+    "service": """apiVersion: v1
+kind: Service
+metadata:
+  name: {{name}}
+  labels:
+    app: {{app}}
+spec:
+  selector:
+    app: {{app}}
+    process: web
+  ports:
+    - port: 80
+      targetPort: {{target_port}}
+""",
+    "namespace": """apiVersion: v1
+kind: Namespace
+metadata:
+  name: {{name}}
+""",
+    "cronjob": """apiVersion: batch/v1beta1
+kind: CronJob
+metadata:
+  name: {{name}}
+  labels:
+    app: {{app}}
+    process: {{process}}
+    project: {{project}}
+spec:
+  jobTemplate: {}
+""",
+    "job": """apiVersion: batch/v1
+kind: Job
+metadata:
+  name: {{name}}
+spec:
+  template:
+    metadata:
+      labels:
+        app: {{app}}
+        process: {{process}}
+    spec:
+      restartPolicy: Never
+      containers:
+        - name: {{process}}
+          image: {{image}}
+""",
+    "ingress-app": """apiVersion: extensions/v1beta1
+kind: Ingress
+metadata:
+  name: {{name}}
+  namespace: {{namespace}}
+spec:
+  rules:
+    - host: {{app}}{{domain_prefix}}.{{domain}}
+      http:
+        paths:
+          - backend:
+              serviceName: {{app}}
+              servicePort: 80
+""",
+}
+
+
+def _generate_value(name: str, idx: int) -> str:
+    if idx % 3 == 0:
+        return "{{env}}.{{project}}." + name.lower()
+    if idx % 3 == 1:
+        return f"https://{name.lower()}{{{{domain_prefix}}}}.{{{{domain}}}}/"
+    return f"value-{idx}"
+
+
+def generate_variables(size: SyntheticConfigSize, prefix: str) -> dict:
+    """Generate environment variables mixing references and plain values."""
+    return {
+        f"{prefix}_{idx}": _generate_value(f"{prefix}_{idx}", idx) for idx in range(size.variables)
+    }
+
+
+def generate_settings(size: SyntheticConfigSize) -> dict:
+    """Generate nested settings, every level mixing references, lists and plain values."""
+    settings: dict = {}
+    level = settings
+    for depth in range(size.depth):
+        level.update(
+            {
+                f"setting_{depth}_{idx}": _generate_value(f"setting_{depth}_{idx}", idx)
+                for idx in range(5)
+            }
+        )
+        level["hosts"] = ["{{domain}}", "www.{{domain}}"]
+        level["nested"] = {}
+        level = level["nested"]
+    return settings
+
+
+def generate_project_config(size: SyntheticConfigSize) -> dict:
+    """Generate the project configuration, holding the defaults of all apps."""
+    return {
+        "project": "my-organization",
+        "env": "staging",
+        "domain": "integration.my-organization.app",
+        "domain_prefix": "-staging",
+        "namespace": "my-namespace",
+        "cluster_name": "staging-cluster",
+        "docker": {"registry": {"organization": "my-organization"}},
+        "affinity": {
+            "default": {
+                "is_anti_affinity_node_enabled": True,
+                "is_anti_affinity_zone_enabled": True,
+            }
+        },
+        "nodeSelector": {"default": {"pool": "default"}},
+        "scales": {"default": {"minReplicas": 2, "maxReplicas": 10}},
+        "resources": {"default": {"requests": {"cpu": 0.1, "memory": "256Mi"}}},
+        "probes": {},
+        "workflow": ["master", "staging", "production"],
+        "settings": generate_settings(size),
+        "variables": {
+            "ope": generate_variables(size, "OPE"),
+            "app": generate_variables(size, "PROJECT"),
+        },
+    }
+
+
+def generate_app_config(size: SyntheticConfigSize, app_index: int) -> dict:
+    """Generate the configuration of an app, overriding part of the project configuration."""
+    app_name = f"app-{app_index}"
+    processes: List[dict] = [
+        {
+            "name": "web" if idx == 0 else f"worker-{idx}",
+            "start_command": f"npm run p{idx}",
+            "is_cronjob": False,
+        }
+        for idx in range(size.processes)
+    ]
+    cronjobs = [
+        {"name": f"cron-{idx}", "start_command": f"npm run cron-{idx}", "is_cronjob": True}
+        for idx in range(size.cronjobs)
+    ]
+    return {
+        "app": app_name,
+        "git": {"origin": f"git@github.com:my-organization/{app_name}.git"},
+        "processes": processes + cronjobs,
+        "crons": {
+            cronjob["name"]: {"schedule": "*/30 * * * *", "concurrency_policy": "Forbid"}
+            for cronjob in cronjobs
+        },
+        "probes": {"web": {"path": "/heartbeat"}} if size.processes > 0 else {},
+        "variables": {
+            "ope": {"APP_URL": f"https://{app_name}{{{{domain_prefix}}}}.{{{{domain}}}}/"},
+            "app": generate_variables(size, "APP"),
+        },
+    }
+
+
+def generate_sections_config(sections: int) -> dict:
+    """Generate a large configuration mixing resolvable references, unknown references
+    and plain values, shaped like a project merged with many deployments."""
+    synthetic_config: dict = {
+        "env": "staging",
+        "domain": "integration.my-organization.app",
+        "domain_prefix": "-staging",
+        "project": "my-organization",
+    }
+    for idx in range(sections):
+        synthetic_config[f"section-{idx}"] = {
+            "variables": {
+                "ope": {
+                    "LOGGER_NAME": "{{env}}.{{project}}",
+                    "API_URL": f"http://app-{idx}{{{{domain_prefix}}}}.{{{{domain}}}}/",
+                    "UNKNOWN": "{{not_defined}}",
+                    "PORT": "8080",
+                },
+                "app": {f"VARIABLE_{var}": f"value-{var}" for var in range(20)},
+            },
+            "resources": {"requests": {"memory": "256Mi", "cpu": 0.1}},
+            "processes": [
+                {"name": "web", "start_command": "npm start", "is_cronjob": False},
+                {"name": "worker", "start_command": "npm run worker", "is_cronjob": False},
+            ],
+        }
+    return synthetic_config
+
+
+def parse_sections_args(description: str) -> argparse.Namespace:
+    """Parse the arguments of the micro-benchmarks run on `generate_sections_config`."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--sections", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    return parser.parse_args()
+
+
+def write_config_repository(config_path: str, size: SyntheticConfigSize) -> None:
+    """Write a synthetic configuration repository: project, apps and k8s templates."""
+    apps_path = os.path.join(config_path, Configuration.get_config_app_folder())
+    templates_path = os.path.join(config_path, K8sConfiguration.get_templates_dir())
+    os.makedirs(apps_path, exist_ok=True)
+    os.makedirs(templates_path, exist_ok=True)
+
+    project_path = os.path.join(config_path, Configuration.get_config_project_filename())
+    with open(project_path, "w", encoding="utf-8") as project_file:
+        yaml.safe_dump(generate_project_config(size), project_file)
+
+    for app_index in range(size.apps):
+        app_path = os.path.join(apps_path, f"app-{app_index}.yaml")
+        with open(app_path, "w", encoding="utf-8") as app_file:
+            yaml.safe_dump(generate_app_config(size, app_index), app_file)
+
+    for template_name, template in TEMPLATES.items():
+        template_path = os.path.join(templates_path, f"{template_name}.yaml")
+        with open(template_path, "w", encoding="utf-8") as template_file:
+            template_file.write(template)
+
+
+def generate_deployment_status(size: SyntheticConfigSize, tag: str) -> dict:
+    """Generate the status of a deployed app, as returned by `get_deployment_status`."""
+    image = f"my-organization/app:{tag}"
+    return {
+        "processes": [
+            {"name": f"process-{idx}", "image": image, "command": f"npm run p{idx}"}
+            for idx in range(size.processes)
+        ],
+        "cronjobs": [
+            {
+                "name": f"cron-{idx}",
+                "image": image,
+                "command": f"npm run cron-{idx}",
+                "schedule": "*/30 * * * *",
+            }
+            for idx in range(size.cronjobs)
+        ],
+        "env": [
+            {"name": f"VARIABLE_{idx}", "value": f"{tag}-{idx}"} for idx in range(size.variables)
+        ],
+    }
@@ -2,6 +2,23 @@
 
 from abc import ABC, abstractmethod
 from enum import Enum
+from typing import Dict, List, NamedTuple, Optional
+
+
+class BranchRef(NamedTuple):
+    """A branch of a repository."""
+
+    organization: str
+    repository_name: str
+    branch_name: str
+
+
+class BranchState(NamedTuple):
+    """The state of a branch: whether it exists, its head sha and whether it is protected."""
+
+    exists: bool
+    sha: Optional[str]
+    protected: bool
 
 
 class AbstractGitProvider(ABC):
@@ -22,6 +39,11 @@ class AbstractGitProvider(ABC):
         """Create a branch."""
         raise NotImplementedError()
 
+    @abstractmethod
+    def update_branch(self, organization: str, repository_name: str, branch_name: str, ref: str):
+        """Move a branch to a commit, refused unless it is a fast-forward."""
+        raise NotImplementedError()
+
     @abstractmethod
     def protect_branch(
         self, organization: str, repository_name: str, branch_name: str, user_login: str
@@ -29,6 +51,38 @@ class AbstractGitProvider(ABC):
         """Protect a branch."""
         raise NotImplementedError()
 
+    def get_branches(self, branches: List[BranchRef]) -> Dict[BranchRef, BranchState]:
+        """Get the state of several branches, possibly from several repositories.
+        Providers should override it to fetch all of them at once."""
+        states = {}
+        for branch_ref in branches:
+            try:
+                branch = self.get_branch(*branch_ref)
+            except GitResourceNotFoundError as err:
+                if err.resource != GitResource.BRANCH:
+                    raise
+                states[branch_ref] = BranchState(exists=False, sha=None, protected=False)
+            else:
+                states[branch_ref] = BranchState(
+                    exists=True, sha=branch.commit.sha, protected=branch.protected
+                )
+        return states
+
+    def create_branches(self, branches: Dict[BranchRef, str]) -> None:
+        """Create several branches, each one from its own ref.
+        Providers should override it to create all of them at once."""
+        for branch_ref, ref in branches.items():
+            self.create_branch(*branch_ref, ref)
+
+    def protect_branches(self, branches: List[BranchRef], user_login: Optional[str]) -> None:
+        """Protect several branches, limiting the push rights to `user_login`
+        (GitResourceNotFoundError without user).
+        Providers should override it to protect all of them at once."""
+        if user_login is None:
+            raise GitResourceNotFoundError(GitResource.USER)
+        for branch_ref in branches:
+            self.protect_branch(*branch_ref, user_login)
+
 
 class GitResource(Enum):
     """Enum for Git resource."""
@@ -1,39 +1,119 @@
 """Git provider adapter for Github."""
 
 from http import HTTPStatus
-from typing import Union
+import json
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, TypeVar, Union
 
 from github import AuthenticatedUser, Branch, Github, GithubException, NamedUser, Repository
 
 from nestor_api.adapters.git.abstract_git_provider import (
     AbstractGitProvider,
+    BranchRef,
+    BranchState,
     GitProviderError,
     GitResource,
     GitResourceNotFoundError,
 )
+from nestor_api.adapters.git.github_rate_limiter import GitHubRateLimiter
 from nestor_api.config.git import GitConfiguration
+import nestor_api.lib.monitoring as monitoring
+
+CachedValue = TypeVar("CachedValue")
+Result = TypeVar("Result")
+
+
+class _CacheEntry(NamedTuple):
+    value: object
+    expires_at: float
 
 
 class GitHubGitProvider(AbstractGitProvider):
-    """Git provider adapter for Github."""
+    """Git provider adapter for Github.
+
+    Repositories and branches are kept in a cache for `NESTOR_GIT_PROVIDER_CACHE_TTL`
+    seconds. Once expired, an entry is revalidated with a conditional request, which
+    does not count against the rate limit when the resource has not changed.
+
+    All the requests go through a `GitHubRateLimiter`, throttling them ahead of
+    the rate limit and retrying them when rejected by it.
+
+    The provider can be shared by threads: the PyGithub client keeps a single
+    connection, also used by the repositories and branches it returns, so the
+    requests are sent one at a time."""
 
     def __init__(self):
         self.__client = Github(GitConfiguration.get_git_provider_token())
+        self._rate_limiter = GitHubRateLimiter(self.__client)
+        self._client_lock = threading.Lock()
+        self._cache: Dict[Tuple[str, ...], _CacheEntry] = {}
+        self._cache_lock = threading.Lock()
+        self._cache_ttl = GitConfiguration.get_git_provider_cache_ttl()
+        # GraphQL node ids, which never change
+        self._node_ids: Dict[Tuple[str, ...], str] = {}
+
+    def _get_cached(
+        self,
+        key: Tuple[str, ...],
+        fetch: Callable[[], CachedValue],
+        revalidate: Callable[[CachedValue], CachedValue],
+    ) -> CachedValue:
+        """Get a value from the cache, fetching it when missing
+        and revalidating it when expired."""
+        with self._cache_lock:
+            entry = self._cache.get(key)
+
+        if entry is None:
+            monitoring.record_cache_lookup("github", "miss")
+            value = fetch()
+        elif time.monotonic() < entry.expires_at:
+            monitoring.record_cache_lookup("github", "hit")
+            return entry.value  # type: ignore
+        else:
+            monitoring.record_cache_lookup("github", "revalidated")
+            value = revalidate(entry.value)  # type: ignore
+
+        with self._cache_lock:
+            self._cache[key] = _CacheEntry(value, time.monotonic() + self._cache_ttl)
+        return value
+
+    def _call(self, operation: Callable[[], Result]) -> Result:
+        """Run an operation sending requests to GitHub through the rate limiter,
+        holding the client for the time of each attempt."""
+
+        def locked_operation() -> Result:
+            with self._client_lock:
+                return operation()
+
+        return self._rate_limiter.call(locked_operation)
+
+    def _invalidate(self, key: Tuple[str, ...]) -> None:
+        with self._cache_lock:
+            self._cache.pop(key, None)
 
     def get_user_info(
         self,
     ) -> Union[NamedUser.NamedUser, AuthenticatedUser.AuthenticatedUser, None]:
         """Get logged in user information."""
         try:
-            return self.__client.get_user()
+            return self._call(self.__client.get_user)
         except GithubException as err:
             raise _format_error(err)
 
     def _get_repository(self, organization: str, repository_name: str) -> Repository.Repository:
         """Get repository information."""
+        key = ("repository", organization, repository_name)
         try:
-            return self.__client.get_repo(f"{organization}/{repository_name}")
+            return self._get_cached(
+                key,
+                lambda: self._call(
+                    lambda: self.__client.get_repo(f"{organization}/{repository_name}")
+                ),
+                lambda repository: self._call(lambda: _revalidate_repository(repository)),
+            )
         except GithubException as err:
+            self._invalidate(key)
             if err.status == HTTPStatus.NOT_FOUND:
                 raise GitResourceNotFoundError(GitResource.REPOSITORY)
             raise _format_error(err)
@@ -43,9 +123,17 @@ class GitHubGitProvider(AbstractGitProvider):
     ) -> Branch.Branch:
         """Get branch information."""
         repository = self._get_repository(organization, repository_name)
+        key = ("branch", organization, repository_name, branch_name)
         try:
-            return repository.get_branch(branch=branch_name)
+            return self._get_cached(
+                key,
+                lambda: self._call(lambda: repository.get_branch(branch=branch_name)),
+                lambda branch: self._call(
+                    lambda: _revalidate_branch(repository, branch_name, branch)
+                ),
+            )
         except GithubException as err:
+            self._invalidate(key)
             if err.status == HTTPStatus.NOT_FOUND:
                 raise GitResourceNotFoundError(GitResource.BRANCH)
             raise _format_error(err)
@@ -56,20 +144,259 @@ class GitHubGitProvider(AbstractGitProvider):
         """Create a branch."""
         repository = self._get_repository(organization, repository_name)
         try:
-            repository.create_git_ref(f"refs/heads/{branch_name}", ref)
+            self._call(lambda: repository.create_git_ref(f"refs/heads/{branch_name}", ref))
+            self._invalidate(("branch", organization, repository_name, branch_name))
             return self.get_branch(organization, repository_name, branch_name)
         except GithubException as err:
             raise _format_error(err)
 
+    def update_branch(
+        self, organization: str, repository_name: str, branch_name: str, ref: str
+    ) -> None:
+        """Move a branch to a commit with a single ref update,
+        refused by GitHub unless it is a fast-forward."""
+        repository = self._get_repository(organization, repository_name)
+        # pylint: disable=protected-access
+        requester = repository._requester  # type: ignore
+        try:
+            self._call(
+                lambda: requester.requestJsonAndCheck(
+                    "PATCH",
+                    f"{repository.url}/git/refs/heads/{branch_name}",
+                    input={"sha": ref, "force": False},
+                )
+            )
+        except GithubException as err:
+            if err.status == HTTPStatus.NOT_FOUND:
+                raise GitResourceNotFoundError(GitResource.BRANCH)
+            raise _format_error(err)
+        finally:
+            self._invalidate(("branch", organization, repository_name, branch_name))
+
     def protect_branch(
         self, organization: str, repository_name: str, branch_name: str, user_login: str
     ) -> None:
         """Protect a branch."""
         try:
             branch = self.get_branch(organization, repository_name, branch_name)
-            branch.edit_protection(enforce_admins=False, user_push_restrictions=[user_login])
+            self._call(
+                lambda: branch.edit_protection(
+                    enforce_admins=False, user_push_restrictions=[user_login]
+                )
+            )
         except GithubException as err:
             raise _format_error(err)
+        finally:
+            self._invalidate(("branch", organization, repository_name, branch_name))
+
+    def get_branches(self, branches: List[BranchRef]) -> Dict[BranchRef, BranchState]:
+        """Get the state of several branches with a single GraphQL query."""
+        if not branches:
+            return {}
+        repositories = _group_by_repository(branches)
+        data = self._graphql(*_build_branches_query(repositories))
+
+        states = {}
+        for repository_index, ((organization, repository_name), refs) in enumerate(
+            repositories.items()
+        ):
+            repository = data[f"r{repository_index}"]
+            if repository is None:
+                raise GitResourceNotFoundError(GitResource.REPOSITORY)
+            self._node_ids[("repository", organization, repository_name)] = repository["id"]
+            for ref_index, branch_ref in enumerate(refs):
+                ref = repository[f"b{ref_index}"]
+                if ref is None:
+                    states[branch_ref] = BranchState(exists=False, sha=None, protected=False)
+                else:
+                    states[branch_ref] = BranchState(
+                        exists=True,
+                        sha=ref["target"]["oid"],
+                        protected=ref["branchProtectionRule"] is not None,
+                    )
+        return states
+
+    def create_branches(self, branches: Dict[BranchRef, str]) -> None:
+        """Create several branches with a single GraphQL mutation."""
+        if not branches:
+            return
+        self._load_node_ids({(ref.organization, ref.repository_name) for ref in branches})
+
+        variables = {}
+        mutations = []
+        for index, (branch_ref, ref) in enumerate(branches.items()):
+            variables[f"input{index}"] = {
+                "repositoryId": self._node_ids[
+                    ("repository", branch_ref.organization, branch_ref.repository_name)
+                ],
+                "name": f"refs/heads/{branch_ref.branch_name}",
+                "oid": ref,
+            }
+            mutations.append(f"c{index}: createRef(input: $input{index}) {{ clientMutationId }}")
+
+        declarations = ", ".join(f"${variable}: CreateRefInput!" for variable in variables)
+        try:
+            self._graphql(f"mutation({declarations}) {{ {' '.join(mutations)} }}", variables)
+        finally:
+            for branch_ref in branches:
+                self._invalidate(("branch", *branch_ref))
+
+    def protect_branches(self, branches: List[BranchRef], user_login: Optional[str]) -> None:
+        """Protect several branches with a single GraphQL mutation,
+        limiting the push rights to `user_login`."""
+        if not branches:
+            return
+        if user_login is None:
+            raise GitResourceNotFoundError(GitResource.USER)
+        self._load_node_ids(
+            {(ref.organization, ref.repository_name) for ref in branches}, user_login
+        )
+
+        variables = {}
+        mutations = []
+        for index, branch_ref in enumerate(branches):
+            variables[f"input{index}"] = {
+                "repositoryId": self._node_ids[
+                    ("repository", branch_ref.organization, branch_ref.repository_name)
+                ],
+                "pattern": branch_ref.branch_name,
+                "isAdminEnforced": False,
+                "restrictsPushes": True,
+                "pushActorIds": [self._node_ids[("user", user_login)]],
+            }
+            mutations.append(
+                f"p{index}: createBranchProtectionRule(input: $input{index}) "
+                "{ clientMutationId }"
+            )
+
+        declarations = ", ".join(
+            f"${variable}: CreateBranchProtectionRuleInput!" for variable in variables
+        )
+        try:
+            self._graphql(f"mutation({declarations}) {{ {' '.join(mutations)} }}", variables)
+        finally:
+            for branch_ref in branches:
+                self._invalidate(("branch", *branch_ref))
+
+    def _load_node_ids(
+        self, repositories: Set[Tuple[str, str]], user_login: Optional[str] = None
+    ) -> None:
+        """Fetch the GraphQL node ids of repositories and of a user, unless already known."""
+        variables = {}
+        fields = []
+        missing_repositories = sorted(
+            (organization, repository_name)
+            for organization, repository_name in repositories
+            if ("repository", organization, repository_name) not in self._node_ids
+        )
+        for index, (organization, repository_name) in enumerate(missing_repositories):
+            variables[f"owner{index}"] = organization
+            variables[f"name{index}"] = repository_name
+            fields.append(
+                f"r{index}: repository(owner: $owner{index}, name: $name{index}) {{ id }}"
+            )
+        if user_login is not None and ("user", user_login) not in self._node_ids:
+            variables["login"] = user_login
+            fields.append("user(login: $login) { id }")
+        if not fields:
+            return
+
+        declarations = ", ".join(f"${variable}: String!" for variable in variables)
+        data = self._graphql(f"query({declarations}) {{ {' '.join(fields)} }}", variables)
+
+        for index, (organization, repository_name) in enumerate(missing_repositories):
+            if data[f"r{index}"] is None:
+                raise GitResourceNotFoundError(GitResource.REPOSITORY)
+            self._node_ids[("repository", organization, repository_name)] = data[f"r{index}"]["id"]
+        if "login" in variables:
+            if data["user"] is None:
+                raise GitResourceNotFoundError(GitResource.USER)
+            self._node_ids[("user", variables["login"])] = data["user"]["id"]
+
+    def _graphql(self, query: str, variables: dict) -> dict:
+        """Run a GraphQL query or mutation, raising on the errors it reports."""
+        # pylint: disable=protected-access
+        requester = self.__client._Github__requester  # type: ignore
+        try:
+            _, response = self._call(
+                lambda: requester.requestJsonAndCheck(
+                    "POST", "/graphql", input={"query": query, "variables": variables}
+                )
+            )
+        except GithubException as err:
+            raise _format_error(err)
+
+        # Resources not found are returned as null: the callers handle them
+        errors = [
+            error for error in response.get("errors") or [] if error.get("type") != "NOT_FOUND"
+        ]
+        if errors:
+            messages = "; ".join(error.get("message", "") for error in errors)
+            raise GitProviderError(f"GitHub GraphQL operation failed because: {messages}")
+        return response["data"]
+
+
+def _build_branches_query(
+    repositories: Dict[Tuple[str, str], List[BranchRef]],
+) -> Tuple[str, Dict[str, str]]:
+    """Build a query fetching the head sha and the protection rule
+    of several branches, aliased by repository and branch index."""
+    variables: Dict[str, str] = {}
+    repository_fields = []
+    for repository_index, ((organization, repository_name), refs) in enumerate(
+        repositories.items()
+    ):
+        variables[f"owner{repository_index}"] = organization
+        variables[f"name{repository_index}"] = repository_name
+        ref_fields = []
+        for ref_index, branch_ref in enumerate(refs):
+            variable = f"ref{repository_index}_{ref_index}"
+            variables[variable] = f"refs/heads/{branch_ref.branch_name}"
+            ref_fields.append(
+                f"b{ref_index}: ref(qualifiedName: ${variable}) "
+                "{ target { oid } branchProtectionRule { id } }"
+            )
+        repository_fields.append(
+            f"r{repository_index}: repository(owner: $owner{repository_index}, "
+            f"name: $name{repository_index}) {{ id {' '.join(ref_fields)} }}"
+        )
+
+    declarations = ", ".join(f"${variable}: String!" for variable in variables)
+    return f"query({declarations}) {{ {' '.join(repository_fields)} }}", variables
+
+
+def _group_by_repository(branches: Iterable[BranchRef]) -> Dict[Tuple[str, str], List[BranchRef]]:
+    repositories: Dict[Tuple[str, str], List[BranchRef]] = {}
+    for branch_ref in branches:
+        repository_key = (branch_ref.organization, branch_ref.repository_name)
+        repositories.setdefault(repository_key, []).append(branch_ref)
+    return repositories
+
+
+def _revalidate_repository(repository: Repository.Repository) -> Repository.Repository:
+    """Refresh a repository with a conditional request."""
+    repository.update()
+    return repository
+
+
+def _revalidate_branch(
+    repository: Repository.Repository, branch_name: str, branch: Branch.Branch
+) -> Branch.Branch:
+    """Refresh a branch with a conditional request. The branch is
+    returned as is when GitHub reports that it has not been modified."""
+    # pylint: disable=protected-access
+    requester = repository._requester  # type: ignore
+    status, headers, output = requester.requestJson(
+        "GET",
+        f"{repository.url}/branches/{branch_name}",
+        headers={"If-None-Match": branch.etag} if branch.etag else None,
+    )
+    if status == HTTPStatus.NOT_MODIFIED:
+        return branch
+    data = json.loads(output) if output else None
+    if status >= HTTPStatus.BAD_REQUEST:
+        raise GithubException(status, data)
+    return Branch.Branch(requester, headers, data, completed=True)
 
 
 def _format_error(error: GithubException):
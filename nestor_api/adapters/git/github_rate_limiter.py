@@ -0,0 +1,141 @@
+"""Rate limit awareness for the GitHub API client."""
+
+from http import HTTPStatus
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, TypeVar
+
+from github import Github, GithubException
+
+from nestor_api.config.git import GitConfiguration
+from nestor_api.utils.logger import Logger
+from nestor_api.utils.metrics import Counter, Gauge
+
+Result = TypeVar("Result")
+
+# Never wait more than this between two requests, whatever the headers say
+MAX_DELAY = 15 * 60
+
+RATE_LIMIT_REMAINING = Gauge(
+    "nestor_github_rate_limit_remaining", "Requests remaining in the GitHub rate limit window"
+)
+RATE_LIMIT_LIMIT = Gauge(
+    "nestor_github_rate_limit_limit", "Requests allowed in the GitHub rate limit window"
+)
+RATE_LIMIT_RESET = Gauge(
+    "nestor_github_rate_limit_reset_timestamp_seconds",
+    "Time at which the GitHub rate limit window resets",
+)
+THROTTLED_SECONDS = Counter(
+    "nestor_github_throttled_seconds_total", "Time spent waiting before sending requests to GitHub"
+)
+RATE_LIMITED_RETRIES = Counter(
+    "nestor_github_rate_limited_retries_total",
+    "Requests retried after being rejected by the GitHub rate limit",
+)
+
+
+class GitHubRateLimiter:
+    """Track the rate limit budget of a GitHub client from the headers of its
+    responses, and throttle its requests ahead of the limit.
+
+    Once the remaining budget goes below `NESTOR_GIT_PROVIDER_RATE_LIMIT_RESERVE`,
+    requests are spread over the rest of the window, then held until the window
+    resets when half of the reserve is consumed. Requests rejected by the primary
+    or the secondary rate limit are retried, honoring `Retry-After`, with a
+    jittered exponential backoff."""
+
+    def __init__(self, client: Github):
+        self._lock = threading.Lock()
+        self._remaining: Optional[int] = None
+        self._reset_at: Optional[float] = None
+        self._retry_at: Optional[float] = None
+        self._reserve = GitConfiguration.get_git_provider_rate_limit_reserve()
+        self._max_retries = GitConfiguration.get_git_provider_max_retries()
+        self._backoff = GitConfiguration.get_git_provider_backoff()
+        # The exceptions raised by PyGithub do not carry the response headers,
+        # they are read from the hook it calls on every response instead.
+        # pylint: disable=protected-access
+        client._Github__requester.DEBUG_ON_RESPONSE = self.on_response  # type: ignore
+
+    def on_response(self, status: int, headers: Dict[str, str], _output: str) -> None:
+        """Update the budget from the (lowercased) headers of a response."""
+        with self._lock:
+            if "x-ratelimit-remaining" in headers:
+                self._remaining = int(headers["x-ratelimit-remaining"])
+                RATE_LIMIT_REMAINING.set(self._remaining)
+            if "x-ratelimit-limit" in headers:
+                RATE_LIMIT_LIMIT.set(int(headers["x-ratelimit-limit"]))
+            if "x-ratelimit-reset" in headers:
+                self._reset_at = float(headers["x-ratelimit-reset"])
+                RATE_LIMIT_RESET.set(self._reset_at)
+            if "retry-after" in headers and status in (
+                HTTPStatus.FORBIDDEN,
+                HTTPStatus.TOO_MANY_REQUESTS,
+            ):
+                self._retry_at = time.time() + float(headers["retry-after"])
+
+    def get_delay(self) -> float:
+        """Returns the time (in seconds) to wait before sending the next request."""
+        now = time.time()
+        with self._lock:
+            delay = 0.0
+            if self._retry_at is not None:
+                delay = max(delay, self._retry_at - now)
+            if (
+                self._remaining is not None
+                and self._reset_at is not None
+                and self._remaining <= self._reserve
+            ):
+                # Spread the requests left over the rest of the window,
+                # and keep the reserve for after the reset
+                spare = self._remaining - self._reserve // 2
+                window = self._reset_at - now
+                delay = max(delay, window / spare if spare > 0 else window)
+        return min(max(delay, 0.0), MAX_DELAY)
+
+    def wait(self) -> None:
+        """Sleep until the next request can be sent."""
+        delay = self.get_delay()
+        if delay > 0:
+            # Jitter, so that waiting threads do not all wake up at once
+            delay += random.uniform(0, min(delay, 1))
+            Logger.debug({"delay": delay}, "Throttling GitHub requests")
+            THROTTLED_SECONDS.inc(delay)
+            time.sleep(delay)
+
+    def call(self, operation: Callable[[], Result]) -> Result:
+        """Run an operation sending requests to GitHub, throttling it
+        and retrying it when rejected by the rate limit."""
+        attempt = 0
+        while True:
+            self.wait()
+            try:
+                return operation()
+            except GithubException as err:
+                if attempt >= self._max_retries or not self._is_rate_limited(err):
+                    raise
+                # Full jitter: the rate limit headers (and Retry-After)
+                # are enforced by the next wait()
+                delay = random.uniform(0, min(MAX_DELAY, self._backoff * 2**attempt))
+                Logger.warn(
+                    {"status": err.status, "attempt": attempt + 1, "delay": delay},
+                    "GitHub request rate limited, retrying",
+                )
+                RATE_LIMITED_RETRIES.inc()
+                time.sleep(delay)
+                attempt += 1
+
+    def _is_rate_limited(self, error: GithubException) -> bool:
+        if error.status == HTTPStatus.TOO_MANY_REQUESTS:
+            return True
+        if error.status != HTTPStatus.FORBIDDEN:
+            return False
+        with self._lock:
+            if self._retry_at is not None and self._retry_at > time.time():
+                return True
+            if self._remaining == 0:
+                return True
+        message = str(error.data).lower()
+        return "rate limit" in message or "abuse" in message
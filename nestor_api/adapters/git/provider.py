@@ -1,5 +1,7 @@
 """Selector for git provider."""
 
+from functools import lru_cache
+
 from nestor_api.adapters.git.abstract_git_provider import AbstractGitProvider
 from nestor_api.adapters.git.github_git_provider import GitHubGitProvider
 
@@ -11,5 +13,12 @@ def get_git_provider(project_config: dict) -> AbstractGitProvider:
         raise ValueError("Git provider is not set in your project configuration file")
 
     if provider == "github":
-        return GitHubGitProvider()
+        return _get_github_git_provider()
     raise NotImplementedError("Adapter for this git provider is not implemented")
+
+
+@lru_cache(maxsize=None)
+def _get_github_git_provider() -> GitHubGitProvider:
+    """The GitHub provider is shared, so that its cache lives across requests:
+    it sends the requests of the threads using it one at a time."""
+    return GitHubGitProvider()
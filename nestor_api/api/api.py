@@ -1,7 +1,8 @@
 """Register all routes under the /api prefixes. The route /heartbeat is not included."""
+
 from flask import Blueprint
 
-from .api_routes import builds, workflow
+from .api_routes import builds, deployments, manifests, profiles, workflow
 
 
 def create_api() -> Blueprint:
@@ -9,6 +10,9 @@ def create_api() -> Blueprint:
     api = Blueprint("api", __name__, url_prefix="/api")
 
     builds.register_routes(api=api)
+    deployments.register_routes(api=api)
+    manifests.register_routes(api=api)
+    profiles.register_routes(api=api)
     workflow.register_routes(api=api)
 
     return api
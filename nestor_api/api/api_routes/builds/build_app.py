@@ -9,13 +9,18 @@ import nestor_api.lib.config as config
 import nestor_api.lib.docker as docker
 import nestor_api.lib.git as git
 import nestor_api.lib.io as io
+import nestor_api.lib.monitoring as monitoring
+from nestor_api.utils import profiling, tracing
 from nestor_api.utils.logger import Logger
 
 
 # pylint: disable=broad-except
+@monitoring.tracked_job("build")
+@tracing.traced("build", start_trace=True, app="app_name")
 def _differed_build(app_name: str):
     config_dir = None
     app_dir = None
+    phases = monitoring.PhaseTimer("build")
 
     try:
         # Retrieve app's configuration
@@ -26,6 +31,7 @@ def _differed_build(app_name: str):
             {"app": app_name, "config_directory": config_dir},
             "[/api/builds/:app] Application's configuration retrieved",
         )
+        phases.phase_done("config")
 
         # Retrieve app's repository
         app_dir = git.create_working_repository(app_name, app_config["git"]["origin"])
@@ -34,7 +40,9 @@ def _differed_build(app_name: str):
             {"app": app_name, "working_directory": app_dir},
             "[/api/builds/:app] Application's repository retrieved",
         )
+        phases.phase_done("checkout")
 
+        git_tag = None
         try:
             # Create a new tag
             version = app.get_version(app_dir)
@@ -48,20 +56,26 @@ def _differed_build(app_name: str):
                 {"app": app_name, "err": err}, "[/api/builds/:app] Error while tagging the app"
             )
 
+        phases.phase_done("tag")
+
         # Build and publish the new docker image
         image_tag = docker.build(app_name, app_dir, app_config)
         Logger.debug(
             {"app": app_name, "image": image_tag}, "[/api/builds/:app] Docker image created"
         )
+        phases.phase_done("docker_build")
         docker.push(app_name, image_tag, app_config)
         Logger.debug(
             {"app": app_name, "image": image_tag},
             "[/api/builds/:app] Docker image published on registry",
         )
+        phases.phase_done("docker_push")
 
-        # Send the new tag to git
-        git.push(app_dir)
-        Logger.debug({"app": app_name}, "[/api/builds/:app] Tag pushed to Git")
+        # Send the new tag to git, if it has been created by this build
+        if git_tag is not None:
+            git.push(app_dir, [f"refs/tags/{git_tag}"])
+            Logger.debug({"app": app_name, "tag": git_tag}, "[/api/builds/:app] Tag pushed to Git")
+            phases.phase_done("git_push")
 
     except Exception as err:
         Logger.error(
@@ -84,6 +98,7 @@ def build_app(app_name: str):
     a unique tag and uploads it to the configured Docker registry."""
     Logger.info({"app": app_name}, "[/api/builds/:app] Building an application image")
 
-    Thread(target=_differed_build, args=[app_name]).start()
+    build_job = profiling.background_job(_differed_build, f"build {app_name}")
+    Thread(target=build_job, args=[app_name]).start()
 
     return "Build processing", HTTPStatus.ACCEPTED
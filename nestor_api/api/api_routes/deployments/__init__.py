@@ -0,0 +1,3 @@
+"""Nestor-api deployments module"""
+
+from .register_routes import register_routes
@@ -0,0 +1,43 @@
+"""Define the deployments routes."""
+
+from http import HTTPStatus
+
+from flask import request
+
+import nestor_api.lib.config as config_lib
+import nestor_api.lib.k8s.deploy_queue as deploy_queue
+from nestor_api.utils.logger import Logger
+
+
+def deploy_app(app_name: str, environment: str):
+    """Queue the deployment of an application on the clusters of an environment.
+    The tag to deploy is given in the `tag` field of the JSON body. The returned job id
+    gives access to the status of the deployment."""
+    if not config_lib.is_valid_environment_name(environment):
+        return (
+            {"app": app_name, "environment": environment, "message": "Invalid environment name"},
+            HTTPStatus.BAD_REQUEST,
+        )
+
+    body = request.get_json(silent=True) or {}
+    tag = body.get("tag")
+    if not isinstance(tag, str) or not tag:
+        return (
+            {"app": app_name, "environment": environment, "message": "'tag' must be a tag name"},
+            HTTPStatus.BAD_REQUEST,
+        )
+
+    job = deploy_queue.submit(app_name, environment, tag)
+    Logger.info(
+        {"app": app_name, "environment": environment, "tag": tag, "job": job["id"]},
+        "[/api/deployments/:app/:env] Deployment queued",
+    )
+    return {"job": job, "message": "Deployment queued"}, HTTPStatus.ACCEPTED
+
+
+def get_deployment_job(job_id: str):
+    """Retrieve the status of a deployment job, and of its deployment on each cluster."""
+    job = deploy_queue.get_job(job_id)
+    if job is None:
+        return {"message": "Deployment job not found"}, HTTPStatus.NOT_FOUND
+    return {"job": job}, HTTPStatus.OK
@@ -0,0 +1,17 @@
+"""Define the deployments controllers."""
+
+from flask import Blueprint
+
+from nestor_api.api.api_routes.deployments.deploy_app import deploy_app, get_deployment_job
+
+
+def register_routes(api: Blueprint) -> None:
+    """Register the `/deployments` routes."""
+
+    @api.route("/deployments/<app_name>/<environment>", methods=["POST"])
+    def _deploy_app(app_name: str, environment: str):
+        return deploy_app(app_name, environment)
+
+    @api.route("/deployments/jobs/<job_id>", methods=["GET"])
+    def _get_deployment_job(job_id: str):
+        return get_deployment_job(job_id)
@@ -0,0 +1,13 @@
+"""Define the manifests controllers."""
+
+from flask import Blueprint
+
+from nestor_api.api.api_routes.manifests.render_all import render_all
+
+
+def register_routes(api: Blueprint) -> None:
+    """Register the `/manifests` routes."""
+
+    @api.route("/manifests", methods=["GET"])
+    def _render_all():
+        return render_all()
@@ -0,0 +1,111 @@
+"""Define the manifests export route."""
+
+from http import HTTPStatus
+from io import BytesIO
+import json
+import tarfile
+import time
+from typing import Iterable, Iterator, List
+
+from flask import Response, request
+
+from nestor_api.config.config import Configuration
+import nestor_api.lib.config as config_lib
+import nestor_api.lib.k8s.manifests as manifests
+from nestor_api.utils.error_handling import non_blocking_clean
+from nestor_api.utils.logger import Logger
+
+OUTPUT_FORMATS = {"ndjson": "application/x-ndjson", "tar": "application/x-tar"}
+
+
+def _to_ndjson(results: Iterable[dict]) -> Iterator[str]:
+    for result in results:
+        yield json.dumps(result) + "\n"
+
+
+class _ChunksWriter:
+    """Write-only file object collecting what is written, to stream it by chunks."""
+
+    def __init__(self) -> None:
+        self.chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        """Collect a chunk."""
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self) -> bytes:
+        """Returns the chunks collected since the last call."""
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _to_tar(results: Iterable[dict]) -> Iterator[bytes]:
+    """Archive the manifests as <cluster>/<app>/{ingress,deployment}.yaml,
+    or <cluster>/<app>/error.txt when the rendering failed."""
+    writer = _ChunksWriter()
+    now = time.time()
+    with tarfile.open(fileobj=writer, mode="w|") as archive:  # type: ignore
+        for result in results:
+            if "err" in result:
+                files = {"error.txt": result["err"]}
+            else:
+                files = {"ingress.yaml": result["ingress"], "deployment.yaml": result["deployment"]}
+            for file_name, content in files.items():
+                if content is None:
+                    continue
+                data = content.encode("utf-8")
+                file_info = tarfile.TarInfo(f"{result['cluster']}/{result['app']}/{file_name}")
+                file_info.size = len(data)
+                file_info.mtime = int(now)
+                archive.addfile(file_info, BytesIO(data))
+            yield writer.pop()
+    yield writer.pop()
+
+
+def render_all():
+    """Render the manifests of every app on every cluster, from the configuration of the
+    `environment` query parameter (the default branch by default) with the image `tag`
+    ("latest" by default). They are streamed as they are rendered, in the NDJSON format
+    or as a tarball with `?format=tar`."""
+    tag = request.args.get("tag", "latest")
+    environment = request.args.get("environment", Configuration.get_config_default_branch())
+    output_format = request.args.get("format", "ndjson")
+    if output_format not in OUTPUT_FORMATS:
+        return (
+            {"message": f"'format' must be one of: {', '.join(OUTPUT_FORMATS)}"},
+            HTTPStatus.BAD_REQUEST,
+        )
+    if not config_lib.is_valid_environment_name(environment):
+        return {"message": "Invalid environment name"}, HTTPStatus.BAD_REQUEST
+
+    Logger.info(
+        {"environment": environment, "tag": tag}, "[/api/manifests] Rendering all the manifests"
+    )
+    config_dir = config_lib.create_temporary_config_copy()
+    try:
+        config_lib.change_environment(environment, config_dir)
+    # pylint: disable=broad-except
+    except Exception as err:
+        non_blocking_clean(config_dir, message_prefix="[/api/manifests]")
+        Logger.error(
+            {"environment": environment, "err": str(err)},
+            "[/api/manifests] Error while retrieving the configuration",
+        )
+        return (
+            {"err": str(err), "message": "Manifests rendering failed"},
+            HTTPStatus.INTERNAL_SERVER_ERROR,
+        )
+
+    def generate():
+        try:
+            results = manifests.render_all(config_dir, tag)
+            if output_format == "tar":
+                yield from _to_tar(results)
+            else:
+                yield from _to_ndjson(results)
+        finally:
+            non_blocking_clean(config_dir, message_prefix="[/api/manifests]")
+
+    return Response(generate(), mimetype=OUTPUT_FORMATS[output_format])
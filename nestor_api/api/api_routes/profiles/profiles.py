@@ -0,0 +1,41 @@
+"""Define the profiles routes, giving access to the profiles of the requests and jobs."""
+
+from http import HTTPStatus
+import os
+
+from flask import request, send_file
+
+from nestor_api.utils import profiling
+
+
+def _is_authorized() -> bool:
+    # The profiling token is given as a bearer token, so that these requests are not profiled
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    return scheme.lower() == "bearer" and profiling.is_authorized(token.strip())
+
+
+def list_profiles():
+    """List the saved profiles, the most recent first."""
+    if not _is_authorized():
+        return {"message": "Invalid profiling token"}, HTTPStatus.FORBIDDEN
+
+    profiles = []
+    for name in profiling.list_profiles():
+        path = profiling.get_profile_path(name)
+        if path is not None:
+            profiles.append({"name": name, "size": os.path.getsize(path)})
+    return {"profiles": profiles}, HTTPStatus.OK
+
+
+def get_profile(name: str):
+    """Download a profile in the pstats format, or as a text summary with `?format=text`."""
+    if not _is_authorized():
+        return {"message": "Invalid profiling token"}, HTTPStatus.FORBIDDEN
+
+    path = profiling.get_profile_path(name)
+    if path is None:
+        return {"message": "Profile not found"}, HTTPStatus.NOT_FOUND
+
+    if request.args.get("format") == "text":
+        return profiling.format_profile(path), HTTPStatus.OK, {"Content-Type": "text/plain"}
+    return send_file(path, mimetype="application/octet-stream", as_attachment=True)
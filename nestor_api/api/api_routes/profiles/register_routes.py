@@ -0,0 +1,17 @@
+"""Define the profiles controllers."""
+
+from flask import Blueprint
+
+from nestor_api.api.api_routes.profiles.profiles import get_profile, list_profiles
+
+
+def register_routes(api: Blueprint) -> None:
+    """Register the `/profiles` routes."""
+
+    @api.route("/profiles", methods=["GET"])
+    def _list_profiles():
+        return list_profiles()
+
+    @api.route("/profiles/<name>", methods=["GET"])
+    def _get_profile(name: str):
+        return get_profile(name)
@@ -2,6 +2,7 @@
 
 from http import HTTPStatus
 
+from nestor_api.adapters.git.provider import get_git_provider
 from nestor_api.config.config import Configuration
 import nestor_api.lib.config as config_lib
 import nestor_api.lib.workflow as workflow_lib
@@ -22,8 +23,14 @@ def advance_workflow(current_step):
         config_lib.change_environment(Configuration.get_config_default_branch(), config_dir)
         project_config = config_lib.get_project_config(config_dir)
 
+        # Without a git provider, all the apps are advanced with local rebases
+        try:
+            git_provider = get_git_provider(project_config)
+        except (ValueError, NotImplementedError):
+            git_provider = None
+
         report_status, report = workflow_lib.advance_workflow(
-            config_dir, project_config, current_step
+            config_dir, project_config, current_step, git_provider=git_provider
         )
 
         status, message = _get_status_and_message(report_status)
@@ -1,11 +1,15 @@
 """Define the workflow initialization route."""
+
 from http import HTTPStatus
 
+from flask import request
+
 from nestor_api.adapters.git.provider import get_git_provider
 from nestor_api.config.config import Configuration
 import nestor_api.lib.config as config_lib
 import nestor_api.lib.io as io_lib
 import nestor_api.lib.workflow as workflow_lib
+from nestor_api.utils.error_handling import non_blocking_clean
 from nestor_api.utils.logger import Logger
 
 
@@ -70,3 +74,70 @@ def init_workflow(organization, app):
             },
             HTTPStatus.INTERNAL_SERVER_ERROR,
         )
+
+
+def init_workflows(organization):
+    """Initialize the workflow of all applications, or of the
+    applications listed in the `apps` field of the JSON body."""
+    body = request.get_json(silent=True) or {}
+    app_names = body.get("apps")
+    if app_names is not None and (
+        not isinstance(app_names, list) or not all(isinstance(app, str) for app in app_names)
+    ):
+        return (
+            {"organization": organization, "message": "'apps' must be a list of app names"},
+            HTTPStatus.BAD_REQUEST,
+        )
+
+    Logger.info(
+        {"organization": organization, "apps": app_names},
+        "[/api/workflow/init/:org] Workflows initialization started",
+    )
+
+    try:
+        # Retrieve project configuration
+        config_dir = config_lib.create_temporary_config_copy()
+        config_lib.change_environment(Configuration.get_config_default_branch(), config_dir)
+        project_config = config_lib.get_project_config(config_dir)
+
+        git_provider = get_git_provider(project_config)
+        report_status, app_reports = workflow_lib.init_workflows(
+            organization, git_provider, config_dir, app_names
+        )
+
+        if report_status == workflow_lib.WorkflowInitStatus.SUCCESS:
+            status = HTTPStatus.OK
+            message = "Workflows initialization succeeded"
+        else:
+            status = HTTPStatus.INTERNAL_SERVER_ERROR
+            message = "Workflows initialization failed"
+        reports = {
+            app: {"status": app_status.value, "report": report}
+            for app, (app_status, report) in app_reports.items()
+        }
+
+        # Clean the temporary directory
+        non_blocking_clean(config_dir, message_prefix="[/api/workflow/init/:org]")
+
+        # HTTP Response
+        Logger.info(
+            {"organization": organization, "reports": reports},
+            f"[/api/workflow/init/:org] {message}",
+        )
+        return ({"organization": organization, "reports": reports, "message": message}, status)
+    # pylint: disable=broad-except
+    except Exception as err:
+        Logger.error(
+            {"organization": organization, "apps": app_names, "err": str(err)},
+            "[/api/workflow/init/:org] Workflows initialization failed",
+        )
+
+        # HTTP Response
+        return (
+            {
+                "organization": organization,
+                "err": str(err),
+                "message": "Workflows initialization failed",
+            },
+            HTTPStatus.INTERNAL_SERVER_ERROR,
+        )
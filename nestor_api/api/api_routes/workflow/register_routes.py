@@ -3,7 +3,7 @@
 from flask import Blueprint
 
 from nestor_api.api.api_routes.workflow.advance import advance_workflow
-from nestor_api.api.api_routes.workflow.init import init_workflow
+from nestor_api.api.api_routes.workflow.init import init_workflow, init_workflows
 
 
 def register_routes(api: Blueprint) -> None:
@@ -13,6 +13,10 @@ def register_routes(api: Blueprint) -> None:
     def _init_workflow(organization, app):
         return init_workflow(organization, app)
 
+    @api.route("/workflow/init/<organization>", methods=["POST"])
+    def _init_workflows(organization):
+        return init_workflows(organization)
+
     @api.route("/workflow/progress/<current_step>", methods=["POST"])
     def _advance_workflow(current_step):
         return advance_workflow(current_step)
@@ -1,16 +1,22 @@
 """Return an initialized Flask application with the API."""
+
 from flask import Flask
 
 from nestor_api.api.api import create_api
-from nestor_api.api.public_routes import heartbeat
+from nestor_api.api.public_routes import heartbeat, metrics
+from nestor_api.utils import profiling
 
 
 def create_app() -> Flask:
     """Initialize a Flask app."""
     app = Flask(__name__)
 
-    # Note: heartbeat is exposed without authentication
+    # Opt-in profiling of the requests
+    profiling.init_app(app)
+
+    # Note: heartbeat and metrics are exposed without authentication
     app.register_blueprint(heartbeat.blueprint)
+    app.register_blueprint(metrics.blueprint)
 
     api = create_api()
     app.register_blueprint(api)
@@ -0,0 +1,19 @@
+"""Define the metrics route."""
+
+from http import HTTPStatus
+
+from flask import Blueprint
+
+# Register the metrics of the jobs
+import nestor_api.lib.monitoring  # pylint: disable=unused-import
+from nestor_api.utils.metrics import REGISTRY
+
+blueprint = Blueprint("metrics", __name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@blueprint.route("/metrics")
+def metrics():
+    """The metrics of the API in the Prometheus text format (no auth!)."""
+    return REGISTRY.expose(), HTTPStatus.OK, {"Content-Type": CONTENT_TYPE}
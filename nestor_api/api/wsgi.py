@@ -5,5 +5,7 @@ describes how a web server communicates with web applications,
 and how web applications can be chained together to process one request.
 """
 from nestor_api.api.flask_app import create_app
+import nestor_api.lib.janitor as janitor
 
 app = create_app()
+janitor.start()
@@ -35,3 +35,8 @@ class Configuration:
     def get_working_path():
         """Returns the path of the project holding working copies"""
         return os.getenv("NESTOR_WORK_PATH", "/tmp/nestor/work")
+
+    @staticmethod
+    def get_config_loading_processes():
+        """Returns the number of processes used to load the applications configurations"""
+        return int(os.getenv("NESTOR_CONFIG_LOADING_PROCESSES", "1"))
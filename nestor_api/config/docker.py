@@ -0,0 +1,22 @@
+"""Docker configuration"""
+
+import os
+
+
+class DockerConfiguration:
+    """Docker configuration"""
+
+    @staticmethod
+    def get_engine_socket_path() -> str:
+        """Returns the path of the unix socket exposing the Docker Engine API"""
+        return os.getenv("NESTOR_DOCKER_SOCKET_PATH", "/var/run/docker.sock")
+
+    @staticmethod
+    def get_engine_api_version() -> str:
+        """Returns the version of the Docker Engine API to use"""
+        return os.getenv("NESTOR_DOCKER_API_VERSION", "1.40")
+
+    @staticmethod
+    def get_client_config_path() -> str:
+        """Returns the directory holding the docker client configuration (registries auths)"""
+        return os.getenv("DOCKER_CONFIG", os.path.join(os.path.expanduser("~"), ".docker"))
@@ -15,3 +15,26 @@ class GitConfiguration:
     def get_master_tag():
         """Returns the master tag."""
         return os.getenv("NESTOR_GIT_DEFAULT_TAG", "master")
+
+    @staticmethod
+    def get_git_provider_cache_ttl():
+        """Returns the time (in seconds) the repositories and branches
+        fetched from the git provider are used without being revalidated."""
+        return float(os.getenv("NESTOR_GIT_PROVIDER_CACHE_TTL", "60"))
+
+    @staticmethod
+    def get_git_provider_rate_limit_reserve():
+        """Returns the number of requests kept in reserve: once the remaining
+        budget goes below it, requests are delayed until the rate limit resets."""
+        return int(os.getenv("NESTOR_GIT_PROVIDER_RATE_LIMIT_RESERVE", "100"))
+
+    @staticmethod
+    def get_git_provider_max_retries():
+        """Returns the number of times a rate limited request is retried."""
+        return int(os.getenv("NESTOR_GIT_PROVIDER_MAX_RETRIES", "5"))
+
+    @staticmethod
+    def get_git_provider_backoff():
+        """Returns the base delay (in seconds) of the exponential backoff
+        between the retries of a rate limited request."""
+        return float(os.getenv("NESTOR_GIT_PROVIDER_BACKOFF", "1"))
@@ -0,0 +1,28 @@
+"""Janitor configuration"""
+
+import os
+
+
+class JanitorConfiguration:
+    """Configuration of the janitor cleaning the work and pristine paths"""
+
+    @staticmethod
+    def get_interval() -> int:
+        """Returns the time between two cleanings in seconds, 0 disabling the janitor"""
+        return int(os.getenv("NESTOR_JANITOR_INTERVAL", "300"))
+
+    @staticmethod
+    def get_orphan_age() -> int:
+        """Returns the age in seconds after which a working copy that is not tracked
+        as in use by a running process (e.g. left by a crash) is removed"""
+        return int(os.getenv("NESTOR_JANITOR_ORPHAN_AGE", "3600"))
+
+    @staticmethod
+    def get_disk_quota() -> int:
+        """Returns the disk usage in MiB allowed to the work and pristine paths, 0 for none"""
+        return int(os.getenv("NESTOR_JANITOR_DISK_QUOTA", "0"))
+
+    @staticmethod
+    def get_min_free_space() -> int:
+        """Returns the free disk space in MiB under which pristines are evicted, 0 for none"""
+        return int(os.getenv("NESTOR_JANITOR_MIN_FREE_SPACE", "0"))
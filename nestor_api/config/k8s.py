@@ -10,11 +10,59 @@ class K8sConfiguration:
         """Returns the k8s http proxy"""
         return os.environ["NESTOR_K8S_HTTP_PROXY"]
 
+    @staticmethod
+    def get_client() -> str:
+        """Returns how nestor talks to the clusters: by forking "kubectl" or through
+        the Kubernetes "api" with pooled connections."""
+        return os.getenv("NESTOR_K8S_CLIENT", "kubectl").lower()
+
+    @staticmethod
+    def get_kubeconfig_path() -> str:
+        """Returns the kubeconfig file defining the clusters contexts, like kubectl does"""
+        kubeconfig = os.getenv("KUBECONFIG")
+        if kubeconfig:
+            return kubeconfig.split(os.pathsep)[0]
+        return os.path.join(os.path.expanduser("~"), ".kube", "config")
+
     @staticmethod
     def get_service_port() -> int:
         """Returns the port to expose on the k8s services."""
         return int(os.getenv("NESTOR_K8S_SERVICE_PORT", "8080"))
 
+    @staticmethod
+    def get_pod_template_annotation() -> str:
+        """Returns how the pod templates are annotated: with the "date" of the deployment,
+        restarting the pods every time, or with a "hash" of their content."""
+        return os.getenv("NESTOR_K8S_POD_TEMPLATE_ANNOTATION", "date").lower()
+
+    @staticmethod
+    def get_applied_record() -> str:
+        """Returns where the digest of the last applied manifests of each app is recorded,
+        to skip the deployments that would not change anything: "none", "local" or
+        "cluster" (locally and in an annotation of the deployed resources)."""
+        return os.getenv("NESTOR_K8S_APPLIED_RECORD", "none").lower()
+
+    @staticmethod
+    def get_applied_record_path() -> str:
+        """Returns the directory in which the applied manifests digests are recorded."""
+        return os.getenv("NESTOR_K8S_APPLIED_RECORD_PATH", "/tmp/nestor/applied")
+
+    @staticmethod
+    def get_rollout_timeout() -> int:
+        """Returns how long (in seconds) to wait for a rollout to complete."""
+        return int(os.getenv("NESTOR_K8S_ROLLOUT_TIMEOUT", "600"))
+
+    @staticmethod
+    def get_deploy_concurrency() -> int:
+        """Returns how many deployments can run at the same time on each cluster."""
+        return int(os.getenv("NESTOR_K8S_DEPLOY_CONCURRENCY", "2"))
+
+    @staticmethod
+    def get_render_processes() -> int:
+        """Returns the number of processes rendering the manifests of all apps,
+        the number of CPUs by default."""
+        return int(os.getenv("NESTOR_K8S_RENDER_PROCESSES", str(os.cpu_count() or 1)))
+
     @staticmethod
     def get_templates_dir() -> str:
         """Returns the subfolder in which the k8s templates are stored."""
@@ -0,0 +1,28 @@
+"""Profiling configuration"""
+
+import os
+from typing import Optional
+
+
+class ProfilingConfiguration:
+    """Profiling configuration"""
+
+    @staticmethod
+    def is_always_enabled() -> bool:
+        """Returns whether every request and background job should be profiled"""
+        return os.getenv("NESTOR_PROFILING_ENABLED", "false").lower() in ("true", "1", "yes")
+
+    @staticmethod
+    def get_token() -> Optional[str]:
+        """Returns the token allowing to profile a request and to download the profiles"""
+        return os.getenv("NESTOR_PROFILING_TOKEN") or None
+
+    @staticmethod
+    def get_profiles_path() -> str:
+        """Returns the directory where the profiles are saved"""
+        return os.getenv("NESTOR_PROFILES_PATH", "/tmp/nestor/profiles")
+
+    @staticmethod
+    def get_max_profiles() -> int:
+        """Returns the number of profiles kept, the oldest ones being removed first"""
+        return int(os.getenv("NESTOR_PROFILES_MAX", "50"))
@@ -0,0 +1,17 @@
+"""Tracing configuration"""
+
+import os
+
+
+class TracingConfiguration:
+    """Tracing configuration"""
+
+    @staticmethod
+    def get_exporter() -> str:
+        """Returns where the traces are exported: "none", "file" or "memory" """
+        return os.getenv("NESTOR_TRACING_EXPORTER", "none").lower()
+
+    @staticmethod
+    def get_file_path() -> str:
+        """Returns the file the traces are appended to, one OTLP JSON document per line"""
+        return os.getenv("NESTOR_TRACING_FILE", "/tmp/nestor/traces")
@@ -13,3 +13,7 @@ class AggregatedConfigurationError(Exception):
     def __init__(self, errors: List[ConfigurationError]):
         super().__init__("Invalid configuration")
         self.errors = errors
+
+    def __reduce__(self):
+        # Allow the error to be sent back by the processes loading the configuration
+        return (self.__class__, (self.errors,))
@@ -6,3 +6,8 @@ class AppConfigurationNotFoundError(FileNotFoundError):
 
     def __init__(self, app_name: str):
         super().__init__(f"Configuration file not found for app: {app_name}")
+        self.app_name = app_name
+
+    def __reduce__(self):
+        # Allow the error to be sent back by the processes loading the configuration
+        return (self.__class__, (self.app_name,))
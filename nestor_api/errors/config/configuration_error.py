@@ -8,3 +8,7 @@ class ConfigurationError(Exception):
         super().__init__(f"Invalid configuration: {path}: {message}")
         self.path = path
         self.message = message
+
+    def __reduce__(self):
+        # Allow the error to be sent back by the processes loading the configuration
+        return (self.__class__, (self.path, self.message))
@@ -1,35 +1,70 @@
 """Configuration library"""
 
-import copy
+from concurrent.futures import ProcessPoolExecutor
 import errno
 import os
 from pathlib import PurePath
 import re
+from typing import Dict, List
 
 from nestor_api.config.config import Configuration
 from nestor_api.errors.config.aggregated_configuration_error import AggregatedConfigurationError
 from nestor_api.errors.config.app_configuration_not_found_error import AppConfigurationNotFoundError
 from nestor_api.errors.config.configuration_error import ConfigurationError
 import nestor_api.lib.io as io
+from nestor_api.utils import tracing
 import nestor_api.utils.dict as dict_utils
 import yaml_lib
 
+# Branch names safe to pass to a git command run in a shell, e.g. 'staging' or 'release/1.0'
+ENVIRONMENT_NAME_PATTERN = re.compile(r"(?!.*\.\.)[A-Za-z0-9][A-Za-z0-9._/-]*")
 
+
+def is_valid_environment_name(environment: str) -> bool:
+    """Determines if an environment (branch) name can be used in git commands"""
+    if not isinstance(environment, str):
+        return False
+    return ENVIRONMENT_NAME_PATTERN.fullmatch(environment) is not None
+
+
+def _check_environment_name(environment: str) -> None:
+    if not is_valid_environment_name(environment):
+        raise ValueError(f'Invalid environment name: "{environment}"')
+
+
+@tracing.traced("env_switch", environment="environment")
 def change_environment(environment: str, config_path=Configuration.get_config_path()):
     """Change the environment (branch) of the configuration"""
+    _check_environment_name(environment)
     io.execute("git stash", config_path)
     io.execute("git fetch origin", config_path)
     io.execute(f"git checkout {environment}", config_path)
     io.execute(f"git reset --hard origin/{environment}", config_path)
 
 
+def get_remote_environment_commit(
+    environment: str, config_path: str = Configuration.get_config_path()
+) -> str:
+    """Returns the hash of the last commit of an environment (branch) of the configuration
+    on its remote, without fetching it. Empty when the environment does not exist."""
+    _check_environment_name(environment)
+    output = io.execute(f"git ls-remote origin refs/heads/{environment}", config_path)
+    return output.split("\t")[0] if output else ""
+
+
+@tracing.traced("config_copy")
 def create_temporary_config_copy() -> str:
     """Copy the configuration into a temporary directory and returns its path"""
     return io.create_temporary_copy(Configuration.get_config_path(), "config")
 
 
-def get_app_config(app_name: str, config_path: str = Configuration.get_config_path()) -> dict:
-    """Load the configuration of an app"""
+@tracing.traced("config_load", app="app_name")
+def get_app_config(
+    app_name: str, config_path: str = Configuration.get_config_path(), project_config: dict = None
+) -> dict:
+    """Load the configuration of an app. The resolved project configuration
+    can be provided to avoid loading it again when loading several apps: the subtrees
+    the app does not override are then shared with it, copy them before modifying them."""
     app_config_path = os.path.join(
         config_path, Configuration.get_config_app_folder(), f"{app_name}.yaml",
     )
@@ -37,7 +72,8 @@ def get_app_config(app_name: str, config_path: str = Configuration.get_config_pa
         raise AppConfigurationNotFoundError(app_name)
 
     app_config = yaml_lib.read_yaml(app_config_path)
-    project_config = get_project_config(config_path)
+    if project_config is None:
+        project_config = get_project_config(config_path)
 
     config = dict_utils.deep_merge(project_config, app_config)
 
@@ -80,70 +116,89 @@ def get_deployments(project_config: dict) -> list:
     return deployments
 
 
+# Pattern '{{variable}}'
+VARIABLE_REFERENCE_PATTERN = re.compile(r"{{([\w\-.]+)}}")
+# Pattern '$ENV_VAR'
+ENV_VARIABLE_PATTERN = re.compile(r"^\$(\w+)$")
+
+
 def _resolve_variable(template: str, variables: dict, path: str) -> str:
-    final_value = template
-
-    # Resolve pattern '{{variable}}'
-    referenced_names = re.findall(r"{{([\w\-.]+)}}", template)
-    if len(referenced_names) > 0:
-        for var_name in referenced_names:
-            var_value = variables.get(var_name)
-            if var_value is not None:
-                if not isinstance(var_value, str):
-                    raise ConfigurationError(
-                        path, "Referenced variable should resolved to a string"
-                    )
-
-                final_value = re.sub(f"{{{{{var_name}}}}}", var_value, final_value)
+    # Resolve pattern '{{variable}}' in a single pass
+    def __replace_reference(match):
+        var_value = variables.get(match.group(1))
+        if var_value is None:
+            return match.group(0)
+        if not isinstance(var_value, str):
+            raise ConfigurationError(path, "Referenced variable should resolved to a string")
+        return var_value
+
+    final_value, references_count = VARIABLE_REFERENCE_PATTERN.subn(__replace_reference, template)
+    if references_count > 0:
         return final_value
 
     # Resolve pattern '$ENV_VAR'
-    env_variables = re.findall(r"^\$(\w+)$", template)
-    if len(env_variables) > 0:
-        env_var = os.environ.get(env_variables[0])
-        if env_var is not None:
-            final_value = env_var
-        return final_value
+    env_variable = ENV_VARIABLE_PATTERN.match(template)
+    if env_variable is not None:
+        return os.environ.get(env_variable.group(1), template)
 
     # Awaiting for implementation
     # -> Resolve vault definitions "!vault:xxx"
 
-    return final_value
+    return template
 
 
 def _resolve_variables_deep(config: dict) -> dict:
-    def __resolve_list(list_values, variables, path, errors):
-        resolved_values = []
+    """Resolve the variables referenced in the strings of the configuration,
+    the top-level of the configuration being used as `variables`.
+
+    The configuration is not modified: a container is only copied when one of its
+    values is resolved, unchanged subtrees are shared with the returned configuration."""
+    errors: List[ConfigurationError] = []
+    # The same templates are repeated across the configuration (e.g. "{{domain}}")
+    resolved_strings: Dict[str, str] = {}
+
+    def __resolve_list(list_values, path):
+        resolved_values = None
         for idx, value in enumerate(list_values):
-            resolved, errors = __resolve(value, variables, f"{path}[{idx}]", errors)
-            resolved_values.append(resolved)
-        return resolved_values, errors
-
-    def __resolve_dict(dict_values, variables, path, errors):
-        for key in dict_values:
-            resolved_value, errors = __resolve(dict_values[key], variables, f"{path}.{key}", errors)
-            dict_values[key] = resolved_value
-        return dict_values, errors
-
-    def __resolve_str(value, variables, path, errors):
-        try:
-            resolved_value = _resolve_variable(value, variables, path)
-            return resolved_value, errors
-        except ConfigurationError as err:
-            errors.append(err)
-            return value, errors
-
-    def __resolve(value, variables, path, errors):
+            resolved = __resolve(value, f"{path}[{idx}]")
+            if resolved_values is None and resolved is not value:
+                resolved_values = list_values[:idx]
+            if resolved_values is not None:
+                resolved_values.append(resolved)
+        return list_values if resolved_values is None else resolved_values
+
+    def __resolve_dict(dict_values, path):
+        resolved_values = None
+        for key, value in dict_values.items():
+            resolved = __resolve(value, f"{path}.{key}")
+            if resolved is not value:
+                if resolved_values is None:
+                    resolved_values = dict(dict_values)
+                resolved_values[key] = resolved
+        return dict_values if resolved_values is None else resolved_values
+
+    def __resolve_str(value, path):
+        resolved_value = resolved_strings.get(value)
+        if resolved_value is None:
+            try:
+                resolved_value = _resolve_variable(value, config, path)
+            except ConfigurationError as err:
+                errors.append(err)
+                return value
+            resolved_strings[value] = resolved_value
+        # Keep the original object when nothing was resolved
+        return value if resolved_value == value else resolved_value
+
+    def __resolve(value, path):
         if isinstance(value, list):
-            return __resolve_list(value, variables, path, errors)
+            return __resolve_list(value, path)
         if isinstance(value, dict):
-            return __resolve_dict(value, variables, path, errors)
+            return __resolve_dict(value, path)
         if isinstance(value, str):
-            return __resolve_str(value, variables, path, errors)
-        return value, errors
+            return __resolve_str(value, path)
+        return value
 
-    # The top-level of config is used as `variables`
-    resolved_config, errors = __resolve(copy.deepcopy(config), config, "CONFIG", [])
+    resolved_config = __resolve(config, "CONFIG")
 
     if len(errors) > 0:
         raise AggregatedConfigurationError(errors)
@@ -151,23 +206,62 @@ def _resolve_variables_deep(config: dict) -> dict:
     return resolved_config
 
 
-def list_apps_config(config_path: str = Configuration.get_config_path()) -> dict:
-    """Retrieves all of the apps configurations keyed by app names."""
+def list_app_names(config_path: str = Configuration.get_config_path()) -> List[str]:
+    """Retrieves the names of the apps having a configuration file."""
     apps_path = os.path.join(config_path, Configuration.get_config_app_folder())
 
     if not os.path.isdir(apps_path):
         raise ValueError(apps_path)
 
-    apps_config_hashmap = {}
+    app_names = []
     for file_path in os.listdir(apps_path):
         basename = os.path.basename(file_path)
         filename = PurePath(basename)
         file_extension = "".join(filename.suffixes)
-        app_name = filename.name.replace(file_extension, "")
 
         # Prevent parsing other files than configuration ones (directories, incorrect extension)
         if file_extension not in [".yml", ".yaml"]:
             continue
 
-        apps_config_hashmap[app_name] = get_app_config(app_name)
-    return apps_config_hashmap
+        app_names.append(filename.name.replace(file_extension, ""))
+    return app_names
+
+
+# State of the processes loading apps configurations, set once per worker
+_worker_state: dict = {}
+
+
+def _init_app_config_worker(config_path: str, project_config: dict) -> None:
+    _worker_state["config_path"] = config_path
+    _worker_state["project_config"] = project_config
+
+
+def _load_app_config_in_worker(app_name: str) -> dict:
+    return get_app_config(app_name, _worker_state["config_path"], _worker_state["project_config"])
+
+
+def list_apps_config(config_path: str = Configuration.get_config_path()) -> dict:
+    """Retrieves all of the apps configurations keyed by app names.
+
+    The project configuration is loaded and resolved once, then shared by all apps
+    (the configurations must be copied before being modified).
+    When `NESTOR_CONFIG_LOADING_PROCESSES` is greater than 1, the apps are loaded
+    across a pool of processes."""
+    app_names = list_app_names(config_path)
+    project_config = get_project_config(config_path)
+
+    processes = min(Configuration.get_config_loading_processes(), len(app_names))
+    if processes <= 1:
+        return {
+            app_name: get_app_config(app_name, config_path, project_config)
+            for app_name in app_names
+        }
+
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_app_config_worker,
+        initargs=(config_path, project_config),
+    ) as executor:
+        chunksize = max(1, len(app_names) // (processes * 4))
+        apps_config = executor.map(_load_app_config_in_worker, app_names, chunksize=chunksize)
+        return dict(zip(app_names, apps_config))
@@ -1,10 +1,27 @@
 """Docker library"""
 
+import threading
+
+import nestor_api.lib.docker_engine as docker_engine
 import nestor_api.lib.git as git
-import nestor_api.lib.io as io
+import nestor_api.lib.monitoring as monitoring
+from nestor_api.utils import tracing
 from nestor_api.utils.logger import Logger
 
+_engine_clients = threading.local()
+
+
+def get_engine_client() -> docker_engine.DockerEngineClient:
+    """Returns the Docker engine client of the current thread,
+    so that its connection is reused across the calls of a job."""
+    client = getattr(_engine_clients, "client", None)
+    if client is None:
+        client = docker_engine.DockerEngineClient()
+        _engine_clients.client = client
+    return client
+
 
+@tracing.traced("docker_build", app="app_name")
 def build(app_name: str, repository: str, app_config: dict) -> str:
     """Build the docker image of the last version of the app"""
     image_tag = git.get_last_tag(repository)
@@ -14,28 +31,30 @@ def build(app_name: str, repository: str, app_config: dict) -> str:
     )
 
     if has_docker_image(app_name, image_tag):
+        monitoring.record_cache_lookup("docker_image", "hit")
         Logger.info({}, "Docker image already built (skipped)")
         return image_tag
+    monitoring.record_cache_lookup("docker_image", "miss")
 
     commit_hash = git.get_commit_hash_from_tag(repository, image_tag)
-    build_variables = app_config.get("docker", {}).get("build", {}).get("variables", {})
-    build_variables["COMMIT_HASH"] = commit_hash
-
     # Application build environment variables:
-    builds_args = []
-    for key, value in build_variables.items():
-        builds_args.append(f"--build-arg {key}={value}")
-
-    builds_args_str = " ".join(builds_args)
-
-    command = f"docker build --tag {app_name}:{image_tag} {builds_args_str} {repository}"
-
-    Logger.debug({"command": command}, "Docker build command")
+    build_variables = {
+        **app_config.get("docker", {}).get("build", {}).get("variables", {}),
+        "COMMIT_HASH": commit_hash,
+    }
+
+    image = f"{app_name}:{image_tag}"
+    Logger.debug(
+        {"image": image, "build_args": list(build_variables), "context": repository}, "Docker build"
+    )
 
     try:
-        io.execute(command)
+        with monitoring.measure_command("docker", "build"):
+            for message in get_engine_client().build_image(repository, image, build_variables):
+                if "stream" in message and message["stream"].strip():
+                    Logger.debug({"image": image, "output": message["stream"].rstrip()}, "Building")
     except Exception as err:
-        Logger.error({"err": err}, "Error while building Docker image")
+        Logger.error({"err": str(err)}, "Error while building Docker image")
         raise err
 
     return image_tag
@@ -43,8 +62,7 @@ def build(app_name: str, repository: str, app_config: dict) -> str:
 
 def has_docker_image(app_name: str, tag: str) -> bool:
     """Checks if the docker image already exists for a given app and tag"""
-    stdout = io.execute(f"docker images {app_name}:{tag} --quiet")
-    return len(stdout) != 0
+    return get_engine_client().image_exists(f"{app_name}:{tag}")
 
 
 def get_registry_image_tag(app_name: str, image_tag: str, registry: dict) -> str:
@@ -57,6 +75,7 @@ def get_version_from_image_tag(image_tag: str) -> str:
     return image_tag.split(":")[1]
 
 
+@tracing.traced("docker_push", app="app_name", tag="image_tag")
 def push(app_name: str, image_tag: str, app_config: dict) -> None:
     """Push an image to the configured docker registry"""
     if not has_docker_image(app_name, image_tag):
@@ -69,7 +88,44 @@ def push(app_name: str, image_tag: str, app_config: dict) -> None:
 
     # Create the tag
     image = get_registry_image_tag(app_name, image_tag, registry)
+    repository = image.rsplit(":", 1)[0]
+
+    client = get_engine_client()
+    client.tag_image(f"{app_name}:{image_tag}", repository, image_tag)
+
+    auth = docker_engine.get_registry_auth(docker_engine.get_registry_hostname(repository))
+    layers: dict = {}
+    with monitoring.measure_command("docker", "push"):
+        for message in client.push_image(repository, image_tag, auth):
+            _track_push_progress(image, message, layers)
+
+    Logger.info(
+        {
+            "image": image,
+            "layers": len(layers),
+            "bytes": sum(layer["bytes"] for layer in layers.values()),
+        },
+        "Docker image pushed",
+    )
 
-    io.execute(f"docker tag {app_name}:{image_tag} {image}")
 
-    io.execute(f"docker push {image}")
+def _track_push_progress(image: str, message: dict, layers: dict) -> None:
+    """Record the per-layer progress reported by the engine while pushing an image."""
+    layer_id = message.get("id")
+    status = message.get("status", "")
+    if layer_id is None or status.startswith("The push refers to"):
+        return
+
+    layer = layers.setdefault(layer_id, {"bytes": 0, "status": None})
+    progress = message.get("progressDetail") or {}
+    if "total" in progress:
+        layer["bytes"] = progress["total"]
+    elif "current" in progress:
+        layer["bytes"] = max(layer["bytes"], progress["current"])
+
+    if status not in (layer["status"], "Pushing"):
+        Logger.debug(
+            {"image": image, "layer": layer_id, "status": status, "bytes": layer["bytes"]},
+            "Pushing",
+        )
+    layer["status"] = status
@@ -0,0 +1,229 @@
+"""Docker Engine API client
+
+Talks HTTP to the Docker daemon over its unix socket instead of forking the `docker` CLI.
+The connection is kept alive between requests, and the build and push endpoints are
+consumed as a stream of JSON messages so their progress can be followed.
+"""
+
+import base64
+import fnmatch
+import http.client
+import json
+import os
+import socket
+import tarfile
+import tempfile
+from typing import IO, Iterator, List, Optional, Tuple
+from urllib.parse import quote, urlencode
+
+from nestor_api.config.docker import DockerConfiguration
+import nestor_api.utils.http as http_utils
+
+DOCKER_HUB_REGISTRY = "https://index.docker.io/v1/"
+
+
+class DockerEngineError(http_utils.HttpApiError):
+    """Raised when the Docker engine reports an error."""
+
+
+class UnixSocketHTTPConnection(http.client.HTTPConnection):
+    """An HTTP connection established over a unix socket."""
+
+    def __init__(self, socket_path: str, timeout: float = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        """Connect to the unix socket."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class DockerEngineClient:
+    """A minimal Docker Engine API client using a persistent connection.
+
+    A client is not thread-safe: use one client per thread.
+    """
+
+    def __init__(self, socket_path: str = None, api_version: str = None, timeout: float = None):
+        self.socket_path = socket_path or DockerConfiguration.get_engine_socket_path()
+        self.api_version = api_version or DockerConfiguration.get_engine_api_version()
+        self._connection = UnixSocketHTTPConnection(self.socket_path, timeout=timeout)
+
+    def close(self) -> None:
+        """Close the connection to the Docker engine."""
+        self._connection.close()
+
+    def image_exists(self, image: str) -> bool:
+        """Checks if an image (`name:tag`) exists in the engine's local storage."""
+        response = self._request("GET", f"/images/{quote(image, safe='')}/json")
+        body = response.read()
+        if response.status == http.client.NOT_FOUND:
+            return False
+        http_utils.raise_for_status(response.status, body, DockerEngineError)
+        return True
+
+    def build_image(self, context_dir: str, image: str, build_args: dict = None) -> Iterator[dict]:
+        """Build an image from a directory and stream the build progress messages."""
+        params = {"t": image, "rm": "1"}
+        if build_args:
+            params["buildargs"] = json.dumps(build_args)
+
+        with tempfile.TemporaryFile() as context_archive:
+            create_context_archive(context_dir, context_archive)
+            context_size = context_archive.tell()
+            context_archive.seek(0)
+
+            response = self._request(
+                "POST",
+                "/build",
+                params=params,
+                body=context_archive,
+                headers={"Content-Type": "application/x-tar", "Content-Length": str(context_size)},
+            )
+            yield from _stream_json(response)
+
+    def tag_image(self, image: str, repository: str, tag: str) -> None:
+        """Create a tag `repository:tag` that refers to an existing image."""
+        response = self._request(
+            "POST", f"/images/{quote(image, safe='')}/tag", params={"repo": repository, "tag": tag}
+        )
+        http_utils.raise_for_status(response.status, response.read(), DockerEngineError)
+
+    def push_image(self, repository: str, tag: str, auth: Optional[dict] = None) -> Iterator[dict]:
+        """Push an image to its registry and stream the push progress messages."""
+        encoded_auth = base64.urlsafe_b64encode(json.dumps(auth or {}).encode("utf-8"))
+        response = self._request(
+            "POST",
+            f"/images/{quote(repository, safe='/')}/push",
+            params={"tag": tag},
+            headers={"X-Registry-Auth": encoded_auth.decode("ascii")},
+        )
+        yield from _stream_json(response)
+
+    # pylint: disable=too-many-arguments
+    def _request(
+        self, method: str, path: str, params: dict = None, body: IO = None, headers: dict = None
+    ) -> http.client.HTTPResponse:
+        url = f"/v{self.api_version}{path}"
+        if params:
+            url = f"{url}?{urlencode(params)}"
+
+        try:
+            self._connection.request(method, url, body=body, headers=headers or {})
+            return self._connection.getresponse()
+        except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+            # The engine may have closed the idle keep-alive connection: reconnect once.
+            self._connection.close()
+            if body is not None:
+                body.seek(0)
+            self._connection.request(method, url, body=body, headers=headers or {})
+            return self._connection.getresponse()
+
+
+def _stream_json(response: http.client.HTTPResponse) -> Iterator[dict]:
+    """Yield the JSON messages streamed by the engine, raising on the first reported error."""
+    if response.status >= 400:
+        http_utils.raise_for_status(response.status, response.read(), DockerEngineError)
+
+    for line in response:
+        line = line.strip()
+        if not line:
+            continue
+        message = json.loads(line)
+        if "error" in message:
+            # Drain the response so that the connection can be reused
+            response.read()
+            raise DockerEngineError(message["error"])
+        yield message
+
+
+def _read_ignore_patterns(context_dir: str) -> List[Tuple[bool, str]]:
+    """Read the `.dockerignore` patterns as a list of (is_exception, pattern)."""
+    ignore_file_path = os.path.join(context_dir, ".dockerignore")
+    if not os.path.isfile(ignore_file_path):
+        return []
+
+    patterns = []
+    with open(ignore_file_path, "r") as ignore_file:
+        for line in ignore_file:
+            pattern = line.strip()
+            if not pattern or pattern.startswith("#"):
+                continue
+            is_exception = pattern.startswith("!")
+            pattern = os.path.normpath(pattern.lstrip("!").strip()).lstrip("/")
+            patterns.append((is_exception, pattern))
+    return patterns
+
+
+def _is_excluded(relative_path: str, patterns: List[Tuple[bool, str]]) -> bool:
+    """Apply the `.dockerignore` rules: the last matching pattern wins and
+    a pattern matching a directory also matches its content."""
+    parts = relative_path.split("/")
+    prefixes = ["/".join(parts[: idx + 1]) for idx in range(len(parts))]
+
+    excluded = False
+    for is_exception, pattern in patterns:
+        if any(fnmatch.fnmatchcase(prefix, pattern) for prefix in prefixes):
+            excluded = not is_exception
+    return excluded
+
+
+def create_context_archive(context_dir: str, fileobj: IO) -> None:
+    """Write the build context of a directory as a tar archive,
+    honoring its `.dockerignore` file like the docker CLI does."""
+    patterns = _read_ignore_patterns(context_dir)
+    has_exceptions = any(is_exception for is_exception, _ in patterns)
+
+    with tarfile.open(fileobj=fileobj, mode="w") as archive:
+        for root, dirs, files in os.walk(context_dir):
+            relative_root = os.path.relpath(root, context_dir)
+            relative_root = "" if relative_root == "." else relative_root.replace(os.sep, "/")
+
+            kept_dirs = []
+            for directory in sorted(dirs):
+                relative_path = f"{relative_root}/{directory}".lstrip("/")
+                excluded = _is_excluded(relative_path, patterns)
+                if not excluded:
+                    archive.add(os.path.join(root, directory), relative_path, recursive=False)
+                # An exception pattern may re-include some content of an excluded directory
+                if not excluded or has_exceptions:
+                    kept_dirs.append(directory)
+            dirs[:] = kept_dirs
+
+            for file_name in sorted(files):
+                relative_path = f"{relative_root}/{file_name}".lstrip("/")
+                if relative_path in ("Dockerfile", ".dockerignore") or not _is_excluded(
+                    relative_path, patterns
+                ):
+                    archive.add(os.path.join(root, file_name), relative_path, recursive=False)
+
+
+def get_registry_hostname(repository: str) -> str:
+    """Returns the registry a repository (e.g. `my-org/my-app`) is pushed to."""
+    first_component = repository.split("/")[0]
+    if "/" in repository and ("." in first_component or ":" in first_component):
+        return first_component
+    return DOCKER_HUB_REGISTRY
+
+
+def get_registry_auth(registry: str) -> Optional[dict]:
+    """Returns the credentials stored by `docker login` for a registry, if any."""
+    config_path = os.path.join(DockerConfiguration.get_client_config_path(), "config.json")
+    if not os.path.isfile(config_path):
+        return None
+
+    with open(config_path, "r") as config_file:
+        auths = json.load(config_file).get("auths", {})
+
+    hostname = registry.replace("https://", "").replace("http://", "").split("/")[0]
+    for server_address, auth_config in auths.items():
+        server_hostname = server_address.replace("https://", "").replace("http://", "")
+        if server_hostname.split("/")[0] != hostname or "auth" not in auth_config:
+            continue
+        username, password = base64.b64decode(auth_config["auth"]).decode("utf-8").split(":", 1)
+        return {"username": username, "password": password, "serveraddress": server_address}
+    return None
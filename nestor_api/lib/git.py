@@ -1,8 +1,13 @@
 """git library"""
 
+import re
+from typing import List, Optional, Tuple
+
 import semver
 
 import nestor_api.lib.io as io
+import nestor_api.lib.monitoring as monitoring
+from nestor_api.utils import tracing
 from nestor_api.utils.logger import Logger
 
 
@@ -21,6 +26,7 @@ def is_branch_existing(repository_dir: str, branch_name: str) -> bool:
     return len(stdout) != 0
 
 
+@tracing.traced("working_copy", app="app_name")
 def create_working_repository(app_name: str, git_url: str) -> str:
     """Create a working copy of an app's repository"""
     pristine_directory = update_pristine_repository(app_name, git_url)
@@ -61,9 +67,29 @@ def get_last_commit_hash(repository_dir: str, reference: str = "HEAD") -> str:
     return io.execute(f"git rev-parse --short {reference}", repository_dir)
 
 
-def get_last_tag(repository_dir: str) -> str:
-    """Retrieves the last tag of a repository (locally)"""
-    return io.execute("git describe --always --abbrev=0", repository_dir)
+def get_last_tag(repository_dir: str, reference: str = None) -> str:
+    """Retrieves the last tag of a repository (locally), reachable from HEAD or a reference"""
+    return io.execute(
+        f'git describe --always --abbrev=0{f" {reference}" if reference else ""}', repository_dir
+    )
+
+
+def get_remote_branch_hash(
+    repository_dir: str, branch_name: str, remote_name: str = "origin"
+) -> Optional[str]:
+    """Retrieves the commit hash of a remote branch as last fetched, `None` if it does not exist"""
+    stdout = io.execute(
+        f"git for-each-ref --format=%(objectname) refs/remotes/{remote_name}/{branch_name}",
+        repository_dir,
+    )
+    return stdout or None
+
+
+def is_ancestor(repository_dir: str, ancestor: str, descendant: str) -> bool:
+    """Determines if a commit is an ancestor of another one (or the same commit), that is
+    if moving a branch from the first one to the second one would be a fast-forward"""
+    # Counts the commits of the ancestor not in the history of the descendant
+    return io.execute(f"git rev-list --count {descendant}..{ancestor}", repository_dir) == "0"
 
 
 def get_remote_url(repository_dir: str, remote_name: str = "origin") -> str:
@@ -71,11 +97,28 @@ def get_remote_url(repository_dir: str, remote_name: str = "origin") -> str:
     return io.execute(f"git remote get-url {remote_name}", repository_dir)
 
 
-def push(repository_dir: str, branch_name: str = "HEAD") -> None:
-    """Push to the remote repository"""
-    io.execute(f"git push origin {branch_name} --tags --follow-tags", repository_dir)
+# Pattern 'git@host:organization/repository.git' or 'https://host/organization/repository.git'
+REPOSITORY_URL_PATTERN = re.compile(r"[:/]([^/:]+)/([^/]+?)(?:\.git)?/?$")
+
+
+def parse_repository_url(git_url: str) -> Tuple[str, str]:
+    """Returns the organization and the name of the repository of a git url"""
+    match = REPOSITORY_URL_PATTERN.search(git_url)
+    if match is None:
+        raise ValueError(f'Invalid repository url: "{git_url}"')
+    return match.group(1), match.group(2)
+
+
+@tracing.traced("git_push")
+def push(repository_dir: str, refs: List[str], remote_name: str = "origin") -> None:
+    """Push refs to the remote repository, all of them or none (e.g. `refs/tags/<tag>`)"""
+    if not refs:
+        return
+    # Only the given refs are negotiated with the remote, not every local tag
+    io.execute(f"git push --atomic {remote_name} {' '.join(refs)}", repository_dir)
 
 
+@tracing.traced("rebase", branch="branch_name", onto="onto")
 def rebase(repository_dir: str, branch_name: str, *, onto: str = None) -> None:
     """Rebase the current branch on top of the given branch"""
     io.execute(
@@ -83,6 +126,7 @@ def rebase(repository_dir: str, branch_name: str, *, onto: str = None) -> None:
     )
 
 
+@tracing.traced("tag", tag="tag_name")
 def tag(repository_dir: str, tag_name: str, tag_message: str = "NESTOR_AUTO_TAG") -> str:
     """Add a tag to the repository"""
     commit_hash = get_last_commit_hash(repository_dir)
@@ -97,11 +141,14 @@ def tag(repository_dir: str, tag_name: str, tag_message: str = "NESTOR_AUTO_TAG"
     return final_tag
 
 
+@tracing.traced("pristine_fetch", app="app_name")
 def update_pristine_repository(app_name: str, git_url: str) -> str:
     """Update the pristine repository of an application"""
     repository_dir = io.get_pristine_path(app_name)
 
     update_repository(repository_dir, git_url)
+    # Keep track of the last use for the eviction of the least recently used pristines
+    io.touch(repository_dir)
 
     Logger.debug(
         {"app": app_name, "repository": repository_dir},
@@ -132,11 +179,13 @@ def update_repository(repository_dir: str, git_url: str, revision: str = "origin
 
             # No need to clone
             should_clone = False
+            monitoring.record_cache_lookup("repository", "hit")
         else:
             # If the remotes mismatch, remove the old one
             io.remove(repository_dir)
 
     if should_clone:
+        monitoring.record_cache_lookup("repository", "miss")
         io.execute(f"git clone {git_url} {repository_dir}")
 
     io.execute(f"git reset --hard {revision}", repository_dir)
@@ -1,14 +1,33 @@
 """I/O library"""
 from datetime import datetime
 import errno
+import fcntl
 import math
 import os
 from pathlib import Path
 from random import random
 import shutil
+import signal
 import subprocess
+import threading
+from typing import IO, Dict, Iterator, Tuple, cast
+import uuid
 
 from nestor_api.config.config import Configuration
+import nestor_api.lib.monitoring as monitoring
+
+# The working directories in use, with the thread that created them
+_live_directories: Dict[str, threading.Thread] = {}
+_live_directories_lock = threading.Lock()
+
+# The working directories in use are also recorded on disk, for the other processes (e.g. the
+# other workers of the server): each directory has a marker in the owners directory, next to
+# it, holding the token of the process that created it. A process holds a lock on its own
+# "<token>.lock" file as long as it runs.
+OWNERS_DIRECTORY = ".owners"
+OWNER_LOCK_SUFFIX = ".lock"
+# Owners directory => (pid, lock file descriptor, token) of the current process
+_process_owners: Dict[str, Tuple[int, int, str]] = {}
 
 
 def copy(source: str, destination: str) -> None:
@@ -28,6 +47,7 @@ def create_temporary_directory(directory_prefix: str = "") -> str:
 
     # Create directory if it does not exist
     ensure_dir(tmp_directory_path)
+    _track_live_directory(tmp_directory_path)
 
     return tmp_directory_path
 
@@ -39,22 +59,69 @@ def ensure_dir(directory_path: str) -> None:
 
 def execute(command: str, cwd: str = None, env: dict = None) -> str:
     """Executes a command and returns the stdout from it"""
-    result = subprocess.run(
-        command,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        cwd=cwd,
-        env=env,
-        shell=True,
-        check=False,
-    )
-    if result.returncode != 0:
-        stderr = result.stderr.decode("utf-8").rstrip()
-        raise RuntimeError(stderr)
+    with monitoring.measure_command(*monitoring.get_command_labels(command)):
+        result = subprocess.run(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            env=env,
+            shell=True,
+            check=False,
+        )
+        if result.returncode != 0:
+            stderr = result.stderr.decode("utf-8").rstrip()
+            raise RuntimeError(stderr)
 
     return result.stdout.decode("utf-8").rstrip()
 
 
+def execute_stream(
+    command: str, cwd: str = None, env: dict = None, stop: threading.Event = None
+) -> Iterator[str]:
+    """Executes a command and yields the lines of its stdout as they are written.
+    Stopping the iteration early kills the command. So does setting `stop`, from any
+    thread (e.g. when the lines are read by another thread): the iteration then ends."""
+    with monitoring.measure_command(*monitoring.get_command_labels(command)):
+        # In its own process group, so that killing it also kills the command run by the shell
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            env=env,
+            shell=True,
+            start_new_session=True,
+        )
+        stdout, stderr = cast(IO[bytes], process.stdout), cast(IO[bytes], process.stderr)
+        if stop is not None:
+            threading.Thread(
+                target=_kill_when_stopped, args=(process, stop), name="kill-on-stop", daemon=True
+            ).start()
+        try:
+            for line in stdout:
+                yield line.decode("utf-8")
+            error = stderr.read().decode("utf-8").rstrip()
+            if process.wait() != 0 and not (stop is not None and stop.is_set()):
+                raise RuntimeError(error)
+        finally:
+            if process.poll() is None:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
+            stdout.close()
+            stderr.close()
+
+
+def _kill_when_stopped(process: subprocess.Popen, stop: threading.Event) -> None:
+    while process.poll() is None:
+        if stop.wait(0.1):
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            return
+
+
 def exists(file_path: str) -> bool:
     """Checks if a file exists"""
     return Path(file_path).exists()
@@ -68,11 +135,99 @@ def get_pristine_path(pristine_path_name: str) -> str:
 def create_temporary_copy(directory_path: str, target_directory_prefix: str = "") -> str:
     """Creates a copy of a directory in a temporary directory and returns its path"""
     copy_path = get_temporary_directory_path(target_directory_prefix)
+    _track_live_directory(copy_path)
     copy(directory_path, copy_path)
 
     return copy_path
 
 
+def _track_live_directory(directory_path: str) -> None:
+    directory_path = os.path.normpath(directory_path)
+    owners_path = _get_owners_path(directory_path)
+    with _live_directories_lock:
+        _live_directories[directory_path] = threading.current_thread()
+        token = _get_process_owner_token(owners_path)
+    with open(os.path.join(owners_path, os.path.basename(directory_path)), "w") as marker:
+        marker.write(token)
+
+
+def _get_owners_path(directory_path: str) -> str:
+    return os.path.join(os.path.dirname(directory_path), OWNERS_DIRECTORY)
+
+
+def _get_process_owner_token(owners_path: str) -> str:
+    """Returns the token of the current process, creating and locking its lock file once
+    (once again in a forked process, the lock being shared with its parent)."""
+    owner = _process_owners.get(owners_path)
+    if owner is not None and owner[0] == os.getpid():
+        return owner[2]
+
+    token = uuid.uuid4().hex
+    ensure_dir(owners_path)
+    # Locked before being named as a lock file, not to be removed as stale meanwhile
+    tmp_lock_path = os.path.join(owners_path, f".{token}")
+    lock_fd = os.open(tmp_lock_path, os.O_CREAT | os.O_WRONLY, 0o644)
+    fcntl.flock(lock_fd, fcntl.LOCK_EX)
+    os.rename(tmp_lock_path, os.path.join(owners_path, f"{token}{OWNER_LOCK_SUFFIX}"))
+    _process_owners[owners_path] = (os.getpid(), lock_fd, token)
+    return token
+
+
+def _is_owner_alive(owners_path: str, token: str) -> bool:
+    try:
+        lock_fd = os.open(os.path.join(owners_path, f"{token}{OWNER_LOCK_SUFFIX}"), os.O_RDONLY)
+    except FileNotFoundError:
+        return False
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return False
+    except BlockingIOError:
+        return True
+    finally:
+        # Also releases the lock, if acquired
+        os.close(lock_fd)
+
+
+def is_owned_by_live_process(directory_path: str) -> bool:
+    """Checks if a working directory was created by a process still running,
+    this one included."""
+    owners_path = _get_owners_path(os.path.normpath(directory_path))
+    try:
+        with open(os.path.join(owners_path, os.path.basename(directory_path)), "r") as marker:
+            token = marker.read()
+    except FileNotFoundError:
+        return False
+    return _is_owner_alive(owners_path, token)
+
+
+def remove_stale_owners(working_path: str) -> None:
+    """Remove the lock files of the processes that ended, and the markers of the
+    directories that were removed by a process that ended."""
+    owners_path = os.path.join(working_path, OWNERS_DIRECTORY)
+    if not os.path.isdir(owners_path):
+        return
+    for name in os.listdir(owners_path):
+        path = os.path.join(owners_path, name)
+        try:
+            if name.endswith(OWNER_LOCK_SUFFIX):
+                if not _is_owner_alive(owners_path, name[: -len(OWNER_LOCK_SUFFIX)]):
+                    os.remove(path)
+            elif not name.startswith(".") and not os.path.exists(os.path.join(working_path, name)):
+                with open(path, "r") as marker:
+                    token = marker.read()
+                if not _is_owner_alive(owners_path, token):
+                    os.remove(path)
+        except FileNotFoundError:
+            # Removed meanwhile
+            continue
+
+
+def get_live_directories() -> Dict[str, threading.Thread]:
+    """Returns the temporary directories not removed yet, with the thread that created them"""
+    with _live_directories_lock:
+        return dict(_live_directories)
+
+
 def get_temporary_directory_path(prefix: str = "") -> str:
     """Returns a temporary directory path with an optional prefix"""
     random_num = math.floor(random() * 1e9)
@@ -107,6 +262,21 @@ def remove(file_path: str) -> None:
             os.remove(file_path)
         else:
             raise
+    with _live_directories_lock:
+        owner = _live_directories.pop(os.path.normpath(file_path), None)
+    if owner is not None:
+        marker_path = os.path.join(
+            _get_owners_path(os.path.normpath(file_path)), os.path.basename(file_path)
+        )
+        try:
+            os.remove(marker_path)
+        except FileNotFoundError:
+            pass
+
+
+def touch(file_path: str) -> None:
+    """Set the access and modification times of a file or a directory to now"""
+    os.utime(file_path)
 
 
 def write(file_path: str, content: str) -> None:
@@ -0,0 +1,151 @@
+"""Janitor periodically cleaning the work and pristine paths.
+
+Working copies are removed by the jobs once done, but a crash leaks them. The janitor removes
+the working copies whose job is over (the thread that created them died) and, once older than
+the orphan age, the ones left by a process that ended. The working copies of the other
+processes running (e.g. the other workers of the server) are left to their own janitor.
+When the disk quota is exceeded or the free disk space is low, it evicts the least recently
+used pristines. It also updates the disk usage exposed in the metrics.
+"""
+
+import os
+import shutil
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from nestor_api.config.config import Configuration
+from nestor_api.config.janitor import JanitorConfiguration
+import nestor_api.lib.io as io
+import nestor_api.lib.monitoring as monitoring
+from nestor_api.utils.logger import Logger
+from nestor_api.utils.metrics import Counter
+
+# A pristine used recently may be being copied into a working copy
+PRISTINE_GRACE_PERIOD = 10 * 60
+MIB = 1024 * 1024
+
+RECLAIMED_BYTES = Counter(
+    "nestor_janitor_reclaimed_bytes_total",
+    "Disk space reclaimed by the janitor, by directory (work, pristine) and reason",
+    ["directory", "reason"],
+)
+
+_thread: Optional[threading.Thread] = None
+_thread_lock = threading.Lock()
+
+
+def _list_entries(path: str) -> List[Tuple[str, float]]:
+    """Returns the entries of a directory with their last change time, the oldest first"""
+    if not os.path.isdir(path):
+        return []
+    entries = []
+    with os.scandir(path) as iterator:
+        for entry in iterator:
+            if entry.name == io.OWNERS_DIRECTORY:
+                continue
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                # Removed meanwhile
+                continue
+            # A copy keeps the modification time of its source, but its change time is new
+            entries.append((os.path.normpath(entry.path), max(stat.st_mtime, stat.st_ctime)))
+    return sorted(entries, key=lambda entry: entry[1])
+
+
+def _evict(path: str, directory: str, reason: str) -> int:
+    try:
+        size = monitoring.get_directory_size(path) + os.lstat(path).st_size
+        io.remove(path)
+    except OSError as err:
+        Logger.warn({"path": path, "err": str(err)}, "[janitor] Error while evicting")
+        return 0
+    RECLAIMED_BYTES.inc(size, directory=directory, reason=reason)
+    Logger.info({"path": path, "reason": reason, "size": size}, "[janitor] Evicted")
+    return size
+
+
+def evict_orphans(now: float) -> int:
+    """Remove the working copies no job uses anymore, returns the reclaimed bytes"""
+    working_path = Configuration.get_working_path()
+    live_directories = io.get_live_directories()
+    orphan_age = JanitorConfiguration.get_orphan_age()
+    reclaimed = 0
+    for path, changed_at in _list_entries(working_path):
+        owner = live_directories.get(path)
+        if owner is not None:
+            if owner.is_alive():
+                continue
+            reclaimed += _evict(path, "work", "job_ended")
+        elif now - changed_at >= orphan_age and not io.is_owned_by_live_process(path):
+            reclaimed += _evict(path, "work", "orphan")
+    io.remove_stale_owners(working_path)
+    return reclaimed
+
+
+def _is_space_low(used_space: int, free_space: int) -> bool:
+    disk_quota = JanitorConfiguration.get_disk_quota() * MIB
+    min_free_space = JanitorConfiguration.get_min_free_space() * MIB
+    return 0 < disk_quota < used_space or free_space < min_free_space
+
+
+def evict_pristines(now: float) -> int:
+    """Remove the least recently used pristines while the disk quota is exceeded
+    or the free disk space is low, returns the reclaimed bytes"""
+    if (
+        JanitorConfiguration.get_disk_quota() <= 0
+        and JanitorConfiguration.get_min_free_space() <= 0
+    ):
+        return 0
+
+    pristine_path = Configuration.get_pristine_path()
+    used_space = monitoring.get_directory_size(
+        Configuration.get_working_path()
+    ) + monitoring.get_directory_size(pristine_path)
+    free_space = shutil.disk_usage(pristine_path).free if os.path.isdir(pristine_path) else 0
+
+    reclaimed = 0
+    for path, used_at in _list_entries(pristine_path):
+        if not _is_space_low(used_space - reclaimed, free_space + reclaimed):
+            break
+        if now - used_at < PRISTINE_GRACE_PERIOD:
+            break
+        reclaimed += _evict(path, "pristine", "low_space")
+
+    if _is_space_low(used_space - reclaimed, free_space + reclaimed):
+        Logger.warn(
+            {"used_space": used_space - reclaimed, "free_space": free_space + reclaimed},
+            "[janitor] Disk space still low, the remaining directories are in use",
+        )
+    return reclaimed
+
+
+def run_once() -> int:
+    """Clean the work and pristine paths once and measure their disk usage,
+    returns the reclaimed bytes"""
+    now = time.time()
+    reclaimed = evict_orphans(now) + evict_pristines(now)
+    monitoring.measure_directory_sizes()
+    return reclaimed
+
+
+def _run(interval: int) -> None:
+    while True:
+        try:
+            run_once()
+        except Exception as err:  # pylint: disable=broad-except
+            Logger.error({"err": str(err)}, "[janitor] Error while cleaning")
+        time.sleep(interval)
+
+
+def start() -> None:
+    """Start the janitor in a background thread, unless it is disabled or already started"""
+    global _thread  # pylint: disable=global-statement
+    interval = JanitorConfiguration.get_interval()
+    if interval <= 0:
+        return
+    with _thread_lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, args=[interval], name="janitor", daemon=True)
+            _thread.start()
@@ -0,0 +1,449 @@
+"""Kubernetes API client
+
+Talks HTTP to the API servers of the clusters instead of forking `kubectl`. The kubeconfig
+is read once per cluster context (except the service account token files, re-read when the
+API server rejects a rotated token), the connections (tunneled through the configured proxy)
+are kept alive in a pool shared by the threads, and the API discovery is cached.
+"""
+
+import base64
+import functools
+import http.client
+import json
+import os
+import queue
+import ssl
+import tempfile
+import threading
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote, urlencode, urlsplit
+
+import yaml
+
+from nestor_api.config.k8s import K8sConfiguration
+import nestor_api.utils.http as http_utils
+import nestor_api.utils.iterator as iterator_utils
+
+from .enums.k8s_resource_kind import K8sResourceKind
+
+FIELD_MANAGER = "nestor"
+MAX_IDLE_CONNECTIONS = 4
+DEFAULT_TIMEOUT = 60
+
+# The API versions in which the resources read by nestor are fetched
+RESOURCE_API_VERSIONS = {
+    K8sResourceKind.DEPLOYMENT: "apps/v1",
+    K8sResourceKind.CRONJOB: "batch/v1beta1",
+}
+
+
+class K8sApiError(http_utils.HttpApiError):
+    """Raised when the Kubernetes API reports an error."""
+
+
+class ClusterConfig(NamedTuple):
+    """How to reach and authenticate to the API server of a cluster."""
+
+    server: str
+    token: Optional[str] = None
+    token_file: Optional[str] = None
+    ca_file: Optional[str] = None
+    ca_data: Optional[str] = None
+    cert_file: Optional[str] = None
+    cert_data: Optional[str] = None
+    key_file: Optional[str] = None
+    key_data: Optional[str] = None
+    insecure: bool = False
+
+
+def _find_named(entries: Optional[list], name: Optional[str], key: str) -> Optional[dict]:
+    for entry in entries or []:
+        if entry.get("name") == name:
+            return entry.get(key) or {}
+    return None
+
+
+def _read_file_or_data(entry: dict, key: str, base_dir: str) -> Tuple[Optional[str], Optional[str]]:
+    """Returns the path of a file referenced by the kubeconfig (relative to it)
+    or the content embedded in base64 instead."""
+    data = entry.get(f"{key}-data")
+    if data is not None:
+        return None, base64.b64decode(data).decode("utf-8")
+    path = entry.get(key)
+    if path is not None:
+        return os.path.join(base_dir, os.path.expanduser(path)), None
+    return None, None
+
+
+def _read_token(token_file: str) -> str:
+    with open(token_file, "r") as file:
+        return file.read().strip()
+
+
+def load_cluster_config(cluster_name: str, kubeconfig_path: str = None) -> ClusterConfig:
+    """Read the configuration of a cluster context from the kubeconfig."""
+    kubeconfig_path = kubeconfig_path or K8sConfiguration.get_kubeconfig_path()
+    with open(kubeconfig_path, "r") as kubeconfig_file:
+        kubeconfig = yaml.safe_load(kubeconfig_file) or {}
+    base_dir = os.path.dirname(os.path.abspath(kubeconfig_path))
+
+    context = _find_named(kubeconfig.get("contexts"), cluster_name, "context")
+    if context is None:
+        raise K8sApiError(f'Context "{cluster_name}" not found in {kubeconfig_path}')
+    cluster = _find_named(kubeconfig.get("clusters"), context.get("cluster"), "cluster")
+    if cluster is None or "server" not in cluster:
+        raise K8sApiError(f'Cluster of the context "{cluster_name}" not found')
+    user = _find_named(kubeconfig.get("users"), context.get("user"), "user") or {}
+    if "exec" in user or "auth-provider" in user:
+        raise K8sApiError(
+            f'The authentication of the context "{cluster_name}" relies on a plugin, '
+            "which is only supported by the kubectl client"
+        )
+
+    token = user.get("token")
+    token_file = None
+    if token is None and "tokenFile" in user:
+        token_file = os.path.join(base_dir, user["tokenFile"])
+        token = _read_token(token_file)
+    ca_file, ca_data = _read_file_or_data(cluster, "certificate-authority", base_dir)
+    cert_file, cert_data = _read_file_or_data(user, "client-certificate", base_dir)
+    key_file, key_data = _read_file_or_data(user, "client-key", base_dir)
+
+    return ClusterConfig(
+        server=cluster["server"],
+        token=token,
+        token_file=token_file,
+        ca_file=ca_file,
+        ca_data=ca_data,
+        cert_file=cert_file,
+        cert_data=cert_data,
+        key_file=key_file,
+        key_data=key_data,
+        insecure=bool(cluster.get("insecure-skip-tls-verify", False)),
+    )
+
+
+def _create_ssl_context(config: ClusterConfig) -> ssl.SSLContext:
+    context = ssl.create_default_context(cafile=config.ca_file, cadata=config.ca_data)
+    if config.insecure:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+
+    if config.cert_data is None and config.key_data is None:
+        if config.cert_file is not None:
+            context.load_cert_chain(config.cert_file, config.key_file)
+        return context
+
+    # The ssl module only loads certificates from files
+    with tempfile.TemporaryDirectory() as cert_dir:
+        cert_file, key_file = config.cert_file, config.key_file
+        if config.cert_data is not None:
+            cert_file = os.path.join(cert_dir, "client.crt")
+            with open(cert_file, "w") as file:
+                file.write(config.cert_data)
+        if config.key_data is not None:
+            key_file = os.path.join(cert_dir, "client.key")
+            with open(key_file, "w") as file:
+                file.write(config.key_data)
+        if cert_file is None:
+            raise K8sApiError("A client key is configured without its client certificate")
+        context.load_cert_chain(cert_file, key_file)
+    return context
+
+
+def _parse_proxy(proxy: str) -> Optional[Tuple[str, int]]:
+    if not proxy:
+        return None
+    url = urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+    return url.hostname or "", url.port or 80
+
+
+class K8sApiClient:
+    """A minimal Kubernetes API client for a cluster context, safe to share between threads."""
+
+    def __init__(
+        self,
+        cluster_name: str,
+        cluster_config: ClusterConfig = None,
+        proxy: str = None,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        self.cluster_name = cluster_name
+        config = cluster_config or load_cluster_config(cluster_name)
+        server = urlsplit(config.server)
+        self._is_https = server.scheme == "https"
+        self._host = server.hostname or ""
+        self._port = server.port or (443 if self._is_https else 80)
+        self._base_path = server.path.rstrip("/")
+        self._ssl_context = _create_ssl_context(config) if self._is_https else None
+        self._proxy = _parse_proxy(K8sConfiguration.get_http_proxy() if proxy is None else proxy)
+        self._timeout = timeout
+
+        self._headers = {"Accept": "application/json", "User-Agent": FIELD_MANAGER}
+        if config.token:
+            self._headers["Authorization"] = f"Bearer {config.token}"
+        # The service account tokens are rotated: their file is re-read when one is rejected
+        self._token_file = config.token_file
+        self._token_lock = threading.Lock()
+
+        self._idle_connections: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue()
+        # (api version, kind) => (plural name, is namespaced), filled by the API discovery
+        self._resources: Dict[Tuple[str, str], Tuple[str, bool]] = {}
+        self._resources_lock = threading.Lock()
+
+    def close(self) -> None:
+        """Close the idle connections to the API server."""
+        while True:
+            try:
+                self._idle_connections.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def list_resources(
+        self, namespace: str, kinds: List[K8sResourceKind], label_selector: str
+    ) -> dict:
+        """List the resources of the given kinds matching a label selector,
+        in the same format as `kubectl get --output=json`."""
+        items: list = []
+        for kind in kinds:
+            api_version = RESOURCE_API_VERSIONS[kind]
+            resource_list = self._request(
+                "GET",
+                self._get_resource_path(api_version, str(kind), namespace),
+                params={"labelSelector": label_selector},
+            )
+            # The items of a list do not hold their kind
+            items.extend(
+                {"apiVersion": api_version, "kind": str(kind), **item}
+                for item in resource_list.get("items") or []
+            )
+        return {"apiVersion": "v1", "kind": "List", "items": items}
+
+    def watch_resources(
+        self, namespace: str, kinds: List[K8sResourceKind], label_selector: str, timeout: int
+    ) -> Iterator[dict]:
+        """Watch the resources of the given kinds matching a label selector: yields their
+        events ({"type": ..., "object": {...}}) in a single stream, until the timeout
+        (in seconds). Each kind is watched on its own connection, by its own thread."""
+        connections: List[http.client.HTTPConnection] = []
+
+        def watch_kind(kind: K8sResourceKind) -> Iterator[dict]:
+            api_version = RESOURCE_API_VERSIONS[kind]
+            params = {
+                "watch": "1",
+                "labelSelector": label_selector,
+                "timeoutSeconds": str(timeout),
+            }
+            path = self._get_resource_path(api_version, str(kind), namespace)
+            url = f"{self._base_path}{path}?{urlencode(params)}"
+            for attempt in range(2):
+                # Not taken from the pool: the server keeps it busy until the timeout
+                connection = self._new_connection(timeout=timeout + self._timeout)
+                connections.append(connection)
+                headers = self._headers
+                connection.request("GET", url, headers=headers)
+                response = connection.getresponse()
+                if response.status < 400:
+                    break
+                payload = response.read()
+                if (
+                    attempt > 0
+                    or response.status != 401
+                    or not self._reload_token(headers.get("Authorization"))
+                ):
+                    http_utils.raise_for_status(response.status, payload, K8sApiError)
+            for line in response:
+                if line.strip():
+                    event = json.loads(line)
+                    event["object"].setdefault("apiVersion", api_version)
+                    event["object"].setdefault("kind", str(kind))
+                    yield event
+
+        try:
+            yield from iterator_utils.merge_in_threads(
+                {f"watch {kind}": functools.partial(watch_kind, kind) for kind in kinds}
+            )
+        finally:
+            # Ends the watches still running
+            for connection in connections:
+                connection.close()
+
+    def apply(self, resource: dict) -> dict:
+        """Create or update a resource with a server-side apply."""
+        metadata = resource["metadata"]
+        path = self._get_resource_path(
+            resource["apiVersion"],
+            resource["kind"],
+            metadata.get("namespace", "default"),
+            metadata["name"],
+        )
+        return self._request(
+            "PATCH",
+            path,
+            params={"fieldManager": FIELD_MANAGER, "force": "true"},
+            body=json.dumps(resource).encode("utf-8"),
+            content_type="application/apply-patch+yaml",
+        )
+
+    def apply_manifest(self, manifest: str) -> None:
+        """Apply all the resources of a multi-document yaml manifest."""
+        for resource in yaml.safe_load_all(manifest):
+            if resource:
+                self.apply(resource)
+
+    def annotate_resources(
+        self,
+        namespace: str,
+        kinds: List[K8sResourceKind],
+        label_selector: str,
+        annotations: Dict[str, str],
+    ) -> None:
+        """Set annotations on the resources matching a label selector."""
+        patch = json.dumps({"metadata": {"annotations": annotations}}).encode("utf-8")
+        for item in self.list_resources(namespace, kinds, label_selector)["items"]:
+            path = self._get_resource_path(
+                item["apiVersion"], item["kind"], namespace, item["metadata"]["name"]
+            )
+            self._request("PATCH", path, body=patch, content_type="application/merge-patch+json")
+
+    def _reload_token(self, rejected_authorization: Optional[str]) -> bool:
+        """Re-read the token file after the API server rejected a token.
+        Returns whether the request should be sent again with a new token."""
+        if self._token_file is None:
+            return False
+        with self._token_lock:
+            if self._headers.get("Authorization") != rejected_authorization:
+                # Already reloaded by another thread
+                return True
+            try:
+                token = _read_token(self._token_file)
+            except OSError:
+                return False
+            authorization = f"Bearer {token}"
+            if authorization == rejected_authorization:
+                return False
+            # Replaced rather than updated: the headers may be read by other threads
+            self._headers = {**self._headers, "Authorization": authorization}
+            return True
+
+    def _get_resource(self, api_version: str, kind: str) -> Tuple[str, bool]:
+        with self._resources_lock:
+            resource = self._resources.get((api_version, kind))
+        if resource is not None:
+            return resource
+
+        discovery = self._request("GET", self._get_api_prefix(api_version))
+        with self._resources_lock:
+            for api_resource in discovery.get("resources", []):
+                # Skip the subresources (e.g. "deployments/scale")
+                if "/" not in api_resource["name"]:
+                    self._resources[(api_version, api_resource["kind"])] = (
+                        api_resource["name"],
+                        api_resource["namespaced"],
+                    )
+            resource = self._resources.get((api_version, kind))
+        if resource is None:
+            raise K8sApiError(f'Unknown resource kind "{kind}" in {api_version}')
+        return resource
+
+    @staticmethod
+    def _get_api_prefix(api_version: str) -> str:
+        return "/api/v1" if api_version == "v1" else f"/apis/{api_version}"
+
+    def _get_resource_path(
+        self, api_version: str, kind: str, namespace: str, name: str = None
+    ) -> str:
+        plural, is_namespaced = self._get_resource(api_version, kind)
+        path = self._get_api_prefix(api_version)
+        if is_namespaced:
+            path = f"{path}/namespaces/{quote(namespace, safe='')}"
+        path = f"{path}/{plural}"
+        if name is not None:
+            path = f"{path}/{quote(name, safe='')}"
+        return path
+
+    def _new_connection(self, timeout: float = None) -> http.client.HTTPConnection:
+        host, port = self._proxy or (self._host, self._port)
+        timeout = timeout or self._timeout
+        connection: http.client.HTTPConnection
+        if self._is_https:
+            connection = http.client.HTTPSConnection(
+                host, port, timeout=timeout, context=self._ssl_context
+            )
+        else:
+            connection = http.client.HTTPConnection(host, port, timeout=timeout)
+        if self._proxy is not None:
+            connection.set_tunnel(self._host, self._port)
+        return connection
+
+    # pylint: disable=too-many-arguments
+    def _request(
+        self,
+        method: str,
+        path: str,
+        params: dict = None,
+        body: bytes = None,
+        content_type: str = None,
+    ) -> dict:
+        url = f"{self._base_path}{path}"
+        if params:
+            url = f"{url}?{urlencode(params)}"
+        headers = dict(self._headers)
+        if content_type is not None:
+            headers["Content-Type"] = content_type
+
+        status, payload = self._send(method, url, body, headers)
+        if status == 401 and self._reload_token(headers.get("Authorization")):
+            headers["Authorization"] = self._headers["Authorization"]
+            status, payload = self._send(method, url, body, headers)
+
+        http_utils.raise_for_status(status, payload, K8sApiError)
+        return json.loads(payload) if payload else {}
+
+    def _send(
+        self, method: str, url: str, body: Optional[bytes], headers: Dict[str, str]
+    ) -> Tuple[int, bytes]:
+        try:
+            connection = self._idle_connections.get_nowait()
+            is_reused = True
+        except queue.Empty:
+            connection = self._new_connection()
+            is_reused = False
+
+        try:
+            try:
+                connection.request(method, url, body=body, headers=headers)
+                response = connection.getresponse()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                if not is_reused:
+                    raise
+                # The server may have closed the idle keep-alive connection: reconnect once
+                connection.close()
+                connection = self._new_connection()
+                connection.request(method, url, body=body, headers=headers)
+                response = connection.getresponse()
+            payload = response.read()
+        except BaseException:
+            connection.close()
+            raise
+
+        if response.will_close or self._idle_connections.qsize() >= MAX_IDLE_CONNECTIONS:
+            connection.close()
+        else:
+            self._idle_connections.put(connection)
+        return response.status, payload
+
+
+_clients: Dict[str, K8sApiClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(cluster_name: str) -> K8sApiClient:
+    """Returns the API client of a cluster context, shared by all the threads
+    so that its connections and its discovery cache are reused."""
+    with _clients_lock:
+        client = _clients.get(cluster_name)
+        if client is None:
+            client = K8sApiClient(cluster_name)
+            _clients[cluster_name] = client
+        return client
@@ -0,0 +1,122 @@
+"""Record of the digest of the manifests last applied for each app, so that the deployments
+rendering the same manifests again can be skipped without calling kubectl.
+
+The record is kept in a local directory, one file per (cluster, namespace, app). In "cluster"
+mode, it is also mirrored in an annotation of the deployed resources, so that a new nestor
+instance (or one that lost its local record) does not need to apply everything again.
+"""
+
+import hashlib
+import os
+import threading
+from typing import List, Optional
+
+from nestor_api.config.k8s import K8sConfiguration
+import nestor_api.lib.io as io
+from nestor_api.utils.logger import Logger
+
+from . import cli
+from .enums.k8s_resource_kind import K8sResourceKind
+
+DIGEST_ANNOTATION = "nestor/applied-manifests-digest"
+RECORD_MODES = ("local", "cluster")
+ANNOTATED_RESOURCES = [K8sResourceKind.DEPLOYMENT, K8sResourceKind.CRONJOB]
+
+
+def get_digest(manifests: List[Optional[str]]) -> str:
+    """Returns the digest of the rendered manifests of an app, ignoring the missing ones."""
+    digest = hashlib.sha256()
+    for manifest in manifests:
+        if manifest is not None:
+            digest.update(manifest.encode("utf-8"))
+            # Separator, so that moving content between manifests changes the digest
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _get_record_path(deployment_config: dict) -> str:
+    key = "\0".join(
+        [
+            deployment_config["cluster_name"],
+            deployment_config["namespace"],
+            deployment_config["app"],
+        ]
+    )
+    file_name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return os.path.join(K8sConfiguration.get_applied_record_path(), file_name)
+
+
+def _read_local_record(deployment_config: dict) -> Optional[str]:
+    record_path = _get_record_path(deployment_config)
+    if not io.exists(record_path):
+        return None
+    return io.read(record_path).strip()
+
+
+def _write_local_record(deployment_config: dict, digest: str) -> None:
+    record_path = _get_record_path(deployment_config)
+    io.ensure_dir(os.path.dirname(record_path))
+    # Written aside then renamed, so that a concurrent reader never sees a partial digest
+    temporary_path = f"{record_path}.{os.getpid()}.{threading.get_ident()}"
+    io.write(temporary_path, digest)
+    os.replace(temporary_path, record_path)
+
+
+def _is_annotated_in_cluster(deployment_config: dict, digest: str) -> bool:
+    deployed_configuration = cli.fetch_resource_configuration(
+        deployment_config["cluster_name"],
+        deployment_config["namespace"],
+        deployment_config["app"],
+        ANNOTATED_RESOURCES,
+    )
+    items = deployed_configuration["items"]
+    return len(items) > 0 and all(
+        item["metadata"].get("annotations", {}).get(DIGEST_ANNOTATION) == digest for item in items
+    )
+
+
+def is_applied(deployment_config: dict, digest: str) -> bool:
+    """Returns `True` if the manifests with this digest are the last ones applied for the app."""
+    mode = K8sConfiguration.get_applied_record()
+    if mode not in RECORD_MODES:
+        return False
+    if _read_local_record(deployment_config) == digest:
+        return True
+    if mode == "cluster" and _is_annotated_in_cluster(deployment_config, digest):
+        _write_local_record(deployment_config, digest)
+        return True
+    return False
+
+
+def record_applied(deployment_config: dict, digest: str) -> None:
+    """Record the digest of the manifests just applied for the app. The manifests being
+    applied, a failure to record them is logged: they will be applied again next time."""
+    mode = K8sConfiguration.get_applied_record()
+    if mode not in RECORD_MODES:
+        return
+    if mode == "cluster":
+        try:
+            cli.annotate_resources(
+                deployment_config["cluster_name"],
+                deployment_config["namespace"],
+                deployment_config["app"],
+                ANNOTATED_RESOURCES,
+                {DIGEST_ANNOTATION: digest},
+            )
+        # pylint: disable=broad-except
+        except Exception as err:
+            Logger.warn(
+                {"app": deployment_config["app"], "err": str(err)},
+                "[k8s] Failed to annotate the resources with the applied manifests digest",
+            )
+    try:
+        _write_local_record(deployment_config, digest)
+    except OSError as err:
+        Logger.warn(
+            {"app": deployment_config["app"], "err": str(err)},
+            "[k8s] Failed to record the applied manifests digest",
+        )
+        return
+    Logger.debug(
+        {"app": deployment_config["app"], "digest": digest}, "[k8s] Applied manifests recorded"
+    )
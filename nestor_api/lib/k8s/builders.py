@@ -1,5 +1,7 @@
 """k8s deployment file builders"""
 
+import hashlib
+import json
 import os
 import time
 from typing import Optional, Tuple
@@ -12,28 +14,35 @@ from nestor_api.config.replicas import ReplicasDefaultConfiguration
 import nestor_api.lib.config as config
 import nestor_api.lib.docker as docker
 import nestor_api.lib.io as io
+from nestor_api.utils import tracing
 import nestor_api.utils.dict as dict_utils
 import nestor_api.utils.list as list_utils
 import yaml_lib
 
 
+@tracing.traced("render", tag="tag_to_deploy")
 def build_deployment_yaml(deployment_config: dict, templates: dict, tag_to_deploy: str) -> str:
     """Builds the deployment.yaml corresponding to the provided k8s deployment configuration."""
-    yaml_sections = []
+    resources = []
 
     processes = config.get_processes(deployment_config)
     for process in processes:
         sections = get_sections_for_process(process, deployment_config, tag_to_deploy, templates)
-        yaml_sections.extend(sections)
+        resources.extend(sections)
 
     cronjobs = config.get_cronjobs(deployment_config)
     for cronjob in cronjobs:
         sections = get_sections_for_cronjob(cronjob, deployment_config, tag_to_deploy, templates)
-        yaml_sections.extend(sections)
+        resources.extend(sections)
 
-    return "\n".join(yaml_sections)
+    namespace = set_namespace(deployment_config, resources, templates)
+    if namespace is not None:
+        resources.insert(0, namespace)
+
+    return serialize_resources(resources)
 
 
+@tracing.traced("render_ingress", process="process_name")
 def build_ingress_yaml(deployment_config: dict, process_name: str, templates: dict) -> str:
     """Builds the k8s yaml corresponding to the provided configuration."""
     app_name, sanitized_process_name, metadata_name = get_sanitized_names(
@@ -60,6 +69,10 @@ def build_ingress_yaml(deployment_config: dict, process_name: str, templates: di
     return "\n".join(deployment_resources)
 
 
+# Kinds of the resources shared by the processes of an app, applied once and first
+# since the other resources depend on them
+SHARED_RESOURCE_KINDS = ["Namespace"]
+
 TEMPLATES = [
     "deployment",
     "hpa",
@@ -80,6 +93,7 @@ def _load_template(templates_path: str, template_compiler: pybars.Compiler, temp
     return template_compiler.compile(file_content)
 
 
+@tracing.traced("load_templates")
 def load_templates(templates_path: str) -> dict:
     """Load the builder templates from the configuration path."""
     template_compiler = pybars.Compiler()
@@ -93,7 +107,7 @@ def load_templates(templates_path: str) -> dict:
 def get_sections_for_process(
     process: dict, deployment_config: dict, tag_to_deploy: str, templates: dict
 ) -> list:
-    """Build the deployment sections of a process."""
+    """Build the k8s resources of a process."""
     process_name = process["name"]
     app_name, sanitized_process_name, metadata_name = get_sanitized_names(
         deployment_config, process_name
@@ -131,9 +145,6 @@ def get_sections_for_process(
         )
     )
 
-    timestamp = round(time.time() * 1000)  # timestamp in milliseconds
-    deployment["spec"]["template"]["metadata"]["annotations"] = {"date": str(timestamp)}
-
     set_secret(deployment_config, deployment)
 
     hpa = set_replicas(deployment_config, process_name, deployment, templates)
@@ -156,21 +167,17 @@ def get_sections_for_process(
 
     set_environment_variables(deployment_config, deployment, service_port)
 
-    deployment_resources.append(deployment)
+    set_pod_template_annotation(deployment)
 
-    namespace = set_namespace(deployment_config, deployment_resources, templates)
-    if namespace is not None:
-        deployment_resources.insert(0, namespace)
+    deployment_resources.append(deployment)
 
-    return list_utils.flatten(
-        [["---", yaml_lib.convert_to_yaml(section)] for section in deployment_resources]
-    )
+    return deployment_resources
 
 
 def get_sections_for_cronjob(
     process: dict, deployment_config: dict, tag_to_deploy: str, templates: dict
 ) -> list:
-    """Build the deployment sections of a cronjob."""
+    """Build the k8s resources of a cronjob."""
     process_name = process["name"]
     app_name, sanitized_process_name, metadata_name = get_sanitized_names(
         deployment_config, process_name
@@ -222,13 +229,7 @@ def get_sections_for_cronjob(
     cronjob["spec"]["jobTemplate"]["spec"] = job["spec"]
     cronjob_sections.append(cronjob)
 
-    namespace = set_namespace(deployment_config, cronjob_sections, templates)
-    if namespace is not None:
-        cronjob_sections.insert(0, namespace)
-
-    return list_utils.flatten(
-        [["---", yaml_lib.convert_to_yaml(section)] for section in cronjob_sections]
-    )
+    return cronjob_sections
 
 
 def get_anti_affinity_node(
@@ -334,6 +335,18 @@ def get_sanitized_names(deployment_config: dict, process_name: str) -> Tuple[str
     return app, sanitized_process_name, metadata_name
 
 
+def get_pod_template_hash(pod_template: dict) -> str:
+    """Returns a hash of the labels and the spec (image, command, env, resources...) of a pod
+    template, which only changes when the pods need to be replaced."""
+    content = json.dumps(
+        {"labels": pod_template["metadata"].get("labels"), "spec": pod_template["spec"]},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
 def get_secret_variables(app_config: dict) -> dict:
     """Returns the secret variables from configuration."""
     secret_variables = app_config.get("variables", {}).get("secret", {})
@@ -367,6 +380,33 @@ def get_variables(deployment_config: dict) -> dict:
     }
 
 
+def serialize_resources(resources: list) -> str:
+    """Serialize k8s resources into a multi-document yaml. The shared resources
+    (e.g. the namespace) are serialized once, before the others."""
+    shared_resources = []
+    other_resources = []
+    shared_resource_keys = set()
+    for resource in resources:
+        kind = resource.get("kind")
+        if kind in SHARED_RESOURCE_KINDS:
+            key = (kind, resource["metadata"]["name"])
+            if key not in shared_resource_keys:
+                shared_resource_keys.add(key)
+                shared_resources.append(resource)
+        else:
+            other_resources.append(resource)
+    shared_resources.sort(key=lambda resource: SHARED_RESOURCE_KINDS.index(resource["kind"]))
+
+    return "\n".join(
+        list_utils.flatten(
+            [
+                ["---", yaml_lib.convert_to_yaml(resource)]
+                for resource in shared_resources + other_resources
+            ]
+        )
+    )
+
+
 def set_anti_affinity(
     deployment_config: dict, process_name: str, resource: dict, templates: dict
 ) -> None:
@@ -423,6 +463,18 @@ def set_node_selector(deployment_config: dict, process_name: str, resource: dict
         resource["spec"]["template"]["spec"]["nodeSelector"] = node_selector
 
 
+def set_pod_template_annotation(resource: dict) -> None:
+    """Annotate the pod template of a resource. With the date, every deployment rolls the pods
+    out; with a hash of the template, deploying the same version and configuration is a no-op."""
+    pod_template = resource["spec"]["template"]
+    if K8sConfiguration.get_pod_template_annotation() == "hash":
+        annotations = {"checksum/pod-template": get_pod_template_hash(pod_template)}
+    else:
+        timestamp = round(time.time() * 1000)  # timestamp in milliseconds
+        annotations = {"date": str(timestamp)}
+    pod_template["metadata"]["annotations"] = annotations
+
+
 def set_probes(deployment_config: dict, process_name: str, resource: dict, port: int) -> None:
     """Attach the process' probes to the resource if configured."""
     if process_name in deployment_config["probes"]:
@@ -1,12 +1,19 @@
-"""Kubernetes' kubectl library."""
+"""Kubernetes' kubectl library.
 
+With `NESTOR_K8S_CLIENT=api`, the commands are sent to the Kubernetes API
+with the pooled client of `api_client` instead of forking kubectl."""
+
+import functools
 import json
 import os
-from typing import List
+import threading
+from typing import Dict, Generator, Iterable, Iterator, List
 
 from nestor_api.config.k8s import K8sConfiguration
 import nestor_api.lib.io as io
+import nestor_api.utils.iterator as iterator_utils
 
+from . import api_client
 from .enums.k8s_resource_kind import K8sResourceKind
 
 
@@ -17,10 +24,19 @@ def _build_kubectl_env() -> dict:
     }
 
 
+def _is_api_client_enabled() -> bool:
+    return K8sConfiguration.get_client() == "api"
+
+
 def fetch_resource_configuration(
     cluster_name: str, namespace: str, app_name: str, resources: List[K8sResourceKind]
 ) -> dict:
-    """Fetch a resource's configuration using kubectl."""
+    """Fetch a resource's configuration using kubectl or the API."""
+    if _is_api_client_enabled():
+        return api_client.get_client(cluster_name).list_resources(
+            namespace, resources, f"app={app_name}"
+        )
+
     resources_str = ",".join([str(resource) for resource in resources])
     command = (
         "kubectl "
@@ -37,9 +53,192 @@ def fetch_resource_configuration(
     return json.loads(stdout)
 
 
+# Fields of the pod template read by the deployment status, and where
+# they are in the resources: (Deployment path, CronJob path)
+POD_TEMPLATE_PATHS = (".spec.template", ".spec.jobTemplate.spec.template")
+STATUS_FIELDS = [
+    "{.kind}",
+    "{.spec.schedule}",
+    *[
+        "".join(f"{{{template_path}{field}}}" for template_path in POD_TEMPLATE_PATHS)
+        for field in [
+            ".metadata.labels.process",
+            ".spec.containers[0].image",
+            ".spec.containers[0].args",
+            ".spec.containers[0].env",
+        ]
+    ],
+]
+STATUS_JSONPATH = "{range .items[*]}" + '{"\\t"}'.join(STATUS_FIELDS) + '{"\\n"}{end}'
+
+
+def _parse_status_line(line: str) -> dict:
+    """Rebuild a resource, trimmed down to the fields of the deployment status,
+    from a line printed with the `STATUS_JSONPATH` template."""
+    kind, schedule, process, image, args, env = line.rstrip("\n").split("\t")
+    pod_template = {
+        "metadata": {"labels": {"process": process}},
+        "spec": {
+            "containers": [
+                {
+                    "image": image,
+                    # Lists are printed as JSON, and missing fields as empty strings
+                    "args": json.loads(args) if args else [],
+                    "env": json.loads(env) if env else [],
+                }
+            ],
+        },
+    }
+    if kind == K8sResourceKind.CRONJOB.value:
+        return {
+            "kind": kind,
+            "spec": {"schedule": schedule, "jobTemplate": {"spec": {"template": pod_template}}},
+        }
+    return {"kind": kind, "spec": {"template": pod_template}}
+
+
+def fetch_resource_status(
+    cluster_name: str, namespace: str, app_name: str, resources: List[K8sResourceKind]
+) -> Iterator[dict]:
+    """Fetch the resources of an app using kubectl or the API, trimmed down to the fields
+    of the deployment status (process label, schedule, image, args and env of the first
+    container). Unlike `fetch_resource_configuration`, kubectl only prints these fields,
+    one resource per line, and the resources are yielded as they are read."""
+    if _is_api_client_enabled():
+        # The API cannot project the fields of the resources
+        yield from api_client.get_client(cluster_name).list_resources(
+            namespace, resources, f"app={app_name}"
+        )["items"]
+        return
+
+    resources_str = ",".join([str(resource) for resource in resources])
+    command = (
+        "kubectl "
+        f"--context {cluster_name} "
+        f"--namespace {namespace} "
+        f"get {resources_str} "
+        f"--output=jsonpath='{STATUS_JSONPATH}' "
+        f"--selector app={app_name}"
+    )
+    env = _build_kubectl_env()
+
+    for line in io.execute_stream(command, env=env):
+        if line.strip():
+            yield _parse_status_line(line)
+
+
+def _parse_json_stream(lines: Iterable[str]) -> Iterator[dict]:
+    """Parse the successive JSON documents printed by kubectl, each over several lines."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    for line in lines:
+        buffer += line
+        # A document can only end on a line closing an object at the top level
+        if not line.startswith("}") and not (line.startswith("{") and line.rstrip().endswith("}")):
+            continue
+        try:
+            document, end = decoder.raw_decode(buffer.lstrip())
+        except ValueError:
+            continue
+        buffer = buffer.lstrip()[end:]
+        yield document
+
+
+def _watch_kind(
+    cluster_name: str,
+    namespace: str,
+    app_name: str,
+    resource: K8sResourceKind,
+    timeout: int,
+    stop: threading.Event,
+) -> Iterator[dict]:
+    command = (
+        "kubectl "
+        f"--context {cluster_name} "
+        f"--namespace {namespace} "
+        f"get {resource} "
+        "--watch "
+        "--output-watch-events "
+        "--output=json "
+        f"--request-timeout={timeout}s "
+        f"--selector app={app_name}"
+    )
+    env = _build_kubectl_env()
+
+    try:
+        yield from _parse_json_stream(io.execute_stream(command, env=env, stop=stop))
+    except RuntimeError as err:
+        # Reaching the request timeout ends the watch, it is not an error
+        message = str(err).lower()
+        if "timeout" not in message and "deadline exceeded" not in message:
+            raise
+
+
+def watch_resources(
+    cluster_name: str, namespace: str, app_name: str, resources: List[K8sResourceKind], timeout: int
+) -> Generator[dict, None, None]:
+    """Watch the resources of an app using kubectl or the API: yields the events
+    ({"type": "ADDED" | "MODIFIED" | "DELETED", "object": {...}}) of all the resources
+    in a single stream, until the timeout (in seconds).
+    kubectl only watches one kind of resource at a time: a kubectl is run for each kind,
+    by its own thread, and they are all killed when the watch ends."""
+    if _is_api_client_enabled():
+        yield from api_client.get_client(cluster_name).watch_resources(
+            namespace, resources, f"app={app_name}", timeout
+        )
+        return
+
+    stop = threading.Event()
+    try:
+        yield from iterator_utils.merge_in_threads(
+            {
+                f"watch {resource}": functools.partial(
+                    _watch_kind, cluster_name, namespace, app_name, resource, timeout, stop
+                )
+                for resource in resources
+            }
+        )
+    finally:
+        stop.set()
+
+
 def apply_config(cluster_name: str, yaml_path: str) -> None:
-    """Apply the k8s configuration using kubectl."""
+    """Apply the k8s configuration using kubectl or the API."""
+    if _is_api_client_enabled():
+        api_client.get_client(cluster_name).apply_manifest(io.read(yaml_path))
+        return
+
     command = "kubectl " f"--context {cluster_name} " f"apply -f {yaml_path}"
     env = _build_kubectl_env()
 
     io.execute(command, env=env)
+
+
+def annotate_resources(
+    cluster_name: str,
+    namespace: str,
+    app_name: str,
+    resources: List[K8sResourceKind],
+    annotations: Dict[str, str],
+) -> None:
+    """Set annotations on the resources of an app using kubectl or the API."""
+    if _is_api_client_enabled():
+        api_client.get_client(cluster_name).annotate_resources(
+            namespace, resources, f"app={app_name}", annotations
+        )
+        return
+
+    resources_str = ",".join([str(resource) for resource in resources])
+    annotations_str = " ".join([f"{key}={value}" for key, value in annotations.items()])
+    command = (
+        "kubectl "
+        f"--context {cluster_name} "
+        f"--namespace {namespace} "
+        f"annotate {resources_str} "
+        "--overwrite "
+        f"--selector app={app_name} "
+        f"{annotations_str}"
+    )
+    env = _build_kubectl_env()
+
+    io.execute(command, env=env)
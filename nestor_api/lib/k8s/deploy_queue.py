@@ -0,0 +1,277 @@
+"""Deploy queue: runs the deployments requested through the API in the background.
+
+Each cluster has its own queue, running a bounded number of deployments at the same time
+(`NESTOR_K8S_DEPLOY_CONCURRENCY`). The deployments of an app on a cluster run one at a time,
+in the order of their jobs, so that the last tag queued is the one deployed in the end.
+A deployment is followed until its rollout completes, its progress being reported in
+the status of the job: a rollout not completed in time fails the deployment.
+The jobs are dispatched by a single thread, and the jobs
+of an environment share a copy of its configuration, with the templates and the apps
+configurations loaded once, as long as the environment stays on the same commit.
+"""
+
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+import os
+import queue
+from threading import Lock, Thread
+from typing import Deque, Dict, List, Optional, Tuple
+import uuid
+
+from nestor_api.config.k8s import K8sConfiguration
+import nestor_api.lib.config as config
+import nestor_api.lib.monitoring as monitoring
+from nestor_api.utils.error_handling import non_blocking_clean
+from nestor_api.utils.logger import Logger
+
+from . import builders, deployment
+
+# Finished jobs kept for their status to be retrieved
+MAX_FINISHED_JOBS = 1000
+FINISHED_STATUSES = ["succeeded", "failed"]
+
+
+class ConfigSnapshot:  # pylint: disable=too-few-public-methods
+    """A copy of the configuration of an environment at a commit, shared by the jobs
+    deploying it. It is removed once outdated by a newer commit and no longer used."""
+
+    def __init__(self, commit: str, config_dir: str, project_config: dict, templates: dict):
+        self.commit = commit
+        self.config_dir = config_dir
+        self.project_config = project_config
+        self.templates = templates
+        self.apps_config: Dict[str, dict] = {}
+        self.users = 0
+        self.is_outdated = False
+
+    def get_app_config(self, app_name: str) -> dict:
+        """Returns the configuration of an app, loaded once."""
+        if app_name not in self.apps_config:
+            self.apps_config[app_name] = config.get_app_config(
+                app_name, self.config_dir, self.project_config
+            )
+        return self.apps_config[app_name]
+
+
+_lock = Lock()
+_jobs: "OrderedDict[str, dict]" = OrderedDict()
+# Last configuration snapshot of each environment
+_snapshots: Dict[str, ConfigSnapshot] = {}
+_executors: Dict[str, ThreadPoolExecutor] = {}
+# Deployments of each (cluster, app), the first one being queued or running on the cluster
+_app_deployments: Dict[Tuple[str, str], Deque[tuple]] = {}
+_pending_jobs: "queue.Queue[str]" = queue.Queue()
+_dispatcher: Optional[Thread] = None
+
+
+def submit(app_name: str, environment: str, tag: str) -> dict:
+    """Queue the deployment of a tag of an app on the clusters of an environment,
+    returns the job with the id to retrieve its status."""
+    job: dict = {
+        "id": uuid.uuid4().hex,
+        "app": app_name,
+        "environment": environment,
+        "tag": tag,
+        "status": "queued",
+        "clusters": {},
+        "err": None,
+    }
+    with _lock:
+        _jobs[job["id"]] = job
+        _forget_finished_jobs()
+        _start_dispatcher()
+        job_copy = _copy_job(job)
+    _pending_jobs.put(job["id"])
+    return job_copy
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    """Returns the current state of a job, `None` if unknown."""
+    with _lock:
+        job = _jobs.get(job_id)
+        return None if job is None else _copy_job(job)
+
+
+def _copy_job(job: dict) -> dict:
+    return {
+        **job,
+        "clusters": {cluster: dict(status) for cluster, status in job["clusters"].items()},
+    }
+
+
+def _forget_finished_jobs() -> None:
+    finished_job_ids = [
+        job_id for job_id, job in _jobs.items() if job["status"] in FINISHED_STATUSES
+    ]
+    for job_id in finished_job_ids[: max(0, len(finished_job_ids) - MAX_FINISHED_JOBS)]:
+        del _jobs[job_id]
+
+
+def _start_dispatcher() -> None:
+    global _dispatcher  # pylint: disable=global-statement
+    if _dispatcher is None or not _dispatcher.is_alive():
+        # Long-lived: the configuration snapshots it creates are not leaked working copies
+        _dispatcher = Thread(target=_dispatch_jobs, name="deploy-dispatcher", daemon=True)
+        _dispatcher.start()
+
+
+def _dispatch_jobs() -> None:
+    while True:
+        _dispatch(_pending_jobs.get())
+
+
+def _get_executor(cluster_name: str) -> ThreadPoolExecutor:
+    with _lock:
+        if cluster_name not in _executors:
+            _executors[cluster_name] = ThreadPoolExecutor(
+                max_workers=K8sConfiguration.get_deploy_concurrency(),
+                thread_name_prefix=f"deploy-{cluster_name}",
+            )
+        return _executors[cluster_name]
+
+
+def _create_snapshot(environment: str, commit: str) -> ConfigSnapshot:
+    config_dir = config.create_temporary_config_copy()
+    try:
+        config.change_environment(environment, config_dir)
+        templates_path = os.path.join(config_dir, K8sConfiguration.get_templates_dir())
+        return ConfigSnapshot(
+            commit,
+            config_dir,
+            config.get_project_config(config_dir),
+            builders.load_templates(templates_path),
+        )
+    except Exception:
+        non_blocking_clean(config_dir, message_prefix="[deploy_queue]")
+        raise
+
+
+def _get_snapshot(environment: str) -> ConfigSnapshot:
+    """Returns the configuration snapshot of the last commit of an environment."""
+    commit = config.get_remote_environment_commit(environment)
+    if not commit:
+        raise ValueError(f'Unknown environment "{environment}"')
+
+    with _lock:
+        snapshot = _snapshots.get(environment)
+    if snapshot is not None and snapshot.commit == commit:
+        monitoring.record_cache_lookup("config_snapshot", "hit")
+        return snapshot
+    monitoring.record_cache_lookup("config_snapshot", "miss")
+
+    new_snapshot = _create_snapshot(environment, commit)
+    with _lock:
+        _snapshots[environment] = new_snapshot
+        if snapshot is not None:
+            snapshot.is_outdated = True
+    if snapshot is not None:
+        _release_snapshot(snapshot, users=0)
+    return new_snapshot
+
+
+def _release_snapshot(snapshot: ConfigSnapshot, users: int = 1) -> None:
+    with _lock:
+        snapshot.users -= users
+        is_removable = snapshot.is_outdated and snapshot.users == 0
+    if is_removable:
+        non_blocking_clean(snapshot.config_dir, message_prefix="[deploy_queue]")
+
+
+def _update_cluster_status(job: dict, cluster_name: str, **fields) -> None:
+    with _lock:
+        job["clusters"][cluster_name].update(fields)
+        statuses = [cluster["status"] for cluster in job["clusters"].values()]
+        if all(status in FINISHED_STATUSES for status in statuses):
+            job["status"] = "failed" if "failed" in statuses else "succeeded"
+
+
+# pylint: disable=broad-except
+def _dispatch(job_id: str) -> None:
+    """Queue the deployments of a job on their clusters."""
+    with _lock:
+        job = _jobs[job_id]
+    try:
+        snapshot = _get_snapshot(job["environment"])
+        deployments_config: List[dict] = config.get_deployments(snapshot.get_app_config(job["app"]))
+        if not deployments_config:
+            raise ValueError(f'No deployment configured for "{job["environment"]}"')
+    except Exception as err:
+        Logger.error(
+            {"job": job_id, "app": job["app"], "err": str(err)},
+            "[deploy_queue] Error while preparing the deployment",
+        )
+        with _lock:
+            job["status"] = "failed"
+            job["err"] = str(err)
+        return
+
+    with _lock:
+        job["status"] = "running"
+        job["clusters"] = {
+            deployment_config["cluster_name"]: {"status": "queued"}
+            for deployment_config in deployments_config
+        }
+        snapshot.users += len(deployments_config)
+    for deployment_config in deployments_config:
+        _queue_deployment(job, deployment_config, snapshot)
+
+
+def _queue_deployment(job: dict, deployment_config: dict, snapshot: ConfigSnapshot) -> None:
+    key = (deployment_config["cluster_name"], job["app"])
+    with _lock:
+        deployments = _app_deployments.setdefault(key, deque())
+        deployments.append((job, deployment_config, snapshot))
+        is_first = len(deployments) == 1
+    if is_first:
+        _get_executor(key[0]).submit(_deploy_next, key)
+
+
+def _deploy_next(key: Tuple[str, str]) -> None:
+    """Run the first deployment of an app on a cluster, then queue the next one."""
+    with _lock:
+        job, deployment_config, snapshot = _app_deployments[key][0]
+    try:
+        _deploy(job, deployment_config, snapshot)
+    finally:
+        with _lock:
+            deployments = _app_deployments[key]
+            deployments.popleft()
+            has_next = len(deployments) > 0
+            if not has_next:
+                del _app_deployments[key]
+        if has_next:
+            _get_executor(key[0]).submit(_deploy_next, key)
+
+
+# pylint: disable=broad-except
+@monitoring.tracked_job("deploy")
+def _deploy(job: dict, deployment_config: dict, snapshot: ConfigSnapshot) -> None:
+    cluster_name = deployment_config["cluster_name"]
+    _update_cluster_status(job, cluster_name, status="running")
+    try:
+        changes = deployment.deploy_app(
+            deployment_config,
+            snapshot.config_dir,
+            job["tag"],
+            wait=True,
+            on_rollout_progress=lambda progress: _update_cluster_status(
+                job, cluster_name, rollout=progress
+            ),
+            templates=snapshot.templates,
+        )
+        rollout_progress = changes.pop("rollout", None)
+        if rollout_progress is not None and not rollout_progress["done"]:
+            raise RuntimeError("The rollout did not complete in time")
+        _update_cluster_status(job, cluster_name, status="succeeded", changes=changes)
+        Logger.info(
+            {"job": job["id"], "app": job["app"], "cluster": cluster_name},
+            "[deploy_queue] Application deployed",
+        )
+    except Exception as err:
+        Logger.error(
+            {"job": job["id"], "app": job["app"], "cluster": cluster_name, "err": str(err)},
+            "[deploy_queue] Error while deploying the application",
+        )
+        _update_cluster_status(job, cluster_name, status="failed", err=str(err))
+    finally:
+        _release_snapshot(snapshot)
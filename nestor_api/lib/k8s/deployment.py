@@ -1,39 +1,97 @@
 """Kubernetes deployment library."""
 
 import os
-from typing import Optional
+from typing import Callable, Optional, Tuple
 
 from nestor_api.config.k8s import K8sConfiguration
 import nestor_api.lib.config as config
 import nestor_api.lib.io as io
+from nestor_api.utils import tracing
 import nestor_api.utils.list as list_utils
 
-from . import builders, cli
+from . import applied_manifests, builders, cli, rollout
 from .enums.k8s_resource_kind import K8sResourceKind
 
 WEB_PROCESS_NAME = "web"
-
-
-def deploy_app(deployment_config: dict, config_dir: str, tag_to_deploy: str) -> dict:
+EMPTY_STATUS: dict = {"processes": [], "cronjobs": [], "env": []}
+
+
+@tracing.traced("deploy", start_trace=True, tag="tag_to_deploy")
+def deploy_app(
+    deployment_config: dict,
+    config_dir: str,
+    tag_to_deploy: str,
+    wait: bool = False,
+    on_rollout_progress: Callable[[dict], None] = None,
+    templates: dict = None,
+) -> dict:
     """Deploy a new version of an application on kubernetes
-    following the provided configuration."""
-    templates_path = os.path.join(config_dir, K8sConfiguration.get_templates_dir())
-    templates = builders.load_templates(templates_path)
+    following the provided configuration.
+    With `wait`, the rollout is followed until it completes (or times out): its progress is
+    passed to `on_rollout_progress` as it goes, and the last one is returned as "rollout".
+    The templates loaded from `config_dir` can be provided to share them between deployments."""
+    tracing.set_attribute("app", deployment_config.get("app"))
+    tracing.set_attribute("cluster", deployment_config.get("cluster_name"))
+    if templates is None:
+        templates_path = os.path.join(config_dir, K8sConfiguration.get_templates_dir())
+        templates = builders.load_templates(templates_path)
+
+    ingress_yaml, deployment_yaml = render_manifests(deployment_config, templates, tag_to_deploy)
+
+    digest = applied_manifests.get_digest([ingress_yaml, deployment_yaml])
+    if applied_manifests.is_applied(deployment_config, digest):
+        tracing.set_attribute("skipped", True)
+        status_changes = get_deployment_statuses_diff(EMPTY_STATUS, EMPTY_STATUS)
+        if wait:
+            # Only recorded once rolled out, the rollout is expected to be done already
+            status_changes["rollout"] = _wait_for_rollout(deployment_config, on_rollout_progress)
+        return status_changes
 
     previous_status = get_deployment_status(deployment_config)
 
-    if has_process(deployment_config, WEB_PROCESS_NAME):
-        deploy_app_ingress(deployment_config, WEB_PROCESS_NAME, templates)
-
-    deployment_yaml = builders.build_deployment_yaml(deployment_config, templates, tag_to_deploy)
+    if ingress_yaml is not None:
+        write_and_deploy_configuration(deployment_config["cluster_name"], ingress_yaml)
     write_and_deploy_configuration(deployment_config["cluster_name"], deployment_yaml)
 
+    rollout_progress = None
+    if wait:
+        rollout_progress = _wait_for_rollout(deployment_config, on_rollout_progress)
+
     new_status = get_deployment_status(deployment_config)
     status_changes = get_deployment_statuses_diff(previous_status, new_status)
+    if wait:
+        status_changes["rollout"] = rollout_progress
+
+    # Manifests whose rollout did not complete are applied again by the next deployment
+    if not wait or (rollout_progress is not None and rollout_progress["done"]):
+        applied_manifests.record_applied(deployment_config, digest)
 
     return status_changes
 
 
+def _wait_for_rollout(
+    deployment_config: dict, on_rollout_progress: Optional[Callable[[dict], None]]
+) -> Optional[dict]:
+    rollout_progress = None
+    for rollout_progress in rollout.watch_rollout(deployment_config):
+        if on_rollout_progress is not None:
+            on_rollout_progress(rollout_progress)
+    tracing.set_attribute("rollout_done", rollout_progress and rollout_progress["done"])
+    return rollout_progress
+
+
+def render_manifests(
+    deployment_config: dict, templates: dict, tag_to_deploy: str
+) -> Tuple[Optional[str], str]:
+    """Render the manifests of an app: its ingress (`None` without a web process)
+    and its deployment."""
+    ingress_yaml = None
+    if has_process(deployment_config, WEB_PROCESS_NAME):
+        ingress_yaml = builders.build_ingress_yaml(deployment_config, WEB_PROCESS_NAME, templates)
+    deployment_yaml = builders.build_deployment_yaml(deployment_config, templates, tag_to_deploy)
+    return ingress_yaml, deployment_yaml
+
+
 def deploy_app_ingress(deployment_config: dict, process_name: str, templates: dict):
     """Deploy the ingress configuration of an app."""
     ingress_yaml = builders.build_ingress_yaml(deployment_config, process_name, templates)
@@ -60,15 +118,17 @@ def _build_variable_status(item: dict) -> list:
     return item["spec"]["template"]["spec"]["containers"][0]["env"]
 
 
+@tracing.traced("deployment_status")
 def get_deployment_status(deployment_config: dict) -> dict:
     """Retrieve the deployment status of a deployed application."""
-    deployed_configuration = cli.fetch_resource_configuration(
-        deployment_config["cluster_name"],
-        deployment_config["namespace"],
-        deployment_config["app"],
-        [K8sResourceKind.DEPLOYMENT, K8sResourceKind.CRONJOB],
+    items = list(
+        cli.fetch_resource_status(
+            deployment_config["cluster_name"],
+            deployment_config["namespace"],
+            deployment_config["app"],
+            [K8sResourceKind.DEPLOYMENT, K8sResourceKind.CRONJOB],
+        )
     )
-    items = deployed_configuration["items"]
 
     status: dict = {
         "processes": [],
@@ -146,6 +206,7 @@ def has_process(deployment_config: dict, process_name: str) -> bool:
     return process is not None
 
 
+@tracing.traced("apply", cluster="cluster_name")
 def write_and_deploy_configuration(cluster_name: str, yaml_config: str) -> None:
     """Write the kubernetes configuration into a local file and
     apply it on the cluster with the cli."""
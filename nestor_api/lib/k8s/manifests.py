@@ -0,0 +1,74 @@
+"""Export of the rendered manifests of every app on every cluster, for audits and previews.
+
+The configuration is loaded once and the templates are compiled once per process: the
+(app, deployment) pairs are rendered across a pool of `NESTOR_K8S_RENDER_PROCESSES`
+processes, each compiling the templates in its initializer.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+from typing import Iterator, List
+
+from nestor_api.config.k8s import K8sConfiguration
+import nestor_api.lib.config as config
+
+from . import builders, deployment
+
+# Templates of the processes rendering the manifests, compiled once per worker
+_worker_state: dict = {}
+
+
+def _render(deployment_config: dict, templates: dict, tag_to_deploy: str) -> dict:
+    result = {"app": deployment_config["app"], "cluster": deployment_config["cluster_name"]}
+    try:
+        ingress_yaml, deployment_yaml = deployment.render_manifests(
+            deployment_config, templates, tag_to_deploy
+        )
+    # pylint: disable=broad-except
+    except Exception as err:
+        return {**result, "err": str(err)}
+    return {**result, "ingress": ingress_yaml, "deployment": deployment_yaml}
+
+
+def _init_render_worker(templates_path: str, tag_to_deploy: str) -> None:
+    _worker_state["templates"] = builders.load_templates(templates_path)
+    _worker_state["tag_to_deploy"] = tag_to_deploy
+
+
+def _render_in_worker(deployment_config: dict) -> dict:
+    return _render(deployment_config, _worker_state["templates"], _worker_state["tag_to_deploy"])
+
+
+def list_deployments_config(config_path: str) -> List[dict]:
+    """Returns the configurations of every app on every cluster it is deployed on.
+    Without `deployments`, an app is deployed on the cluster of its configuration."""
+    deployments_config = []
+    for app_config in config.list_apps_config(config_path).values():
+        if "deployments" in app_config:
+            deployments_config.extend(config.get_deployments(app_config))
+        else:
+            deployments_config.append(app_config)
+    return deployments_config
+
+
+def render_all(config_path: str, tag_to_deploy: str) -> Iterator[dict]:
+    """Yields the manifests of every app on every cluster, rendered with the given tag:
+    {"app", "cluster", "ingress", "deployment"}, or {"app", "cluster", "err"} when
+    the rendering fails. They are yielded as they are rendered, in a stable order."""
+    deployments_config = list_deployments_config(config_path)
+    templates_path = os.path.join(config_path, K8sConfiguration.get_templates_dir())
+
+    processes = min(K8sConfiguration.get_render_processes(), len(deployments_config))
+    if processes <= 1:
+        templates = builders.load_templates(templates_path)
+        for deployment_config in deployments_config:
+            yield _render(deployment_config, templates, tag_to_deploy)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_render_worker,
+        initargs=(templates_path, tag_to_deploy),
+    ) as executor:
+        chunksize = max(1, len(deployments_config) // (processes * 4))
+        yield from executor.map(_render_in_worker, deployments_config, chunksize=chunksize)
@@ -0,0 +1,101 @@
+"""Rollout watcher: follows the deployments of an app until all of them are rolled out.
+
+The Deployments and CronJobs of the app are watched in a single stream of events rather
+than polled, and the progress of the processes is reported at each event.
+"""
+
+import time
+from typing import Dict, Iterator, Optional
+
+from nestor_api.config.k8s import K8sConfiguration
+import nestor_api.lib.config as config
+
+from . import builders, cli
+from .enums.k8s_resource_kind import K8sResourceKind
+
+
+def get_resource_progress(process_name: str, item: Optional[dict]) -> dict:
+    """Returns the rollout progress of a process from its deployed resource, if already seen.
+    Like `kubectl rollout status`, a deployment is rolled out once its latest version is
+    observed and all its replicas are updated and available. A cronjob has no rollout."""
+    progress = {"name": process_name, "replicas": 0, "updated": 0, "ready": 0, "done": False}
+    if item is None:
+        return progress
+    if item["kind"] == K8sResourceKind.CRONJOB.value:
+        return {**progress, "done": True}
+
+    status = item.get("status", {})
+    replicas = item["spec"].get("replicas", 1)
+    updated = status.get("updatedReplicas", 0)
+    is_observed = status.get("observedGeneration", 0) >= item["metadata"].get("generation", 0)
+    is_done = (
+        is_observed
+        and updated >= replicas
+        and status.get("replicas", 0) <= updated
+        and status.get("availableReplicas", 0) >= updated
+    )
+    return {
+        **progress,
+        "replicas": replicas,
+        "updated": updated,
+        "ready": status.get("readyReplicas", 0),
+        "done": is_done,
+    }
+
+
+def _build_progress(process_names: Dict[str, str], items: Dict[str, dict]) -> dict:
+    processes = [
+        get_resource_progress(process_name, items.get(metadata_name))
+        for metadata_name, process_name in process_names.items()
+    ]
+    return {
+        "processes": processes,
+        "done": all(process["done"] for process in processes),
+        "timed_out": False,
+    }
+
+
+def watch_rollout(deployment_config: dict, timeout: int = None) -> Iterator[dict]:
+    """Yields the rollout progress of the processes of an app each time one of them changes,
+    until all of them are rolled out or the timeout (in seconds) is reached. The last progress
+    yielded is either `done` or `timed_out`."""
+    timeout = timeout or K8sConfiguration.get_rollout_timeout()
+    deadline = time.monotonic() + timeout
+
+    # Metadata name of the resources => process name
+    process_names = {}
+    for process in config.get_processes(deployment_config) + config.get_cronjobs(deployment_config):
+        _, _, metadata_name = builders.get_sanitized_names(deployment_config, process["name"])
+        process_names[metadata_name] = process["name"]
+
+    items: Dict[str, dict] = {}
+    events = cli.watch_resources(
+        deployment_config["cluster_name"],
+        deployment_config["namespace"],
+        deployment_config["app"],
+        [K8sResourceKind.DEPLOYMENT, K8sResourceKind.CRONJOB],
+        timeout,
+    )
+    try:
+        for event in events:
+            item = event["object"]
+            if event["type"] == "ERROR":
+                raise RuntimeError(item.get("message", "The watch of the rollout failed"))
+            if item["metadata"]["name"] not in process_names:
+                continue
+            if event["type"] == "DELETED":
+                items.pop(item["metadata"]["name"], None)
+            else:
+                items[item["metadata"]["name"]] = item
+
+            progress = _build_progress(process_names, items)
+            if progress["done"]:
+                yield progress
+                return
+            if time.monotonic() >= deadline:
+                break
+            yield progress
+    finally:
+        events.close()
+
+    yield {**_build_progress(process_names, items), "timed_out": True}
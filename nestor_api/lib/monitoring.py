@@ -0,0 +1,134 @@
+"""Metrics of the jobs run by nestor: commands, phases, caches and disk usage."""
+
+from contextlib import contextmanager
+import functools
+import os
+import re
+import shlex
+import time
+from typing import Callable, Iterator, Tuple, TypeVar
+
+from nestor_api.config.config import Configuration
+from nestor_api.utils.metrics import Counter, Gauge, Histogram
+
+Function = TypeVar("Function", bound=Callable)
+
+COMMAND_DURATION = Histogram(
+    "nestor_command_duration_seconds",
+    "Duration of the commands run by nestor (git, kubectl, docker...)",
+    ["tool", "subcommand", "status"],
+)
+JOB_DURATION = Histogram(
+    "nestor_job_duration_seconds", "Duration of the jobs (build, advance...)", ["job"]
+)
+JOB_PHASE_DURATION = Histogram(
+    "nestor_job_phase_duration_seconds", "Duration of each phase of the jobs", ["job", "phase"]
+)
+JOBS_IN_PROGRESS = Gauge("nestor_jobs_in_progress", "Jobs started and not finished yet", ["job"])
+CACHE_REQUESTS = Counter(
+    "nestor_cache_requests_total",
+    "Lookups of the caches, by result (hit, miss, revalidated)",
+    ["cache", "result"],
+)
+DIRECTORY_SIZE = Gauge(
+    "nestor_directory_size_bytes", "Disk usage of the directories managed by nestor", ["directory"]
+)
+
+# Subcommands are reported as is only when they look like one,
+# so that arbitrary arguments do not end up as label values
+SUBCOMMAND_PATTERN = re.compile(r"^[a-z][a-z0-9-]*$")
+
+
+def get_command_labels(command: str) -> Tuple[str, str]:
+    """Returns the tool and the subcommand of a command line,
+    e.g. ("kubectl", "apply") for "kubectl --context staging apply -f file.yaml"."""
+    try:
+        arguments = shlex.split(command)
+    except ValueError:
+        arguments = command.split()
+    if not arguments:
+        return "unknown", "unknown"
+
+    tool = os.path.basename(arguments[0])
+    skip_next = False
+    for argument in arguments[1:]:
+        if skip_next:
+            skip_next = False
+        elif argument.startswith("--"):
+            # A long option without "=" is followed by its value (e.g. "--context staging")
+            skip_next = "=" not in argument
+        elif not argument.startswith("-"):
+            return tool, argument if SUBCOMMAND_PATTERN.match(argument) else "other"
+    return tool, "none"
+
+
+@contextmanager
+def measure_command(tool: str, subcommand: str) -> Iterator[None]:
+    """Observe the duration of a command, labeled by its outcome."""
+    start = time.monotonic()
+    status = "failure"
+    try:
+        yield
+        status = "success"
+    finally:
+        COMMAND_DURATION.observe(
+            time.monotonic() - start, tool=tool, subcommand=subcommand, status=status
+        )
+
+
+class PhaseTimer:
+    """Observe the duration of the successive phases of a job: each call to
+    `phase_done` records the time elapsed since the previous one."""
+
+    def __init__(self, job: str):
+        self._job = job
+        self._last_mark = time.monotonic()
+
+    def phase_done(self, phase: str) -> None:
+        """Record the duration of a phase that just ended."""
+        now = time.monotonic()
+        JOB_PHASE_DURATION.observe(now - self._last_mark, job=self._job, phase=phase)
+        self._last_mark = now
+
+
+def tracked_job(job: str) -> Callable[[Function], Function]:
+    """Decorator counting the running instances of a job and observing their duration."""
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            JOBS_IN_PROGRESS.inc(job=job)
+            try:
+                with JOB_DURATION.time(job=job):
+                    return function(*args, **kwargs)
+            finally:
+                JOBS_IN_PROGRESS.dec(job=job)
+
+        return wrapper
+
+    return decorator
+
+
+def record_cache_lookup(cache: str, result: str) -> None:
+    """Count a lookup in a cache: "hit", "miss" or "revalidated"."""
+    CACHE_REQUESTS.inc(cache=cache, result=result)
+
+
+def get_directory_size(path: str) -> int:
+    """Returns the disk usage of a directory, without following symbolic links."""
+    size = 0
+    for root, directories, files in os.walk(path, onerror=lambda _: None):
+        for name in files + directories:
+            try:
+                size += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                # Removed while walking
+                pass
+    return size
+
+
+def measure_directory_sizes() -> None:
+    """Update the disk usage of the work and pristine directories. Walking them is costly,
+    it is done at each pass of the janitor rather than each time the metrics are read."""
+    DIRECTORY_SIZE.set(get_directory_size(Configuration.get_working_path()), directory="work")
+    DIRECTORY_SIZE.set(get_directory_size(Configuration.get_pristine_path()), directory="pristine")
@@ -2,5 +2,5 @@
 
 from .advance import advance_workflow
 from .errors import *
-from .init import init_workflow
+from .init import init_workflow, init_workflows
 from .typings import *
@@ -1,22 +1,35 @@
 """Workflow library advance."""
 from typing import Dict, List, Optional, Tuple
 
+from nestor_api.adapters.git.abstract_git_provider import AbstractGitProvider
 import nestor_api.lib.config as config
 import nestor_api.lib.git as git
+import nestor_api.lib.monitoring as monitoring
 from nestor_api.lib.workflow.errors import (
     AppListingError,
     StepNotExistingInWorkflowError,
     WorkflowError,
 )
 from nestor_api.lib.workflow.typings import AdvanceWorkflowAppReport, WorkflowAdvanceStatus
+from nestor_api.utils import tracing
 from nestor_api.utils.error_handling import non_blocking_clean
 from nestor_api.utils.logger import Logger
 
 
+# pylint: disable=too-many-locals
+@monitoring.tracked_job("advance")
+@tracing.traced("advance", start_trace=True, step="current_step")
 def advance_workflow(
-    config_dir: str, project_config: Dict, current_step: str
+    config_dir: str,
+    project_config: Dict,
+    current_step: str,
+    git_provider: AbstractGitProvider = None,
 ) -> Tuple[WorkflowAdvanceStatus, List[AdvanceWorkflowAppReport]]:
-    """Advance the application workflow to the next step"""
+    """Advance the application workflow to the next step.
+    With a git provider, the apps whose next step branch can be fast-forwarded are advanced
+    with a ref update through the provider, without a working copy. The other ones are
+    rebased locally and pushed."""
+    phases = monitoring.PhaseTimer("advance")
     progress_report: List[AdvanceWorkflowAppReport] = []
     next_step = get_next_step(project_config, current_step)
     if next_step is None:
@@ -28,15 +41,31 @@ def advance_workflow(
         apps = config.list_apps_config(config_dir)
     except Exception as err:
         raise AppListingError(err)
+    phases.phase_done("list_apps")
 
     for (app_name, app_config) in apps.items():
+        phases = monitoring.PhaseTimer("advance")
         should_app_progress = False
         tag = None
         app_dir = None
         try:
-            # Determine if app is ready to progress or not
-            app_dir = git.create_working_repository(app_name, app_config["git"]["origin"])
-            should_app_progress, tag = get_app_progress_report(app_dir, current_step, next_step)
+            fast_forward_report = None
+            if git_provider is not None:
+                fast_forward_report = fast_forward_app(
+                    app_name, app_config, current_step, next_step, git_provider
+                )
+                phases.phase_done("fast_forward")
+
+            if fast_forward_report is not None:
+                should_app_progress, tag = fast_forward_report
+            else:
+                # Determine if app is ready to progress or not
+                app_dir = git.create_working_repository(app_name, app_config["git"]["origin"])
+                phases.phase_done("checkout")
+                should_app_progress, tag = get_app_progress_report(
+                    app_dir, current_step, next_step
+                )
+                phases.phase_done("progress_report")
 
             # If app is ready to progress, make it advance to the next step in the workflow
             Logger.info(
@@ -51,9 +80,12 @@ def advance_workflow(
                 else "App is already up-to-date. Skipping.",
             )
             if should_app_progress:
-                git.branch(app_dir, next_step)
-                git.rebase(app_dir, current_step, onto=tag)
-                git.push(app_dir)
+                if app_dir is not None:
+                    git.branch(app_dir, next_step)
+                    git.rebase(app_dir, current_step, onto=tag)
+                    phases.phase_done("rebase")
+                    git.push(app_dir, [f"refs/heads/{next_step}"])
+                    phases.phase_done("git_push")
 
                 processes = config.get_processes(app_config)
                 cron_jobs = config.get_cronjobs(app_config)
@@ -89,6 +121,35 @@ def advance_workflow(
     return status, progress_report
 
 
+def fast_forward_app(
+    app_name: str,
+    app_config: dict,
+    current_step: str,
+    next_step: str,
+    git_provider: AbstractGitProvider,
+) -> Optional[Tuple[bool, str]]:
+    """Advance an app to the next step with a single ref update through the git provider,
+    when its next step branch is missing or can be fast-forwarded to the last tag of the
+    current step. The branches and tags are read from the pristine repository, without a
+    working copy. Returns whether the app progressed and the tag, or `None` when the next
+    step branch has diverged and must be rebased locally."""
+    pristine_dir = git.update_pristine_repository(app_name, app_config["git"]["origin"])
+    last_tag = git.get_last_tag(pristine_dir, f"origin/{current_step}")
+    last_tag_hash = git.get_commit_hash_from_tag(pristine_dir, last_tag)
+    next_step_hash = git.get_remote_branch_hash(pristine_dir, next_step)
+    if next_step_hash == last_tag_hash:
+        return False, last_tag
+
+    organization, repository_name = git.parse_repository_url(app_config["git"]["origin"])
+    if next_step_hash is None:
+        git_provider.create_branch(organization, repository_name, next_step, last_tag_hash)
+    elif git.is_ancestor(pristine_dir, next_step_hash, last_tag_hash):
+        git_provider.update_branch(organization, repository_name, next_step, last_tag_hash)
+    else:
+        return None
+    return True, last_tag
+
+
 def get_app_progress_report(app_dir: str, current_step: str, next_step: str) -> Tuple[bool, str]:
     """Determines if an app can be advanced to the next step."""
 
@@ -1,12 +1,12 @@
 """Workflow library init."""
 
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from nestor_api.adapters.git.abstract_git_provider import (
     AbstractGitProvider,
+    BranchRef,
+    BranchState,
     GitProviderError,
-    GitResource,
-    GitResourceNotFoundError,
 )
 from nestor_api.config.git import GitConfiguration
 import nestor_api.lib.config as config
@@ -37,83 +37,208 @@ def init_workflow(
 
     # Get application configuration to get the list of workflow branches
     app_config = config.get_app_config(app_name, config_path)
-    master_tag = GitConfiguration.get_master_tag()
 
-    workflow_branches = _get_workflow_branches(app_config, master_tag)
-    branches = {}
-    status = WorkflowInitStatus.SUCCESS
+    reports = _init_apps_workflow(organization, {app_name: app_config}, git_provider)
+
+    # Clean temporary copy
+    non_blocking_clean(config_path)
+
+    return reports[app_name]
+
+
+def init_workflows(
+    organization: str,
+    git_provider: AbstractGitProvider,
+    config_path: str,
+    app_names: Optional[List[str]] = None,
+) -> Tuple[WorkflowInitStatus, Dict[str, Tuple[WorkflowInitStatus, Report]]]:
+    """Initialize the workflow of several applications' repositories, all of
+    them by default. The configuration is loaded once from `config_path`, and
+    the branches of all the applications are read, created and protected at once."""
+
+    # Switch to staging environment in order to get applications configuration
+    config.change_environment("staging", config_path)
+
+    unknown_app_names = []
+    if app_names is None:
+        apps_config = config.list_apps_config(config_path)
+    else:
+        # Only the names of configured apps can be used to build a configuration path
+        known_app_names = set(config.list_app_names(config_path))
+        unknown_app_names = [app_name for app_name in app_names if app_name not in known_app_names]
+        project_config = config.get_project_config(config_path)
+        apps_config = {
+            app_name: config.get_app_config(app_name, config_path, project_config)
+            for app_name in app_names
+            if app_name in known_app_names
+        }
+
+    reports = _init_apps_workflow(organization, apps_config, git_provider)
+    for app_name in unknown_app_names:
+        Logger.error({"app_name": app_name}, "Fail to initialize workflow of an unknown app")
+        reports[app_name] = (WorkflowInitStatus.FAIL, {})
+    if app_names is not None:
+        reports = {app_name: reports[app_name] for app_name in app_names}
 
-    if len(workflow_branches) != 0:
+    status = WorkflowInitStatus.SUCCESS
+    if any(app_status == WorkflowInitStatus.FAIL for app_status, _ in reports.values()):
         status = WorkflowInitStatus.FAIL
+    return status, reports
+
+
+def _init_apps_workflow(
+    organization: str, apps_config: Dict[str, Dict], git_provider: AbstractGitProvider
+) -> Dict[str, Tuple[WorkflowInitStatus, Report]]:
+    """Create and protect the workflow branches of applications."""
+    master_tag = GitConfiguration.get_master_tag()
+
+    reports: Dict[str, Tuple[WorkflowInitStatus, Report]] = {}
+    apps_branches = {}
+    for app_name, app_config in apps_config.items():
+        workflow_branches = _get_workflow_branches(app_config, master_tag)
+        if len(workflow_branches) == 0:
+            reports[app_name] = (WorkflowInitStatus.SUCCESS, {})
+        else:
+            apps_branches[app_name] = [
+                BranchRef(organization, app_name, branch_name) for branch_name in workflow_branches
+            ]
+
+    if apps_branches:
         try:
             # Get user_login linked to the GITHUB_TOKEN
             user_info = git_provider.get_user_info()
             user_login = user_info.login if user_info else None
             Logger.info({"user_login": user_login}, "User login retrieved")
-
-            # Get the last commit's sha on master branch
-            branch = git_provider.get_branch(organization, app_name, master_tag)
-            master_head_sha = branch and branch.commit and branch.commit.sha
-            Logger.info({"sha": master_head_sha}, "master last commit sha retrieved")
-
-            # Sync all workflow branches with master's head and
-            # protect them by limiting push rights to user_login
-            for branch_name in workflow_branches:
-                branches[branch_name] = _create_and_protect_branch(
-                    organization, app_name, branch_name, master_head_sha, user_login, git_provider
-                )
-        except GitResourceNotFoundError as err:
-            Logger.error(
-                {"master_branch_name": master_tag, "err": err},
-                "master last commit sha failed to be retrieved.",
-            )
         except GitProviderError as err:
             Logger.error(
-                {"organization": organization, "app_name": app_name, "err": err},
-                "Fail to initialize workflow",
+                {"organization": organization, "err": str(err)}, "Fail to retrieve the user login"
             )
+            reports.update({app_name: (WorkflowInitStatus.FAIL, {}) for app_name in apps_branches})
         else:
-            status = WorkflowInitStatus.SUCCESS
-
-    # Clean temporary copy
-    non_blocking_clean(config_path)
+            reports.update(
+                _init_branches(organization, apps_branches, user_login, git_provider, master_tag)
+            )
 
-    return status, branches
+    return {app_name: reports[app_name] for app_name in apps_config}
 
 
-# pylint: disable=too-many-arguments
-def _create_and_protect_branch(
+def _init_branches(
     organization: str,
-    app_name: str,
-    branch_name: str,
-    master_sha: str,
-    user_login: str,
+    apps_branches: Dict[str, List[BranchRef]],
+    user_login: Optional[str],
     git_provider: AbstractGitProvider,
-) -> BranchReport:
-    """Try to create and protect a branch on a repository."""
-    report: BranchReport = {}
-    branch = None
+    master_tag: str,
+) -> Dict[str, Tuple[WorkflowInitStatus, Report]]:
+    """Create and protect the workflow branches of applications with a request per operation
+    for all of them. When it fails, the applications are retried one by one so that only
+    the failing ones are reported as failed."""
     try:
-        branch = git_provider.get_branch(organization, app_name, branch_name)
-        Logger.info({"branch_name": branch_name}, "Branch already exists. Skipped creation.")
-        report["created"] = CreationStatus(False, True)
-    except GitResourceNotFoundError as err:
-        if err.resource == GitResource.BRANCH:
-            branch = git_provider.create_branch(organization, app_name, branch_name, master_sha)
-            Logger.info({"branch_name": branch_name}, "Branch created")
-            report["created"] = CreationStatus(True, True)
-        else:
-            raise
+        return _init_branches_at_once(apps_branches, user_login, git_provider, master_tag)
+    except GitProviderError as err:
+        if len(apps_branches) > 1:
+            Logger.warn(
+                {"organization": organization, "err": str(err)},
+                "Fail to initialize the workflows at once, initializing them one by one",
+            )
+            reports = {}
+            for app_name, branches in apps_branches.items():
+                reports.update(
+                    _init_branches(
+                        organization, {app_name: branches}, user_login, git_provider, master_tag
+                    )
+                )
+            return reports
+
+        app_name = next(iter(apps_branches))
+        Logger.error(
+            {"organization": organization, "app_name": app_name, "err": str(err)},
+            "Fail to initialize workflow",
+        )
+        return {app_name: (WorkflowInitStatus.FAIL, {})}
+
+
+def _init_branches_at_once(
+    apps_branches: Dict[str, List[BranchRef]],
+    user_login: Optional[str],
+    git_provider: AbstractGitProvider,
+    master_tag: str,
+) -> Dict[str, Tuple[WorkflowInitStatus, Report]]:
+    # Get the state of the master and workflow branches of all the applications at once
+    master_refs = {
+        app_name: BranchRef(branches[0].organization, app_name, master_tag)
+        for app_name, branches in apps_branches.items()
+    }
+    states = git_provider.get_branches(
+        [
+            *master_refs.values(),
+            *(branch for branches in apps_branches.values() for branch in branches),
+        ]
+    )
+
+    reports: Dict[str, Tuple[WorkflowInitStatus, Report]] = {}
+    master_shas = {}
+    for app_name, branches in apps_branches.items():
+        master_state = states[master_refs[app_name]]
+        if not master_state.exists or master_state.sha is None:
+            Logger.error(
+                {"app_name": app_name, "master_branch_name": master_tag},
+                "master last commit sha failed to be retrieved.",
+            )
+            reports[app_name] = (WorkflowInitStatus.FAIL, {})
+            continue
+        Logger.info(
+            {"app_name": app_name, "sha": master_state.sha}, "master last commit sha retrieved"
+        )
+        master_shas.update({branch: master_state.sha for branch in branches})
+
+    # Sync all workflow branches with master's head and
+    # protect them by limiting push rights to user_login
+    branch_reports = _create_and_protect_branches(master_shas, states, user_login, git_provider)
+    for app_name, branches in apps_branches.items():
+        if app_name not in reports:
+            reports[app_name] = (
+                WorkflowInitStatus.SUCCESS,
+                {branch.branch_name: branch_reports[branch] for branch in branches},
+            )
+    return reports
+
 
-    if branch.protected is True:
+def _create_and_protect_branches(
+    branches: Dict[BranchRef, str],
+    states: Dict[BranchRef, BranchState],
+    user_login: Optional[str],
+    git_provider: AbstractGitProvider,
+) -> Dict[BranchRef, BranchReport]:
+    """Create the missing branches on the given commits and protect the unprotected
+    ones, each operation being done for all the branches at once."""
+    branches_to_create = [branch for branch in branches if not states[branch].exists]
+    branches_to_protect = [branch for branch in branches if not states[branch].protected]
+
+    if branches_to_create:
+        git_provider.create_branches({branch: branches[branch] for branch in branches_to_create})
+    if branches_to_protect:
+        git_provider.protect_branches(branches_to_protect, user_login)
+
+    report: Dict[BranchRef, BranchReport] = {}
+    for branch in branches:
+        is_created = branch in branches_to_create
+        is_protected = branch in branches_to_protect
         Logger.info(
-            {"branch_name": branch_name}, "Branch is already protected. Skipped protection."
+            {"app_name": branch.repository_name, "branch_name": branch.branch_name},
+            "Branch created" if is_created else "Branch already exists. Skipped creation.",
         )
-        report["protected"] = ProtectionStatus(False, True)
-    else:
-        git_provider.protect_branch(organization, app_name, branch_name, user_login)
-        Logger.info({"branch_name": branch_name}, "Branch protected")
-        report["protected"] = ProtectionStatus(True, True)
+        Logger.info(
+            {"app_name": branch.repository_name, "branch_name": branch.branch_name},
+            (
+                "Branch protected"
+                if is_protected
+                else "Branch is already protected. Skipped protection."
+            ),
+        )
+        report[branch] = {
+            "created": CreationStatus(is_created, True),
+            "protected": ProtectionStatus(is_protected, True),
+        }
     return report
 
 
@@ -1,26 +1,26 @@
 """Dictionary utilities"""
 
-import copy
-
 
 def deep_merge(destination: dict, source: dict, concat_lists: bool = False) -> dict:
     """Recursively add all keys from `source` into `destination`.
 
+    Neither `destination` nor `source` is modified. Only the dictionaries along the merged
+    paths are copied: untouched subtrees are shared between the inputs and the result,
+    so copy a subtree of the result before modifying it.
+
     Example:
         >>> destination = {'a': 1, 'b': {'c': 3}}
         >>> source = {'a': 11, 'b': {'d': 44}, 'e': 55}
         >>> deep_merge(destination, source)
         {'a': 11, 'b': {'c': 3, 'd': 44}, 'e': 55}
     """
-
-    def _deep_merge_rec(dest, src):
-        for key in src:
-            if isinstance(dest.get(key), dict) and isinstance(src[key], dict):
-                dest[key] = _deep_merge_rec(dest[key], src[key])
-            elif isinstance(dest.get(key), list) and isinstance(src[key], list) and concat_lists:
-                dest[key].extend(src[key])
-            else:
-                dest[key] = src[key]
-        return dest
-
-    return _deep_merge_rec(copy.deepcopy(destination), source)
+    merged = dict(destination)
+    for key, value in source.items():
+        destination_value = merged.get(key)
+        if isinstance(destination_value, dict) and isinstance(value, dict):
+            merged[key] = deep_merge(destination_value, value, concat_lists)
+        elif concat_lists and isinstance(destination_value, list) and isinstance(value, list):
+            merged[key] = [*destination_value, *value]
+        else:
+            merged[key] = value
+    return merged
@@ -0,0 +1,26 @@
+"""HTTP utilities."""
+
+import json
+from typing import Type
+
+
+class HttpApiError(Exception):
+    """Raised when an HTTP API reports an error."""
+
+    def __init__(self, message: str, status: int = None):
+        super().__init__(message)
+        self.status = status
+
+
+def raise_for_status(
+    status: int, body: bytes, error_class: Type[HttpApiError] = HttpApiError
+) -> None:
+    """Raise an `error_class` error for an error status, with the message of the JSON body
+    ({"message": ...}) or the body itself."""
+    if status < 400:
+        return
+    try:
+        message = json.loads(body)["message"]
+    except (ValueError, KeyError, TypeError):
+        message = body.decode("utf-8", errors="replace")
+    raise error_class(message, status)
@@ -0,0 +1,46 @@
+"""Iterator utilities."""
+
+import queue
+import threading
+from typing import Callable, Dict, Iterable, Iterator, TypeVar
+
+Item = TypeVar("Item")
+
+# Put in the queue by a producer once its iterable is exhausted
+_DONE = object()
+
+
+class _ProducerError:  # pylint: disable=too-few-public-methods
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def merge_in_threads(producers: Dict[str, Callable[[], Iterable[Item]]]) -> Iterator[Item]:
+    """Iterate over several iterables at the same time, each in its own thread (named
+    after its key), and yield their items as they come. The first error raised by one
+    of them is raised.
+
+    The threads are not stopped when the iteration stops early: the caller stops
+    the underlying streams (e.g. closes their connections), the threads then end."""
+    items: "queue.Queue[object]" = queue.Queue()
+
+    def produce(create_iterable: Callable[[], Iterable[Item]]) -> None:
+        try:
+            for item in create_iterable():
+                items.put(item)
+            items.put(_DONE)
+        except BaseException as err:  # pylint: disable=broad-except
+            items.put(_ProducerError(err))
+
+    for name, create_iterable in producers.items():
+        threading.Thread(target=produce, args=(create_iterable,), name=name, daemon=True).start()
+
+    remaining_producers = len(producers)
+    while remaining_producers > 0:
+        item = items.get()
+        if item is _DONE:
+            remaining_producers -= 1
+        elif isinstance(item, _ProducerError):
+            raise item.error
+        else:
+            yield item  # type: ignore
@@ -0,0 +1,225 @@
+"""Application metrics, exposed in the Prometheus text format"""
+
+import bisect
+from contextlib import contextmanager
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+
+class Registry:
+    """A collection of metrics, keyed by name"""
+
+    def __init__(self):
+        self._metrics: Dict[str, "Metric"] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: "Metric") -> None:
+        """Add a metric to the registry"""
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"A metric named '{metric.name}' is already registered")
+            self._metrics[metric.name] = metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Add a function updating metrics, called before every exposition. It is meant
+        for the values too costly to be maintained continuously (e.g. disk usage)."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def get(self, name: str) -> Optional["Metric"]:
+        """Returns a registered metric"""
+        return self._metrics.get(name)
+
+    def expose(self) -> str:
+        """Returns all the metrics in the Prometheus text format"""
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        for collector in collectors:
+            collector()
+        return "".join(metric.expose() for metric in metrics)
+
+
+REGISTRY = Registry()
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    formatted_labels = (f'{name}="{_escape_label_value(value)}"' for name, value in labels.items())
+    return "{" + ",".join(formatted_labels) + "}"
+
+
+class Metric:
+    """Base class of the metrics: a value for each combination of labels"""
+
+    metric_type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Registry = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _label_values(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"Metric '{self.name}' expects the labels {list(self.labelnames)}, "
+                f"got {sorted(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def get(self, **labels: str) -> float:
+        """Returns the current value for the given labels"""
+        return self._values.get(self._label_values(labels), 0)
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """Returns the (name, labels, value) samples of the metric"""
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            (self.name, dict(zip(self.labelnames, label_values)), value)
+            for label_values, value in values
+        ]
+
+    def expose(self) -> str:
+        """Returns the metric in the Prometheus text format"""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class Gauge(Metric):
+    """A value that can go up and down"""
+
+    metric_type = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the value for the given labels"""
+        label_values = self._label_values(labels)
+        with self._lock:
+            self._values[label_values] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Increment the value for the given labels"""
+        label_values = self._label_values(labels)
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        """Decrement the value for the given labels"""
+        self.inc(-amount, **labels)
+
+
+class Counter(Metric):
+    """A value that only goes up"""
+
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Increment the value for the given labels"""
+        if amount < 0:
+            raise ValueError("A counter can only be incremented by a non-negative amount")
+        label_values = self._label_values(labels)
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+
+# Suited to durations going from a local git command to a docker build
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+class Histogram(Metric):
+    """The distribution of observed values, counted in cumulative buckets"""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Registry = REGISTRY,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+        # For each set of labels, the count of each bucket (and of +Inf) then the sum
+        self._observations: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record an observed value for the given labels"""
+        label_values = self._label_values(labels)
+        with self._lock:
+            observations = self._observations.get(label_values)
+            if observations is None:
+                observations = [0] * (len(self.buckets) + 2)
+                self._observations[label_values] = observations
+            observations[bisect.bisect_left(self.buckets, value)] += 1
+            observations[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration (in seconds) of a block of code"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start, **labels)
+
+    def get(self, **labels: str) -> float:
+        """Returns the number of observations for the given labels"""
+        observations = self._observations.get(self._label_values(labels))
+        return sum(observations[:-1]) if observations else 0
+
+    def get_sum(self, **labels: str) -> float:
+        """Returns the sum of the observed values for the given labels"""
+        observations = self._observations.get(self._label_values(labels))
+        return observations[-1] if observations else 0
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """Returns the cumulative buckets, the sum and the count of each set of labels"""
+        with self._lock:
+            observations = sorted(
+                (label_values, list(values)) for label_values, values in self._observations.items()
+            )
+        samples = []
+        for label_values, values in observations:
+            labels = dict(zip(self.labelnames, label_values))
+            count = 0.0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), values[:-1]):
+                count += bucket_count
+                samples.append(
+                    (f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, count)
+                )
+            samples.append((f"{self.name}_sum", labels, values[-1]))
+            samples.append((f"{self.name}_count", labels, count))
+        return samples
@@ -0,0 +1,155 @@
+"""On-demand profiling of the API requests and of the background jobs they start.
+
+A request is profiled when it carries the profiling token in the `X-Nestor-Profile` header
+(or when profiling is always enabled). The profiles are saved in the pstats format; the time
+spent waiting for subprocesses (git, kubectl...) shows up under `subprocess.run`.
+"""
+
+import cProfile
+from contextlib import contextmanager
+from datetime import datetime
+import functools
+import hmac
+import io
+import os
+import pstats
+import re
+import threading
+from typing import Callable, Iterator, List, Optional, TypeVar
+
+from flask import Flask, g, request
+
+from nestor_api.config.profiling import ProfilingConfiguration
+from nestor_api.utils.logger import Logger
+
+PROFILE_HEADER = "X-Nestor-Profile"
+PROFILE_EXTENSION = ".pstats"
+PROFILE_NAME_PATTERN = re.compile(r"^[0-9T]+-[a-z0-9-]+\.pstats$")
+
+Function = TypeVar("Function", bound=Callable)
+
+_saving_lock = threading.Lock()
+
+
+def is_authorized(token: Optional[str]) -> bool:
+    """Returns whether a token matches the configured profiling token"""
+    expected_token = ProfilingConfiguration.get_token()
+    if expected_token is None or token is None:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), expected_token.encode("utf-8"))
+
+
+def _get_profile_name(label: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", label.lower()).strip("-") or "profile"
+    return f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{slug[:80]}{PROFILE_EXTENSION}"
+
+
+def list_profiles() -> List[str]:
+    """Returns the names of the saved profiles, the most recent first"""
+    profiles_path = ProfilingConfiguration.get_profiles_path()
+    if not os.path.isdir(profiles_path):
+        return []
+    return sorted(
+        (name for name in os.listdir(profiles_path) if PROFILE_NAME_PATTERN.match(name)),
+        reverse=True,
+    )
+
+
+def get_profile_path(name: str) -> Optional[str]:
+    """Returns the path of a saved profile, `None` if there is no such profile"""
+    if not PROFILE_NAME_PATTERN.match(name):
+        return None
+    path = os.path.join(ProfilingConfiguration.get_profiles_path(), name)
+    return path if os.path.isfile(path) else None
+
+
+def format_profile(path: str, limit: int = 50) -> str:
+    """Returns the functions of a profile taking the most cumulative time, as text"""
+    output = io.StringIO()
+    stats = pstats.Stats(path, stream=output)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    return output.getvalue()
+
+
+def _save(profiler: cProfile.Profile, label: str) -> None:
+    profiles_path = ProfilingConfiguration.get_profiles_path()
+    with _saving_lock:
+        os.makedirs(profiles_path, exist_ok=True)
+        name = _get_profile_name(label)
+        profiler.dump_stats(os.path.join(profiles_path, name))
+
+        # Only keep the most recent profiles
+        for old_name in list_profiles()[ProfilingConfiguration.get_max_profiles() :]:
+            try:
+                os.remove(os.path.join(profiles_path, old_name))
+            except OSError:
+                pass
+    Logger.info({"profile": name}, "Profile saved")
+
+
+def _start() -> Optional[cProfile.Profile]:
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as err:
+        # Another profiler is already active (only one at a time from Python 3.12)
+        Logger.warn({"err": str(err)}, "Profiling skipped")
+        return None
+    return profiler
+
+
+def _stop(profiler: cProfile.Profile, label: str) -> None:
+    profiler.disable()
+    try:
+        _save(profiler, label)
+    except OSError as err:
+        Logger.error({"err": str(err)}, "Error while saving the profile")
+
+
+@contextmanager
+def profile(label: str) -> Iterator[None]:
+    """Profile a block of code and save the profile under the given label"""
+    profiler = _start()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            _stop(profiler, label)
+
+
+def is_request_profiled() -> bool:
+    """Returns whether the current request is profiled"""
+    return bool(g.get("profiler"))
+
+
+def background_job(function: Function, label: str) -> Function:
+    """Returns the function of a background job, profiled when the request starting it is.
+    It must be called in the context of the request."""
+    if not (ProfilingConfiguration.is_always_enabled() or is_request_profiled()):
+        return function
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with profile(label):
+            return function(*args, **kwargs)
+
+    return wrapper  # type: ignore
+
+
+def _start_request_profiling() -> None:
+    if ProfilingConfiguration.is_always_enabled() or is_authorized(
+        request.headers.get(PROFILE_HEADER)
+    ):
+        g.profiler = _start()
+
+
+def _stop_request_profiling(_error: Optional[BaseException]) -> None:
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        _stop(profiler, f"{request.method} {request.path}")
+
+
+def init_app(app: Flask) -> None:
+    """Register the hooks profiling the requests of an app"""
+    app.before_request(_start_request_profiling)
+    app.teardown_request(_stop_request_profiling)
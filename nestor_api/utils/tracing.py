@@ -0,0 +1,299 @@
+"""Lightweight tracing of the jobs (build, advance, deploy) as trees of timed spans.
+
+A trace starts with `start_span` outside of any span, and the functions decorated with
+`traced` record a child span when they are called within a trace. When the root span ends,
+the trace is exported in the OTLP JSON format (to a file or to an in-memory collector,
+see `TracingConfiguration`) and a flame-style summary is logged.
+"""
+
+from contextlib import contextmanager
+import contextvars
+import functools
+import inspect
+import json
+import os
+import secrets
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, TypeVar, Union
+
+from nestor_api.config.tracing import TracingConfiguration
+from nestor_api.utils.logger import Logger
+
+AttributeValue = Union[str, int, float, bool]
+Function = TypeVar("Function", bound=Callable)
+
+SERVICE_NAME = "nestor-api"
+# OTLP enums
+SPAN_KIND_INTERNAL = 1
+STATUS_CODE_OK = 1
+STATUS_CODE_ERROR = 2
+
+
+class Span:  # pylint: disable=too-many-instance-attributes
+    """A timed operation of a trace"""
+
+    def __init__(self, name: str, trace: "_Trace", parent: Optional["Span"], attributes: Dict):
+        self.name = name
+        self.trace_id = trace.trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent.span_id if parent is not None else None
+        self.attributes: Dict[str, AttributeValue] = {}
+        self.start_time = time.time_ns()
+        self.end_time: Optional[int] = None
+        self.error: Optional[str] = None
+        self._trace = trace
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    @property
+    def duration(self) -> float:
+        """Returns the duration of the span in seconds (so far, if it is not ended)"""
+        end_time = self.end_time if self.end_time is not None else time.time_ns()
+        return (end_time - self.start_time) / 1e9
+
+    def set_attribute(self, key: str, value) -> None:
+        """Set an attribute, ignored when `None`"""
+        if value is None:
+            return
+        if not isinstance(value, (str, int, float, bool)):
+            value = str(value)
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        """End the span, failed if an error is given"""
+        self.end_time = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        self._trace.add(self)
+
+    def to_otlp(self) -> dict:
+        """Returns the span in the OTLP JSON format"""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(self.start_time),
+            "endTimeUnixNano": str(self.end_time),
+            "attributes": [
+                {"key": key, "value": _to_otlp_value(value)}
+                for key, value in sorted(self.attributes.items())
+            ],
+            "status": (
+                {"code": STATUS_CODE_ERROR, "message": self.error}
+                if self.error is not None
+                else {"code": STATUS_CODE_OK}
+            ),
+        }
+        if self.parent_span_id is not None:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+def _to_otlp_value(value: AttributeValue) -> dict:
+    # bool is a subclass of int, test it first
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # 64-bit integers are encoded as strings in OTLP JSON
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": value}
+
+
+class _Trace:  # pylint: disable=too-few-public-methods
+    """The spans of a trace, collected as they end"""
+
+    def __init__(self):
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        """Add an ended span"""
+        with self._lock:
+            self.spans.append(span)
+
+
+_current_span: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+def get_current_span() -> Optional[Span]:
+    """Returns the span in progress, `None` outside of a trace"""
+    return _current_span.get()
+
+
+def set_attribute(key: str, value) -> None:
+    """Set an attribute on the span in progress, if any"""
+    span = get_current_span()
+    if span is not None:
+        span.set_attribute(key, value)
+
+
+@contextmanager
+def start_span(name: str, **attributes) -> Iterator[Span]:
+    """Record a span, child of the span in progress or root of a new trace"""
+    parent = get_current_span()
+    trace = parent._trace if parent is not None else _Trace()  # pylint: disable=protected-access
+    span = Span(name, trace, parent, attributes)
+    token = _current_span.set(span)
+    error = None
+    try:
+        yield span
+    except BaseException as err:
+        error = err
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end(error)
+        if parent is None:
+            _export(trace.spans)
+
+
+def traced(
+    name: str, start_trace: bool = False, **attributes_arguments: str
+) -> Callable[[Function], Function]:
+    """Decorator recording a span for each call of a function made within a trace, or for
+    every call with `start_trace` (e.g. for a job). The span attributes are taken from the
+    arguments of the function: `@traced("working_copy", app="app_name")`."""
+
+    def decorator(function):
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not start_trace and get_current_span() is None:
+                return function(*args, **kwargs)
+
+            arguments = signature.bind(*args, **kwargs)
+            arguments.apply_defaults()
+            attributes = {
+                attribute: arguments.arguments.get(argument)
+                for attribute, argument in attributes_arguments.items()
+            }
+            with start_span(name, **attributes):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def to_otlp(spans: List[Span]) -> dict:
+    """Returns spans as an OTLP JSON export request"""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]
+                },
+                "scopeSpans": [
+                    {"scope": {"name": __name__}, "spans": [span.to_otlp() for span in spans]}
+                ],
+            }
+        ]
+    }
+
+
+def format_summary(spans: List[Span]) -> str:
+    """Returns a flame-style summary of a trace: the tree of spans with their duration and
+    share of the root span. The spans of the critical path, i.e. the child ending last at
+    each level, are marked with a star."""
+    children: Dict[Optional[str], List[Span]] = {}
+    for span in spans:
+        children.setdefault(span.parent_span_id, []).append(span)
+    roots = children.get(None, [])
+    if not roots:
+        return ""
+    total = roots[0].duration or 1e-9
+
+    lines: List[str] = []
+
+    def add_lines(span: Span, depth: int, is_critical: bool) -> None:
+        attributes = " ".join(f"{key}={value}" for key, value in sorted(span.attributes.items()))
+        lines.append(
+            f"{'  ' * depth}{'*' if is_critical else ' '} {span.name} "
+            f"{span.duration:.3f}s {100 * span.duration / total:.1f}%"
+            + (f" [{attributes}]" if attributes else "")
+            + (f" ERROR {span.error}" if span.error else "")
+        )
+        span_children = sorted(children.get(span.span_id, []), key=lambda child: child.start_time)
+        last_ending = max(span_children, key=lambda child: child.end_time or 0, default=None)
+        for child in span_children:
+            add_lines(child, depth + 1, is_critical and child is last_ending)
+
+    for root in roots:
+        add_lines(root, 0, True)
+    return "\n".join(lines)
+
+
+class InMemoryExporter:
+    """Collector keeping the spans of the last traces in memory"""
+
+    def __init__(self, max_traces: int = 100):
+        self.max_traces = max_traces
+        self._traces: List[List[Span]] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        """Keep the spans of a trace"""
+        with self._lock:
+            self._traces.append(list(spans))
+            del self._traces[: -self.max_traces]
+
+    def get_traces(self) -> List[List[Span]]:
+        """Returns the spans of the kept traces, the oldest first"""
+        with self._lock:
+            return list(self._traces)
+
+    def clear(self) -> None:
+        """Forget the kept traces"""
+        with self._lock:
+            self._traces.clear()
+
+
+class FileExporter:  # pylint: disable=too-few-public-methods
+    """Exporter appending the traces to a file, one OTLP JSON document per line"""
+
+    _lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Span]) -> None:
+        """Append the spans of a trace to the file"""
+        line = json.dumps(to_otlp(spans), separators=(",", ":"))
+        with FileExporter._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a") as file:
+                file.write(line + "\n")
+
+
+MEMORY_EXPORTER = InMemoryExporter()
+
+
+def get_exporter() -> Optional[Union[InMemoryExporter, FileExporter]]:
+    """Returns the configured exporter, `None` when tracing is disabled"""
+    exporter = TracingConfiguration.get_exporter()
+    if exporter == "memory":
+        return MEMORY_EXPORTER
+    if exporter == "file":
+        return FileExporter(TracingConfiguration.get_file_path())
+    return None
+
+
+def _export(spans: List[Span]) -> None:
+    exporter = get_exporter()
+    if exporter is None:
+        return
+    try:
+        exporter.export(spans)
+    except OSError as err:
+        Logger.error({"err": str(err)}, "Error while exporting a trace")
+    Logger.debug(
+        {"trace_id": spans[-1].trace_id, "summary": format_summary(spans)}, "Trace finished"
+    )
@@ -1,9 +1,15 @@
 # pylint: disable=abstract-class-instantiated
 
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import MagicMock, call, patch
 
-from nestor_api.adapters.git.abstract_git_provider import AbstractGitProvider
+from nestor_api.adapters.git.abstract_git_provider import (
+    AbstractGitProvider,
+    BranchRef,
+    BranchState,
+    GitResource,
+    GitResourceNotFoundError,
+)
 
 
 @patch.object(AbstractGitProvider, "__abstractmethods__", set())
@@ -26,8 +32,98 @@ class TestAbstractGitProvider(TestCase):
         with self.assertRaises(NotImplementedError):
             git_provider.create_branch("organization", "app", "branch", "ref")
 
+    def test_update_branch(self):
+        """Should raise a NotImplementedError."""
+        git_provider = AbstractGitProvider()
+        with self.assertRaises(NotImplementedError):
+            git_provider.update_branch("organization", "app", "branch", "ref")
+
     def test_protect_branch(self):
         """Should raise a NotImplementedError."""
         git_provider = AbstractGitProvider()
         with self.assertRaises(NotImplementedError):
             git_provider.protect_branch("organization", "app", "branch", "user_login")
+
+    @patch.object(AbstractGitProvider, "get_branch", autospec=True)
+    def test_get_branches(self, get_branch_mock):
+        """Should get the state of each branch."""
+        master_branch = MagicMock()
+        master_branch.commit.sha = "5ac5ee8"
+        master_branch.protected = True
+        get_branch_mock.side_effect = [master_branch, GitResourceNotFoundError(GitResource.BRANCH)]
+        git_provider = AbstractGitProvider()
+
+        result = git_provider.get_branches(
+            [
+                BranchRef("organization", "app", "master"),
+                BranchRef("organization", "app", "staging"),
+            ]
+        )
+
+        self.assertEqual(
+            result,
+            {
+                BranchRef("organization", "app", "master"): BranchState(True, "5ac5ee8", True),
+                BranchRef("organization", "app", "staging"): BranchState(False, None, False),
+            },
+        )
+
+    @patch.object(AbstractGitProvider, "get_branch", autospec=True)
+    def test_get_branches_with_non_existing_repository(self, get_branch_mock):
+        """Should raise the GitResourceNotFoundError of the repository."""
+        get_branch_mock.side_effect = GitResourceNotFoundError(GitResource.REPOSITORY)
+        git_provider = AbstractGitProvider()
+
+        with self.assertRaises(GitResourceNotFoundError) as context:
+            git_provider.get_branches([BranchRef("organization", "app", "master")])
+
+        self.assertEqual(context.exception.resource, GitResource.REPOSITORY)
+
+    @patch.object(AbstractGitProvider, "create_branch", autospec=True)
+    def test_create_branches(self, create_branch_mock):
+        """Should create each branch."""
+        git_provider = AbstractGitProvider()
+
+        git_provider.create_branches(
+            {
+                BranchRef("organization", "app-1", "staging"): "sha-1",
+                BranchRef("organization", "app-2", "staging"): "sha-2",
+            }
+        )
+
+        self.assertEqual(
+            create_branch_mock.call_args_list,
+            [
+                call(git_provider, "organization", "app-1", "staging", "sha-1"),
+                call(git_provider, "organization", "app-2", "staging", "sha-2"),
+            ],
+        )
+
+    @patch.object(AbstractGitProvider, "protect_branch", autospec=True)
+    def test_protect_branches(self, protect_branch_mock):
+        """Should protect each branch."""
+        git_provider = AbstractGitProvider()
+
+        git_provider.protect_branches(
+            [BranchRef("organization", "app", "staging"), BranchRef("organization", "app", "prod")],
+            "user_login",
+        )
+
+        self.assertEqual(
+            protect_branch_mock.call_args_list,
+            [
+                call(git_provider, "organization", "app", "staging", "user_login"),
+                call(git_provider, "organization", "app", "prod", "user_login"),
+            ],
+        )
+
+    @patch.object(AbstractGitProvider, "protect_branch", autospec=True)
+    def test_protect_branches_without_user(self, protect_branch_mock):
+        """Should raise a GitResourceNotFoundError."""
+        git_provider = AbstractGitProvider()
+
+        with self.assertRaises(GitResourceNotFoundError) as context:
+            git_provider.protect_branches([BranchRef("organization", "app", "staging")], None)
+
+        self.assertEqual(context.exception.resource, GitResource.USER)
+        protect_branch_mock.assert_not_called()
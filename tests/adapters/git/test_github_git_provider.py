@@ -1,9 +1,11 @@
 from unittest import TestCase
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
 
 from github import AuthenticatedUser, Branch, GithubException, Repository
 
 from nestor_api.adapters.git.abstract_git_provider import (
+    BranchRef,
+    BranchState,
     GitProviderError,
     GitResource,
     GitResourceNotFoundError,
@@ -11,8 +13,19 @@ from nestor_api.adapters.git.abstract_git_provider import (
 from nestor_api.adapters.git.github_git_provider import GitHubGitProvider
 
 
+def _bypass_rate_limiter(test_case: TestCase):
+    """Replace the rate limiter of the providers by one running the operations directly."""
+    patcher = patch("nestor_api.adapters.git.github_git_provider.GitHubRateLimiter", autospec=True)
+    rate_limiter_mock = patcher.start()
+    rate_limiter_mock.return_value.call.side_effect = lambda operation: operation()
+    test_case.addCleanup(patcher.stop)
+
+
 @patch("nestor_api.adapters.git.github_git_provider.Github", autospec=True)
 class TestGitHubGitProvider(TestCase):
+    def setUp(self):
+        _bypass_rate_limiter(self)
+
     @patch("nestor_api.adapters.git.github_git_provider.GitConfiguration", autospec=True)
     def test_init(self, git_configuration_mock, github_mock):
         """Should init the Github client."""
@@ -44,6 +57,19 @@ class TestGitHubGitProvider(TestCase):
         with self.assertRaises(GitProviderError):
             github_provider.get_user_info()
 
+    def test_requests_sent_one_at_a_time(self, github_mock):
+        """Should hold the client while an operation sends requests."""
+        github_provider = GitHubGitProvider()
+        is_client_locked = []
+        github_mock.return_value.get_user.side_effect = lambda: is_client_locked.append(
+            github_provider._client_lock.locked()
+        )
+
+        github_provider.get_user_info()
+
+        self.assertEqual(is_client_locked, [True])
+        self.assertFalse(github_provider._client_lock.locked())
+
     def test_get_repository(self, github_mock):
         """Should get the repository information."""
         fake_repo = MagicMock(spec=Repository.Repository)
@@ -196,6 +222,44 @@ class TestGitHubGitProvider(TestCase):
                 "organization", "fake-project", "fake-branch", "fake-sha1"
             )
 
+    @patch.object(GitHubGitProvider, "_get_repository", autospec=True)
+    def test_update_branch(self, get_repository_mock, _github_mock):
+        """Should move the branch with a single ref update, without forcing it."""
+        fake_repository = MagicMock(spec=Repository.Repository)
+        fake_repository.url = "https://api.github.com/repos/organization/fake-project"
+        fake_repository._requester = MagicMock()
+        get_repository_mock.return_value = fake_repository
+        github_provider = GitHubGitProvider()
+
+        github_provider.update_branch("organization", "fake-project", "fake-branch", "fake-sha1")
+
+        fake_repository._requester.requestJsonAndCheck.assert_called_once_with(
+            "PATCH",
+            "https://api.github.com/repos/organization/fake-project/git/refs/heads/fake-branch",
+            input={"sha": "fake-sha1", "force": False},
+        )
+
+    @patch.object(GitHubGitProvider, "_get_repository", autospec=True)
+    def test_update_branch_failing(self, get_repository_mock, _github_mock):
+        """Should raise a GitProviderError when the update is not a fast-forward,
+        and a GitResourceNotFoundError when the branch does not exist."""
+        fake_repository = MagicMock(spec=Repository.Repository)
+        fake_repository.url = "https://api.github.com/repos/organization/fake-project"
+        fake_repository._requester = MagicMock()
+        get_repository_mock.return_value = fake_repository
+        github_provider = GitHubGitProvider()
+
+        fake_repository._requester.requestJsonAndCheck.side_effect = GithubException(
+            422, {"message": "Update is not a fast forward"}
+        )
+        with self.assertRaisesRegex(GitProviderError, "not a fast forward"):
+            github_provider.update_branch("organization", "fake-project", "fake-branch", "sha")
+
+        fake_repository._requester.requestJsonAndCheck.side_effect = GithubException(404, {})
+        with self.assertRaises(GitResourceNotFoundError) as context:
+            github_provider.update_branch("organization", "fake-project", "fake-branch", "sha")
+        self.assertEqual(context.exception.resource, GitResource.BRANCH)
+
     @patch.object(GitHubGitProvider, "get_branch", autospec=True)
     def test_protect_branch(self, get_branch_mock, _github_mock):
         """Should protect the branch."""
@@ -232,3 +296,329 @@ class TestGitHubGitProvider(TestCase):
             github_provider.protect_branch(
                 "organization", "fake-project", "fake-branch", "user_login"
             )
+
+
+@patch("nestor_api.adapters.git.github_git_provider.Github", autospec=True)
+@patch("nestor_api.adapters.git.github_git_provider.time.monotonic", autospec=True)
+class TestGitHubGitProviderCache(TestCase):
+    def setUp(self):
+        _bypass_rate_limiter(self)
+        self.fake_repo = MagicMock(spec=Repository.Repository)
+        self.fake_repo.url = "https://api.github.com/repos/organization/fake-project"
+        self.fake_repo._requester = MagicMock()
+        self.fake_branch = MagicMock(spec=Branch.Branch)
+        self.fake_branch.etag = '"branch-etag"'
+        self.fake_repo.get_branch.return_value = self.fake_branch
+
+    def _get_provider(self, github_mock):
+        github_mock.return_value.get_repo.return_value = self.fake_repo
+        with patch.dict("os.environ", {"NESTOR_GIT_PROVIDER_CACHE_TTL": "60"}):
+            return GitHubGitProvider()
+
+    def test_get_branch_from_cache(self, monotonic_mock, github_mock):
+        """Should not request GitHub again before the cache expires."""
+        monotonic_mock.return_value = 1000
+        github_provider = self._get_provider(github_mock)
+
+        first_result = github_provider.get_branch("organization", "fake-project", "fake-branch")
+        monotonic_mock.return_value = 1059
+        second_result = github_provider.get_branch("organization", "fake-project", "fake-branch")
+
+        self.assertIs(first_result, self.fake_branch)
+        self.assertIs(second_result, self.fake_branch)
+        github_mock.return_value.get_repo.assert_called_once_with("organization/fake-project")
+        self.fake_repo.get_branch.assert_called_once_with(branch="fake-branch")
+        self.fake_repo.update.assert_not_called()
+
+    def test_get_branch_revalidated_when_expired(self, monotonic_mock, github_mock):
+        """Should revalidate the cached resources with conditional requests."""
+        monotonic_mock.return_value = 1000
+        github_provider = self._get_provider(github_mock)
+        requester = self.fake_repo._requester
+        requester.requestJson.return_value = (304, {}, "")
+
+        github_provider.get_branch("organization", "fake-project", "fake-branch")
+        monotonic_mock.return_value = 1061
+        result = github_provider.get_branch("organization", "fake-project", "fake-branch")
+
+        self.assertIs(result, self.fake_branch)
+        github_mock.return_value.get_repo.assert_called_once()
+        self.fake_repo.get_branch.assert_called_once()
+        self.fake_repo.update.assert_called_once_with()
+        requester.requestJson.assert_called_once_with(
+            "GET",
+            "https://api.github.com/repos/organization/fake-project/branches/fake-branch",
+            headers={"If-None-Match": '"branch-etag"'},
+        )
+
+    def test_get_branch_revalidated_and_modified(self, monotonic_mock, github_mock):
+        """Should replace the cached branch when it has been modified."""
+        monotonic_mock.return_value = 1000
+        github_provider = self._get_provider(github_mock)
+        requester = self.fake_repo._requester
+        requester.requestJson.return_value = (
+            200,
+            {"etag": '"new-etag"'},
+            '{"name": "fake-branch", "protected": true}',
+        )
+
+        github_provider.get_branch("organization", "fake-project", "fake-branch")
+        monotonic_mock.return_value = 1061
+        result = github_provider.get_branch("organization", "fake-project", "fake-branch")
+
+        self.assertIsInstance(result, Branch.Branch)
+        self.assertEqual(result.name, "fake-branch")
+        self.assertTrue(result.protected)
+
+    def test_get_branch_deleted_when_revalidated(self, monotonic_mock, github_mock):
+        """Should raise a GitResourceNotFoundError and forget the branch."""
+        monotonic_mock.return_value = 1000
+        github_provider = self._get_provider(github_mock)
+        self.fake_repo._requester.requestJson.return_value = (
+            404,
+            {},
+            '{"message": "Branch not found"}',
+        )
+
+        github_provider.get_branch("organization", "fake-project", "fake-branch")
+        monotonic_mock.return_value = 1061
+        with self.assertRaises(GitResourceNotFoundError) as context:
+            github_provider.get_branch("organization", "fake-project", "fake-branch")
+        github_provider.get_branch("organization", "fake-project", "fake-branch")
+
+        self.assertEqual(context.exception.resource, GitResource.BRANCH)
+        self.assertEqual(self.fake_repo.get_branch.call_count, 2)
+
+    def test_create_branch_invalidates_cache(self, monotonic_mock, github_mock):
+        """Should fetch the created branch instead of using the cache."""
+        monotonic_mock.return_value = 1000
+        github_provider = self._get_provider(github_mock)
+        self.fake_repo.get_branch.side_effect = [
+            GithubException(404, "branch not found"),
+            self.fake_branch,
+        ]
+
+        with self.assertRaises(GitResourceNotFoundError):
+            github_provider.get_branch("organization", "fake-project", "fake-branch")
+        result = github_provider.create_branch(
+            "organization", "fake-project", "fake-branch", "fake-sha1"
+        )
+
+        self.assertIs(result, self.fake_branch)
+        github_mock.return_value.get_repo.assert_called_once()
+        self.assertEqual(
+            self.fake_repo.get_branch.call_args_list,
+            [call(branch="fake-branch"), call(branch="fake-branch")],
+        )
+
+    def test_protect_branch_invalidates_cache(self, monotonic_mock, github_mock):
+        """Should fetch the branch again once protected."""
+        monotonic_mock.return_value = 1000
+        github_provider = self._get_provider(github_mock)
+
+        github_provider.protect_branch("organization", "fake-project", "fake-branch", "user")
+        github_provider.get_branch("organization", "fake-project", "fake-branch")
+
+        self.fake_branch.edit_protection.assert_called_once_with(
+            enforce_admins=False, user_push_restrictions=["user"]
+        )
+        self.assertEqual(self.fake_repo.get_branch.call_count, 2)
+        github_mock.return_value.get_repo.assert_called_once()
+
+
+@patch("nestor_api.adapters.git.github_git_provider.Github", autospec=True)
+class TestGitHubGitProviderBatch(TestCase):
+    def _get_provider(self, github_mock, *responses):
+        requester = MagicMock()
+        requester.requestJsonAndCheck.side_effect = [({}, response) for response in responses]
+        github_mock.return_value._Github__requester = requester
+        return GitHubGitProvider(), requester
+
+    def test_get_branches(self, github_mock):
+        """Should get the state of all branches with a single query."""
+        github_provider, requester = self._get_provider(
+            github_mock,
+            {
+                "data": {
+                    "r0": {
+                        "id": "repo-1-id",
+                        "b0": {"target": {"oid": "sha-1"}, "branchProtectionRule": {"id": "r"}},
+                        "b1": None,
+                    },
+                    "r1": {
+                        "id": "repo-2-id",
+                        "b0": {"target": {"oid": "sha-2"}, "branchProtectionRule": None},
+                    },
+                }
+            },
+        )
+
+        result = github_provider.get_branches(
+            [
+                BranchRef("organization", "app-1", "master"),
+                BranchRef("organization", "app-1", "staging"),
+                BranchRef("organization", "app-2", "staging"),
+            ]
+        )
+
+        self.assertEqual(
+            result,
+            {
+                BranchRef("organization", "app-1", "master"): BranchState(True, "sha-1", True),
+                BranchRef("organization", "app-1", "staging"): BranchState(False, None, False),
+                BranchRef("organization", "app-2", "staging"): BranchState(True, "sha-2", False),
+            },
+        )
+        requester.requestJsonAndCheck.assert_called_once()
+        verb, url = requester.requestJsonAndCheck.call_args[0]
+        graphql_input = requester.requestJsonAndCheck.call_args[1]["input"]
+        self.assertEqual((verb, url), ("POST", "/graphql"))
+        self.assertIn("r1: repository(owner: $owner1, name: $name1)", graphql_input["query"])
+        self.assertIn("b1: ref(qualifiedName: $ref0_1)", graphql_input["query"])
+        self.assertEqual(
+            graphql_input["variables"],
+            {
+                "owner0": "organization",
+                "name0": "app-1",
+                "ref0_0": "refs/heads/master",
+                "ref0_1": "refs/heads/staging",
+                "owner1": "organization",
+                "name1": "app-2",
+                "ref1_0": "refs/heads/staging",
+            },
+        )
+
+    def test_get_branches_with_non_existing_repository(self, github_mock):
+        """Should raise a GitResourceNotFoundError."""
+        github_provider, _ = self._get_provider(
+            github_mock,
+            {
+                "data": {"r0": None},
+                "errors": [{"type": "NOT_FOUND", "message": "Could not resolve to a Repository"}],
+            },
+        )
+
+        with self.assertRaises(GitResourceNotFoundError) as context:
+            github_provider.get_branches([BranchRef("organization", "app-1", "master")])
+
+        self.assertEqual(context.exception.resource, GitResource.REPOSITORY)
+
+    def test_get_branches_failing(self, github_mock):
+        """Should raise a GitProviderError with the GraphQL errors."""
+        github_provider, _ = self._get_provider(
+            github_mock, {"data": None, "errors": [{"type": "FORBIDDEN", "message": "forbidden"}]}
+        )
+
+        with self.assertRaisesRegex(GitProviderError, "forbidden"):
+            github_provider.get_branches([BranchRef("organization", "app-1", "master")])
+
+    def test_create_and_protect_branches(self, github_mock):
+        """Should create then protect branches with one mutation each,
+        reusing the node ids already known."""
+        github_provider, requester = self._get_provider(
+            github_mock,
+            {"data": {"r0": {"id": "repo-1-id", "b0": None, "b1": None}}},
+            {"data": {"c0": {"clientMutationId": None}, "c1": {"clientMutationId": None}}},
+            {"data": {"user": {"id": "user-id"}}},
+            {"data": {"p0": {"clientMutationId": None}, "p1": {"clientMutationId": None}}},
+        )
+        branches = [
+            BranchRef("organization", "app-1", "integration"),
+            BranchRef("organization", "app-1", "staging"),
+        ]
+
+        github_provider.get_branches(branches)
+        github_provider.create_branches({branch: "sha-1" for branch in branches})
+        github_provider.protect_branches(branches, "user_login")
+
+        self.assertEqual(requester.requestJsonAndCheck.call_count, 4)
+        inputs = [
+            call_args[1]["input"] for call_args in requester.requestJsonAndCheck.call_args_list
+        ]
+        self.assertIn("c1: createRef(input: $input1)", inputs[1]["query"])
+        self.assertEqual(
+            inputs[1]["variables"]["input1"],
+            {"repositoryId": "repo-1-id", "name": "refs/heads/staging", "oid": "sha-1"},
+        )
+        self.assertEqual(inputs[2]["variables"], {"login": "user_login"})
+        self.assertIn("p0: createBranchProtectionRule(input: $input0)", inputs[3]["query"])
+        self.assertEqual(
+            inputs[3]["variables"]["input0"],
+            {
+                "repositoryId": "repo-1-id",
+                "pattern": "integration",
+                "isAdminEnforced": False,
+                "restrictsPushes": True,
+                "pushActorIds": ["user-id"],
+            },
+        )
+
+    def test_create_branches_with_unknown_repository(self, github_mock):
+        """Should fetch the node id of the repository first."""
+        github_provider, requester = self._get_provider(
+            github_mock,
+            {"data": {"r0": {"id": "repo-1-id"}}},
+            {"data": {"c0": {"clientMutationId": None}}},
+        )
+
+        github_provider.create_branches({BranchRef("organization", "app-1", "staging"): "sha-1"})
+
+        inputs = [
+            call_args[1]["input"] for call_args in requester.requestJsonAndCheck.call_args_list
+        ]
+        self.assertEqual(inputs[0]["variables"], {"owner0": "organization", "name0": "app-1"})
+        self.assertEqual(inputs[1]["variables"]["input0"]["repositoryId"], "repo-1-id")
+
+    def test_protect_branches_with_unknown_user(self, github_mock):
+        """Should raise a GitResourceNotFoundError."""
+        github_provider, _ = self._get_provider(
+            github_mock,
+            {
+                "data": {"r0": {"id": "repo-1-id"}, "user": None},
+                "errors": [{"type": "NOT_FOUND", "message": "Could not resolve to a User"}],
+            },
+        )
+
+        with self.assertRaises(GitResourceNotFoundError) as context:
+            github_provider.protect_branches(
+                [BranchRef("organization", "app-1", "staging")], "user_login"
+            )
+
+        self.assertEqual(context.exception.resource, GitResource.USER)
+
+    def test_protect_branches_without_user(self, github_mock):
+        """Should raise a GitResourceNotFoundError without sending any request."""
+        github_provider, requester = self._get_provider(github_mock)
+
+        with self.assertRaises(GitResourceNotFoundError) as context:
+            github_provider.protect_branches([BranchRef("organization", "app-1", "staging")], None)
+
+        self.assertEqual(context.exception.resource, GitResource.USER)
+        requester.requestJsonAndCheck.assert_not_called()
+
+    def test_batch_operations_without_branches(self, github_mock):
+        """Should not send any request."""
+        github_provider, requester = self._get_provider(github_mock)
+
+        self.assertEqual(github_provider.get_branches([]), {})
+        github_provider.create_branches({})
+        github_provider.protect_branches([], "user_login")
+
+        requester.requestJsonAndCheck.assert_not_called()
+
+    @patch("nestor_api.adapters.git.github_rate_limiter.time.sleep", autospec=True)
+    def test_graphql_retried_when_rate_limited(self, sleep_mock, github_mock):
+        """Should retry the requests rejected by the rate limit."""
+        github_provider, requester = self._get_provider(github_mock)
+        requester.requestJsonAndCheck.side_effect = [
+            GithubException(429, None),
+            ({}, {"data": {"r0": {"id": "repo-1-id", "b0": None}}}),
+        ]
+
+        result = github_provider.get_branches([BranchRef("organization", "app-1", "staging")])
+
+        self.assertEqual(
+            result, {BranchRef("organization", "app-1", "staging"): BranchState(False, None, False)}
+        )
+        self.assertEqual(requester.requestJsonAndCheck.call_count, 2)
+        sleep_mock.assert_called_once()
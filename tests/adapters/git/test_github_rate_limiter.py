@@ -0,0 +1,131 @@
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from github import GithubException
+
+from nestor_api.adapters.git.github_rate_limiter import (
+    MAX_DELAY,
+    RATE_LIMIT_REMAINING,
+    GitHubRateLimiter,
+)
+
+
+@patch("nestor_api.adapters.git.github_rate_limiter.time.sleep", autospec=True)
+@patch("nestor_api.adapters.git.github_rate_limiter.time.time", autospec=True)
+class TestGitHubRateLimiter(TestCase):
+    def setUp(self):
+        self.client = MagicMock()
+        with patch.dict(
+            "os.environ",
+            {
+                "NESTOR_GIT_PROVIDER_RATE_LIMIT_RESERVE": "100",
+                "NESTOR_GIT_PROVIDER_MAX_RETRIES": "2",
+                "NESTOR_GIT_PROVIDER_BACKOFF": "1",
+            },
+        ):
+            self.rate_limiter = GitHubRateLimiter(self.client)
+
+    @staticmethod
+    def _rate_limit_headers(remaining, reset):
+        return {
+            "x-ratelimit-remaining": str(remaining),
+            "x-ratelimit-limit": "5000",
+            "x-ratelimit-reset": str(reset),
+        }
+
+    def test_hook_installed(self, _time_mock, _sleep_mock):
+        """Should read the headers of every response of the client."""
+        requester = self.client._Github__requester
+        self.assertEqual(requester.DEBUG_ON_RESPONSE, self.rate_limiter.on_response)
+
+    def test_no_delay_with_budget(self, time_mock, sleep_mock):
+        """Should not throttle the requests while the budget is above the reserve."""
+        time_mock.return_value = 1000
+        self.rate_limiter.on_response(200, self._rate_limit_headers(4000, 4600), "")
+
+        self.rate_limiter.call(lambda: "result")
+
+        sleep_mock.assert_not_called()
+        self.assertEqual(RATE_LIMIT_REMAINING.get(), 4000)
+
+    def test_spread_requests_in_reserve(self, time_mock, _sleep_mock):
+        """Should spread the requests over the window once in the reserve."""
+        time_mock.return_value = 1000
+        self.rate_limiter.on_response(200, self._rate_limit_headers(90, 1400), "")
+
+        # 40 requests left before keeping half of the reserve, for 400 seconds
+        self.assertEqual(self.rate_limiter.get_delay(), 10)
+
+    def test_wait_for_reset(self, time_mock, sleep_mock):
+        """Should wait for the window to reset once half of the reserve is consumed."""
+        time_mock.return_value = 1000
+        self.rate_limiter.on_response(200, self._rate_limit_headers(10, 1060), "")
+
+        result = self.rate_limiter.call(lambda: "result")
+
+        self.assertEqual(result, "result")
+        delay = sleep_mock.call_args[0][0]
+        self.assertGreaterEqual(delay, 60)
+        self.assertLessEqual(delay, 61)
+
+    def test_delay_is_bounded(self, time_mock, _sleep_mock):
+        """Should never wait more than the maximum delay."""
+        time_mock.return_value = 1000
+        self.rate_limiter.on_response(200, self._rate_limit_headers(0, 1000 + 24 * 3600), "")
+
+        self.assertEqual(self.rate_limiter.get_delay(), MAX_DELAY)
+
+    def test_retry_after(self, time_mock, sleep_mock):
+        """Should honor the Retry-After header of a rejected request."""
+        time_mock.return_value = 1000
+        operation = MagicMock(side_effect=[GithubException(403, {"message": "..."}), "result"])
+
+        def _operation():
+            self.rate_limiter.on_response(403, {"retry-after": "30"}, "")
+            return operation()
+
+        result = self.rate_limiter.call(_operation)
+
+        self.assertEqual(result, "result")
+        self.assertEqual(operation.call_count, 2)
+        # The backoff, then the wait for Retry-After
+        backoff, wait = [call_args[0][0] for call_args in sleep_mock.call_args_list]
+        self.assertLessEqual(backoff, 1)
+        self.assertGreaterEqual(wait, 30)
+
+    def test_retry_with_backoff(self, _time_mock, sleep_mock):
+        """Should retry the rejected requests with an exponential backoff."""
+        operation = MagicMock(
+            side_effect=[
+                GithubException(429, None),
+                GithubException(403, {"message": "You have exceeded a secondary rate limit"}),
+                "result",
+            ]
+        )
+
+        result = self.rate_limiter.call(operation)
+
+        self.assertEqual(result, "result")
+        first_delay, second_delay = [call_args[0][0] for call_args in sleep_mock.call_args_list]
+        self.assertLessEqual(first_delay, 1)
+        self.assertLessEqual(second_delay, 2)
+
+    def test_give_up_after_max_retries(self, _time_mock, sleep_mock):
+        """Should raise once the maximum number of retries is reached."""
+        operation = MagicMock(side_effect=GithubException(429, None))
+
+        with self.assertRaises(GithubException):
+            self.rate_limiter.call(operation)
+
+        self.assertEqual(operation.call_count, 3)
+        self.assertEqual(sleep_mock.call_count, 2)
+
+    def test_no_retry_on_other_errors(self, _time_mock, sleep_mock):
+        """Should not retry the requests failing for another reason."""
+        operation = MagicMock(side_effect=GithubException(403, {"message": "Forbidden"}))
+
+        with self.assertRaises(GithubException):
+            self.rate_limiter.call(operation)
+
+        operation.assert_called_once()
+        sleep_mock.assert_not_called()
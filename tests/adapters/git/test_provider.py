@@ -9,6 +9,10 @@ class TestProvider(TestCase):
         git_provider = get_git_provider({"git": {"provider": "github"}})
         self.assertIsInstance(git_provider, GitHubGitProvider)
 
+    def test_get_git_provider_is_shared(self):
+        git_provider = get_git_provider({"git": {"provider": "github"}})
+        self.assertIs(get_git_provider({"git": {"provider": "github"}}), git_provider)
+
     def test_get_git_provider_without_defined(self):
         with self.assertRaisesRegex(
             NotImplementedError, "Adapter for this git provider is not implemented"
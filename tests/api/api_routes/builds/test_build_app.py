@@ -73,7 +73,9 @@ class TestApiBuildApp(TestCase):
         docker_mock.build.assert_called_once_with("my-app", "/tmp/working/repo", app_config)
         docker_mock.push.assert_called_once_with("my-app", "my-app@1.0.0-sha-a1b2c3d4", app_config)
 
-        git_mock.push.assert_called_once_with("/tmp/working/repo")
+        git_mock.push.assert_called_once_with(
+            "/tmp/working/repo", ["refs/tags/1.0.0-sha-a1b2c3d4"]
+        )
 
         io_mock.remove.assert_has_calls([call("/tmp/config"), call("/tmp/working/repo")])
 
@@ -104,6 +106,7 @@ class TestApiBuildApp(TestCase):
         logger_mock.warn.assert_called_once_with(
             {"app": "my-app", "err": exception}, "[/api/builds/:app] Error while tagging the app",
         )
+        git_mock.push.assert_not_called()
         logger_mock.error.assert_not_called()
 
     def test_build_app_handle_errors(
@@ -0,0 +1,66 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from nestor_api.api.flask_app import create_app
+
+JOB: dict = {
+    "id": "job-id",
+    "app": "my-app",
+    "environment": "staging",
+    "tag": "1.0.0-sha-a1b2c3d",
+    "status": "queued",
+    "clusters": {},
+    "err": None,
+}
+
+
+@patch("nestor_api.api.api_routes.deployments.deploy_app.Logger", autospec=True)
+@patch("nestor_api.api.api_routes.deployments.deploy_app.deploy_queue", autospec=True)
+class TestApiDeployApp(TestCase):
+    def setUp(self):
+        self.app_client = create_app().test_client()
+
+    def test_deploy_app(self, deploy_queue_mock, _logger_mock):
+        deploy_queue_mock.submit.return_value = JOB
+
+        response = self.app_client.post(
+            "/api/deployments/my-app/staging", json={"tag": "1.0.0-sha-a1b2c3d"}
+        )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.get_json(), {"job": JOB, "message": "Deployment queued"})
+        deploy_queue_mock.submit.assert_called_once_with("my-app", "staging", "1.0.0-sha-a1b2c3d")
+
+    def test_deploy_app_without_tag(self, deploy_queue_mock, _logger_mock):
+        for body in [None, {}, {"tag": ""}, {"tag": ["1.0.0"]}]:
+            with self.subTest(body=body):
+                response = self.app_client.post("/api/deployments/my-app/staging", json=body)
+
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.get_json()["message"], "'tag' must be a tag name")
+        deploy_queue_mock.submit.assert_not_called()
+
+    def test_deploy_app_with_invalid_environment(self, deploy_queue_mock, _logger_mock):
+        response = self.app_client.post(
+            "/api/deployments/my-app/staging;id", json={"tag": "1.0.0-sha-a1b2c3d"}
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()["message"], "Invalid environment name")
+        deploy_queue_mock.submit.assert_not_called()
+
+    def test_get_deployment_job(self, deploy_queue_mock, _logger_mock):
+        deploy_queue_mock.get_job.return_value = JOB
+
+        response = self.app_client.get("/api/deployments/jobs/job-id")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {"job": JOB})
+        deploy_queue_mock.get_job.assert_called_once_with("job-id")
+
+    def test_get_deployment_job_not_found(self, deploy_queue_mock, _logger_mock):
+        deploy_queue_mock.get_job.return_value = None
+
+        response = self.app_client.get("/api/deployments/jobs/unknown")
+
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,107 @@
+from io import BytesIO
+import json
+import tarfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from nestor_api.api.flask_app import create_app
+from nestor_api.lib.config import is_valid_environment_name
+
+RESULTS = [
+    {"app": "app-1", "cluster": "a", "ingress": "ingress: 1", "deployment": "deployment: 1"},
+    {"app": "app-2", "cluster": "a", "ingress": None, "deployment": "deployment: 2"},
+    {"app": "app-2", "cluster": "b", "err": "Invalid configuration"},
+]
+
+
+@patch("nestor_api.api.api_routes.manifests.render_all.Logger", autospec=True)
+@patch("nestor_api.api.api_routes.manifests.render_all.non_blocking_clean", autospec=True)
+@patch("nestor_api.api.api_routes.manifests.render_all.manifests", autospec=True)
+@patch("nestor_api.api.api_routes.manifests.render_all.config_lib", autospec=True)
+@patch("nestor_api.api.api_routes.manifests.render_all.Configuration", autospec=True)
+class TestApiRenderAll(TestCase):
+    def setUp(self):
+        self.app_client = create_app().test_client()
+
+    def _configure(self, configuration_mock, config_mock, manifests_mock):
+        configuration_mock.get_config_default_branch.return_value = "master"
+        config_mock.create_temporary_config_copy.return_value = "/tmp/config"
+        config_mock.is_valid_environment_name.side_effect = is_valid_environment_name
+        manifests_mock.render_all.return_value = iter(RESULTS)
+
+    def test_render_all_as_ndjson(
+        self, configuration_mock, config_mock, manifests_mock, clean_mock, _logger_mock
+    ):
+        self._configure(configuration_mock, config_mock, manifests_mock)
+
+        response = self.app_client.get("/api/manifests?tag=1.0.0")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], RESULTS)
+        config_mock.change_environment.assert_called_once_with("master", "/tmp/config")
+        manifests_mock.render_all.assert_called_once_with("/tmp/config", "1.0.0")
+        clean_mock.assert_called_once_with("/tmp/config", message_prefix="[/api/manifests]")
+
+    def test_render_all_as_tarball(
+        self, configuration_mock, config_mock, manifests_mock, clean_mock, _logger_mock
+    ):
+        self._configure(configuration_mock, config_mock, manifests_mock)
+
+        response = self.app_client.get("/api/manifests?format=tar&environment=production")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/x-tar")
+        with tarfile.open(fileobj=BytesIO(response.get_data()), mode="r") as archive:
+            files = {
+                member.name: archive.extractfile(member).read().decode("utf-8")
+                for member in archive.getmembers()
+            }
+        self.assertEqual(
+            files,
+            {
+                "a/app-1/ingress.yaml": "ingress: 1",
+                "a/app-1/deployment.yaml": "deployment: 1",
+                "a/app-2/deployment.yaml": "deployment: 2",
+                "b/app-2/error.txt": "Invalid configuration",
+            },
+        )
+        config_mock.change_environment.assert_called_once_with("production", "/tmp/config")
+        manifests_mock.render_all.assert_called_once_with("/tmp/config", "latest")
+        clean_mock.assert_called_once()
+
+    def test_render_all_with_unknown_format(
+        self, configuration_mock, config_mock, manifests_mock, _clean_mock, _logger_mock
+    ):
+        self._configure(configuration_mock, config_mock, manifests_mock)
+
+        response = self.app_client.get("/api/manifests?format=zip")
+
+        self.assertEqual(response.status_code, 400)
+        config_mock.create_temporary_config_copy.assert_not_called()
+
+    def test_render_all_with_invalid_environment(
+        self, configuration_mock, config_mock, manifests_mock, _clean_mock, _logger_mock
+    ):
+        self._configure(configuration_mock, config_mock, manifests_mock)
+
+        response = self.app_client.get("/api/manifests?environment=master%3Bid")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()["message"], "Invalid environment name")
+        config_mock.create_temporary_config_copy.assert_not_called()
+        config_mock.change_environment.assert_not_called()
+
+    def test_render_all_without_configuration(
+        self, configuration_mock, config_mock, manifests_mock, clean_mock, _logger_mock
+    ):
+        self._configure(configuration_mock, config_mock, manifests_mock)
+        config_mock.change_environment.side_effect = RuntimeError("unknown branch")
+
+        response = self.app_client.get("/api/manifests")
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.get_json()["err"], "unknown branch")
+        clean_mock.assert_called_once_with("/tmp/config", message_prefix="[/api/manifests]")
+        manifests_mock.render_all.assert_not_called()
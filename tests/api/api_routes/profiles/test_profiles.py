@@ -0,0 +1,69 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from nestor_api.api.flask_app import create_app
+
+HEADERS = {"Authorization": "Bearer secret"}
+
+
+class TestProfilesRoutes(TestCase):
+    def setUp(self):
+        profiles_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(profiles_dir.cleanup)
+        environ_patcher = patch.dict(
+            os.environ,
+            {"NESTOR_PROFILES_PATH": profiles_dir.name, "NESTOR_PROFILING_TOKEN": "secret"},
+        )
+        environ_patcher.start()
+        self.addCleanup(environ_patcher.stop)
+        self.app_client = create_app().test_client()
+
+        # Profile a request
+        self.app_client.get("/heartbeat", headers={"X-Nestor-Profile": "secret"})
+        self.profile_name = os.listdir(profiles_dir.name)[0]
+
+    def test_list_profiles(self):
+        response = self.app_client.get("/api/profiles", headers=HEADERS)
+
+        self.assertEqual(response.status_code, 200)
+        profiles = response.get_json()["profiles"]
+        self.assertEqual(len(profiles), 1)
+        self.assertEqual(profiles[0]["name"], self.profile_name)
+        self.assertTrue(self.profile_name.endswith("-get-heartbeat.pstats"))
+        self.assertGreater(profiles[0]["size"], 0)
+
+    def test_list_profiles_forbidden(self):
+        response = self.app_client.get("/api/profiles", headers={"Authorization": "Bearer invalid"})
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_get_profile(self):
+        response = self.app_client.get(f"/api/profiles/{self.profile_name}", headers=HEADERS)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content_type, "application/octet-stream")
+        self.assertIn("attachment", response.headers["Content-Disposition"])
+        self.assertGreater(len(response.get_data()), 0)
+        response.close()
+
+    def test_get_profile_as_text(self):
+        response = self.app_client.get(
+            f"/api/profiles/{self.profile_name}?format=text", headers=HEADERS
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("function calls", response.get_data(as_text=True))
+
+    def test_get_profile_not_found(self):
+        response = self.app_client.get(
+            "/api/profiles/20200101T000000-missing.pstats", headers=HEADERS
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_profile_forbidden(self):
+        response = self.app_client.get(f"/api/profiles/{self.profile_name}")
+
+        self.assertEqual(response.status_code, 403)
@@ -54,7 +54,9 @@ class TestWorkflow(TestCase):
         # Assertions
         config_mock.create_temporary_config_copy.assert_called_once()
         config_mock.change_environment.assert_called_once_with("staging", "fake-path")
-        advance_workflow_mock.assert_called_once_with("fake-path", fake_config, "master")
+        advance_workflow_mock.assert_called_once_with(
+            "fake-path", fake_config, "master", git_provider=None
+        )
         non_blocking_clean_mock.assert_called_once_with(
             "fake-path", message_prefix="[/api/workflow/progress/<current_step>]"
         )
@@ -76,6 +78,36 @@ class TestWorkflow(TestCase):
             },
         )
 
+    @patch("nestor_api.api.api_routes.workflow.advance.get_git_provider", autospec=True)
+    @patch("nestor_api.api.api_routes.workflow.advance.Configuration", autospec=True)
+    @patch("nestor_api.api.api_routes.workflow.advance.non_blocking_clean", autospec=True)
+    @patch(
+        "nestor_api.api.api_routes.workflow.advance.workflow_lib.advance_workflow", autospec=True
+    )
+    @patch("nestor_api.api.api_routes.workflow.advance.config_lib", autospec=True)
+    def test_advance_workflow_with_git_provider(
+        self,
+        config_mock,
+        advance_workflow_mock,
+        _non_blocking_clean_mock,
+        _configuration_mock,
+        get_git_provider_mock,
+        _logger_mock,
+    ):
+        """Should advance the apps through the git provider of the project."""
+        config_mock.create_temporary_config_copy.return_value = "fake-path"
+        fake_config = {"git": {"provider": "github"}, "workflow": ["master", "staging"]}
+        config_mock.get_project_config.return_value = fake_config
+        advance_workflow_mock.return_value = (WorkflowAdvanceStatus.SUCCESS, [])
+
+        response = self.app_client.post("/api/workflow/progress/master")
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        get_git_provider_mock.assert_called_once_with(fake_config)
+        advance_workflow_mock.assert_called_once_with(
+            "fake-path", fake_config, "master", git_provider=get_git_provider_mock.return_value
+        )
+
     @patch("nestor_api.api.api_routes.workflow.advance.Configuration", autospec=True)
     @patch("nestor_api.api.api_routes.workflow.advance.non_blocking_clean", autospec=True)
     @patch(
@@ -116,7 +148,9 @@ class TestWorkflow(TestCase):
         # Assertions
         config_mock.create_temporary_config_copy.assert_called_once()
         config_mock.change_environment.assert_called_once_with("staging", "fake-path")
-        advance_workflow_mock.assert_called_once_with("fake-path", fake_config, "master")
+        advance_workflow_mock.assert_called_once_with(
+            "fake-path", fake_config, "master", git_provider=None
+        )
         non_blocking_clean_mock.assert_called_once_with(
             "fake-path", message_prefix="[/api/workflow/progress/<current_step>]"
         )
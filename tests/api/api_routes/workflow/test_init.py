@@ -158,3 +158,127 @@ class TestWorkflow(TestCase):
         config_mock.get_project_config.assert_called_once_with("fake-path")
         get_git_provider_mock.assert_called_with(fake_config)
         io_mock.remove.assert_called_with("fake-path")
+
+    @patch("nestor_api.api.api_routes.workflow.init.non_blocking_clean", autospec=True)
+    @patch("nestor_api.api.api_routes.workflow.init.get_git_provider", autospec=True)
+    @patch("nestor_api.api.api_routes.workflow.init.workflow_lib.init_workflows", autospec=True)
+    @patch("nestor_api.api.api_routes.workflow.init.config_lib", autospec=True)
+    def test_init_workflows(
+        self,
+        config_mock,
+        init_workflows_mock,
+        get_git_provider_mock,
+        non_blocking_clean_mock,
+        _io_mock,
+        _logger_mock,
+    ):
+        """Should initialize the given apps and return a report per app."""
+        # Mock
+        config_mock.create_temporary_config_copy.return_value = "fake-path"
+        fake_config = {"git": {"provider": "some-provider"}}
+        config_mock.get_project_config.return_value = fake_config
+        git_provider = MagicMock(spec=AbstractGitProvider)
+        get_git_provider_mock.return_value = git_provider
+        init_workflows_mock.return_value = (
+            WorkflowInitStatus.FAIL,
+            {
+                "app-1": (
+                    WorkflowInitStatus.SUCCESS,
+                    {"integration": {"created": (True, True), "protected": (True, True)}},
+                ),
+                "app-2": (WorkflowInitStatus.FAIL, {}),
+            },
+        )
+
+        # Tests
+        response = self.app_client.post(
+            "/api/workflow/init/my-org", json={"apps": ["app-1", "app-2"]}
+        )
+        data = response.get_json()
+
+        # Assertions
+        self.assertEqual(response.status_code, HTTPStatus.INTERNAL_SERVER_ERROR)
+        self.assertEqual(
+            data,
+            {
+                "organization": "my-org",
+                "message": "Workflows initialization failed",
+                "reports": {
+                    "app-1": {
+                        "status": "SUCCESS",
+                        "report": {
+                            "integration": {"created": [True, True], "protected": [True, True]}
+                        },
+                    },
+                    "app-2": {"status": "FAIL", "report": {}},
+                },
+            },
+        )
+        config_mock.create_temporary_config_copy.assert_called_once()
+        get_git_provider_mock.assert_called_once_with(fake_config)
+        init_workflows_mock.assert_called_once_with(
+            "my-org", git_provider, "fake-path", ["app-1", "app-2"]
+        )
+        non_blocking_clean_mock.assert_called_once_with(
+            "fake-path", message_prefix="[/api/workflow/init/:org]"
+        )
+
+    @patch("nestor_api.api.api_routes.workflow.init.non_blocking_clean", autospec=True)
+    @patch("nestor_api.api.api_routes.workflow.init.get_git_provider", autospec=True)
+    @patch("nestor_api.api.api_routes.workflow.init.workflow_lib.init_workflows", autospec=True)
+    @patch("nestor_api.api.api_routes.workflow.init.config_lib", autospec=True)
+    def test_init_workflows_of_all_apps(
+        self,
+        config_mock,
+        init_workflows_mock,
+        _get_git_provider_mock,
+        _non_blocking_clean_mock,
+        _io_mock,
+        _logger_mock,
+    ):
+        """Should initialize all apps when no filter is given."""
+        config_mock.create_temporary_config_copy.return_value = "fake-path"
+        init_workflows_mock.return_value = (WorkflowInitStatus.SUCCESS, {})
+
+        response = self.app_client.post("/api/workflow/init/my-org")
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            response.get_json(),
+            {
+                "organization": "my-org",
+                "message": "Workflows initialization succeeded",
+                "reports": {},
+            },
+        )
+        self.assertIsNone(init_workflows_mock.call_args[0][3])
+
+    @patch("nestor_api.api.api_routes.workflow.init.workflow_lib.init_workflows", autospec=True)
+    def test_init_workflows_with_invalid_filter(self, init_workflows_mock, _io_mock, _logger_mock):
+        """Should refuse an invalid list of apps."""
+        response = self.app_client.post("/api/workflow/init/my-org", json={"apps": "app-1"})
+
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        init_workflows_mock.assert_not_called()
+
+    @patch("nestor_api.api.api_routes.workflow.init.get_git_provider", autospec=True)
+    @patch("nestor_api.api.api_routes.workflow.init.workflow_lib.init_workflows", autospec=True)
+    @patch("nestor_api.api.api_routes.workflow.init.config_lib", autospec=True)
+    def test_init_workflows_failing(
+        self, config_mock, init_workflows_mock, _get_git_provider_mock, _io_mock, _logger_mock
+    ):
+        """Should return an error response if the initialization raises."""
+        config_mock.create_temporary_config_copy.return_value = "fake-path"
+        init_workflows_mock.side_effect = Exception("some error")
+
+        response = self.app_client.post("/api/workflow/init/my-org")
+
+        self.assertEqual(response.status_code, HTTPStatus.INTERNAL_SERVER_ERROR)
+        self.assertEqual(
+            response.get_json(),
+            {
+                "organization": "my-org",
+                "err": "some error",
+                "message": "Workflows initialization failed",
+            },
+        )
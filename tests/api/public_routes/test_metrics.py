@@ -0,0 +1,18 @@
+"""Test nestor_api.api.public_routes.metrics."""
+
+from unittest import TestCase
+
+from nestor_api.api.flask_app import create_app
+
+
+class TestMetricsRoute(TestCase):
+    def test_metrics(self):
+        """Should return the metrics in the Prometheus text format without restriction."""
+        app = create_app()
+        response = app.test_client().get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content_type, "text/plain; version=0.0.4; charset=utf-8")
+        self.assertIn(
+            "# TYPE nestor_command_duration_seconds histogram", response.get_data(as_text=True)
+        )
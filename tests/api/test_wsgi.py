@@ -3,8 +3,10 @@ from unittest.mock import patch
 
 
 class TestApi(TestCase):
+    @patch("nestor_api.lib.janitor.start", autospec=True)
     @patch("nestor_api.api.flask_app.create_app", autospec=True)
-    def test_api_instance(self, create_app_mock):
+    def test_api_instance(self, create_app_mock, janitor_start_mock):
         import nestor_api.api.wsgi  # pylint: disable=import-outside-toplevel,unused-import
 
         create_app_mock.assert_called()
+        janitor_start_mock.assert_called_once()
@@ -44,3 +44,10 @@ class TestConfig(TestCase):
 
     def test_get_config_default_branch_default(self):
         self.assertEqual(Configuration.get_config_default_branch(), "staging")
+
+    @patch.dict(os.environ, {"NESTOR_CONFIG_LOADING_PROCESSES": "4"})
+    def test_get_config_loading_processes_configured(self):
+        self.assertEqual(Configuration.get_config_loading_processes(), 4)
+
+    def test_get_config_loading_processes_default(self):
+        self.assertEqual(Configuration.get_config_loading_processes(), 1)
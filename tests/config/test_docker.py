@@ -0,0 +1,25 @@
+import os
+from unittest import TestCase
+from unittest.mock import patch
+
+from nestor_api.config.docker import DockerConfiguration
+
+
+class TestDockerConfig(TestCase):
+    @patch.dict(os.environ, {"NESTOR_DOCKER_SOCKET_PATH": ""})
+    def test_get_engine_socket_path_default(self):
+        del os.environ["NESTOR_DOCKER_SOCKET_PATH"]
+        self.assertEqual(DockerConfiguration.get_engine_socket_path(), "/var/run/docker.sock")
+
+    @patch.dict(os.environ, {"NESTOR_DOCKER_SOCKET_PATH": "/run/docker.sock"})
+    def test_get_engine_socket_path_configured(self):
+        self.assertEqual(DockerConfiguration.get_engine_socket_path(), "/run/docker.sock")
+
+    @patch.dict(os.environ, {"NESTOR_DOCKER_API_VERSION": ""})
+    def test_get_engine_api_version_default(self):
+        del os.environ["NESTOR_DOCKER_API_VERSION"]
+        self.assertEqual(DockerConfiguration.get_engine_api_version(), "1.40")
+
+    @patch.dict(os.environ, {"DOCKER_CONFIG": "/etc/docker-client"})
+    def test_get_client_config_path_configured(self):
+        self.assertEqual(DockerConfiguration.get_client_config_path(), "/etc/docker-client")
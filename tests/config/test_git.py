@@ -20,3 +20,31 @@ class TestGitConfig(TestCase):
 
     def test_get_master_tag_default(self):
         self.assertEqual(GitConfiguration.get_master_tag(), "master")
+
+    @patch.dict(os.environ, {"NESTOR_GIT_PROVIDER_CACHE_TTL": "10"})
+    def test_get_git_provider_cache_ttl_configured(self):
+        self.assertEqual(GitConfiguration.get_git_provider_cache_ttl(), 10)
+
+    def test_get_git_provider_cache_ttl_default(self):
+        self.assertEqual(GitConfiguration.get_git_provider_cache_ttl(), 60)
+
+    @patch.dict(os.environ, {"NESTOR_GIT_PROVIDER_RATE_LIMIT_RESERVE": "10"})
+    def test_get_git_provider_rate_limit_reserve_configured(self):
+        self.assertEqual(GitConfiguration.get_git_provider_rate_limit_reserve(), 10)
+
+    def test_get_git_provider_rate_limit_reserve_default(self):
+        self.assertEqual(GitConfiguration.get_git_provider_rate_limit_reserve(), 100)
+
+    @patch.dict(os.environ, {"NESTOR_GIT_PROVIDER_MAX_RETRIES": "2"})
+    def test_get_git_provider_max_retries_configured(self):
+        self.assertEqual(GitConfiguration.get_git_provider_max_retries(), 2)
+
+    def test_get_git_provider_max_retries_default(self):
+        self.assertEqual(GitConfiguration.get_git_provider_max_retries(), 5)
+
+    @patch.dict(os.environ, {"NESTOR_GIT_PROVIDER_BACKOFF": "0.5"})
+    def test_get_git_provider_backoff_configured(self):
+        self.assertEqual(GitConfiguration.get_git_provider_backoff(), 0.5)
+
+    def test_get_git_provider_backoff_default(self):
+        self.assertEqual(GitConfiguration.get_git_provider_backoff(), 1)
@@ -0,0 +1,43 @@
+import os
+from unittest import TestCase
+from unittest.mock import patch
+
+from nestor_api.config.janitor import JanitorConfiguration
+
+
+class TestJanitorConfig(TestCase):
+    @patch.dict(os.environ, {"NESTOR_JANITOR_INTERVAL": ""})
+    def test_get_interval_default(self):
+        del os.environ["NESTOR_JANITOR_INTERVAL"]
+        self.assertEqual(JanitorConfiguration.get_interval(), 300)
+
+    @patch.dict(os.environ, {"NESTOR_JANITOR_INTERVAL": "0"})
+    def test_get_interval_configured(self):
+        self.assertEqual(JanitorConfiguration.get_interval(), 0)
+
+    @patch.dict(os.environ, {"NESTOR_JANITOR_ORPHAN_AGE": ""})
+    def test_get_orphan_age_default(self):
+        del os.environ["NESTOR_JANITOR_ORPHAN_AGE"]
+        self.assertEqual(JanitorConfiguration.get_orphan_age(), 3600)
+
+    @patch.dict(os.environ, {"NESTOR_JANITOR_ORPHAN_AGE": "60"})
+    def test_get_orphan_age_configured(self):
+        self.assertEqual(JanitorConfiguration.get_orphan_age(), 60)
+
+    @patch.dict(os.environ, {"NESTOR_JANITOR_DISK_QUOTA": ""})
+    def test_get_disk_quota_default(self):
+        del os.environ["NESTOR_JANITOR_DISK_QUOTA"]
+        self.assertEqual(JanitorConfiguration.get_disk_quota(), 0)
+
+    @patch.dict(os.environ, {"NESTOR_JANITOR_DISK_QUOTA": "2048"})
+    def test_get_disk_quota_configured(self):
+        self.assertEqual(JanitorConfiguration.get_disk_quota(), 2048)
+
+    @patch.dict(os.environ, {"NESTOR_JANITOR_MIN_FREE_SPACE": ""})
+    def test_get_min_free_space_default(self):
+        del os.environ["NESTOR_JANITOR_MIN_FREE_SPACE"]
+        self.assertEqual(JanitorConfiguration.get_min_free_space(), 0)
+
+    @patch.dict(os.environ, {"NESTOR_JANITOR_MIN_FREE_SPACE": "512"})
+    def test_get_min_free_space_configured(self):
+        self.assertEqual(JanitorConfiguration.get_min_free_space(), 512)
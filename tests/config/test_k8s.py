@@ -16,6 +16,26 @@ class TestK8sConfig(TestCase):
         with self.assertRaises(KeyError):
             K8sConfiguration.get_http_proxy()
 
+    @patch.dict(os.environ, {"NESTOR_K8S_CLIENT": ""})
+    def test_get_client_default(self):
+        del os.environ["NESTOR_K8S_CLIENT"]
+        self.assertEqual(K8sConfiguration.get_client(), "kubectl")
+
+    @patch.dict(os.environ, {"NESTOR_K8S_CLIENT": "API"})
+    def test_get_client_configured(self):
+        self.assertEqual(K8sConfiguration.get_client(), "api")
+
+    @patch.dict(os.environ, {"KUBECONFIG": ""})
+    def test_get_kubeconfig_path_default(self):
+        self.assertEqual(
+            K8sConfiguration.get_kubeconfig_path(),
+            os.path.join(os.path.expanduser("~"), ".kube", "config"),
+        )
+
+    @patch.dict(os.environ, {"KUBECONFIG": os.pathsep.join(["/kube/config", "/kube/other"])})
+    def test_get_kubeconfig_path_configured(self):
+        self.assertEqual(K8sConfiguration.get_kubeconfig_path(), "/kube/config")
+
     @patch.dict(os.environ, {"NESTOR_K8S_SERVICE_PORT": ""})
     def test_get_service_port_default(self):
         del os.environ["NESTOR_K8S_SERVICE_PORT"]
@@ -27,6 +47,61 @@ class TestK8sConfig(TestCase):
         service_port = K8sConfiguration.get_service_port()
         self.assertEqual(service_port, 4242)
 
+    @patch.dict(os.environ, {"NESTOR_K8S_POD_TEMPLATE_ANNOTATION": ""})
+    def test_get_pod_template_annotation_default(self):
+        del os.environ["NESTOR_K8S_POD_TEMPLATE_ANNOTATION"]
+        self.assertEqual(K8sConfiguration.get_pod_template_annotation(), "date")
+
+    @patch.dict(os.environ, {"NESTOR_K8S_POD_TEMPLATE_ANNOTATION": "Hash"})
+    def test_get_pod_template_annotation_configured(self):
+        self.assertEqual(K8sConfiguration.get_pod_template_annotation(), "hash")
+
+    @patch.dict(os.environ, {"NESTOR_K8S_APPLIED_RECORD": ""})
+    def test_get_applied_record_default(self):
+        del os.environ["NESTOR_K8S_APPLIED_RECORD"]
+        self.assertEqual(K8sConfiguration.get_applied_record(), "none")
+
+    @patch.dict(os.environ, {"NESTOR_K8S_APPLIED_RECORD": "Cluster"})
+    def test_get_applied_record_configured(self):
+        self.assertEqual(K8sConfiguration.get_applied_record(), "cluster")
+
+    @patch.dict(os.environ, {"NESTOR_K8S_APPLIED_RECORD_PATH": ""})
+    def test_get_applied_record_path_default(self):
+        del os.environ["NESTOR_K8S_APPLIED_RECORD_PATH"]
+        self.assertEqual(K8sConfiguration.get_applied_record_path(), "/tmp/nestor/applied")
+
+    @patch.dict(os.environ, {"NESTOR_K8S_APPLIED_RECORD_PATH": "/applied"})
+    def test_get_applied_record_path_configured(self):
+        self.assertEqual(K8sConfiguration.get_applied_record_path(), "/applied")
+
+    @patch.dict(os.environ, {"NESTOR_K8S_ROLLOUT_TIMEOUT": ""})
+    def test_get_rollout_timeout_default(self):
+        del os.environ["NESTOR_K8S_ROLLOUT_TIMEOUT"]
+        self.assertEqual(K8sConfiguration.get_rollout_timeout(), 600)
+
+    @patch.dict(os.environ, {"NESTOR_K8S_ROLLOUT_TIMEOUT": "120"})
+    def test_get_rollout_timeout_configured(self):
+        self.assertEqual(K8sConfiguration.get_rollout_timeout(), 120)
+
+    @patch.dict(os.environ, {"NESTOR_K8S_DEPLOY_CONCURRENCY": ""})
+    def test_get_deploy_concurrency_default(self):
+        del os.environ["NESTOR_K8S_DEPLOY_CONCURRENCY"]
+        self.assertEqual(K8sConfiguration.get_deploy_concurrency(), 2)
+
+    @patch.dict(os.environ, {"NESTOR_K8S_DEPLOY_CONCURRENCY": "4"})
+    def test_get_deploy_concurrency_configured(self):
+        self.assertEqual(K8sConfiguration.get_deploy_concurrency(), 4)
+
+    @patch("nestor_api.config.k8s.os.cpu_count", return_value=6)
+    @patch.dict(os.environ, {"NESTOR_K8S_RENDER_PROCESSES": ""})
+    def test_get_render_processes_default(self, _cpu_count_mock):
+        del os.environ["NESTOR_K8S_RENDER_PROCESSES"]
+        self.assertEqual(K8sConfiguration.get_render_processes(), 6)
+
+    @patch.dict(os.environ, {"NESTOR_K8S_RENDER_PROCESSES": "3"})
+    def test_get_render_processes_configured(self):
+        self.assertEqual(K8sConfiguration.get_render_processes(), 3)
+
     @patch.dict(os.environ, {"NESTOR_K8S_TEMPLATE_FOLDER": ""})
     def test_get_templates_dir_default(self):
         del os.environ["NESTOR_K8S_TEMPLATE_FOLDER"]
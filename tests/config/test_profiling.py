@@ -0,0 +1,42 @@
+import os
+from unittest import TestCase
+from unittest.mock import patch
+
+from nestor_api.config.profiling import ProfilingConfiguration
+
+
+class TestProfilingConfig(TestCase):
+    @patch.dict(os.environ, {"NESTOR_PROFILING_ENABLED": ""})
+    def test_is_always_enabled_default(self):
+        del os.environ["NESTOR_PROFILING_ENABLED"]
+        self.assertFalse(ProfilingConfiguration.is_always_enabled())
+
+    @patch.dict(os.environ, {"NESTOR_PROFILING_ENABLED": "True"})
+    def test_is_always_enabled_configured(self):
+        self.assertTrue(ProfilingConfiguration.is_always_enabled())
+
+    @patch.dict(os.environ, {"NESTOR_PROFILING_TOKEN": ""})
+    def test_get_token_default(self):
+        self.assertIsNone(ProfilingConfiguration.get_token())
+
+    @patch.dict(os.environ, {"NESTOR_PROFILING_TOKEN": "secret"})
+    def test_get_token_configured(self):
+        self.assertEqual(ProfilingConfiguration.get_token(), "secret")
+
+    @patch.dict(os.environ, {"NESTOR_PROFILES_PATH": ""})
+    def test_get_profiles_path_default(self):
+        del os.environ["NESTOR_PROFILES_PATH"]
+        self.assertEqual(ProfilingConfiguration.get_profiles_path(), "/tmp/nestor/profiles")
+
+    @patch.dict(os.environ, {"NESTOR_PROFILES_PATH": "/var/profiles"})
+    def test_get_profiles_path_configured(self):
+        self.assertEqual(ProfilingConfiguration.get_profiles_path(), "/var/profiles")
+
+    @patch.dict(os.environ, {"NESTOR_PROFILES_MAX": ""})
+    def test_get_max_profiles_default(self):
+        del os.environ["NESTOR_PROFILES_MAX"]
+        self.assertEqual(ProfilingConfiguration.get_max_profiles(), 50)
+
+    @patch.dict(os.environ, {"NESTOR_PROFILES_MAX": "3"})
+    def test_get_max_profiles_configured(self):
+        self.assertEqual(ProfilingConfiguration.get_max_profiles(), 3)
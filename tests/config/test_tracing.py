@@ -0,0 +1,25 @@
+import os
+from unittest import TestCase
+from unittest.mock import patch
+
+from nestor_api.config.tracing import TracingConfiguration
+
+
+class TestTracingConfig(TestCase):
+    @patch.dict(os.environ, {"NESTOR_TRACING_EXPORTER": ""})
+    def test_get_exporter_default(self):
+        del os.environ["NESTOR_TRACING_EXPORTER"]
+        self.assertEqual(TracingConfiguration.get_exporter(), "none")
+
+    @patch.dict(os.environ, {"NESTOR_TRACING_EXPORTER": "File"})
+    def test_get_exporter_configured(self):
+        self.assertEqual(TracingConfiguration.get_exporter(), "file")
+
+    @patch.dict(os.environ, {"NESTOR_TRACING_FILE": ""})
+    def test_get_file_path_default(self):
+        del os.environ["NESTOR_TRACING_FILE"]
+        self.assertEqual(TracingConfiguration.get_file_path(), "/tmp/nestor/traces")
+
+    @patch.dict(os.environ, {"NESTOR_TRACING_FILE": "/var/traces.jsonl"})
+    def test_get_file_path_configured(self):
+        self.assertEqual(TracingConfiguration.get_file_path(), "/var/traces.jsonl")
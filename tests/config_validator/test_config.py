@@ -13,3 +13,20 @@ class TestConfig(unittest.TestCase):
     @patch.dict(os.environ, {"NESTOR_VALIDATION_TARGET": "APPLICATIONS"})
     def test_config_get_validation_target(self):
         self.assertEqual(Configuration.get_validation_target(), "APPLICATIONS")
+
+    @patch.dict(os.environ, {"NESTOR_VALIDATION_PROCESSES": "4"})
+    def test_config_get_validation_processes(self):
+        self.assertEqual(Configuration.get_validation_processes(), 4)
+
+    def test_config_get_validation_processes_default(self):
+        with patch.dict(os.environ):
+            os.environ.pop("NESTOR_VALIDATION_PROCESSES", None)
+            self.assertEqual(Configuration.get_validation_processes(), 1)
+
+    @patch.dict(os.environ, {"NESTOR_VALIDATION_SINCE": "origin/master"})
+    def test_config_get_validation_since(self):
+        self.assertEqual(Configuration.get_validation_since(), "origin/master")
+
+    @patch.dict(os.environ, {"NESTOR_VALIDATION_CACHE_PATH": "/tmp/cache.json"})
+    def test_config_get_validation_cache_path(self):
+        self.assertEqual(Configuration.get_validation_cache_path(), "/tmp/cache.json")
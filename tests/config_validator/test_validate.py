@@ -1,5 +1,8 @@
 import os
 from pathlib import Path
+import shutil
+import subprocess
+import tempfile
 import unittest
 from unittest.mock import patch
 
@@ -7,9 +10,12 @@ from jsonschema import ValidationError  # type: ignore
 from yaml.constructor import ConstructorError
 
 from tests.__fixtures__.example_schema import EXAMPLE_SCHEMA  # type: ignore
+from validator.config.config import SupportedValidations
 from validator.errors.errors import InvalidTargetPathError
 import validator.validate as config_validator
 
+FIXTURES_PATH = Path(os.path.dirname(__file__), "..", "__fixtures__", "validator").resolve()
+
 
 class TestValidateLibrary(unittest.TestCase):
     def test_is_yaml_file(self):
@@ -39,6 +45,7 @@ class TestValidateLibrary(unittest.TestCase):
         with self.assertRaises(InvalidTargetPathError):
             config_validator.build_project_conf_path()
 
+    @patch.dict(config_validator.SCHEMAS, {"EXAMPLE": EXAMPLE_SCHEMA})
     def test_validate_valid_file(self):
         yaml_fixture_path = Path(
             os.path.dirname(__file__), "..", "__fixtures__", "example_valid_config.yaml"
@@ -46,18 +53,72 @@ class TestValidateLibrary(unittest.TestCase):
 
         # Validate an exception is not raised on valid schemas
         try:
-            result = config_validator.validate_file(yaml_fixture_path, EXAMPLE_SCHEMA)
-            self.assertIsNone(result)
+            self.assertIsNone(config_validator.validate_file(yaml_fixture_path, "EXAMPLE"))
         except ValidationError as error:
             self.fail(f"It should have not raised an exception on a valid file ${error}")
 
+    @patch.dict(config_validator.SCHEMAS, {"EXAMPLE": EXAMPLE_SCHEMA})
     def test_validate_invalid_file(self):
         yaml_fixture_path = Path(
             os.path.dirname(__file__), "..", "__fixtures__", "example_invalid_config.yaml"
         ).resolve()
 
         with self.assertRaises(Exception):
-            config_validator.validate_file(yaml_fixture_path, EXAMPLE_SCHEMA)
+            config_validator.validate_file(yaml_fixture_path, "EXAMPLE")
+
+    @patch.dict(config_validator.SCHEMAS, {"EXAMPLE": EXAMPLE_SCHEMA})
+    def test_validate_invalid_file_raises_validation_error(self):
+        yaml_fixture_path = Path(
+            os.path.dirname(__file__), "..", "__fixtures__", "example_invalid_config.yaml"
+        ).resolve()
+
+        with self.assertRaises(ValidationError):
+            config_validator.validate_file(yaml_fixture_path, "EXAMPLE")
+
+    @patch.dict(config_validator.SCHEMAS, {"EXAMPLE": EXAMPLE_SCHEMA})
+    def test_collect_file_errors(self):
+        yaml_fixture_path = Path(
+            os.path.dirname(__file__), "..", "__fixtures__", "example_invalid_config.yaml"
+        ).resolve()
+
+        errors = config_validator.collect_file_errors(yaml_fixture_path, "EXAMPLE")
+
+        self.assertEqual(len(errors), 2)
+        self.assertTrue(all(isinstance(error, ValidationError) for error in errors))
+        self.assertEqual(
+            # pylint: disable=no-member
+            sorted(error.validator for error in errors),
+            ["additionalProperties", "type"],
+        )
+
+    @patch.dict(config_validator.SCHEMAS, {"EXAMPLE": EXAMPLE_SCHEMA})
+    def test_collect_file_errors_with_duplicate_keys(self):
+        yaml_fixture_path = Path(
+            os.path.dirname(__file__),
+            "..",
+            "__fixtures__",
+            "validator",
+            "apps_with_errors",
+            "app.yaml",
+        ).resolve()
+
+        errors = config_validator.collect_file_errors(yaml_fixture_path, "EXAMPLE")
+
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], ConstructorError)
+
+    @patch.dict(config_validator.SCHEMAS, {"EXAMPLE": EXAMPLE_SCHEMA, "OTHER": {**EXAMPLE_SCHEMA}})
+    @patch.dict(config_validator._validators, clear=True)  # pylint: disable=protected-access
+    @patch("jsonschema.Draft7Validator.check_schema", autospec=True)
+    def test_get_validator_is_cached(self, check_schema_mock):
+        validator = config_validator.get_validator("EXAMPLE")
+
+        self.assertIs(config_validator.get_validator("EXAMPLE"), validator)
+        self.assertIsNot(config_validator.get_validator("OTHER"), validator)
+        self.assertIs(
+            config_validator.get_validator("OTHER").schema, config_validator.SCHEMAS["OTHER"]
+        )
+        self.assertEqual(check_schema_mock.call_count, 2)
 
     @patch("validator.validate.build_apps_path")
     def test_validate_error_apps_dir_not_exists(self, build_apps_path_mock):
@@ -100,7 +161,7 @@ class TestValidateLibrary(unittest.TestCase):
     @patch("validator.validate.build_apps_path")
     @patch("validator.config.config.Configuration.get_validation_target")
     def test_validate_projects(
-        self, get_validation_target_mock, build_apps_path_mock, build_project_conf_path_mock,
+        self, get_validation_target_mock, build_apps_path_mock, build_project_conf_path_mock
     ):
         real_config_fixture_path = Path(
             os.path.dirname(__file__), "..", "__fixtures__", "validator", "projects", "project.yaml"
@@ -126,5 +187,182 @@ class TestValidateLibrary(unittest.TestCase):
 
         expected_error = "Found a duplicate key: app"
         result = config_validator.validate_deployment_files()
-        self.assertIsInstance(result[0], ConstructorError)
-        self.assertEqual(str(result[0]), expected_error)
+        self.assertEqual(result[0][0], os.path.join(config_fixture_path, "app.yaml"))
+        self.assertIsInstance(result[0][1], ConstructorError)
+        self.assertEqual(str(result[0][1]), expected_error)
+
+    @patch("validator.validate.build_apps_path")
+    @patch("validator.config.config.Configuration.get_validation_target")
+    def test_validate_apps_with_validation_errors(
+        self, get_validation_target_mock, build_apps_path_mock
+    ):
+        get_validation_target_mock.return_value = str(SupportedValidations.APPLICATIONS)
+        with tempfile.TemporaryDirectory() as apps_path:
+            build_apps_path_mock.return_value = apps_path
+            for app_name in ["app-1", "app-2"]:
+                with open(os.path.join(apps_path, f"{app_name}.yaml"), "w") as app_file:
+                    app_file.write(f"app: {app_name}\nis_enabled: 'yes'\n")
+
+            result = config_validator.validate_deployment_files()
+
+        # Every error of every file is reported, with the path of its file
+        self.assertTrue(all(isinstance(error, ValidationError) for _, error in result))
+        type_errors = [(path, error) for path, error in result if error.validator == "type"]
+        self.assertEqual(
+            [(os.path.basename(path), error.instance) for path, error in type_errors],
+            [("app-1.yaml", "yes"), ("app-2.yaml", "yes")],
+        )
+        self.assertGreater(len(result), len(type_errors))
+
+
+class TestValidateConfigurationRepository(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.config_path = self.tmp_dir.name
+        os.makedirs(os.path.join(self.config_path, "apps"))
+        for app_name in ["app-1", "app-2", "app-3"]:
+            shutil.copy(
+                os.path.join(FIXTURES_PATH, "apps", "app.yaml"),
+                os.path.join(self.config_path, "apps", f"{app_name}.yaml"),
+            )
+        shutil.copy(
+            os.path.join(FIXTURES_PATH, "projects", "project.yaml"),
+            os.path.join(self.config_path, "project.yaml"),
+        )
+        env_patcher = patch.dict(
+            os.environ, {"NESTOR_CONFIG_PATH": self.config_path, "NESTOR_VALIDATION_TARGET": "ALL"}
+        )
+        env_patcher.start()
+        self.addCleanup(env_patcher.stop)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _break_app(self, app_name):
+        app_path = os.path.join(self.config_path, "apps", f"{app_name}.yaml")
+        with open(app_path, "r") as app_file:
+            content = app_file.read()
+        with open(app_path, "w") as app_file:
+            app_file.write(content.replace("is_enabled: true", "is_enabled: 'yes'"))
+
+    def _git(self, *args):
+        subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@test", *args],
+            cwd=self.config_path,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+
+    def test_validate_all(self):
+        with patch(
+            "validator.validate.collect_file_errors",
+            autospec=True,
+            side_effect=config_validator.collect_file_errors,
+        ) as collect_file_errors_mock:
+            result = config_validator.validate_deployment_files()
+
+        self.assertEqual(result, [])
+        validated_files = [call[0][0] for call in collect_file_errors_mock.call_args_list]
+        self.assertEqual(
+            validated_files,
+            [
+                os.path.join(self.config_path, "apps", "app-1.yaml"),
+                os.path.join(self.config_path, "apps", "app-2.yaml"),
+                os.path.join(self.config_path, "apps", "app-3.yaml"),
+                os.path.join(self.config_path, "project.yaml"),
+            ],
+        )
+
+    @patch.dict(os.environ, {"NESTOR_VALIDATION_PROCESSES": "2"})
+    def test_validate_all_in_processes(self):
+        self._break_app("app-2")
+        with open(os.path.join(self.config_path, "apps", "app-3.yaml"), "a") as app_file:
+            app_file.write("app: duplicate\n")
+
+        result = config_validator.validate_deployment_files()
+
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result[0][0], os.path.join(self.config_path, "apps", "app-2.yaml"))
+        self.assertIsInstance(result[0][1], ValidationError)
+        self.assertEqual(result[0][1].instance, "yes")
+        self.assertEqual(result[1][0], os.path.join(self.config_path, "apps", "app-3.yaml"))
+        self.assertIsInstance(result[1][1], ConstructorError)
+
+    def test_validate_with_cache(self):
+        cache_path = os.path.join(self.config_path, ".validation-cache.json")
+        self._break_app("app-2")
+
+        with patch.dict(os.environ, {"NESTOR_VALIDATION_CACHE_PATH": cache_path}):
+            first_result = config_validator.validate_deployment_files()
+            with patch(
+                "validator.validate.collect_file_errors",
+                autospec=True,
+                side_effect=config_validator.collect_file_errors,
+            ) as collect_file_errors_mock:
+                second_result = config_validator.validate_deployment_files()
+
+        self.assertEqual(len(first_result), 1)
+        self.assertEqual(len(second_result), 1)
+        # Only the invalid file is validated again
+        collect_file_errors_mock.assert_called_once()
+        self.assertEqual(
+            collect_file_errors_mock.call_args[0][0],
+            os.path.join(self.config_path, "apps", "app-2.yaml"),
+        )
+
+    def test_validate_with_cache_of_another_target(self):
+        cache_path = os.path.join(self.config_path, ".validation-cache.json")
+
+        with patch.dict(os.environ, {"NESTOR_VALIDATION_CACHE_PATH": cache_path}):
+            with patch.dict(os.environ, {"NESTOR_VALIDATION_TARGET": "PROJECTS"}):
+                config_validator.validate_deployment_files()
+            with patch.dict(os.environ, {"NESTOR_VALIDATION_TARGET": "APPLICATIONS"}):
+                config_validator.validate_deployment_files()
+            with patch(
+                "validator.validate.collect_file_errors",
+                autospec=True,
+                side_effect=config_validator.collect_file_errors,
+            ) as collect_file_errors_mock:
+                result = config_validator.validate_deployment_files()
+
+        # The project stays cached after the validation of the applications
+        self.assertEqual(result, [])
+        collect_file_errors_mock.assert_not_called()
+
+    def test_validate_since(self):
+        self._git("init", "-q")
+        self._git("add", ".")
+        self._git("commit", "-q", "-m", "initial")
+        self._break_app("app-2")
+        shutil.copy(
+            os.path.join(FIXTURES_PATH, "apps", "app.yaml"),
+            os.path.join(self.config_path, "apps", "app-4.yaml"),
+        )
+
+        cache_path = os.path.join(self.config_path, ".validation-cache.json")
+        with patch.dict(
+            os.environ,
+            {"NESTOR_VALIDATION_SINCE": "HEAD", "NESTOR_VALIDATION_CACHE_PATH": cache_path},
+        ), patch(
+            "validator.validate.collect_file_errors",
+            autospec=True,
+            side_effect=config_validator.collect_file_errors,
+        ) as collect_file_errors_mock, patch(
+            "validator.validate.get_cache_key",
+            autospec=True,
+            side_effect=config_validator.get_cache_key,
+        ) as get_cache_key_mock:
+            result = config_validator.validate_deployment_files()
+
+        self.assertEqual(len(result), 1)
+        validated_files = [call[0][0] for call in collect_file_errors_mock.call_args_list]
+        self.assertEqual(
+            validated_files,
+            [
+                os.path.join(self.config_path, "apps", "app-2.yaml"),
+                os.path.join(self.config_path, "apps", "app-4.yaml"),
+            ],
+        )
+        # Only the changed files are hashed
+        hashed_files = [call[0][0] for call in get_cache_key_mock.call_args_list]
+        self.assertEqual(hashed_files, validated_files)
@@ -0,0 +1,439 @@
+import base64
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import select
+import socket
+import socketserver
+import tempfile
+import threading
+from unittest import TestCase
+
+import yaml
+
+import nestor_api.lib.k8s.api_client as api_client
+from nestor_api.lib.k8s.enums.k8s_resource_kind import K8sResourceKind
+
+DISCOVERY = {
+    "/api/v1": [
+        {"name": "namespaces", "kind": "Namespace", "namespaced": False},
+        {"name": "services", "kind": "Service", "namespaced": True},
+    ],
+    "/apis/apps/v1": [
+        {"name": "deployments", "kind": "Deployment", "namespaced": True},
+        {"name": "deployments/scale", "kind": "Scale", "namespaced": True},
+    ],
+    "/apis/batch/v1beta1": [{"name": "cronjobs", "kind": "CronJob", "namespaced": True}],
+}
+
+
+class _FakeApiServer(ThreadingHTTPServer):
+    """A fake Kubernetes API server."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        self.requests: list = []
+        self.connections = 0
+        # When set, the requests authenticated with another token are rejected
+        self.token = None
+        self.routes: dict = {
+            ("GET", path): (200, {"resources": resources}) for path, resources in DISCOVERY.items()
+        }
+        super().__init__(("127.0.0.1", 0), _FakeApiHandler)
+
+
+class _FakeApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, *_args):  # pylint: disable=arguments-differ
+        pass
+
+    def _handle(self):
+        body = b""
+        if "Content-Length" in self.headers:
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append(
+            {"method": self.command, "path": self.path, "headers": self.headers, "body": body}
+        )
+
+        path = self.path.split("?")[0]
+        status, response = self.server.routes.get(
+            (self.command, path), (404, {"kind": "Status", "message": f"{path} not found"})
+        )
+        if self.server.token is not None and (
+            self.headers["Authorization"] != f"Bearer {self.server.token}"
+        ):
+            status, response = 401, {"kind": "Status", "message": "Unauthorized"}
+        if isinstance(response, list):
+            # Stream of watch events
+            payload = b"".join(json.dumps(event).encode("utf-8") + b"\n" for event in response)
+        else:
+            payload = json.dumps(response).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = _handle
+    do_PATCH = _handle
+
+
+class _FakeProxyHandler(socketserver.StreamRequestHandler):
+    """Tunnels the CONNECT requests to their target."""
+
+    def handle(self):
+        request_line = self.rfile.readline().decode("ascii")
+        while self.rfile.readline() not in (b"\r\n", b""):
+            pass
+        self.server.tunnels.append(request_line.split()[1])
+        host, port = request_line.split()[1].rsplit(":", 1)
+        with socket.create_connection((host, int(port))) as upstream:
+            self.wfile.write(b"HTTP/1.1 200 Connection established\r\n\r\n")
+            sockets = [self.connection, upstream]
+            while True:
+                readable, _, _ = select.select(sockets, [], [], 5)
+                if not readable:
+                    return
+                for sock in readable:
+                    data = sock.recv(65536)
+                    if not data:
+                        return
+                    (upstream if sock is self.connection else self.connection).sendall(data)
+
+
+class TestK8sApiClient(TestCase):
+    def setUp(self):
+        self.server = _FakeApiServer()
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.server_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.client = api_client.K8sApiClient(
+            "my-cluster", api_client.ClusterConfig(self.server_url, token="my-token"), proxy=""
+        )
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_list_resources(self):
+        self.server.routes[("GET", "/apis/apps/v1/namespaces/my-namespace/deployments")] = (
+            200,
+            {"kind": "DeploymentList", "items": [{"metadata": {"name": "my-app----web"}}]},
+        )
+        self.server.routes[("GET", "/apis/batch/v1beta1/namespaces/my-namespace/cronjobs")] = (
+            200,
+            {"kind": "CronJobList", "items": None},
+        )
+
+        result = self.client.list_resources(
+            "my-namespace", [K8sResourceKind.DEPLOYMENT, K8sResourceKind.CRONJOB], "app=my-app"
+        )
+
+        self.assertEqual(
+            result,
+            {
+                "apiVersion": "v1",
+                "kind": "List",
+                "items": [
+                    {
+                        "apiVersion": "apps/v1",
+                        "kind": "Deployment",
+                        "metadata": {"name": "my-app----web"},
+                    }
+                ],
+            },
+        )
+        paths = [request["path"] for request in self.server.requests]
+        self.assertEqual(
+            paths,
+            [
+                "/apis/apps/v1",
+                "/apis/apps/v1/namespaces/my-namespace/deployments?labelSelector=app%3Dmy-app",
+                "/apis/batch/v1beta1",
+                "/apis/batch/v1beta1/namespaces/my-namespace/cronjobs?labelSelector=app%3Dmy-app",
+            ],
+        )
+        self.assertEqual(self.server.requests[0]["headers"]["Authorization"], "Bearer my-token")
+        # All the requests went through the same connection
+        self.assertEqual(self.server.connections, 1)
+
+    def test_watch_resources(self):
+        self.server.routes[("GET", "/apis/apps/v1/namespaces/my-namespace/deployments")] = (
+            200,
+            [
+                {"type": "ADDED", "object": {"metadata": {"name": "web"}}},
+                {"type": "MODIFIED", "object": {"metadata": {"name": "web"}}},
+            ],
+        )
+        self.server.routes[("GET", "/apis/batch/v1beta1/namespaces/my-namespace/cronjobs")] = (
+            200,
+            [{"type": "ADDED", "object": {"kind": "CronJob", "metadata": {"name": "cron"}}}],
+        )
+
+        events = list(
+            self.client.watch_resources(
+                "my-namespace",
+                [K8sResourceKind.DEPLOYMENT, K8sResourceKind.CRONJOB],
+                "app=my-app",
+                30,
+            )
+        )
+
+        self.assertEqual(
+            sorted(
+                (event["type"], event["object"]["kind"], event["object"]["apiVersion"])
+                for event in events
+            ),
+            [
+                ("ADDED", "CronJob", "batch/v1beta1"),
+                ("ADDED", "Deployment", "apps/v1"),
+                ("MODIFIED", "Deployment", "apps/v1"),
+            ],
+        )
+        watch_paths = sorted(
+            request["path"] for request in self.server.requests if "watch" in request["path"]
+        )
+        self.assertEqual(
+            watch_paths,
+            [
+                "/apis/apps/v1/namespaces/my-namespace/deployments"
+                "?watch=1&labelSelector=app%3Dmy-app&timeoutSeconds=30",
+                "/apis/batch/v1beta1/namespaces/my-namespace/cronjobs"
+                "?watch=1&labelSelector=app%3Dmy-app&timeoutSeconds=30",
+            ],
+        )
+
+    def test_watch_resources_with_api_error(self):
+        with self.assertRaisesRegex(api_client.K8sApiError, "not found"):
+            list(
+                self.client.watch_resources(
+                    "my-namespace", [K8sResourceKind.DEPLOYMENT], "app=my-app", 30
+                )
+            )
+
+    def test_apply_manifest(self):
+        self.server.routes[("PATCH", "/api/v1/namespaces/my-namespace")] = (200, {})
+        self.server.routes[
+            ("PATCH", "/apis/apps/v1/namespaces/my-namespace/deployments/my-app----web")
+        ] = (200, {})
+        manifest = (
+            "---\napiVersion: v1\nkind: Namespace\nmetadata:\n  name: my-namespace\n"
+            "---\napiVersion: apps/v1\nkind: Deployment\n"
+            "metadata:\n  name: my-app----web\n  namespace: my-namespace\n"
+        )
+
+        self.client.apply_manifest(manifest)
+
+        patches = [request for request in self.server.requests if request["method"] == "PATCH"]
+        self.assertEqual(
+            [request["path"] for request in patches],
+            [
+                "/api/v1/namespaces/my-namespace?fieldManager=nestor&force=true",
+                "/apis/apps/v1/namespaces/my-namespace/deployments/my-app----web"
+                "?fieldManager=nestor&force=true",
+            ],
+        )
+        self.assertEqual(patches[1]["headers"]["Content-Type"], "application/apply-patch+yaml")
+        self.assertEqual(
+            json.loads(patches[1]["body"]),
+            {
+                "apiVersion": "apps/v1",
+                "kind": "Deployment",
+                "metadata": {"name": "my-app----web", "namespace": "my-namespace"},
+            },
+        )
+
+        # The discovery is cached
+        self.client.apply_manifest(manifest)
+        self.assertEqual(len(self.server.requests), 6)
+
+    def test_apply_with_api_error(self):
+        self.server.routes[
+            ("PATCH", "/apis/apps/v1/namespaces/default/deployments/my-app----web")
+        ] = (422, {"kind": "Status", "message": "Deployment is invalid"})
+
+        with self.assertRaises(api_client.K8sApiError) as context:
+            self.client.apply(
+                {
+                    "apiVersion": "apps/v1",
+                    "kind": "Deployment",
+                    "metadata": {"name": "my-app----web"},
+                }
+            )
+
+        self.assertEqual(str(context.exception), "Deployment is invalid")
+        self.assertEqual(context.exception.status, 422)
+
+    def test_apply_unknown_kind(self):
+        with self.assertRaisesRegex(api_client.K8sApiError, 'Unknown resource kind "Scale"'):
+            self.client.apply({"apiVersion": "apps/v1", "kind": "Scale", "metadata": {"name": "s"}})
+
+    def test_annotate_resources(self):
+        self.server.routes[("GET", "/apis/apps/v1/namespaces/my-namespace/deployments")] = (
+            200,
+            {"items": [{"metadata": {"name": "my-app----web"}}]},
+        )
+        deployment_path = "/apis/apps/v1/namespaces/my-namespace/deployments/my-app----web"
+        self.server.routes[("PATCH", deployment_path)] = (200, {})
+
+        self.client.annotate_resources(
+            "my-namespace", [K8sResourceKind.DEPLOYMENT], "app=my-app", {"key": "value"}
+        )
+
+        request = self.server.requests[-1]
+        self.assertEqual(request["path"], deployment_path)
+        self.assertEqual(request["headers"]["Content-Type"], "application/merge-patch+json")
+        self.assertEqual(
+            json.loads(request["body"]), {"metadata": {"annotations": {"key": "value"}}}
+        )
+
+    def test_rotated_token(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            token_file = os.path.join(tmp_dir, "token")
+            with open(token_file, "w") as file:
+                file.write("my-new-token\n")
+            client = api_client.K8sApiClient(
+                "my-cluster",
+                api_client.ClusterConfig(self.server_url, token="my-token", token_file=token_file),
+                proxy="",
+            )
+            self.server.token = "my-new-token"
+            self.server.routes[("GET", "/apis/apps/v1/namespaces/my-namespace/deployments")] = (
+                200,
+                {"items": []},
+            )
+
+            client.list_resources("my-namespace", [K8sResourceKind.DEPLOYMENT], "app=my-app")
+            client.close()
+
+        self.assertEqual(
+            [request["headers"]["Authorization"] for request in self.server.requests],
+            ["Bearer my-token", "Bearer my-new-token", "Bearer my-new-token"],
+        )
+
+    def test_rejected_token_without_token_file(self):
+        self.server.token = "my-new-token"
+
+        with self.assertRaisesRegex(api_client.K8sApiError, "Unauthorized"):
+            self.client.list_resources("my-namespace", [K8sResourceKind.DEPLOYMENT], "app=my-app")
+
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_watch_resources_with_rotated_token(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            token_file = os.path.join(tmp_dir, "token")
+            with open(token_file, "w") as file:
+                file.write("my-new-token\n")
+            client = api_client.K8sApiClient(
+                "my-cluster",
+                api_client.ClusterConfig(self.server_url, token="my-token", token_file=token_file),
+                proxy="",
+            )
+            self.server.routes[("GET", "/apis/apps/v1/namespaces/my-namespace/deployments")] = (
+                200,
+                [{"type": "ADDED", "object": {"metadata": {"name": "my-app"}}}],
+            )
+            # The API discovery is cached before the token is rotated
+            client.list_resources("my-namespace", [K8sResourceKind.DEPLOYMENT], "app=my-app")
+            self.server.token = "my-new-token"
+
+            events = list(
+                client.watch_resources(
+                    "my-namespace", [K8sResourceKind.DEPLOYMENT], "app=my-app", 30
+                )
+            )
+            client.close()
+
+        self.assertEqual([event["type"] for event in events], ["ADDED"])
+        self.assertEqual(
+            [request["headers"]["Authorization"] for request in self.server.requests][-2:],
+            ["Bearer my-token", "Bearer my-new-token"],
+        )
+
+    def test_through_proxy(self):
+        proxy = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _FakeProxyHandler)
+        proxy.daemon_threads = True
+        proxy.tunnels = []
+        threading.Thread(target=proxy.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(proxy.server_close)
+        self.addCleanup(proxy.shutdown)
+        client = api_client.K8sApiClient(
+            "my-cluster",
+            api_client.ClusterConfig(self.server_url),
+            proxy=f"127.0.0.1:{proxy.server_address[1]}",
+        )
+        self.addCleanup(client.close)
+        self.server.routes[("GET", "/apis/apps/v1/namespaces/default/deployments")] = (
+            200,
+            {"items": []},
+        )
+
+        client.list_resources("default", [K8sResourceKind.DEPLOYMENT], "app=my-app")
+
+        self.assertEqual(proxy.tunnels, [f"127.0.0.1:{self.server.server_address[1]}"])
+        self.assertEqual(len(self.server.requests), 2)
+
+
+class TestLoadClusterConfig(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.kubeconfig_path = os.path.join(self.tmp_dir.name, "config")
+
+    def _write_kubeconfig(self, user: dict) -> None:
+        kubeconfig = {
+            "clusters": [
+                {
+                    "name": "my-cluster",
+                    "cluster": {
+                        "server": "https://k8s.my-domain.com",
+                        "certificate-authority-data": base64.b64encode(b"CA").decode("ascii"),
+                    },
+                }
+            ],
+            "users": [{"name": "my-user", "user": user}],
+            "contexts": [
+                {"name": "my-context", "context": {"cluster": "my-cluster", "user": "my-user"}}
+            ],
+        }
+        with open(self.kubeconfig_path, "w") as kubeconfig_file:
+            yaml.safe_dump(kubeconfig, kubeconfig_file)
+
+    def test_load_cluster_config(self):
+        with open(os.path.join(self.tmp_dir.name, "token"), "w") as token_file:
+            token_file.write("my-token\n")
+        self._write_kubeconfig(
+            {"tokenFile": "token", "client-certificate": "client.crt", "client-key": "/client.key"}
+        )
+
+        config = api_client.load_cluster_config("my-context", self.kubeconfig_path)
+
+        self.assertEqual(
+            config,
+            api_client.ClusterConfig(
+                server="https://k8s.my-domain.com",
+                token="my-token",
+                token_file=os.path.join(self.tmp_dir.name, "token"),
+                ca_data="CA",
+                cert_file=os.path.join(self.tmp_dir.name, "client.crt"),
+                key_file="/client.key",
+            ),
+        )
+
+    def test_load_cluster_config_unknown_context(self):
+        self._write_kubeconfig({"token": "my-token"})
+
+        with self.assertRaisesRegex(api_client.K8sApiError, 'Context "other" not found'):
+            api_client.load_cluster_config("other", self.kubeconfig_path)
+
+    def test_load_cluster_config_with_auth_plugin(self):
+        self._write_kubeconfig({"exec": {"command": "aws"}})
+
+        with self.assertRaisesRegex(api_client.K8sApiError, "only supported by the kubectl"):
+            api_client.load_cluster_config("my-context", self.kubeconfig_path)
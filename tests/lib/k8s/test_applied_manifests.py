@@ -0,0 +1,123 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+import nestor_api.lib.k8s.applied_manifests as applied_manifests
+from nestor_api.lib.k8s.enums.k8s_resource_kind import K8sResourceKind
+
+DEPLOYMENT_CONFIG = {"cluster_name": "my-cluster", "namespace": "my-namespace", "app": "my-app"}
+
+
+@patch("nestor_api.lib.k8s.applied_manifests.cli", autospec=True)
+@patch("nestor_api.lib.k8s.applied_manifests.K8sConfiguration", autospec=True)
+class TestAppliedManifests(TestCase):
+    def setUp(self):
+        self.record_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.record_dir.cleanup)
+
+    def _configure(self, config_mock, mode):
+        config_mock.get_applied_record.return_value = mode
+        config_mock.get_applied_record_path.return_value = os.path.join(
+            self.record_dir.name, "applied"
+        )
+
+    def test_get_digest(self, _config_mock, _cli_mock):
+        """Should depend on the content and the boundaries of the manifests."""
+        digest = applied_manifests.get_digest(["ingress", "deployment"])
+
+        self.assertEqual(digest, applied_manifests.get_digest(["ingress", "deployment"]))
+        self.assertEqual(digest, applied_manifests.get_digest([None, "ingress", "deployment"]))
+        self.assertNotEqual(digest, applied_manifests.get_digest(["ingressdeployment"]))
+        self.assertNotEqual(digest, applied_manifests.get_digest(["ingress", "deployment2"]))
+
+    def test_disabled(self, config_mock, cli_mock):
+        """Should neither record nor skip anything."""
+        self._configure(config_mock, "none")
+
+        applied_manifests.record_applied(DEPLOYMENT_CONFIG, "digest")
+
+        self.assertFalse(applied_manifests.is_applied(DEPLOYMENT_CONFIG, "digest"))
+        self.assertFalse(os.path.exists(os.path.join(self.record_dir.name, "applied")))
+        cli_mock.annotate_resources.assert_not_called()
+
+    def test_local_record(self, config_mock, cli_mock):
+        """Should recognize the last applied digest of each app."""
+        self._configure(config_mock, "local")
+
+        self.assertFalse(applied_manifests.is_applied(DEPLOYMENT_CONFIG, "digest-1"))
+        applied_manifests.record_applied(DEPLOYMENT_CONFIG, "digest-1")
+        self.assertTrue(applied_manifests.is_applied(DEPLOYMENT_CONFIG, "digest-1"))
+
+        applied_manifests.record_applied(DEPLOYMENT_CONFIG, "digest-2")
+        self.assertFalse(applied_manifests.is_applied(DEPLOYMENT_CONFIG, "digest-1"))
+        self.assertTrue(applied_manifests.is_applied(DEPLOYMENT_CONFIG, "digest-2"))
+
+        other_app_config = {**DEPLOYMENT_CONFIG, "namespace": "other-namespace"}
+        self.assertFalse(applied_manifests.is_applied(other_app_config, "digest-2"))
+        cli_mock.fetch_resource_configuration.assert_not_called()
+        cli_mock.annotate_resources.assert_not_called()
+
+    def test_cluster_record(self, config_mock, cli_mock):
+        """Should mirror the digest in an annotation of the deployed resources."""
+        self._configure(config_mock, "cluster")
+
+        applied_manifests.record_applied(DEPLOYMENT_CONFIG, "digest")
+
+        cli_mock.annotate_resources.assert_called_once_with(
+            "my-cluster",
+            "my-namespace",
+            "my-app",
+            [K8sResourceKind.DEPLOYMENT, K8sResourceKind.CRONJOB],
+            {"nestor/applied-manifests-digest": "digest"},
+        )
+        self.assertTrue(applied_manifests.is_applied(DEPLOYMENT_CONFIG, "digest"))
+        cli_mock.fetch_resource_configuration.assert_not_called()
+
+    def test_cluster_record_failing_to_annotate(self, config_mock, cli_mock):
+        """Should still record the digest locally when the resources cannot be annotated."""
+        self._configure(config_mock, "cluster")
+        cli_mock.annotate_resources.side_effect = RuntimeError("kubectl failed")
+
+        applied_manifests.record_applied(DEPLOYMENT_CONFIG, "digest")
+
+        self.assertTrue(applied_manifests.is_applied(DEPLOYMENT_CONFIG, "digest"))
+
+    def test_local_record_failing(self, config_mock, _cli_mock):
+        """Should not raise when the digest cannot be recorded."""
+        self._configure(config_mock, "local")
+        config_mock.get_applied_record_path.return_value = os.path.join(__file__, "applied")
+
+        applied_manifests.record_applied(DEPLOYMENT_CONFIG, "digest")
+
+        self.assertFalse(applied_manifests.is_applied(DEPLOYMENT_CONFIG, "digest"))
+
+    def test_cluster_record_without_local_record(self, config_mock, cli_mock):
+        """Should fall back on the annotations of the deployed resources."""
+        self._configure(config_mock, "cluster")
+        annotated_item = {
+            "metadata": {"annotations": {"nestor/applied-manifests-digest": "digest"}}
+        }
+        cli_mock.fetch_resource_configuration.return_value = {
+            "items": [annotated_item, annotated_item]
+        }
+
+        self.assertTrue(applied_manifests.is_applied(DEPLOYMENT_CONFIG, "digest"))
+        # Recorded locally from then on
+        self.assertTrue(applied_manifests.is_applied(DEPLOYMENT_CONFIG, "digest"))
+        cli_mock.fetch_resource_configuration.assert_called_once()
+
+    def test_cluster_record_partially_annotated(self, config_mock, cli_mock):
+        """Should not skip when a resource is not annotated with the digest."""
+        self._configure(config_mock, "cluster")
+        cli_mock.fetch_resource_configuration.return_value = {
+            "items": [
+                {"metadata": {"annotations": {"nestor/applied-manifests-digest": "digest"}}},
+                {"metadata": {}},
+            ]
+        }
+
+        self.assertFalse(applied_manifests.is_applied(DEPLOYMENT_CONFIG, "digest"))
+
+        cli_mock.fetch_resource_configuration.return_value = {"items": []}
+        self.assertFalse(applied_manifests.is_applied(DEPLOYMENT_CONFIG, "digest"))
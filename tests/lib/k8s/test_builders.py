@@ -3,6 +3,7 @@ from unittest.mock import patch
 
 import nestor_api.lib.k8s.builders as k8s_builders
 import tests.__fixtures__.k8s as k8s_fixtures
+import yaml_lib
 
 
 class TestK8sBuilders(TestCase):
@@ -15,6 +16,10 @@ class TestK8sBuilders(TestCase):
 
         return template_validator
 
+    @staticmethod
+    def _to_yaml(resources: list) -> list:
+        return [yaml_lib.convert_to_yaml(resource) for resource in resources]
+
     # pylint: disable=line-too-long
     @patch("nestor_api.lib.k8s.builders.io", autospec=True)
     def test_load_templates(self, io_mock):
@@ -224,6 +229,20 @@ class TestK8sBuilders(TestCase):
         image_url = k8s_builders.get_image_name(app_config, {"tag": "1.0.0-sha-a2b3c4"})
         self.assertEqual(image_url, "my-organization/my-app:1.0.0-sha-a2b3c4")
 
+    def test_get_pod_template_hash(self):
+        """Should only change when the labels or the spec of the pod change."""
+        pod_template = {
+            "metadata": {"labels": {"app": "my-app"}, "annotations": {"date": "1"}},
+            "spec": {"containers": [{"image": "my-app:1.0.0", "env": [{"name": "A"}]}]},
+        }
+        pod_template_hash = k8s_builders.get_pod_template_hash(pod_template)
+
+        self.assertRegex(pod_template_hash, r"^[0-9a-f]{64}$")
+        pod_template["metadata"]["annotations"] = {"date": "2"}
+        self.assertEqual(k8s_builders.get_pod_template_hash(pod_template), pod_template_hash)
+        pod_template["spec"]["containers"][0]["env"][0]["value"] = "new"
+        self.assertNotEqual(k8s_builders.get_pod_template_hash(pod_template), pod_template_hash)
+
     def test_get_probes_both_configured(self):
         """Check that the configuration of probes is correct if both configured"""
         probes = k8s_builders.get_probes(
@@ -572,6 +591,38 @@ class TestK8sBuilders(TestCase):
 
         self.assertEqual(resource["spec"]["template"]["spec"], {})
 
+    @patch("nestor_api.lib.k8s.builders.K8sConfiguration", autospec=True)
+    @patch("nestor_api.lib.k8s.builders.time.time", autospec=True)
+    def test_set_pod_template_annotation_date(self, time_mock, k8s_configuration_mock):
+        """Should annotate the pod template with the current date."""
+        time_mock.return_value = 123456.789
+        k8s_configuration_mock.get_pod_template_annotation.return_value = "date"
+        deployment = {"spec": {"template": {"metadata": {}, "spec": {}}}}
+
+        k8s_builders.set_pod_template_annotation(deployment)
+
+        self.assertEqual(
+            deployment["spec"]["template"]["metadata"]["annotations"], {"date": "123456789"}
+        )
+
+    @patch("nestor_api.lib.k8s.builders.K8sConfiguration", autospec=True)
+    @patch("nestor_api.lib.k8s.builders.time.time", autospec=True)
+    def test_set_pod_template_annotation_hash(self, time_mock, k8s_configuration_mock):
+        """Should annotate the pod template with a hash of its content, the same on every
+        deployment of the same configuration."""
+        time_mock.side_effect = [1, 2]
+        k8s_configuration_mock.get_pod_template_annotation.return_value = "hash"
+        deployment_1 = {"spec": {"template": {"metadata": {}, "spec": {"containers": [{}]}}}}
+        deployment_2 = {"spec": {"template": {"metadata": {}, "spec": {"containers": [{}]}}}}
+
+        k8s_builders.set_pod_template_annotation(deployment_1)
+        k8s_builders.set_pod_template_annotation(deployment_2)
+
+        annotations = deployment_1["spec"]["template"]["metadata"]["annotations"]
+        self.assertEqual(list(annotations), ["checksum/pod-template"])
+        self.assertEqual(annotations, deployment_2["spec"]["template"]["metadata"]["annotations"])
+        time_mock.assert_not_called()
+
     @patch("nestor_api.lib.k8s.builders.get_probes", autospec=True)
     def test_set_probes_configured(self, get_probes_mock):
         """Should attach the probes to the resource."""
@@ -935,10 +986,10 @@ class TestK8sBuilders(TestCase):
         """Should correctly concatenate the built sections."""
         # Mock
         def _cron_mock(cronjob, _1, _2, _3):
-            return ["---", f'cronjob: {cronjob["name"]}']
+            return [{"cronjob": cronjob["name"]}]
 
         def _process_mock(process, _1, _2, _3):
-            return ["---", f'hpa: {process["name"]}', "---", f'process: {process["name"]}']
+            return [{"hpa": process["name"]}, {"process": process["name"]}]
 
         get_sections_for_cronjobs_mock.side_effect = _cron_mock
         get_sections_for_process_mock.side_effect = _process_mock
@@ -961,19 +1012,103 @@ class TestK8sBuilders(TestCase):
             yaml_output,
             """---
 hpa: process-1
+
 ---
 process: process-1
+
 ---
 hpa: process-2
+
 ---
 process: process-2
+
 ---
 cronjob: cronjob-1
+
+---
+cronjob: cronjob-2
+""",
+        )
+
+    @patch("nestor_api.lib.k8s.builders.load_templates", autospec=True)
+    @patch("nestor_api.lib.k8s.builders.get_sections_for_cronjob", autospec=True)
+    @patch("nestor_api.lib.k8s.builders.get_sections_for_process", autospec=True)
+    def test_build_deployment_yaml_with_namespace(
+        self, get_sections_for_process_mock, get_sections_for_cronjobs_mock, _load_templates_mock
+    ):
+        """Should put all the resources in the namespace, declared once at the beginning."""
+        get_sections_for_process_mock.side_effect = lambda process, _1, _2, _3: [
+            {"kind": "Deployment", "metadata": {"name": process["name"]}}
+        ]
+        get_sections_for_cronjobs_mock.side_effect = lambda cronjob, _1, _2, _3: [
+            {"kind": "CronJob", "metadata": {"name": cronjob["name"]}}
+        ]
+        deployment_config = {
+            "namespace": "my-namespace",
+            "processes": [
+                {"name": "process-1", "is_cronjob": False},
+                {"name": "process-2", "is_cronjob": False},
+                {"name": "cronjob-1", "is_cronjob": True},
+            ],
+        }
+        templates = {
+            "namespace": self._create_template_validator(
+                expected={"name": "my-namespace"},
+                return_value="apiVersion: v1\nkind: Namespace\nmetadata:\n  name: my-namespace\n",
+            )
+        }
+
+        yaml_output = k8s_builders.build_deployment_yaml(deployment_config, templates, "tag")
+
+        self.assertEqual(
+            yaml_output,
+            """---
+apiVersion: v1
+kind: Namespace
+metadata:
+  name: my-namespace
+
+---
+kind: Deployment
+metadata:
+  name: process-1
+  namespace: my-namespace
+
 ---
-cronjob: cronjob-2""",
+kind: Deployment
+metadata:
+  name: process-2
+  namespace: my-namespace
+
+---
+kind: CronJob
+metadata:
+  name: cronjob-1
+  namespace: my-namespace
+""",
+        )
+
+    def test_serialize_resources(self):
+        """Should serialize the shared resources once, before the others."""
+        namespace = {"kind": "Namespace", "metadata": {"name": "my-namespace"}}
+        other_namespace = {"kind": "Namespace", "metadata": {"name": "other-namespace"}}
+        deployment = {"kind": "Deployment", "metadata": {"name": "my-app"}}
+
+        yaml_output = k8s_builders.serialize_resources(
+            [deployment, namespace, deployment, other_namespace, namespace]
+        )
+
+        self.assertEqual(
+            yaml_output.split("---\n"),
+            [
+                "",
+                "kind: Namespace\nmetadata:\n  name: my-namespace\n\n",
+                "kind: Namespace\nmetadata:\n  name: other-namespace\n\n",
+                "kind: Deployment\nmetadata:\n  name: my-app\n\n",
+                "kind: Deployment\nmetadata:\n  name: my-app\n",
+            ],
         )
 
-    @patch("nestor_api.lib.k8s.builders.set_namespace", autospec=True)
     @patch("nestor_api.lib.k8s.builders.set_environment_variables", autospec=True)
     @patch("nestor_api.lib.k8s.builders.set_probes", autospec=True)
     @patch("nestor_api.lib.k8s.builders.set_command", autospec=True)
@@ -996,14 +1131,12 @@ cronjob: cronjob-2""",
         set_command_mock,
         set_probes_mock,
         set_environment_variables_mock,
-        set_namespace_mock,
     ):
         """Should correctly build the sections for the given process."""
         # Mocks
         time_mock.return_value = 123456
         parse_yaml_mock.side_effect = lambda x: x
         set_replicas_mock.return_value = None
-        set_namespace_mock.return_value = None
 
         # Setup
         process = {"name": "my-process"}
@@ -1032,7 +1165,7 @@ cronjob: cronjob-2""",
         )
 
         # Assertions
-        self.assertEqual(sections, ["---", k8s_fixtures.PROCESS_SPEC_EXPECTED_OUTPUT])
+        self.assertEqual(self._to_yaml(sections), [k8s_fixtures.PROCESS_SPEC_EXPECTED_OUTPUT])
 
         set_secret_mock.assert_called_once()
         set_replicas_mock.assert_called_once()
@@ -1042,9 +1175,7 @@ cronjob: cronjob-2""",
         set_command_mock.assert_called_once()
         set_probes_mock.assert_called_once()
         set_environment_variables_mock.assert_called_once()
-        set_namespace_mock.assert_called_once()
 
-    @patch("nestor_api.lib.k8s.builders.set_namespace", autospec=True)
     @patch("nestor_api.lib.k8s.builders.set_environment_variables", autospec=True)
     @patch("nestor_api.lib.k8s.builders.set_probes", autospec=True)
     @patch("nestor_api.lib.k8s.builders.set_command", autospec=True)
@@ -1055,7 +1186,7 @@ cronjob: cronjob-2""",
     @patch("nestor_api.lib.k8s.builders.set_secret", autospec=True)
     @patch("nestor_api.lib.k8s.builders.yaml_lib.parse_yaml", autospec=True)
     @patch("nestor_api.lib.k8s.builders.time.time", autospec=True)
-    def test_get_sections_for_process_with_hpa_and_namespace(
+    def test_get_sections_for_process_with_hpa(
         self,
         time_mock,
         parse_yaml_mock,
@@ -1067,14 +1198,12 @@ cronjob: cronjob-2""",
         set_command_mock,
         set_probes_mock,
         set_environment_variables_mock,
-        set_namespace_mock,
     ):
-        """Should build the sections with the configured hpa and namespace."""
+        """Should build the sections with the configured hpa."""
         # Mocks
         time_mock.return_value = 123456
         parse_yaml_mock.side_effect = lambda x: x
         set_replicas_mock.return_value = {"template": "hpa"}
-        set_namespace_mock.return_value = {"template": "namespace"}
 
         # Setup
         process = {"name": "my-process"}
@@ -1104,15 +1233,7 @@ cronjob: cronjob-2""",
 
         # Assertions
         self.assertEqual(
-            sections,
-            [
-                "---",
-                "template: namespace\n",
-                "---",
-                "template: hpa\n",
-                "---",
-                k8s_fixtures.PROCESS_SPEC_EXPECTED_OUTPUT,
-            ],
+            self._to_yaml(sections), ["template: hpa\n", k8s_fixtures.PROCESS_SPEC_EXPECTED_OUTPUT],
         )
 
         set_secret_mock.assert_called_once()
@@ -1123,9 +1244,7 @@ cronjob: cronjob-2""",
         set_command_mock.assert_called_once()
         set_probes_mock.assert_called_once()
         set_environment_variables_mock.assert_called_once()
-        set_namespace_mock.assert_called_once()
 
-    @patch("nestor_api.lib.k8s.builders.set_namespace", autospec=True)
     @patch("nestor_api.lib.k8s.builders.set_environment_variables", autospec=True)
     @patch("nestor_api.lib.k8s.builders.set_probes", autospec=True)
     @patch("nestor_api.lib.k8s.builders.set_command", autospec=True)
@@ -1148,14 +1267,12 @@ cronjob: cronjob-2""",
         set_command_mock,
         set_probes_mock,
         set_environment_variables_mock,
-        set_namespace_mock,
     ):
         """Should correctly build the sections for the web process."""
         # Mocks
         time_mock.return_value = 123456
         parse_yaml_mock.side_effect = lambda x: x
         set_replicas_mock.return_value = None
-        set_namespace_mock.return_value = None
 
         # Setup
         process = {"name": "web"}
@@ -1194,7 +1311,7 @@ cronjob: cronjob-2""",
 
         # Assertions
         self.assertEqual(
-            sections, ["---", "template: web\n", "---", k8s_fixtures.PROCESS_SPEC_EXPECTED_OUTPUT],
+            self._to_yaml(sections), ["template: web\n", k8s_fixtures.PROCESS_SPEC_EXPECTED_OUTPUT],
         )
 
         set_secret_mock.assert_called_once()
@@ -1205,9 +1322,7 @@ cronjob: cronjob-2""",
         set_command_mock.assert_called_once()
         set_probes_mock.assert_called_once()
         set_environment_variables_mock.assert_called_once()
-        set_namespace_mock.assert_called_once()
 
-    @patch("nestor_api.lib.k8s.builders.set_namespace", autospec=True)
     @patch("nestor_api.lib.k8s.builders.set_node_selector", autospec=True)
     @patch("nestor_api.lib.k8s.builders.set_environment_variables", autospec=True)
     @patch("nestor_api.lib.k8s.builders.set_command", autospec=True)
@@ -1222,83 +1337,10 @@ cronjob: cronjob-2""",
         set_command_mock,
         set_environment_variables_mock,
         set_node_selector_mock,
-        set_namespace_mock,
     ):
         """Should correctly build the sections for cronjob."""
         # Mocks
         parse_yaml_mock.side_effect = lambda x: x
-        set_namespace_mock.return_value = None
-
-        # Setup
-        cronjob = {"name": "my-cron"}
-        deployment_config = {
-            "app": "my-app",
-            "project": "my-project",
-            "docker": {"registry": {"organization": "my-organization"}},
-            "crons": {"my-cron": {"schedule": "*/30 * * * *", "concurrency_policy": "Forbid"}},
-        }
-        tag_to_deploy = "1.0.0-sha-1ab23cd"
-        templates = {
-            "cronjob": self._create_template_validator(
-                expected={
-                    "app": "my-app",
-                    "name": "my-app----my-cron",
-                    "image": "my-organization/my-app:1.0.0-sha-1ab23cd",
-                    "process": "my-cron",
-                    "project": "my-project",
-                },
-                return_value={"spec": {"jobTemplate": {}}},
-            ),
-            "job": self._create_template_validator(
-                expected={
-                    "app": "my-app",
-                    "name": "my-app----my-cron",
-                    "image": "my-organization/my-app:1.0.0-sha-1ab23cd",
-                    "process": "my-cron",
-                    "project": "my-project",
-                },
-                return_value={"spec": {"job": "spec"}},
-            ),
-        }
-
-        # Test
-        sections = k8s_builders.get_sections_for_cronjob(
-            cronjob, deployment_config, tag_to_deploy, templates
-        )
-
-        # Assertions
-        self.assertEqual(
-            sections, ["---", k8s_fixtures.CRONJOB_SPEC_EXPECTED_OUTPUT],
-        )
-
-        set_secret_mock.assert_called_once()
-        set_resources_mock.assert_called_once()
-        set_command_mock.assert_called_once()
-        set_environment_variables_mock.assert_called_once()
-        set_node_selector_mock.assert_called_once()
-        set_namespace_mock.assert_called_once()
-
-    @patch("nestor_api.lib.k8s.builders.set_namespace", autospec=True)
-    @patch("nestor_api.lib.k8s.builders.set_node_selector", autospec=True)
-    @patch("nestor_api.lib.k8s.builders.set_environment_variables", autospec=True)
-    @patch("nestor_api.lib.k8s.builders.set_command", autospec=True)
-    @patch("nestor_api.lib.k8s.builders.set_resources", autospec=True)
-    @patch("nestor_api.lib.k8s.builders.set_secret", autospec=True)
-    @patch("nestor_api.lib.k8s.builders.yaml_lib.parse_yaml", autospec=True)
-    def test_get_sections_for_cronjob_with_namespace(
-        self,
-        parse_yaml_mock,
-        set_secret_mock,
-        set_resources_mock,
-        set_command_mock,
-        set_environment_variables_mock,
-        set_node_selector_mock,
-        set_namespace_mock,
-    ):
-        """Should build the sections with the configured namespace."""
-        # Mocks
-        parse_yaml_mock.side_effect = lambda x: x
-        set_namespace_mock.return_value = {"template": "namespace"}
 
         # Setup
         cronjob = {"name": "my-cron"}
@@ -1338,17 +1380,13 @@ cronjob: cronjob-2""",
         )
 
         # Assertions
-        self.assertEqual(
-            sections,
-            ["---", "template: namespace\n", "---", k8s_fixtures.CRONJOB_SPEC_EXPECTED_OUTPUT],
-        )
+        self.assertEqual(self._to_yaml(sections), [k8s_fixtures.CRONJOB_SPEC_EXPECTED_OUTPUT])
 
         set_secret_mock.assert_called_once()
         set_resources_mock.assert_called_once()
         set_command_mock.assert_called_once()
         set_environment_variables_mock.assert_called_once()
         set_node_selector_mock.assert_called_once()
-        set_namespace_mock.assert_called_once()
 
     def test_build_ingress_yaml(self):
         # Mocks
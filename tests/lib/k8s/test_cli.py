@@ -1,6 +1,6 @@
 import os
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import ANY, call, patch
 
 import nestor_api.lib.k8s.cli as cli
 from nestor_api.lib.k8s.enums.k8s_resource_kind import K8sResourceKind
@@ -64,3 +64,299 @@ class TestK8sCli(TestCase):
             "kubectl --context cluster_name apply -f /path/to/config",
             env={**os.environ, "HTTP_PROXY": "k8s-proxy.my-domain.com"},
         )
+
+    @patch("nestor_api.lib.k8s.cli.K8sConfiguration", autospec=True)
+    @patch("nestor_api.lib.k8s.cli.io", autospec=True)
+    def test_annotate_resources(self, io_mock, config_mock):
+        config_mock.get_http_proxy.return_value = "k8s-proxy.my-domain.com"
+
+        cli.annotate_resources(
+            "cluster",
+            "namespace",
+            "my-app",
+            [K8sResourceKind.DEPLOYMENT, K8sResourceKind.CRONJOB],
+            {"nestor/digest": "abc"},
+        )
+
+        io_mock.execute.assert_called_once_with(
+            (
+                "kubectl "
+                "--context cluster "
+                "--namespace namespace "
+                "annotate Deployment,CronJob "
+                "--overwrite "
+                "--selector app=my-app "
+                "nestor/digest=abc"
+            ),
+            env={**os.environ, "HTTP_PROXY": "k8s-proxy.my-domain.com"},
+        )
+
+    @patch("nestor_api.lib.k8s.cli.K8sConfiguration", autospec=True)
+    @patch("nestor_api.lib.k8s.cli.api_client", autospec=True)
+    @patch("nestor_api.lib.k8s.cli.io", autospec=True)
+    def test_fetch_resource_configuration_with_api_client(self, io_mock, api_mock, config_mock):
+        config_mock.get_client.return_value = "api"
+        client_mock = api_mock.get_client.return_value
+        client_mock.list_resources.return_value = {"items": []}
+
+        result = cli.fetch_resource_configuration(
+            "cluster", "namespace", "my-app", [K8sResourceKind.DEPLOYMENT]
+        )
+
+        self.assertEqual(result, {"items": []})
+        api_mock.get_client.assert_called_once_with("cluster")
+        client_mock.list_resources.assert_called_once_with(
+            "namespace", [K8sResourceKind.DEPLOYMENT], "app=my-app"
+        )
+        io_mock.execute.assert_not_called()
+
+    @patch("nestor_api.lib.k8s.cli.K8sConfiguration", autospec=True)
+    @patch("nestor_api.lib.k8s.cli.api_client", autospec=True)
+    @patch("nestor_api.lib.k8s.cli.io", autospec=True)
+    def test_apply_config_with_api_client(self, io_mock, api_mock, config_mock):
+        config_mock.get_client.return_value = "api"
+        io_mock.read.return_value = "kind: Deployment"
+
+        cli.apply_config("cluster_name", "/path/to/config")
+
+        io_mock.read.assert_called_once_with("/path/to/config")
+        api_mock.get_client.return_value.apply_manifest.assert_called_once_with(
+            "kind: Deployment"
+        )
+        io_mock.execute.assert_not_called()
+
+    @patch("nestor_api.lib.k8s.cli.K8sConfiguration", autospec=True)
+    @patch("nestor_api.lib.k8s.cli.api_client", autospec=True)
+    @patch("nestor_api.lib.k8s.cli.io", autospec=True)
+    def test_annotate_resources_with_api_client(self, io_mock, api_mock, config_mock):
+        config_mock.get_client.return_value = "api"
+
+        cli.annotate_resources(
+            "cluster", "namespace", "my-app", [K8sResourceKind.DEPLOYMENT], {"key": "value"}
+        )
+
+        api_mock.get_client.return_value.annotate_resources.assert_called_once_with(
+            "namespace", [K8sResourceKind.DEPLOYMENT], "app=my-app", {"key": "value"}
+        )
+        io_mock.execute.assert_not_called()
+
+    @patch("nestor_api.lib.k8s.cli.K8sConfiguration", autospec=True)
+    @patch("nestor_api.lib.k8s.cli.io", autospec=True)
+    def test_fetch_resource_status(self, io_mock, config_mock):
+        """Should only request the fields of the status and rebuild the resources from them."""
+        config_mock.get_client.return_value = "kubectl"
+        config_mock.get_http_proxy.return_value = "k8s-proxy.my-domain.com"
+        io_mock.execute_stream.return_value = iter(
+            [
+                'Deployment\t\tweb\tapp:1.0\t["/bin/bash","-c","npm start"]\t[{"name":"A","value":"1"}]\n',
+                "CronJob\t0 0 * * *\tcron\tapp:1.0\t\t\n",
+            ]
+        )
+
+        result = cli.fetch_resource_status(
+            "cluster", "namespace", "my-app", [K8sResourceKind.DEPLOYMENT, K8sResourceKind.CRONJOB]
+        )
+
+        pod_template = {
+            "metadata": {"labels": {"process": "web"}},
+            "spec": {
+                "containers": [
+                    {
+                        "image": "app:1.0",
+                        "args": ["/bin/bash", "-c", "npm start"],
+                        "env": [{"name": "A", "value": "1"}],
+                    }
+                ]
+            },
+        }
+        cron_pod_template = {
+            "metadata": {"labels": {"process": "cron"}},
+            "spec": {"containers": [{"image": "app:1.0", "args": [], "env": []}]},
+        }
+        self.assertEqual(
+            list(result),
+            [
+                {"kind": "Deployment", "spec": {"template": pod_template}},
+                {
+                    "kind": "CronJob",
+                    "spec": {
+                        "schedule": "0 0 * * *",
+                        "jobTemplate": {"spec": {"template": cron_pod_template}},
+                    },
+                },
+            ],
+        )
+        io_mock.execute_stream.assert_called_once_with(
+            (
+                "kubectl "
+                "--context cluster "
+                "--namespace namespace "
+                "get Deployment,CronJob "
+                f"--output=jsonpath='{cli.STATUS_JSONPATH}' "
+                "--selector app=my-app"
+            ),
+            env={**os.environ, "HTTP_PROXY": "k8s-proxy.my-domain.com"},
+        )
+
+    def test_status_jsonpath(self):
+        """Should print the fields of both deployments and cronjobs, one resource per line."""
+        self.assertEqual(
+            cli.STATUS_JSONPATH,
+            "{range .items[*]}"
+            '{.kind}{"\\t"}'
+            '{.spec.schedule}{"\\t"}'
+            "{.spec.template.metadata.labels.process}"
+            '{.spec.jobTemplate.spec.template.metadata.labels.process}{"\\t"}'
+            "{.spec.template.spec.containers[0].image}"
+            '{.spec.jobTemplate.spec.template.spec.containers[0].image}{"\\t"}'
+            "{.spec.template.spec.containers[0].args}"
+            '{.spec.jobTemplate.spec.template.spec.containers[0].args}{"\\t"}'
+            "{.spec.template.spec.containers[0].env}"
+            '{.spec.jobTemplate.spec.template.spec.containers[0].env}{"\\n"}'
+            "{end}",
+        )
+
+    @patch("nestor_api.lib.k8s.cli.K8sConfiguration", autospec=True)
+    @patch("nestor_api.lib.k8s.cli.api_client", autospec=True)
+    @patch("nestor_api.lib.k8s.cli.io", autospec=True)
+    def test_fetch_resource_status_with_api_client(self, io_mock, api_mock, config_mock):
+        config_mock.get_client.return_value = "api"
+        client_mock = api_mock.get_client.return_value
+        client_mock.list_resources.return_value = {"items": [{"kind": "Deployment"}]}
+
+        result = cli.fetch_resource_status(
+            "cluster", "namespace", "my-app", [K8sResourceKind.DEPLOYMENT]
+        )
+
+        self.assertEqual(list(result), [{"kind": "Deployment"}])
+        client_mock.list_resources.assert_called_once_with(
+            "namespace", [K8sResourceKind.DEPLOYMENT], "app=my-app"
+        )
+        io_mock.execute_stream.assert_not_called()
+
+    @patch("nestor_api.lib.k8s.cli.K8sConfiguration", autospec=True)
+    @patch("nestor_api.lib.k8s.cli.io", autospec=True)
+    def test_watch_resources(self, io_mock, config_mock):
+        config_mock.get_http_proxy.return_value = "k8s-proxy.my-domain.com"
+        streams = {
+            "Deployment": [
+                "{\n",
+                '    "type": "ADDED",\n',
+                '    "object": {"kind": "Deployment"}\n',
+                "}\n",
+            ],
+            "CronJob": ['{"type": "MODIFIED", "object": {"kind": "CronJob", "value": "}"}}\n'],
+        }
+        io_mock.execute_stream.side_effect = lambda command, env, stop: iter(
+            streams[command.split(" get ")[1].split(" ")[0]]
+        )
+
+        events = list(
+            cli.watch_resources(
+                "cluster",
+                "namespace",
+                "my-app",
+                [K8sResourceKind.DEPLOYMENT, K8sResourceKind.CRONJOB],
+                60,
+            )
+        )
+
+        # kubectl watches a single kind at a time: the streams are merged
+        self.assertCountEqual(
+            events,
+            [
+                {"type": "ADDED", "object": {"kind": "Deployment"}},
+                {"type": "MODIFIED", "object": {"kind": "CronJob", "value": "}"}},
+            ],
+        )
+        self.assertCountEqual(
+            io_mock.execute_stream.call_args_list,
+            [
+                call(
+                    (
+                        "kubectl "
+                        "--context cluster "
+                        "--namespace namespace "
+                        f"get {kind} "
+                        "--watch "
+                        "--output-watch-events "
+                        "--output=json "
+                        "--request-timeout=60s "
+                        "--selector app=my-app"
+                    ),
+                    env={**os.environ, "HTTP_PROXY": "k8s-proxy.my-domain.com"},
+                    stop=ANY,
+                )
+                for kind in ["Deployment", "CronJob"]
+            ],
+        )
+
+    @patch("nestor_api.lib.k8s.cli.K8sConfiguration", autospec=True)
+    @patch("nestor_api.lib.k8s.cli.io", autospec=True)
+    def test_watch_resources_stopped_early(self, io_mock, _config_mock):
+        stops = []
+
+        def _execute_stream(_command, env, stop):  # pylint: disable=unused-argument
+            stops.append(stop)
+            yield '{"type": "ADDED", "object": {}}\n'
+            stop.wait(5)
+
+        io_mock.execute_stream.side_effect = _execute_stream
+
+        events = cli.watch_resources(
+            "cluster",
+            "namespace",
+            "my-app",
+            [K8sResourceKind.DEPLOYMENT, K8sResourceKind.CRONJOB],
+            60,
+        )
+        self.assertEqual(next(events), {"type": "ADDED", "object": {}})
+        events.close()
+
+        # Stopping the watch kills the kubectl of every kind
+        self.assertTrue(all(stop.is_set() for stop in stops))
+
+    @patch("nestor_api.lib.k8s.cli.K8sConfiguration", autospec=True)
+    @patch("nestor_api.lib.k8s.cli.io", autospec=True)
+    def test_watch_resources_until_timeout(self, io_mock, _config_mock):
+        def _execute_stream(_command, env, stop):  # pylint: disable=unused-argument
+            yield '{"type": "ADDED", "object": {}}\n'
+            raise RuntimeError("error: context deadline exceeded")
+
+        io_mock.execute_stream.side_effect = _execute_stream
+
+        events = list(
+            cli.watch_resources("cluster", "namespace", "my-app", [K8sResourceKind.DEPLOYMENT], 60)
+        )
+
+        self.assertEqual(events, [{"type": "ADDED", "object": {}}])
+
+    @patch("nestor_api.lib.k8s.cli.K8sConfiguration", autospec=True)
+    @patch("nestor_api.lib.k8s.cli.io", autospec=True)
+    def test_watch_resources_with_error(self, io_mock, _config_mock):
+        io_mock.execute_stream.side_effect = RuntimeError("error: forbidden")
+
+        with self.assertRaisesRegex(RuntimeError, "forbidden"):
+            list(
+                cli.watch_resources(
+                    "cluster", "namespace", "my-app", [K8sResourceKind.DEPLOYMENT], 60
+                )
+            )
+
+    @patch("nestor_api.lib.k8s.cli.K8sConfiguration", autospec=True)
+    @patch("nestor_api.lib.k8s.cli.api_client", autospec=True)
+    @patch("nestor_api.lib.k8s.cli.io", autospec=True)
+    def test_watch_resources_with_api_client(self, io_mock, api_mock, config_mock):
+        config_mock.get_client.return_value = "api"
+        client_mock = api_mock.get_client.return_value
+        client_mock.watch_resources.return_value = iter([{"type": "ADDED", "object": {}}])
+
+        events = list(
+            cli.watch_resources("cluster", "namespace", "my-app", [K8sResourceKind.DEPLOYMENT], 60)
+        )
+
+        self.assertEqual(events, [{"type": "ADDED", "object": {}}])
+        client_mock.watch_resources.assert_called_once_with(
+            "namespace", [K8sResourceKind.DEPLOYMENT], "app=my-app", 60
+        )
+        io_mock.execute_stream.assert_not_called()
@@ -0,0 +1,299 @@
+from collections import OrderedDict
+import queue
+from unittest import TestCase
+from unittest.mock import ANY, patch
+
+import nestor_api.lib.k8s.deploy_queue as deploy_queue
+
+APP_CONFIG = {
+    "app": "my-app",
+    "deployments": [{"cluster_name": "cluster-a"}, {"cluster_name": "cluster-b"}],
+}
+
+
+class _SynchronousExecutor:
+    def __init__(self, **_kwargs):
+        pass
+
+    @staticmethod
+    def submit(function, *args):
+        function(*args)
+
+
+class _DeferredExecutor:
+    """Executor running the submitted functions on demand."""
+
+    submitted: list = []
+
+    def __init__(self, **_kwargs):
+        pass
+
+    @classmethod
+    def submit(cls, function, *args):
+        cls.submitted.append((function, args))
+
+    @classmethod
+    def run_next(cls):
+        function, args = cls.submitted.pop(0)
+        function(*args)
+
+
+def _get_deployments(app_config: dict) -> list:
+    return [{"app": app_config["app"], **config} for config in app_config["deployments"]]
+
+
+@patch("nestor_api.lib.k8s.deploy_queue.Logger", autospec=True)
+@patch("nestor_api.lib.k8s.deploy_queue.non_blocking_clean", autospec=True)
+@patch("nestor_api.lib.k8s.deploy_queue.deployment", autospec=True)
+@patch("nestor_api.lib.k8s.deploy_queue.builders", autospec=True)
+@patch("nestor_api.lib.k8s.deploy_queue.config", autospec=True)
+@patch("nestor_api.lib.k8s.deploy_queue.ThreadPoolExecutor", new=_SynchronousExecutor)
+@patch("nestor_api.lib.k8s.deploy_queue.Thread", autospec=True)
+class TestDeployQueue(TestCase):
+    def setUp(self):
+        for name, value in [
+            ("_jobs", OrderedDict()),
+            ("_snapshots", {}),
+            ("_executors", {}),
+            ("_app_deployments", {}),
+            ("_pending_jobs", queue.Queue()),
+            ("_dispatcher", None),
+        ]:
+            patcher = patch.object(deploy_queue, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _configure(self, config_mock, builders_mock, deployment_mock):
+        config_mock.get_remote_environment_commit.return_value = "commit-1"
+        config_mock.create_temporary_config_copy.side_effect = ["/config-1", "/config-2"]
+        config_mock.get_project_config.return_value = {"project": "config"}
+        config_mock.get_app_config.return_value = APP_CONFIG
+        config_mock.get_deployments.side_effect = _get_deployments
+        builders_mock.load_templates.return_value = {"deployment": "template"}
+        deployment_mock.deploy_app.return_value = {"processes": "changes"}
+
+    def _submit_and_dispatch(self, app_name: str = "my-app") -> str:
+        job_id = deploy_queue.submit(app_name, "staging", "1.0.0")["id"]
+        deploy_queue._dispatch(deploy_queue._pending_jobs.get_nowait())
+        return job_id
+
+    def test_submit(self, thread_mock, *_mocks):
+        """Should queue the job and start the dispatcher."""
+        job = deploy_queue.submit("my-app", "staging", "1.0.0")
+
+        self.assertEqual(
+            job,
+            {
+                "id": job["id"],
+                "app": "my-app",
+                "environment": "staging",
+                "tag": "1.0.0",
+                "status": "queued",
+                "clusters": {},
+                "err": None,
+            },
+        )
+        self.assertEqual(deploy_queue.get_job(job["id"]), job)
+        self.assertEqual(deploy_queue._pending_jobs.get_nowait(), job["id"])
+        thread_mock.return_value.start.assert_called_once()
+        self.assertIsNone(deploy_queue.get_job("unknown"))
+
+    def test_deploy_on_each_cluster(
+        self, _thread_mock, config_mock, builders_mock, deployment_mock, clean_mock, _logger_mock
+    ):
+        """Should deploy the app on the clusters of the environment."""
+        self._configure(config_mock, builders_mock, deployment_mock)
+
+        job_id = self._submit_and_dispatch()
+
+        job = deploy_queue.get_job(job_id)
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(
+            job["clusters"],
+            {
+                "cluster-a": {"status": "succeeded", "changes": {"processes": "changes"}},
+                "cluster-b": {"status": "succeeded", "changes": {"processes": "changes"}},
+            },
+        )
+        config_mock.change_environment.assert_called_once_with("staging", "/config-1")
+        builders_mock.load_templates.assert_called_once_with("/config-1/templates")
+        deployment_mock.deploy_app.assert_any_call(
+            {"app": "my-app", "cluster_name": "cluster-a"},
+            "/config-1",
+            "1.0.0",
+            wait=True,
+            on_rollout_progress=ANY,
+            templates={"deployment": "template"},
+        )
+        self.assertEqual(deployment_mock.deploy_app.call_count, 2)
+        clean_mock.assert_not_called()
+
+    def test_share_the_configuration_of_a_commit(
+        self, _thread_mock, config_mock, builders_mock, deployment_mock, clean_mock, _logger_mock
+    ):
+        """Should load the configuration once per commit and remove the outdated ones."""
+        self._configure(config_mock, builders_mock, deployment_mock)
+
+        self._submit_and_dispatch()
+        self._submit_and_dispatch()
+        self._submit_and_dispatch("other-app")
+
+        config_mock.create_temporary_config_copy.assert_called_once()
+        builders_mock.load_templates.assert_called_once()
+        config_mock.get_project_config.assert_called_once()
+        self.assertEqual(config_mock.get_app_config.call_count, 2)
+        config_mock.get_app_config.assert_called_with(
+            "other-app", "/config-1", {"project": "config"}
+        )
+
+        config_mock.get_remote_environment_commit.return_value = "commit-2"
+        self._submit_and_dispatch()
+
+        self.assertEqual(config_mock.create_temporary_config_copy.call_count, 2)
+        clean_mock.assert_called_once_with("/config-1", message_prefix="[deploy_queue]")
+
+    def test_keep_an_outdated_configuration_in_use(
+        self, _thread_mock, config_mock, builders_mock, deployment_mock, clean_mock, _logger_mock
+    ):
+        """Should only remove an outdated configuration once its deployments are over."""
+        self._configure(config_mock, builders_mock, deployment_mock)
+        snapshot = deploy_queue._get_snapshot("staging")
+        snapshot.users += 1
+
+        config_mock.get_remote_environment_commit.return_value = "commit-2"
+        self.assertIsNot(deploy_queue._get_snapshot("staging"), snapshot)
+        clean_mock.assert_not_called()
+
+        deploy_queue._release_snapshot(snapshot)
+        clean_mock.assert_called_once_with("/config-1", message_prefix="[deploy_queue]")
+
+    def test_deployment_failure(
+        self, _thread_mock, config_mock, builders_mock, deployment_mock, _clean_mock, _logger_mock
+    ):
+        """Should fail the job when the deployment fails on a cluster."""
+        self._configure(config_mock, builders_mock, deployment_mock)
+        deployment_mock.deploy_app.side_effect = [{}, Exception("kubectl failed")]
+
+        job = deploy_queue.get_job(self._submit_and_dispatch())
+
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["clusters"]["cluster-a"], {"status": "succeeded", "changes": {}})
+        self.assertEqual(
+            job["clusters"]["cluster-b"], {"status": "failed", "err": "kubectl failed"}
+        )
+
+    def test_rollout_progress(
+        self, _thread_mock, config_mock, builders_mock, deployment_mock, _clean_mock, _logger_mock
+    ):
+        """Should report the progress of the rollouts, and fail the ones not completed."""
+        self._configure(config_mock, builders_mock, deployment_mock)
+        reported_progress = {}
+
+        def _deploy_app(deployment_config, *_args, on_rollout_progress, **_kwargs):
+            cluster_name = deployment_config["cluster_name"]
+            is_done = cluster_name == "cluster-a"
+            progress = {"processes": [], "done": is_done, "timed_out": not is_done}
+            on_rollout_progress(progress)
+            reported_progress[cluster_name] = deploy_queue.get_job(job_id)["clusters"][cluster_name]
+            return {"processes": "changes", "rollout": progress}
+
+        deployment_mock.deploy_app.side_effect = _deploy_app
+        job_id = deploy_queue.submit("my-app", "staging", "1.0.0")["id"]
+        deploy_queue._dispatch(deploy_queue._pending_jobs.get_nowait())
+
+        job = deploy_queue.get_job(job_id)
+        self.assertEqual(
+            reported_progress["cluster-a"],
+            {"status": "running", "rollout": {"processes": [], "done": True, "timed_out": False}},
+        )
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(
+            job["clusters"],
+            {
+                "cluster-a": {
+                    "status": "succeeded",
+                    "rollout": {"processes": [], "done": True, "timed_out": False},
+                    "changes": {"processes": "changes"},
+                },
+                "cluster-b": {
+                    "status": "failed",
+                    "rollout": {"processes": [], "done": False, "timed_out": True},
+                    "err": "The rollout did not complete in time",
+                },
+            },
+        )
+
+    def test_unknown_environment(
+        self, _thread_mock, config_mock, builders_mock, deployment_mock, _clean_mock, _logger_mock
+    ):
+        self._configure(config_mock, builders_mock, deployment_mock)
+        config_mock.get_remote_environment_commit.return_value = ""
+
+        job = deploy_queue.get_job(self._submit_and_dispatch())
+
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["err"], 'Unknown environment "staging"')
+        config_mock.create_temporary_config_copy.assert_not_called()
+        deployment_mock.deploy_app.assert_not_called()
+
+    def test_configuration_failure(
+        self, _thread_mock, config_mock, builders_mock, deployment_mock, clean_mock, _logger_mock
+    ):
+        """Should remove the copy of the configuration when it cannot be loaded."""
+        self._configure(config_mock, builders_mock, deployment_mock)
+        config_mock.change_environment.side_effect = RuntimeError("checkout failed")
+
+        job = deploy_queue.get_job(self._submit_and_dispatch())
+
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["err"], "checkout failed")
+        clean_mock.assert_called_once_with("/config-1", message_prefix="[deploy_queue]")
+
+    @patch.object(_DeferredExecutor, "submitted", [])
+    def test_deploy_an_app_in_order(
+        self, _thread_mock, config_mock, builders_mock, deployment_mock, _clean_mock, _logger_mock
+    ):
+        """Should run the deployments of an app on a cluster one at a time, in order."""
+        self._configure(config_mock, builders_mock, deployment_mock)
+        config_mock.get_app_config.return_value = {
+            "app": "my-app",
+            "deployments": [{"cluster_name": "cluster-a"}],
+        }
+        deployed_tags = []
+        deployment_mock.deploy_app.side_effect = lambda _config, _dir, tag, **_kwargs: (
+            deployed_tags.append(tag) or {}
+        )
+
+        first_job_id = deploy_queue.submit("my-app", "staging", "1.0.0")["id"]
+        second_job_id = deploy_queue.submit("my-app", "staging", "2.0.0")["id"]
+        with patch.object(deploy_queue, "ThreadPoolExecutor", _DeferredExecutor):
+            deploy_queue._dispatch(deploy_queue._pending_jobs.get_nowait())
+            deploy_queue._dispatch(deploy_queue._pending_jobs.get_nowait())
+
+        # The second deployment is only queued once the first one is over
+        self.assertEqual(len(_DeferredExecutor.submitted), 1)
+        _DeferredExecutor.run_next()
+        self.assertEqual(deploy_queue.get_job(first_job_id)["status"], "succeeded")
+        self.assertEqual(deploy_queue.get_job(second_job_id)["status"], "running")
+        self.assertEqual(len(_DeferredExecutor.submitted), 1)
+        _DeferredExecutor.run_next()
+
+        self.assertEqual(deployed_tags, ["1.0.0", "2.0.0"])
+        self.assertEqual(deploy_queue.get_job(second_job_id)["status"], "succeeded")
+        self.assertEqual(_DeferredExecutor.submitted, [])
+        self.assertEqual(deploy_queue._app_deployments, {})
+
+    @patch("nestor_api.lib.k8s.deploy_queue.MAX_FINISHED_JOBS", 1)
+    def test_forget_finished_jobs(
+        self, _thread_mock, config_mock, builders_mock, deployment_mock, _clean_mock, _logger_mock
+    ):
+        self._configure(config_mock, builders_mock, deployment_mock)
+
+        first_job_id = self._submit_and_dispatch()
+        second_job_id = self._submit_and_dispatch()
+        queued_job_id = deploy_queue.submit("my-app", "staging", "1.0.0")["id"]
+        deploy_queue.submit("my-app", "staging", "1.0.0")
+
+        self.assertIsNone(deploy_queue.get_job(first_job_id))
+        self.assertIsNotNone(deploy_queue.get_job(second_job_id))
+        self.assertIsNotNone(deploy_queue.get_job(queued_job_id))
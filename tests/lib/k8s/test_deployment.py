@@ -1,5 +1,5 @@
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import call, patch
 
 import nestor_api.lib.k8s.deployment as k8s_lib
 from nestor_api.lib.k8s.enums.k8s_resource_kind import K8sResourceKind
@@ -7,8 +7,8 @@ import tests.__fixtures__.k8s as k8s_fixtures
 
 
 class TestK8sDeployment(TestCase):
+    @patch("nestor_api.lib.k8s.deployment.applied_manifests", autospec=True)
     @patch("nestor_api.lib.k8s.deployment.write_and_deploy_configuration", autospec=True)
-    @patch("nestor_api.lib.k8s.deployment.deploy_app_ingress", autospec=True)
     @patch("nestor_api.lib.k8s.deployment.get_deployment_statuses_diff", autospec=True)
     @patch("nestor_api.lib.k8s.deployment.get_deployment_status", autospec=True)
     @patch("nestor_api.lib.k8s.deployment.K8sConfiguration", autospec=True)
@@ -21,15 +21,18 @@ class TestK8sDeployment(TestCase):
         k8s_config_mock,
         get_deployment_status_mock,
         get_deployment_statuses_diff_mock,
-        deploy_app_ingress_mock,
         write_and_deploy_configuration_mock,
+        applied_manifests_mock,
     ):
         """Should correctly deploy an app with an ingress."""
         # Mocks
         k8s_config_mock.get_templates_dir.return_value = "templates-dir"
         builders_mock.load_templates.return_value = {}
         has_web_process_mock.return_value = True
+        builders_mock.build_ingress_yaml.return_value = "ingress: app"
         builders_mock.build_deployment_yaml.return_value = "deployment: app"
+        applied_manifests_mock.get_digest.return_value = "digest"
+        applied_manifests_mock.is_applied.return_value = False
         report = {}
         get_deployment_statuses_diff_mock.return_value = report
 
@@ -43,14 +46,21 @@ class TestK8sDeployment(TestCase):
         self.assertEqual(result, report)
 
         builders_mock.load_templates.assert_called_once_with("/config/templates-dir")
+        builders_mock.build_ingress_yaml.assert_called_once_with(deployment_config, "web", {})
+        applied_manifests_mock.get_digest.assert_called_once_with(
+            ["ingress: app", "deployment: app"]
+        )
 
         self.assertEqual(get_deployment_status_mock.call_count, 2)
         get_deployment_statuses_diff_mock.assert_called_once()
-        deploy_app_ingress_mock.assert_called_once()
-        write_and_deploy_configuration_mock.assert_called_once_with("my-cluster", "deployment: app")
+        self.assertEqual(
+            write_and_deploy_configuration_mock.call_args_list,
+            [call("my-cluster", "ingress: app"), call("my-cluster", "deployment: app")],
+        )
+        applied_manifests_mock.record_applied.assert_called_once_with(deployment_config, "digest")
 
+    @patch("nestor_api.lib.k8s.deployment.applied_manifests", autospec=True)
     @patch("nestor_api.lib.k8s.deployment.write_and_deploy_configuration", autospec=True)
-    @patch("nestor_api.lib.k8s.deployment.deploy_app_ingress", autospec=True)
     @patch("nestor_api.lib.k8s.deployment.get_deployment_statuses_diff", autospec=True)
     @patch("nestor_api.lib.k8s.deployment.get_deployment_status", autospec=True)
     @patch("nestor_api.lib.k8s.deployment.K8sConfiguration", autospec=True)
@@ -63,8 +73,8 @@ class TestK8sDeployment(TestCase):
         k8s_config_mock,
         get_deployment_status_mock,
         get_deployment_statuses_diff_mock,
-        deploy_app_ingress_mock,
         write_and_deploy_configuration_mock,
+        applied_manifests_mock,
     ):
         """Should correctly deploy the app, but not deploy an ingress."""
         # Mocks
@@ -72,6 +82,7 @@ class TestK8sDeployment(TestCase):
         builders_mock.load_templates.return_value = {}
         has_web_process_mock.return_value = False
         builders_mock.build_deployment_yaml.return_value = "deployment: app"
+        applied_manifests_mock.is_applied.return_value = False
         report = {}
         get_deployment_statuses_diff_mock.return_value = report
 
@@ -85,13 +96,185 @@ class TestK8sDeployment(TestCase):
         self.assertEqual(result, report)
 
         builders_mock.load_templates.assert_called_once_with("/config/templates-dir")
+        applied_manifests_mock.get_digest.assert_called_once_with([None, "deployment: app"])
 
         self.assertEqual(get_deployment_status_mock.call_count, 2)
         get_deployment_statuses_diff_mock.assert_called_once()
 
-        deploy_app_ingress_mock.assert_not_called()
+        builders_mock.build_ingress_yaml.assert_not_called()
         write_and_deploy_configuration_mock.assert_called_once_with("my-cluster", "deployment: app")
 
+    @patch("nestor_api.lib.k8s.deployment.rollout", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.applied_manifests", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.write_and_deploy_configuration", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.get_deployment_statuses_diff", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.get_deployment_status", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.K8sConfiguration", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.has_process", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.builders", autospec=True)
+    def test_deploy_app_and_wait_for_the_rollout(
+        self,
+        builders_mock,
+        has_web_process_mock,
+        _k8s_config_mock,
+        get_deployment_status_mock,
+        get_deployment_statuses_diff_mock,
+        write_and_deploy_configuration_mock,
+        applied_manifests_mock,
+        rollout_mock,
+    ):
+        """Should take the new status once the rollout is over."""
+        has_web_process_mock.return_value = False
+        builders_mock.build_deployment_yaml.return_value = "deployment: app"
+        applied_manifests_mock.is_applied.return_value = False
+        get_deployment_statuses_diff_mock.return_value = {}
+        progresses = [{"done": False}, {"done": True}]
+        calls = []
+        rollout_mock.watch_rollout.side_effect = lambda _config: (
+            calls.append("watch_rollout") or iter(progresses)
+        )
+        get_deployment_status_mock.side_effect = lambda _config: calls.append("status") or {}
+        reported_progresses: list = []
+        deployment_config = {"cluster_name": "my-cluster"}
+
+        result = k8s_lib.deploy_app(
+            deployment_config,
+            "/config",
+            "tag-to-deploy",
+            wait=True,
+            on_rollout_progress=reported_progresses.append,
+        )
+
+        self.assertEqual(result, {"rollout": {"done": True}})
+        self.assertEqual(reported_progresses, progresses)
+        self.assertEqual(calls, ["status", "watch_rollout", "status"])
+        rollout_mock.watch_rollout.assert_called_once_with(deployment_config)
+        write_and_deploy_configuration_mock.assert_called_once()
+        applied_manifests_mock.record_applied.assert_called_once()
+
+    @patch("nestor_api.lib.k8s.deployment.rollout", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.applied_manifests", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.write_and_deploy_configuration", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.get_deployment_statuses_diff", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.get_deployment_status", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.K8sConfiguration", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.has_process", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.builders", autospec=True)
+    def test_deploy_app_with_failed_rollout(
+        self,
+        builders_mock,
+        has_web_process_mock,
+        _k8s_config_mock,
+        _get_deployment_status_mock,
+        get_deployment_statuses_diff_mock,
+        _write_and_deploy_configuration_mock,
+        applied_manifests_mock,
+        rollout_mock,
+    ):
+        """Should not record the manifests as applied when the rollout did not complete."""
+        has_web_process_mock.return_value = False
+        builders_mock.build_deployment_yaml.return_value = "deployment: app"
+        applied_manifests_mock.is_applied.return_value = False
+        get_deployment_statuses_diff_mock.return_value = {}
+        rollout_mock.watch_rollout.return_value = iter([{"done": False, "timed_out": True}])
+
+        result = k8s_lib.deploy_app({"cluster_name": "my-cluster"}, "/config", "tag", wait=True)
+
+        self.assertEqual(result, {"rollout": {"done": False, "timed_out": True}})
+        applied_manifests_mock.record_applied.assert_not_called()
+
+    @patch("nestor_api.lib.k8s.deployment.applied_manifests", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.write_and_deploy_configuration", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.get_deployment_status", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.K8sConfiguration", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.has_process", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.builders", autospec=True)
+    def test_deploy_app_already_applied(
+        self,
+        builders_mock,
+        has_web_process_mock,
+        k8s_config_mock,
+        get_deployment_status_mock,
+        write_and_deploy_configuration_mock,
+        applied_manifests_mock,
+    ):
+        """Should not call kubectl when the same manifests were already applied."""
+        k8s_config_mock.get_templates_dir.return_value = "templates-dir"
+        has_web_process_mock.return_value = False
+        builders_mock.build_deployment_yaml.return_value = "deployment: app"
+        applied_manifests_mock.is_applied.return_value = True
+
+        result = k8s_lib.deploy_app({"cluster_name": "my-cluster"}, "/config", "tag-to-deploy")
+
+        empty_diff = {"added": [], "modified": [], "removed": []}
+        self.assertEqual(
+            result, {"processes": empty_diff, "cronjobs": empty_diff, "env": empty_diff}
+        )
+        get_deployment_status_mock.assert_not_called()
+        write_and_deploy_configuration_mock.assert_not_called()
+        applied_manifests_mock.record_applied.assert_not_called()
+
+    @patch("nestor_api.lib.k8s.deployment.rollout", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.applied_manifests", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.write_and_deploy_configuration", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.K8sConfiguration", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.has_process", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.builders", autospec=True)
+    def test_deploy_app_already_applied_and_wait_for_the_rollout(
+        self,
+        _builders_mock,
+        has_web_process_mock,
+        _k8s_config_mock,
+        write_and_deploy_configuration_mock,
+        applied_manifests_mock,
+        rollout_mock,
+    ):
+        """Should report the rollout of manifests already applied."""
+        has_web_process_mock.return_value = False
+        applied_manifests_mock.is_applied.return_value = True
+        rollout_mock.watch_rollout.return_value = iter([{"done": True}])
+        reported_progresses: list = []
+
+        result = k8s_lib.deploy_app(
+            {"cluster_name": "my-cluster"},
+            "/config",
+            "tag-to-deploy",
+            wait=True,
+            on_rollout_progress=reported_progresses.append,
+        )
+
+        empty_diff = {"added": [], "modified": [], "removed": []}
+        self.assertEqual(
+            result,
+            {
+                "processes": empty_diff,
+                "cronjobs": empty_diff,
+                "env": empty_diff,
+                "rollout": {"done": True},
+            },
+        )
+        self.assertEqual(reported_progresses, [{"done": True}])
+        write_and_deploy_configuration_mock.assert_not_called()
+
+    @patch("nestor_api.lib.k8s.deployment.applied_manifests", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.has_process", autospec=True)
+    @patch("nestor_api.lib.k8s.deployment.builders", autospec=True)
+    def test_deploy_app_with_loaded_templates(
+        self, builders_mock, has_web_process_mock, applied_manifests_mock
+    ):
+        """Should render the provided templates instead of loading them again."""
+        has_web_process_mock.return_value = False
+        applied_manifests_mock.is_applied.return_value = True
+        templates = {"deployment": "template"}
+        deployment_config = {"cluster_name": "my-cluster"}
+
+        k8s_lib.deploy_app(deployment_config, "/config", "tag-to-deploy", templates=templates)
+
+        builders_mock.load_templates.assert_not_called()
+        builders_mock.build_deployment_yaml.assert_called_once_with(
+            deployment_config, templates, "tag-to-deploy"
+        )
+
     @patch("nestor_api.lib.k8s.deployment.builders", autospec=True)
     @patch("nestor_api.lib.k8s.deployment.write_and_deploy_configuration", autospec=True)
     def test_deploy_app_ingress(self, write_and_deploy_configuration_mock, builders_mock):
@@ -120,12 +303,12 @@ class TestK8sDeployment(TestCase):
     @patch("nestor_api.lib.k8s.deployment.cli", autospec=True)
     def test_get_deployment_status(self, cli_mock):
         """Should correctly retrieve and format the deployment status."""
-        cli_mock.fetch_resource_configuration.return_value = {
-            "items": [
+        cli_mock.fetch_resource_status.return_value = iter(
+            [
                 k8s_fixtures.DEPLOYMENT_STATUS_ITEM_PROCESS,
                 k8s_fixtures.DEPLOYMENT_STATUS_ITEM_CRONJOB,
-            ],
-        }
+            ]
+        )
         deployment_config = {
             "cluster_name": "my-cluster",
             "namespace": "my-namespace",
@@ -158,7 +341,7 @@ class TestK8sDeployment(TestCase):
                 ],
             },
         )
-        cli_mock.fetch_resource_configuration.assert_called_once_with(
+        cli_mock.fetch_resource_status.assert_called_once_with(
             "my-cluster",
             "my-namespace",
             "my-app",
@@ -168,9 +351,7 @@ class TestK8sDeployment(TestCase):
     @patch("nestor_api.lib.k8s.deployment.cli", autospec=True)
     def test_get_deployment_status_when_nothing(self, cli_mock):
         """Should return an empty deployment status."""
-        cli_mock.fetch_resource_configuration.return_value = {
-            "items": [],
-        }
+        cli_mock.fetch_resource_status.return_value = iter([])
         deployment_config = {
             "cluster_name": "my-cluster",
             "namespace": "my-namespace",
@@ -182,7 +363,7 @@ class TestK8sDeployment(TestCase):
         self.assertEqual(
             report, {"processes": [], "cronjobs": [], "env": []},
         )
-        cli_mock.fetch_resource_configuration.assert_called_once_with(
+        cli_mock.fetch_resource_status.assert_called_once_with(
             "my-cluster",
             "my-namespace",
             "my-app",
@@ -192,9 +373,9 @@ class TestK8sDeployment(TestCase):
     @patch("nestor_api.lib.k8s.deployment.cli", autospec=True)
     def test_get_deployment_status_when_only_crons(self, cli_mock):
         """Should correctly retrieve the env from the cronjob."""
-        cli_mock.fetch_resource_configuration.return_value = {
-            "items": [k8s_fixtures.DEPLOYMENT_STATUS_ITEM_CRONJOB],
-        }
+        cli_mock.fetch_resource_status.return_value = iter(
+            [k8s_fixtures.DEPLOYMENT_STATUS_ITEM_CRONJOB]
+        )
         deployment_config = {
             "cluster_name": "my-cluster",
             "namespace": "my-namespace",
@@ -221,7 +402,7 @@ class TestK8sDeployment(TestCase):
                 ],
             },
         )
-        cli_mock.fetch_resource_configuration.assert_called_once_with(
+        cli_mock.fetch_resource_status.assert_called_once_with(
             "my-cluster",
             "my-namespace",
             "my-app",
@@ -231,9 +412,7 @@ class TestK8sDeployment(TestCase):
     @patch("nestor_api.lib.k8s.deployment.cli", autospec=True)
     def test_get_deployment_status_when_unknown_item(self, cli_mock):
         """Should raise an Error when an unknown item is encountered."""
-        cli_mock.fetch_resource_configuration.return_value = {
-            "items": [{"kind": "Unknown"}],
-        }
+        cli_mock.fetch_resource_status.return_value = iter([{"kind": "Unknown"}])
         deployment_config = {
             "cluster_name": "my-cluster",
             "namespace": "my-namespace",
@@ -0,0 +1,74 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+import nestor_api.lib.k8s.manifests as manifests
+
+APPS_CONFIG = {
+    "app-1": {"app": "app-1", "deployments": [{"cluster_name": "a"}, {"cluster_name": "b"}]},
+    "app-2": {"app": "app-2", "cluster_name": "a"},
+}
+
+
+def _get_deployments(app_config: dict) -> list:
+    return [{"app": app_config["app"], **config} for config in app_config["deployments"]]
+
+
+def _render_manifests(deployment_config: dict, templates: dict, tag_to_deploy: str):
+    if deployment_config["cluster_name"] == "b":
+        raise ValueError("Invalid configuration")
+    return None, f"{deployment_config['app']}:{tag_to_deploy}:{templates['deployment']}"
+
+
+@patch("nestor_api.lib.k8s.manifests.deployment.render_manifests", side_effect=_render_manifests)
+@patch("nestor_api.lib.k8s.manifests.builders.load_templates", autospec=True)
+@patch("nestor_api.lib.k8s.manifests.config", autospec=True)
+@patch("nestor_api.lib.k8s.manifests.K8sConfiguration", autospec=True)
+class TestManifests(TestCase):
+    EXPECTED_RESULTS = [
+        {"app": "app-1", "cluster": "a", "ingress": None, "deployment": "app-1:1.0.0:template"},
+        {"app": "app-1", "cluster": "b", "err": "Invalid configuration"},
+        {"app": "app-2", "cluster": "a", "ingress": None, "deployment": "app-2:1.0.0:template"},
+    ]
+
+    def _configure(self, k8s_config_mock, config_mock, load_templates_mock, processes):
+        k8s_config_mock.get_templates_dir.return_value = "templates"
+        k8s_config_mock.get_render_processes.return_value = processes
+        config_mock.list_apps_config.return_value = APPS_CONFIG
+        config_mock.get_deployments.side_effect = _get_deployments
+        load_templates_mock.return_value = {"deployment": "template"}
+
+    def test_list_deployments_config(
+        self, k8s_config_mock, config_mock, load_templates_mock, _render_mock
+    ):
+        self._configure(k8s_config_mock, config_mock, load_templates_mock, 1)
+
+        self.assertEqual(
+            manifests.list_deployments_config("/config"),
+            [
+                {"app": "app-1", "cluster_name": "a"},
+                {"app": "app-1", "cluster_name": "b"},
+                {"app": "app-2", "cluster_name": "a"},
+            ],
+        )
+        config_mock.list_apps_config.assert_called_once_with("/config")
+
+    def test_render_all(self, k8s_config_mock, config_mock, load_templates_mock, _render_mock):
+        """Should render every app on every cluster with templates loaded once."""
+        self._configure(k8s_config_mock, config_mock, load_templates_mock, 1)
+
+        results = list(manifests.render_all("/config", "1.0.0"))
+
+        self.assertEqual(results, self.EXPECTED_RESULTS)
+        load_templates_mock.assert_called_once_with("/config/templates")
+
+    def test_render_all_with_process_pool(
+        self, k8s_config_mock, config_mock, load_templates_mock, _render_mock
+    ):
+        """Should render the manifests across a pool of processes, in the same order."""
+        self._configure(k8s_config_mock, config_mock, load_templates_mock, 2)
+
+        results = list(manifests.render_all("/config", "1.0.0"))
+
+        self.assertEqual(results, self.EXPECTED_RESULTS)
+        # The templates are only loaded by the workers
+        load_templates_mock.assert_not_called()
@@ -0,0 +1,142 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from nestor_api.lib.k8s.enums.k8s_resource_kind import K8sResourceKind
+import nestor_api.lib.k8s.rollout as rollout
+
+DEPLOYMENT_CONFIG = {
+    "app": "my-app",
+    "cluster_name": "my-cluster",
+    "namespace": "my-namespace",
+    "processes": [{"name": "web", "is_cronjob": False}, {"name": "my_cron", "is_cronjob": True}],
+}
+
+
+def _deployment(name: str, replicas: int, status: dict, generation: int = 2) -> dict:
+    return {
+        "kind": "Deployment",
+        "metadata": {"name": name, "generation": generation},
+        "spec": {"replicas": replicas},
+        "status": {"observedGeneration": 2, **status},
+    }
+
+
+CRONJOB = {"kind": "CronJob", "metadata": {"name": "my-app----my-cron"}, "spec": {}}
+ROLLING_OUT = _deployment(
+    "my-app----web", 2, {"replicas": 3, "updatedReplicas": 1, "readyReplicas": 2}
+)
+ROLLED_OUT = _deployment(
+    "my-app----web",
+    2,
+    {"replicas": 2, "updatedReplicas": 2, "readyReplicas": 2, "availableReplicas": 2},
+)
+
+
+class TestRollout(TestCase):
+    def test_get_resource_progress_not_seen(self):
+        self.assertEqual(
+            rollout.get_resource_progress("web", None),
+            {"name": "web", "replicas": 0, "updated": 0, "ready": 0, "done": False},
+        )
+
+    def test_get_resource_progress_rolling_out(self):
+        self.assertEqual(
+            rollout.get_resource_progress("web", ROLLING_OUT),
+            {"name": "web", "replicas": 2, "updated": 1, "ready": 2, "done": False},
+        )
+
+    def test_get_resource_progress_rolled_out(self):
+        self.assertEqual(
+            rollout.get_resource_progress("web", ROLLED_OUT),
+            {"name": "web", "replicas": 2, "updated": 2, "ready": 2, "done": True},
+        )
+
+    def test_get_resource_progress_not_observed_yet(self):
+        """Should not consider the status of the previous version of the deployment."""
+        item = _deployment(
+            "my-app----web",
+            2,
+            {"replicas": 2, "updatedReplicas": 2, "readyReplicas": 2, "availableReplicas": 2},
+            generation=3,
+        )
+
+        self.assertFalse(rollout.get_resource_progress("web", item)["done"])
+
+    def test_get_resource_progress_cronjob(self):
+        self.assertTrue(rollout.get_resource_progress("my_cron", CRONJOB)["done"])
+
+    @patch("nestor_api.lib.k8s.rollout.cli", autospec=True)
+    def test_watch_rollout(self, cli_mock):
+        """Should report the progress at each event until all the processes are rolled out."""
+        other_app = _deployment("other-app----web", 1, {})
+        events = [
+            {"type": "ADDED", "object": ROLLING_OUT},
+            {"type": "ADDED", "object": other_app},
+            {"type": "ADDED", "object": CRONJOB},
+            {"type": "MODIFIED", "object": ROLLED_OUT},
+            {"type": "MODIFIED", "object": ROLLED_OUT},
+        ]
+        cli_mock.watch_resources.return_value = (event for event in events)
+
+        progresses = list(rollout.watch_rollout(DEPLOYMENT_CONFIG, timeout=60))
+
+        self.assertEqual(
+            [
+                [(process["name"], process["done"]) for process in progress["processes"]]
+                for progress in progresses
+            ],
+            [
+                [("web", False), ("my_cron", False)],
+                [("web", False), ("my_cron", True)],
+                [("web", True), ("my_cron", True)],
+            ],
+        )
+        self.assertEqual([progress["done"] for progress in progresses], [False, False, True])
+        self.assertFalse(progresses[-1]["timed_out"])
+        cli_mock.watch_resources.assert_called_once_with(
+            "my-cluster",
+            "my-namespace",
+            "my-app",
+            [K8sResourceKind.DEPLOYMENT, K8sResourceKind.CRONJOB],
+            60,
+        )
+
+    @patch("nestor_api.lib.k8s.rollout.cli", autospec=True)
+    def test_watch_rollout_timed_out(self, cli_mock):
+        """Should end with a timed out progress when the watch ends before the rollout."""
+        cli_mock.watch_resources.return_value = (
+            event for event in [{"type": "ADDED", "object": ROLLING_OUT}]
+        )
+
+        progresses = list(rollout.watch_rollout(DEPLOYMENT_CONFIG, timeout=60))
+
+        self.assertEqual(len(progresses), 2)
+        self.assertFalse(progresses[-1]["done"])
+        self.assertTrue(progresses[-1]["timed_out"])
+
+    @patch("nestor_api.lib.k8s.rollout.time.monotonic", autospec=True)
+    @patch("nestor_api.lib.k8s.rollout.cli", autospec=True)
+    def test_watch_rollout_deadline(self, cli_mock, monotonic_mock):
+        """Should stop watching at the deadline."""
+        monotonic_mock.side_effect = [0, 61]
+        cli_mock.watch_resources.return_value = (
+            event
+            for event in [
+                {"type": "ADDED", "object": ROLLING_OUT},
+                {"type": "MODIFIED", "object": ROLLED_OUT},
+            ]
+        )
+
+        progresses = list(rollout.watch_rollout(DEPLOYMENT_CONFIG, timeout=60))
+
+        self.assertEqual(len(progresses), 1)
+        self.assertTrue(progresses[0]["timed_out"])
+
+    @patch("nestor_api.lib.k8s.rollout.cli", autospec=True)
+    def test_watch_rollout_error(self, cli_mock):
+        cli_mock.watch_resources.return_value = (
+            event for event in [{"type": "ERROR", "object": {"message": "Gone"}}]
+        )
+
+        with self.assertRaisesRegex(RuntimeError, "Gone"):
+            list(rollout.watch_rollout(DEPLOYMENT_CONFIG, timeout=60))
@@ -1,3 +1,6 @@
+import os
+import shutil
+import tempfile
 import unittest
 from unittest.mock import call, patch
 
@@ -20,6 +23,41 @@ class TestConfigLibrary(unittest.TestCase):
             ]
         )
 
+    def test_change_environment_with_invalid_name(self, io_mock):
+        with self.assertRaisesRegex(ValueError, "Invalid environment name"):
+            config.change_environment("master; rm -rf /", "path/to/config")
+
+        io_mock.execute.assert_not_called()
+
+    def test_is_valid_environment_name(self, _io_mock):
+        for environment in ["master", "staging", "release/1.0", "feature_a-b"]:
+            with self.subTest(environment=environment):
+                self.assertTrue(config.is_valid_environment_name(environment))
+        for environment in ["", "-x", "a b", "a;b", "a\nb", "$(id)", "a`id`", "../x", "a..b", None]:
+            with self.subTest(environment=environment):
+                self.assertFalse(config.is_valid_environment_name(environment))
+
+    def test_get_remote_environment_commit(self, io_mock):
+        io_mock.execute.return_value = "a1b2c3d4e5\trefs/heads/staging"
+
+        commit = config.get_remote_environment_commit("staging", "path/to/config")
+
+        self.assertEqual(commit, "a1b2c3d4e5")
+        io_mock.execute.assert_called_once_with(
+            "git ls-remote origin refs/heads/staging", "path/to/config"
+        )
+
+    def test_get_remote_environment_commit_unknown(self, io_mock):
+        io_mock.execute.return_value = ""
+
+        self.assertEqual(config.get_remote_environment_commit("unknown", "path/to/config"), "")
+
+    def test_get_remote_environment_commit_with_invalid_name(self, io_mock):
+        with self.assertRaisesRegex(ValueError, "Invalid environment name"):
+            config.get_remote_environment_commit("staging && id", "path/to/config")
+
+        io_mock.execute.assert_not_called()
+
     @patch("nestor_api.lib.config.Configuration", autospec=True)
     def test_create_temporary_config_copy(self, configuration_mock, io_mock):
         io_mock.create_temporary_copy.return_value = "/temporary/path"
@@ -154,6 +192,11 @@ class TestConfigLibrary(unittest.TestCase):
                 },
             ],
         )
+        # The project configuration is shared, it must not be modified
+        self.assertEqual(len(project_config["deployments"]), 2)
+        self.assertEqual(
+            project_config["spec"], {"spec_1": "default_spec_1", "spec_2": "default_spec_2"}
+        )
 
     @patch("yaml_lib.read_yaml", autospec=True)
     @patch("nestor_api.lib.config.Configuration", autospec=True)
@@ -251,6 +294,35 @@ class TestConfigLibrary(unittest.TestCase):
             },
         )
 
+    def test_resolve_variables_deep_does_not_modify_config(self, _io_mock):
+        """Should copy only the containers holding resolved values."""
+        unchanged = {"list": ["a", "b"], "dict": {"key": "value"}}
+        resolved = {"C1": "__{{A}}__", "C2": "plain"}
+        config_values = {"A": "value_a", "unchanged": unchanged, "resolved": resolved}
+
+        result = config._resolve_variables_deep(config_values)
+
+        self.assertEqual(result["resolved"], {"C1": "__value_a__", "C2": "plain"})
+        self.assertEqual(resolved, {"C1": "__{{A}}__", "C2": "plain"})
+        self.assertIsNot(result, config_values)
+        self.assertIs(result["unchanged"], unchanged)
+
+    def test_resolve_variables_deep_with_special_values(self, _io_mock):
+        """Should insert the referenced values as is."""
+        result = config._resolve_variables_deep(
+            {
+                "path": "C:\\path\\1",
+                "a.b": "dotted",
+                "ref": "{{path}}__{{a.b}}__{{axb}}",
+                "loop": "{{ref_to_other}}",
+                "ref_to_other": "{{A}}",
+                "A": "value_a",
+            }
+        )
+
+        self.assertEqual(result["ref"], "C:\\path\\1__dotted__{{axb}}")
+        self.assertEqual(result["loop"], "{{A}}")
+
     def test_resolve_variables_deep_with_invalid_reference(self, _io_mock):
         with self.assertRaises(AggregatedConfigurationError) as context:
             config._resolve_variables_deep(
@@ -305,8 +377,11 @@ class TestConfigLibrary(unittest.TestCase):
 
     @patch("nestor_api.lib.config.os.path.isdir", autospec=True)
     @patch("nestor_api.lib.config.os.listdir", autospec=True)
+    @patch("nestor_api.lib.config.get_project_config", autospec=True)
     @patch("nestor_api.lib.config.get_app_config", autospec=True)
-    def test_list_apps_config(self, get_app_config_mock, listdir_mock, isdir_mock, _io_mock):
+    def test_list_apps_config(
+        self, get_app_config_mock, get_project_config_mock, listdir_mock, isdir_mock, _io_mock
+    ):
         """Should return a dictionary of apps config."""
         isdir_mock.return_value = True
         listdir_mock.return_value = [
@@ -315,8 +390,10 @@ class TestConfigLibrary(unittest.TestCase):
             "path/to/app-3.ext",
             "path/to/dir/",
         ]
+        project_config = {"domain": "website.com"}
+        get_project_config_mock.return_value = project_config
 
-        def yaml_side_effect(arg):
+        def yaml_side_effect(arg, _config_path, _project_config):
             # pylint: disable=no-else-return
             if arg == "app-1":
                 return {"name": "app-1", "config_key": "value for app-1"}
@@ -334,6 +411,37 @@ class TestConfigLibrary(unittest.TestCase):
                 "app-2": {"name": "app-2", "config_key": "value for app-2"},
             },
         )
+        # The project configuration is only loaded once
+        get_project_config_mock.assert_called_once_with("test")
+        get_app_config_mock.assert_has_calls(
+            [call("app-1", "test", project_config), call("app-2", "test", project_config)]
+        )
+
+    @patch("nestor_api.lib.config.Configuration.get_config_loading_processes", autospec=True)
+    def test_list_apps_config_with_process_pool(self, get_config_loading_processes_mock, io_mock):
+        """Should load the apps configurations across a pool of processes."""
+        get_config_loading_processes_mock.return_value = 2
+        io_mock.exists.return_value = True
+
+        with tempfile.TemporaryDirectory() as config_path:
+            shutil.copytree("tests/__fixtures__/config", config_path, dirs_exist_ok=True)
+            shutil.copy(
+                os.path.join(config_path, "apps", "backoffice.yaml"),
+                os.path.join(config_path, "apps", "frontoffice.yaml"),
+            )
+
+            result = config.list_apps_config(config_path)
+
+        self.assertEqual(sorted(result.keys()), ["backoffice", "frontoffice"])
+        self.assertEqual(result["frontoffice"], result["backoffice"])
+        self.assertEqual(
+            result["backoffice"]["variables"]["ope"],
+            {
+                "VARIABLE_OPE_1": "ope_1",
+                "VARIABLE_OPE_2": "ope_2_override",
+                "VARIABLE_OPE_3": "ope_3",
+            },
+        )
 
     @patch("nestor_api.lib.config.os.path.isdir", autospec=True)
     def test_list_apps_config_with_incorrect_apps_path(self, is_dir_mock, _io_mock):
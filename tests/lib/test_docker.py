@@ -1,15 +1,15 @@
-import subprocess
 from unittest import TestCase
 from unittest.mock import call, patch
 
 import nestor_api.lib.docker as docker
+from nestor_api.lib.docker_engine import DockerEngineError
 
 
 class TestDockerLib(TestCase):
+    @patch("nestor_api.lib.docker.get_engine_client", autospec=True)
     @patch("nestor_api.lib.docker.has_docker_image", autospec=True)
     @patch("nestor_api.lib.docker.git", autospec=True)
-    @patch("nestor_api.lib.docker.io", autospec=True)
-    def test_build_already_built(self, io_mock, git_mock, has_docker_image_mock):
+    def test_build_already_built(self, git_mock, has_docker_image_mock, get_engine_client_mock):
         # Mocks
         has_docker_image_mock.return_value = True
         git_mock.get_last_tag.return_value = "1.0.0-sha-a2b3c4"
@@ -23,18 +23,21 @@ class TestDockerLib(TestCase):
         # Assertions
         git_mock.get_last_tag.assert_called_once_with("/path_to/a_git_repository")
         has_docker_image_mock.assert_called_once_with("my-app", "1.0.0-sha-a2b3c4")
-        io_mock.execute.assert_not_called()
+        get_engine_client_mock.return_value.build_image.assert_not_called()
         self.assertEqual(image_tag, "1.0.0-sha-a2b3c4")
 
+    @patch("nestor_api.lib.docker.get_engine_client", autospec=True)
     @patch("nestor_api.lib.docker.has_docker_image", autospec=True)
     @patch("nestor_api.lib.docker.git", autospec=True)
-    @patch("nestor_api.lib.docker.io", autospec=True)
-    def test_build(self, io_mock, git_mock, has_docker_image_mock):
+    def test_build(self, git_mock, has_docker_image_mock, get_engine_client_mock):
         # Mocks
         has_docker_image_mock.return_value = False
         git_mock.get_last_tag.return_value = "1.0.0-sha-a2b3c4"
         git_mock.get_commit_hash_from_tag.return_value = "a2b3c4d5e6"
-        io_mock.execute.return_value = ""
+        client_mock = get_engine_client_mock.return_value
+        client_mock.build_image.return_value = iter(
+            [{"stream": "Step 1/2 : FROM python\n"}, {"stream": "\n"}, {"aux": {"ID": "sha"}}]
+        )
 
         # Tests
         repository = "/path_to/a_git_repository"
@@ -48,49 +51,44 @@ class TestDockerLib(TestCase):
             "/path_to/a_git_repository", "1.0.0-sha-a2b3c4"
         )
         has_docker_image_mock.assert_called_once_with("my-app", "1.0.0-sha-a2b3c4")
-        io_mock.execute.assert_called_once_with(
-            "docker build"
-            " --tag my-app:1.0.0-sha-a2b3c4"
-            " --build-arg var1=val1"
-            " --build-arg var2=val2"
-            " --build-arg COMMIT_HASH=a2b3c4d5e6"
-            " /path_to/a_git_repository"
+        client_mock.build_image.assert_called_once_with(
+            "/path_to/a_git_repository",
+            "my-app:1.0.0-sha-a2b3c4",
+            {"var1": "val1", "var2": "val2", "COMMIT_HASH": "a2b3c4d5e6"},
+        )
+        # The configuration is not altered
+        self.assertEqual(
+            app_config, {"docker": {"build": {"variables": {"var1": "val1", "var2": "val2"}}}}
         )
         self.assertEqual(image_tag, "1.0.0-sha-a2b3c4")
 
     @patch("nestor_api.lib.docker.Logger", autospec=True)
+    @patch("nestor_api.lib.docker.get_engine_client", autospec=True)
     @patch("nestor_api.lib.docker.has_docker_image", autospec=True)
     @patch("nestor_api.lib.docker.git", autospec=True)
-    @patch("nestor_api.lib.docker.io", autospec=True)
-    def test_build_failure(self, io_mock, git_mock, has_docker_image_mock, logger_mock):
+    def test_build_failure(
+        self, git_mock, has_docker_image_mock, get_engine_client_mock, logger_mock
+    ):
         # Mocks
         has_docker_image_mock.return_value = False
         git_mock.get_last_tag.return_value = "1.0.0-sha-a2b3c4"
         git_mock.get_commit_hash_from_tag.return_value = "a2b3c4d5e6"
 
-        exception = subprocess.CalledProcessError(1, "Docker build failed")
-        io_mock.execute.side_effect = [exception]
+        exception = DockerEngineError("Docker build failed")
+        get_engine_client_mock.return_value.build_image.side_effect = exception
 
         # Test
         repository = "/path_to/a_git_repository"
         app_config = {}
-        with self.assertRaisesRegex(Exception, "Docker build failed"):
+        with self.assertRaisesRegex(DockerEngineError, "Docker build failed"):
             docker.build("my-app", repository, app_config)
 
         # Assertions
-        git_mock.get_last_tag.assert_called_once_with("/path_to/a_git_repository")
-        git_mock.get_commit_hash_from_tag.assert_called_once_with(
-            "/path_to/a_git_repository", "1.0.0-sha-a2b3c4"
-        )
-        has_docker_image_mock.assert_called_once_with("my-app", "1.0.0-sha-a2b3c4")
-        io_mock.execute.assert_called_once_with(
-            "docker build"
-            " --tag my-app:1.0.0-sha-a2b3c4"
-            " --build-arg COMMIT_HASH=a2b3c4d5e6"
-            " /path_to/a_git_repository"
+        get_engine_client_mock.return_value.build_image.assert_called_once_with(
+            "/path_to/a_git_repository", "my-app:1.0.0-sha-a2b3c4", {"COMMIT_HASH": "a2b3c4d5e6"}
         )
         logger_mock.error.assert_called_once_with(
-            {"err": exception}, "Error while building Docker image"
+            {"err": "Docker build failed"}, "Error while building Docker image"
         )
 
     def test_get_registry_image_tag(self):
@@ -104,27 +102,36 @@ class TestDockerLib(TestCase):
         version = docker.get_version_from_image_tag(image_tag)
         self.assertEqual(version, "0.0.0-sha-1a2bc34d")
 
-    @patch("nestor_api.lib.docker.io", autospec=True)
-    def test_has_docker_image_existing(self, io_mock):
-        io_mock.execute.return_value = "001122334455"
+    @patch("nestor_api.lib.docker.get_engine_client", autospec=True)
+    def test_has_docker_image_existing(self, get_engine_client_mock):
+        get_engine_client_mock.return_value.image_exists.return_value = True
 
         has_image = docker.has_docker_image("my-app", "my-tag")
 
-        io_mock.execute.assert_called_once_with("docker images my-app:my-tag --quiet")
+        get_engine_client_mock.return_value.image_exists.assert_called_once_with("my-app:my-tag")
         self.assertTrue(has_image)
 
-    @patch("nestor_api.lib.docker.io", autospec=True)
-    def test_has_docker_image_not_existing(self, io_mock):
-        io_mock.execute.return_value = ""
+    @patch("nestor_api.lib.docker.get_engine_client", autospec=True)
+    def test_has_docker_image_not_existing(self, get_engine_client_mock):
+        get_engine_client_mock.return_value.image_exists.return_value = False
 
         has_image = docker.has_docker_image("my-app", "my-tag")
 
-        io_mock.execute.assert_called_once_with("docker images my-app:my-tag --quiet")
         self.assertFalse(has_image)
 
+    @patch("nestor_api.lib.docker.docker_engine.DockerEngineClient", autospec=True)
+    def test_get_engine_client_is_reused_within_a_thread(self, client_class_mock):
+        docker._engine_clients.__dict__.pop("client", None)
+
+        client = docker.get_engine_client()
+
+        self.assertIs(docker.get_engine_client(), client)
+        client_class_mock.assert_called_once_with()
+        docker._engine_clients.__dict__.pop("client", None)
+
+    @patch("nestor_api.lib.docker.get_engine_client", autospec=True)
     @patch("nestor_api.lib.docker.has_docker_image", autospec=True)
-    @patch("nestor_api.lib.docker.io", autospec=True)
-    def test_push_no_image(self, io_mock, has_docker_image_mock):
+    def test_push_no_image(self, has_docker_image_mock, get_engine_client_mock):
         # Mocks
         has_docker_image_mock.return_value = False
 
@@ -136,14 +143,34 @@ class TestDockerLib(TestCase):
 
         # Assertions
         has_docker_image_mock.assert_called_once_with("my-app", "1.0.0-sha-a2b3c4")
-        io_mock.execute.assert_not_called()
+        get_engine_client_mock.return_value.push_image.assert_not_called()
 
+    @patch("nestor_api.lib.docker.Logger", autospec=True)
+    @patch("nestor_api.lib.docker.docker_engine.get_registry_auth", autospec=True)
+    @patch("nestor_api.lib.docker.get_engine_client", autospec=True)
     @patch("nestor_api.lib.docker.has_docker_image", autospec=True)
-    @patch("nestor_api.lib.docker.io", autospec=True)
-    def test_push(self, io_mock, has_docker_image_mock):
+    def test_push(
+        self, has_docker_image_mock, get_engine_client_mock, get_registry_auth_mock, logger_mock
+    ):
         # Mocks
         has_docker_image_mock.return_value = True
-        io_mock.execute.side_effect = ["001122334455", "", ""]
+        get_registry_auth_mock.return_value = {"username": "user", "password": "pass"}
+        client_mock = get_engine_client_mock.return_value
+        client_mock.push_image.return_value = iter(
+            [
+                {"status": "The push refers to repository [docker.io/my-organization/my-app]"},
+                {"status": "Preparing", "id": "layer1", "progressDetail": {}},
+                {"status": "Pushing", "id": "layer1", "progressDetail": {"current": 512}},
+                {
+                    "status": "Pushing",
+                    "id": "layer1",
+                    "progressDetail": {"current": 1024, "total": 2048},
+                },
+                {"status": "Pushed", "id": "layer1", "progressDetail": {}},
+                {"status": "Layer already exists", "id": "layer2", "progressDetail": {}},
+                {"aux": {"Tag": "1.0.0-sha-a2b3c4", "Digest": "sha256:abc", "Size": 1234}},
+            ]
+        )
 
         # Test
         app_config = {
@@ -154,9 +181,27 @@ class TestDockerLib(TestCase):
 
         # Assertions
         has_docker_image_mock.assert_called_once_with("my-app", "1.0.0-sha-a2b3c4")
-        io_mock.execute.assert_has_calls(
+        client_mock.tag_image.assert_called_once_with(
+            "my-app:1.0.0-sha-a2b3c4", "my-organization/my-app", "1.0.0-sha-a2b3c4"
+        )
+        get_registry_auth_mock.assert_called_once_with("https://index.docker.io/v1/")
+        client_mock.push_image.assert_called_once_with(
+            "my-organization/my-app", "1.0.0-sha-a2b3c4", {"username": "user", "password": "pass"}
+        )
+        logger_mock.debug.assert_has_calls(
             [
-                call("docker tag my-app:1.0.0-sha-a2b3c4 my-organization/my-app:1.0.0-sha-a2b3c4"),
-                call("docker push my-organization/my-app:1.0.0-sha-a2b3c4"),
+                call(
+                    {
+                        "image": "my-organization/my-app:1.0.0-sha-a2b3c4",
+                        "layer": "layer1",
+                        "status": "Pushed",
+                        "bytes": 2048,
+                    },
+                    "Pushing",
+                )
             ]
         )
+        logger_mock.info.assert_called_once_with(
+            {"image": "my-organization/my-app:1.0.0-sha-a2b3c4", "layers": 2, "bytes": 2048},
+            "Docker image pushed",
+        )
@@ -0,0 +1,221 @@
+import base64
+from http.server import BaseHTTPRequestHandler
+import io
+import json
+import os
+import socketserver
+import tarfile
+import tempfile
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+import nestor_api.lib.docker_engine as docker_engine
+
+
+class _FakeEngineServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """A fake Docker engine listening on a unix socket."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str):
+        self.requests: list = []
+        self.connections = 0
+        self.routes: dict = {}
+        super().__init__(socket_path, _FakeEngineHandler)
+
+
+class _FakeEngineHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def address_string(self):
+        return "fake-engine"
+
+    def log_message(self, *_args):  # pylint: disable=arguments-differ
+        pass
+
+    def _handle(self):
+        body = b""
+        if "Content-Length" in self.headers:
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append(
+            {"method": self.command, "path": self.path, "headers": self.headers, "body": body}
+        )
+
+        path = self.path.split("?")[0]
+        status, messages = self.server.routes.get((self.command, path), (404, {"message": "nf"}))
+        if isinstance(messages, list):
+            # Streamed response (chunked encoding)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for message in messages:
+                chunk = json.dumps(message).encode("utf-8") + b"\r\n"
+                self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            payload = json.dumps(messages).encode("utf-8") if messages is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+class TestDockerEngineClient(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp_dir.name, "docker.sock")
+        self.server = _FakeEngineServer(self.socket_path)
+        self.server_thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        )
+        self.server_thread.start()
+        self.client = docker_engine.DockerEngineClient(self.socket_path, "1.40", timeout=5)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
+
+    def test_image_exists(self):
+        self.server.routes[("GET", "/v1.40/images/my-app%3A1.0.0/json")] = (200, {"Id": "sha"})
+
+        self.assertTrue(self.client.image_exists("my-app:1.0.0"))
+        self.assertFalse(self.client.image_exists("my-app:2.0.0"))
+
+        # Both requests went through the same connection
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_image_exists_with_engine_error(self):
+        self.server.routes[("GET", "/v1.40/images/my-app%3A1.0.0/json")] = (
+            500,
+            {"message": "engine failure"},
+        )
+
+        with self.assertRaises(docker_engine.DockerEngineError) as context:
+            self.client.image_exists("my-app:1.0.0")
+
+        self.assertEqual(str(context.exception), "engine failure")
+        self.assertEqual(context.exception.status, 500)
+
+    def test_build_image(self):
+        self.server.routes[("POST", "/v1.40/build")] = (
+            200,
+            [{"stream": "Step 1/1 : FROM scratch\n"}, {"aux": {"ID": "sha256:123"}}],
+        )
+        context_dir = os.path.join(self.tmp_dir.name, "context")
+        os.makedirs(os.path.join(context_dir, "node_modules"))
+        with open(os.path.join(context_dir, "Dockerfile"), "w") as dockerfile:
+            dockerfile.write("FROM scratch\n")
+        with open(os.path.join(context_dir, "node_modules", "module.js"), "w") as module:
+            module.write("")
+        with open(os.path.join(context_dir, ".dockerignore"), "w") as ignore_file:
+            ignore_file.write("node_modules\n")
+
+        messages = list(self.client.build_image(context_dir, "my-app:1.0.0", {"VAR": "value"}))
+
+        self.assertEqual(
+            messages, [{"stream": "Step 1/1 : FROM scratch\n"}, {"aux": {"ID": "sha256:123"}}]
+        )
+        request = self.server.requests[0]
+        self.assertIn("t=my-app%3A1.0.0", request["path"])
+        self.assertIn("buildargs=%7B%22VAR%22%3A+%22value%22%7D", request["path"])
+        self.assertEqual(request["headers"]["Content-Type"], "application/x-tar")
+        with tarfile.open(fileobj=io.BytesIO(request["body"])) as archive:
+            self.assertEqual(sorted(archive.getnames()), [".dockerignore", "Dockerfile"])
+
+    def test_build_image_with_error(self):
+        self.server.routes[("POST", "/v1.40/build")] = (
+            200,
+            [{"stream": "Step 1/2 : RUN false\n"}, {"error": "The command returned 1"}],
+        )
+        self.server.routes[("GET", "/v1.40/images/my-app%3A1.0.0/json")] = (200, {"Id": "sha"})
+
+        with self.assertRaisesRegex(docker_engine.DockerEngineError, "The command returned 1"):
+            list(self.client.build_image(self.tmp_dir.name, "my-app:1.0.0"))
+
+        # The connection is still usable after an error
+        self.assertTrue(self.client.image_exists("my-app:1.0.0"))
+        self.assertEqual(self.server.connections, 1)
+
+    def test_tag_image(self):
+        self.server.routes[("POST", "/v1.40/images/my-app%3A1.0.0/tag")] = (201, None)
+
+        self.client.tag_image("my-app:1.0.0", "my-org/my-app", "1.0.0")
+
+        self.assertEqual(
+            self.server.requests[0]["path"],
+            "/v1.40/images/my-app%3A1.0.0/tag?repo=my-org%2Fmy-app&tag=1.0.0",
+        )
+
+    def test_push_image(self):
+        self.server.routes[("POST", "/v1.40/images/my-org/my-app/push")] = (
+            200,
+            [
+                {"status": "Pushing", "id": "layer", "progressDetail": {"current": 1, "total": 2}},
+                {"status": "Pushed", "id": "layer", "progressDetail": {}},
+            ],
+        )
+
+        messages = list(self.client.push_image("my-org/my-app", "1.0.0", {"username": "user"}))
+
+        self.assertEqual(len(messages), 2)
+        request = self.server.requests[0]
+        self.assertEqual(request["path"], "/v1.40/images/my-org/my-app/push?tag=1.0.0")
+        auth = json.loads(base64.urlsafe_b64decode(request["headers"]["X-Registry-Auth"]))
+        self.assertEqual(auth, {"username": "user"})
+
+
+class TestDockerEngineHelpers(TestCase):
+    def test_is_excluded(self):
+        patterns = [(False, "node_modules"), (False, "*.log"), (True, "keep.log")]
+
+        self.assertTrue(docker_engine._is_excluded("node_modules/lib/index.js", patterns))
+        self.assertTrue(docker_engine._is_excluded("debug.log", patterns))
+        self.assertFalse(docker_engine._is_excluded("keep.log", patterns))
+        self.assertFalse(docker_engine._is_excluded("src/index.js", patterns))
+
+    def test_get_registry_hostname(self):
+        self.assertEqual(
+            docker_engine.get_registry_hostname("my-org/my-app"), "https://index.docker.io/v1/"
+        )
+        self.assertEqual(docker_engine.get_registry_hostname("gcr.io/my-org/my-app"), "gcr.io")
+
+    def test_get_registry_auth(self):
+        with tempfile.TemporaryDirectory() as config_dir:
+            with open(os.path.join(config_dir, "config.json"), "w") as config_file:
+                json.dump(
+                    {
+                        "auths": {
+                            "https://index.docker.io/v1/": {
+                                "auth": base64.b64encode(b"user:pa:ss").decode("ascii")
+                            }
+                        }
+                    },
+                    config_file,
+                )
+
+            with patch.dict(os.environ, {"DOCKER_CONFIG": config_dir}):
+                auth = docker_engine.get_registry_auth("https://index.docker.io/v1/")
+                missing_auth = docker_engine.get_registry_auth("gcr.io")
+
+        self.assertEqual(
+            auth,
+            {
+                "username": "user",
+                "password": "pa:ss",
+                "serveraddress": "https://index.docker.io/v1/",
+            },
+        )
+        self.assertIsNone(missing_auth)
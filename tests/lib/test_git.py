@@ -116,6 +116,47 @@ class TestGitLibrary(TestCase):
             "git describe --always --abbrev=0", "/path_to/a_git_repository"
         )
 
+    def test_get_last_tag_with_reference(self, io_mock):
+        io_mock.execute.return_value = "1.0.0-sha-a2b3c4"
+
+        last_tag = git.get_last_tag("/path_to/a_git_repository", "origin/master")
+
+        self.assertEqual(last_tag, "1.0.0-sha-a2b3c4")
+        io_mock.execute.assert_called_once_with(
+            "git describe --always --abbrev=0 origin/master", "/path_to/a_git_repository"
+        )
+
+    def test_get_remote_branch_hash(self, io_mock):
+        io_mock.execute.return_value = "a2b3c4d5e6f7g8h9"
+
+        branch_hash = git.get_remote_branch_hash("/path_to/a_git_repository", "staging")
+
+        self.assertEqual(branch_hash, "a2b3c4d5e6f7g8h9")
+        io_mock.execute.assert_called_once_with(
+            "git for-each-ref --format=%(objectname) refs/remotes/origin/staging",
+            "/path_to/a_git_repository",
+        )
+
+    def test_get_remote_branch_hash_with_non_existing_branch(self, io_mock):
+        io_mock.execute.return_value = ""
+
+        branch_hash = git.get_remote_branch_hash("/path_to/a_git_repository", "staging")
+
+        self.assertIsNone(branch_hash)
+
+    def test_is_ancestor(self, io_mock):
+        for count, expected in [("0", True), ("2", False)]:
+            with self.subTest(count=count):
+                io_mock.execute.reset_mock()
+                io_mock.execute.return_value = count
+
+                result = git.is_ancestor("/path_to/a_git_repository", "a2b3c4", "d5e6f7")
+
+                self.assertEqual(result, expected)
+                io_mock.execute.assert_called_once_with(
+                    "git rev-list --count d5e6f7..a2b3c4", "/path_to/a_git_repository"
+                )
+
     def test_get_commit_hash_from_tag(self, io_mock):
         io_mock.execute.return_value = "a2b3c4d5e6f7g8h9"
 
@@ -146,13 +187,33 @@ class TestGitLibrary(TestCase):
             "git remote get-url custom_remote_name", "/path_to/a_git_repository",
         )
 
+    def test_parse_repository_url(self, _io_mock):
+        for git_url in [
+            "git@github.com:org/repo.git",
+            "https://github.com/org/repo.git",
+            "https://github.com/org/repo",
+            "ssh://git@github.com/org/repo.git/",
+        ]:
+            with self.subTest(git_url=git_url):
+                self.assertEqual(git.parse_repository_url(git_url), ("org", "repo"))
+
+    def test_parse_repository_url_with_invalid_url(self, _io_mock):
+        with self.assertRaisesRegex(ValueError, 'Invalid repository url: "repo"'):
+            git.parse_repository_url("repo")
+
     def test_push(self, io_mock):
-        git.push("/path_to/a_git_repository", "feature/branch")
+        git.push("/path_to/a_git_repository", ["refs/heads/staging", "refs/tags/1.0.0-sha-a2b3c4"])
 
         io_mock.execute.assert_called_once_with(
-            "git push origin feature/branch --tags --follow-tags", "/path_to/a_git_repository",
+            "git push --atomic origin refs/heads/staging refs/tags/1.0.0-sha-a2b3c4",
+            "/path_to/a_git_repository",
         )
 
+    def test_push_without_refs(self, io_mock):
+        git.push("/path_to/a_git_repository", [])
+
+        io_mock.execute.assert_not_called()
+
     def test_rebase(self, io_mock):
         git.rebase("/path_to/a_git_repository", "feature/branch")
 
@@ -194,6 +255,7 @@ class TestGitLibrary(TestCase):
         update_repository_mock.assert_called_once_with(
             "/fixtures-nestor-pristine/my-app", "git@github.com:org/repo.git"
         )
+        io_mock.touch.assert_called_once_with("/fixtures-nestor-pristine/my-app")
         self.assertEqual(repository_dir, "/fixtures-nestor-pristine/my-app")
 
     def test_update_repository_clone_if_not_existing_default_revision(self, io_mock):
@@ -3,11 +3,14 @@ import filecmp
 import os
 from pathlib import Path
 import subprocess
-from tempfile import gettempdir
+from tempfile import TemporaryDirectory, gettempdir
+import threading
+import time
 from unittest import TestCase
 from unittest.mock import patch
 
 import nestor_api.lib.io as io
+import nestor_api.lib.monitoring as monitoring
 
 
 class TestIoLib(TestCase):
@@ -33,15 +36,19 @@ class TestIoLib(TestCase):
         self.assertEqual(exception, context.exception)
         shutil_mock.copy.assert_not_called()
 
+    @patch("nestor_api.lib.io._track_live_directory", autospec=True)
     @patch("nestor_api.lib.io.get_temporary_directory_path", autospec=True)
     @patch("nestor_api.lib.io.ensure_dir", autospec=True)
-    def test_create_temporary_directory(self, ensure_dir_mock, get_temporary_directory_path_mock):
+    def test_create_temporary_directory(
+        self, ensure_dir_mock, get_temporary_directory_path_mock, track_live_directory_mock
+    ):
         get_temporary_directory_path_mock.return_value = "path/to/temporary/prefix-dir"
 
         temporary_path = io.create_temporary_directory("prefix")
 
         get_temporary_directory_path_mock.assert_called_with("prefix")
         ensure_dir_mock.assert_called_with("path/to/temporary/prefix-dir")
+        track_live_directory_mock.assert_called_once_with("path/to/temporary/prefix-dir")
         self.assertEqual(temporary_path, "path/to/temporary/prefix-dir")
 
     @patch("nestor_api.lib.io.Path", autospec=True)
@@ -77,6 +84,53 @@ class TestIoLib(TestCase):
 
         self.assertEqual(str(context.exception), "An error message")
 
+    @patch("nestor_api.lib.io.subprocess.run", autospec=True)
+    def test_execute_should_measure_the_command(self, subprocess_run_mock):
+        subprocess_run_mock.return_value.returncode = 1
+        subprocess_run_mock.return_value.stderr.decode.return_value = "An error message\n"
+        labels = {"tool": "git", "subcommand": "fetch", "status": "failure"}
+        count = monitoring.COMMAND_DURATION.get(**labels)
+
+        with self.assertRaises(RuntimeError):
+            io.execute("git fetch --all")
+
+        self.assertEqual(monitoring.COMMAND_DURATION.get(**labels), count + 1)
+
+    def test_execute_stream(self):
+        lines = list(io.execute_stream("echo first; echo second"))
+
+        self.assertEqual(lines, ["first\n", "second\n"])
+
+    def test_execute_stream_should_raise_if_failure(self):
+        with self.assertRaises(RuntimeError) as context:
+            list(io.execute_stream("echo output; echo An error message >&2; exit 1"))
+
+        self.assertEqual(str(context.exception), "An error message")
+
+    def test_execute_stream_stopped_early(self):
+        with TemporaryDirectory() as tmp_dir:
+            marker_path = os.path.join(tmp_dir, "marker")
+            lines = io.execute_stream(f"echo started; sleep 0.5; touch {marker_path}")
+
+            self.assertEqual(next(lines), "started\n")
+            lines.close()
+
+            # The command was killed before it could go on
+            time.sleep(0.7)
+            self.assertFalse(os.path.exists(marker_path))
+
+    def test_execute_stream_stopped_from_another_thread(self):
+        stop = threading.Event()
+        lines = io.execute_stream("echo started; sleep 5; echo never", stop=stop)
+
+        self.assertEqual(next(lines), "started\n")
+        threading.Timer(0.1, stop.set).start()
+        started_at = time.monotonic()
+
+        # The command is killed and the iteration ends without error
+        self.assertEqual(list(lines), [])
+        self.assertLess(time.monotonic() - started_at, 2)
+
     @patch("nestor_api.lib.io.Path", autospec=True)
     def test_exists_existing_file(self, path_mock):
         path_mock.return_value.exists.return_value = True
@@ -101,9 +155,10 @@ class TestIoLib(TestCase):
 
         self.assertEqual(pristine_path, "/tmp/nestor/pristine/my_path_name")
 
+    @patch("nestor_api.lib.io._track_live_directory", autospec=True)
     @patch("nestor_api.lib.io.get_temporary_directory_path", autospec=True)
     @patch("nestor_api.lib.io.copy", autospec=True)
-    def test_create_temporary_copy(self, copy_mock, get_temporary_directory_path_mock):
+    def test_create_temporary_copy(self, copy_mock, get_temporary_directory_path_mock, _track_mock):
         get_temporary_directory_path_mock.return_value = "/tmp/nestor/work/my-application-"
 
         temporary_directory_path = io.create_temporary_copy("some/path", "my-application")
@@ -178,6 +233,37 @@ class TestIoLib(TestCase):
         shutil_mock.rmtree.assert_called_once_with("path/to/remove")
         os_mock.remove.assert_not_called()
 
+    def test_live_directories(self):
+        with TemporaryDirectory() as working_path:
+            with patch.dict(os.environ, {"NESTOR_WORK_PATH": working_path}):
+                directory = io.create_temporary_directory("prefix")
+                self.assertIs(io.get_live_directories()[directory], threading.current_thread())
+
+                copy = io.create_temporary_copy(directory, "copy")
+                self.assertIn(copy, io.get_live_directories())
+
+                # Recorded on disk for the other processes
+                self.assertTrue(io.is_owned_by_live_process(directory))
+                self.assertTrue(io.is_owned_by_live_process(copy))
+
+                io.remove(directory)
+                io.remove(copy)
+                self.assertNotIn(directory, io.get_live_directories())
+                self.assertNotIn(copy, io.get_live_directories())
+                self.assertFalse(io.is_owned_by_live_process(directory))
+                # Only the lock file of the process is left
+                owners = os.listdir(os.path.join(working_path, io.OWNERS_DIRECTORY))
+                self.assertEqual(len(owners), 1)
+                self.assertTrue(owners[0].endswith(io.OWNER_LOCK_SUFFIX))
+
+    def test_touch(self):
+        with TemporaryDirectory() as directory:
+            os.utime(directory, (0, 0))
+
+            io.touch(directory)
+
+            self.assertGreater(os.stat(directory).st_mtime, 0)
+
     def test_write(self):
         temporary_file_path = os.path.join(gettempdir(), "test_write.txt")
         sample_file_path = Path(
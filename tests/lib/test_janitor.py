@@ -0,0 +1,199 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import nestor_api.lib.janitor as janitor
+
+MIB = 1024 * 1024
+
+
+def _create_directory(parent: str, name: str, size: int, age: float) -> str:
+    path = os.path.join(parent, name)
+    os.makedirs(path)
+    with open(os.path.join(path, "content"), "wb") as file:
+        file.write(b"x" * size)
+    past = time.time() - age
+    os.utime(path, (past, past))
+    return path
+
+
+@patch("nestor_api.lib.janitor.Logger", autospec=True)
+class TestJanitor(TestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.work_path = os.path.join(root.name, "work")
+        self.pristine_path = os.path.join(root.name, "pristine")
+        os.makedirs(self.work_path)
+        os.makedirs(self.pristine_path)
+        environ_patcher = patch.dict(
+            os.environ,
+            {
+                "NESTOR_WORK_PATH": self.work_path,
+                "NESTOR_PRISTINE_PATH": self.pristine_path,
+                "NESTOR_JANITOR_ORPHAN_AGE": "3600",
+                "NESTOR_JANITOR_DISK_QUOTA": "0",
+                "NESTOR_JANITOR_MIN_FREE_SPACE": "0",
+            },
+        )
+        environ_patcher.start()
+        self.addCleanup(environ_patcher.stop)
+
+        # The change time of the directories can not be set, make them look as old as required
+        self.now = time.time() + 7200
+
+    @patch("nestor_api.lib.janitor.io.get_live_directories", autospec=True)
+    def test_evict_orphans(self, get_live_directories_mock, _logger_mock):
+        """Should remove the directories of the ended jobs and the untracked old ones."""
+        running = _create_directory(self.work_path, "running", 10, 0)
+        ended = _create_directory(self.work_path, "ended", 20, 0)
+        orphan = _create_directory(self.work_path, "orphan", 30, 0)
+        dead_thread = MagicMock(spec=threading.Thread)
+        dead_thread.is_alive.return_value = False
+        get_live_directories_mock.return_value = {
+            running: threading.current_thread(),
+            ended: dead_thread,
+        }
+        reclaimed_orphans = janitor.RECLAIMED_BYTES.get(directory="work", reason="orphan")
+
+        reclaimed = janitor.evict_orphans(self.now)
+
+        self.assertTrue(os.path.isdir(running))
+        self.assertFalse(os.path.exists(ended))
+        self.assertFalse(os.path.exists(orphan))
+        self.assertGreaterEqual(reclaimed, 50)
+        self.assertGreaterEqual(
+            janitor.RECLAIMED_BYTES.get(directory="work", reason="orphan"), reclaimed_orphans + 30
+        )
+
+    @patch("nestor_api.lib.janitor.io.get_live_directories", autospec=True)
+    def test_evict_orphans_recent(self, get_live_directories_mock, _logger_mock):
+        """Should keep the untracked directories younger than the orphan age."""
+        get_live_directories_mock.return_value = {}
+        recent = _create_directory(self.work_path, "recent", 10, 0)
+
+        reclaimed = janitor.evict_orphans(time.time())
+
+        self.assertEqual(reclaimed, 0)
+        self.assertTrue(os.path.isdir(recent))
+
+    def test_evict_orphans_of_another_process(self, _logger_mock):
+        """Should keep the directories of another process while it runs."""
+        worker = subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                "import sys\n"
+                "import nestor_api.lib.io as io\n"
+                "print(io.create_temporary_directory('job'), flush=True)\n"
+                "sys.stdin.read()\n",
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        self.addCleanup(worker.kill)
+        directory = worker.stdout.readline().strip()
+
+        janitor.evict_orphans(self.now)
+
+        self.assertTrue(os.path.isdir(directory))
+
+        worker.communicate("")
+        janitor.evict_orphans(self.now)
+
+        self.assertFalse(os.path.exists(directory))
+        # The ownership records of the ended process are removed too
+        self.assertEqual(os.listdir(os.path.join(self.work_path, janitor.io.OWNERS_DIRECTORY)), [])
+
+    def test_evict_pristines_disabled(self, _logger_mock):
+        """Should keep the pristines without quota nor minimum free space."""
+        pristine = _create_directory(self.pristine_path, "app", MIB, 0)
+
+        self.assertEqual(janitor.evict_pristines(self.now), 0)
+        self.assertTrue(os.path.isdir(pristine))
+
+    @patch.dict(os.environ, {"NESTOR_JANITOR_DISK_QUOTA": "3"})
+    def test_evict_pristines_quota(self, _logger_mock):
+        """Should evict the least recently used pristines until the quota is respected."""
+        oldest = _create_directory(self.pristine_path, "oldest", MIB, 0)
+        time.sleep(0.01)
+        older = _create_directory(self.pristine_path, "older", MIB, 0)
+        time.sleep(0.01)
+        recent = _create_directory(self.pristine_path, "recent", MIB, 0)
+
+        reclaimed = janitor.evict_pristines(self.now)
+
+        self.assertFalse(os.path.exists(oldest))
+        self.assertTrue(os.path.isdir(older))
+        self.assertTrue(os.path.isdir(recent))
+        self.assertGreaterEqual(reclaimed, MIB)
+
+    @patch.dict(os.environ, {"NESTOR_JANITOR_DISK_QUOTA": "1"})
+    def test_evict_pristines_grace_period(self, logger_mock):
+        """Should keep the recently used pristines even if the quota is exceeded."""
+        pristine = _create_directory(self.pristine_path, "app", 2 * MIB, 0)
+
+        reclaimed = janitor.evict_pristines(time.time())
+
+        self.assertEqual(reclaimed, 0)
+        self.assertTrue(os.path.isdir(pristine))
+        logger_mock.warn.assert_called_once()
+
+    @patch.dict(os.environ, {"NESTOR_JANITOR_MIN_FREE_SPACE": "1"})
+    @patch("nestor_api.lib.janitor.shutil.disk_usage", autospec=True)
+    def test_evict_pristines_low_free_space(self, disk_usage_mock, _logger_mock):
+        """Should evict pristines until enough disk space is free."""
+        disk_usage_mock.return_value.free = MIB // 2
+        oldest = _create_directory(self.pristine_path, "oldest", MIB, 0)
+        time.sleep(0.01)
+        recent = _create_directory(self.pristine_path, "recent", MIB, 0)
+
+        janitor.evict_pristines(self.now)
+
+        self.assertFalse(os.path.exists(oldest))
+        self.assertTrue(os.path.isdir(recent))
+        disk_usage_mock.assert_called_once_with(self.pristine_path)
+
+    @patch("nestor_api.lib.janitor.io.get_live_directories", autospec=True)
+    def test_run_once(self, get_live_directories_mock, _logger_mock):
+        """Should clean the directories, then measure their disk usage."""
+        get_live_directories_mock.return_value = {}
+        _create_directory(self.work_path, "orphan", 30, 0)
+        _create_directory(self.pristine_path, "app", 1000, 0)
+
+        with patch.object(janitor.time, "time", return_value=self.now):
+            reclaimed = janitor.run_once()
+
+        self.assertGreaterEqual(reclaimed, 30)
+        self.assertLess(janitor.monitoring.DIRECTORY_SIZE.get(directory="work"), 30)
+        self.assertGreaterEqual(janitor.monitoring.DIRECTORY_SIZE.get(directory="pristine"), 1000)
+
+    @patch("nestor_api.lib.janitor.threading.Thread", autospec=True)
+    def test_start(self, thread_mock, _logger_mock):
+        """Should start the janitor thread once."""
+        with patch.object(janitor, "_thread", None):
+            janitor.start()
+            janitor.start()
+
+        thread_mock.assert_called_once_with(
+            target=janitor._run,  # pylint: disable=protected-access
+            args=[300],
+            name="janitor",
+            daemon=True,
+        )
+        thread_mock.return_value.start.assert_called_once()
+
+    @patch.dict(os.environ, {"NESTOR_JANITOR_INTERVAL": "0"})
+    @patch("nestor_api.lib.janitor.threading.Thread", autospec=True)
+    def test_start_disabled(self, thread_mock, _logger_mock):
+        """Should not start the janitor when disabled."""
+        with patch.object(janitor, "_thread", None):
+            janitor.start()
+
+        thread_mock.assert_not_called()
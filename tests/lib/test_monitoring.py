@@ -0,0 +1,101 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+import nestor_api.lib.monitoring as monitoring
+from nestor_api.utils.metrics import REGISTRY
+
+
+class TestMonitoring(TestCase):
+    def test_get_command_labels(self):
+        """Should extract the tool and the subcommand of a command line."""
+        self.assertEqual(monitoring.get_command_labels("git fetch --all"), ("git", "fetch"))
+        self.assertEqual(
+            monitoring.get_command_labels("git reset --hard origin/master"), ("git", "reset")
+        )
+        self.assertEqual(
+            monitoring.get_command_labels(
+                "kubectl --context staging --namespace app get deployment --output=json"
+            ),
+            ("kubectl", "get"),
+        )
+        self.assertEqual(
+            monitoring.get_command_labels("/usr/bin/kubectl --context=staging apply -f file.yaml"),
+            ("kubectl", "apply"),
+        )
+        self.assertEqual(monitoring.get_command_labels("git Weird_Name"), ("git", "other"))
+        self.assertEqual(monitoring.get_command_labels("ls -la"), ("ls", "none"))
+        self.assertEqual(monitoring.get_command_labels(""), ("unknown", "unknown"))
+
+    def test_measure_command(self):
+        """Should observe the duration of the command with its outcome."""
+        labels = {"tool": "tool", "subcommand": "measured"}
+        successes = monitoring.COMMAND_DURATION.get(**labels, status="success")
+        failures = monitoring.COMMAND_DURATION.get(**labels, status="failure")
+
+        with monitoring.measure_command("tool", "measured"):
+            pass
+        with self.assertRaises(RuntimeError):
+            with monitoring.measure_command("tool", "measured"):
+                raise RuntimeError("failure")
+
+        self.assertEqual(monitoring.COMMAND_DURATION.get(**labels, status="success"), successes + 1)
+        self.assertEqual(monitoring.COMMAND_DURATION.get(**labels, status="failure"), failures + 1)
+
+    @patch("nestor_api.lib.monitoring.time.monotonic", autospec=True)
+    def test_phase_timer(self, monotonic_mock):
+        """Should observe the time elapsed since the previous phase."""
+        monotonic_mock.side_effect = [100, 102, 107]
+        first_sum = monitoring.JOB_PHASE_DURATION.get_sum(job="test", phase="first")
+        second_sum = monitoring.JOB_PHASE_DURATION.get_sum(job="test", phase="second")
+
+        phases = monitoring.PhaseTimer("test")
+        phases.phase_done("first")
+        phases.phase_done("second")
+
+        self.assertEqual(
+            monitoring.JOB_PHASE_DURATION.get_sum(job="test", phase="first"), first_sum + 2
+        )
+        self.assertEqual(
+            monitoring.JOB_PHASE_DURATION.get_sum(job="test", phase="second"), second_sum + 5
+        )
+
+    def test_tracked_job(self):
+        """Should count the running jobs and observe their duration."""
+        count = monitoring.JOB_DURATION.get(job="tracked")
+
+        @monitoring.tracked_job("tracked")
+        def job(value):
+            self.assertEqual(monitoring.JOBS_IN_PROGRESS.get(job="tracked"), 1)
+            return value
+
+        self.assertEqual(job("result"), "result")
+        self.assertEqual(monitoring.JOBS_IN_PROGRESS.get(job="tracked"), 0)
+        self.assertEqual(monitoring.JOB_DURATION.get(job="tracked"), count + 1)
+
+    def test_record_cache_lookup(self):
+        """Should count the lookups by result."""
+        hits = monitoring.CACHE_REQUESTS.get(cache="test", result="hit")
+
+        monitoring.record_cache_lookup("test", "hit")
+
+        self.assertEqual(monitoring.CACHE_REQUESTS.get(cache="test", result="hit"), hits + 1)
+
+    def test_measure_directory_sizes(self):
+        """Should expose the disk usage of the work and pristine directories once measured."""
+        with tempfile.TemporaryDirectory() as work_path:
+            os.makedirs(os.path.join(work_path, "app"))
+            with open(os.path.join(work_path, "app", "file"), "w") as file:
+                file.write("x" * 1000)
+
+            with patch.dict(
+                "os.environ",
+                {"NESTOR_WORK_PATH": work_path, "NESTOR_PRISTINE_PATH": "/does/not/exist"},
+            ):
+                monitoring.measure_directory_sizes()
+                exposition = REGISTRY.expose()
+
+            self.assertGreaterEqual(monitoring.DIRECTORY_SIZE.get(directory="work"), 1000)
+            self.assertEqual(monitoring.DIRECTORY_SIZE.get(directory="pristine"), 0)
+            self.assertIn('nestor_directory_size_bytes{directory="pristine"} 0', exposition)
@@ -1,7 +1,12 @@
 from unittest import TestCase
-from unittest.mock import call, patch
+from unittest.mock import Mock, call, patch
 
-from nestor_api.lib.workflow.advance import advance_workflow, get_app_progress_report, get_next_step
+from nestor_api.lib.workflow.advance import (
+    advance_workflow,
+    fast_forward_app,
+    get_app_progress_report,
+    get_next_step,
+)
 from nestor_api.lib.workflow.errors import (
     AppListingError,
     StepNotExistingInWorkflowError,
@@ -59,7 +64,7 @@ class TestWorkflow(TestCase):
         )
         git_mock.branch.assert_called_once_with("app-1-dir", "step-2")
         git_mock.rebase.assert_called_once_with("app-1-dir", "step-1", onto="0.0.0-sha-cf021d1")
-        git_mock.push.assert_called_once_with("app-1-dir")
+        git_mock.push.assert_called_once_with("app-1-dir", ["refs/heads/step-2"])
         config_mock.get_processes.assert_called_once_with(fake_config_app_1)
         config_mock.get_cronjobs.assert_called_once_with(fake_config_app_1)
         non_blocking_clean_mock.assert_has_calls([call("app-1-dir"), call("app-2-dir")])
@@ -157,6 +162,134 @@ class TestWorkflow(TestCase):
         with self.assertRaisesRegex(WorkflowError, "Workflow is already in final step."):
             advance_workflow("path/to/config", {}, "step-1")
 
+    @patch("nestor_api.lib.workflow.advance.Logger", autospec=True)
+    @patch("nestor_api.lib.workflow.advance.git", autospec=True)
+    @patch("nestor_api.lib.workflow.advance.config", autospec=True)
+    @patch("nestor_api.lib.workflow.advance.non_blocking_clean", autospec=True)
+    @patch("nestor_api.lib.workflow.advance.get_app_progress_report", autospec=True)
+    @patch("nestor_api.lib.workflow.advance.fast_forward_app", autospec=True)
+    def test_advance_workflow_with_git_provider(
+        self,
+        fast_forward_app_mock,
+        get_app_progress_report_mock,
+        non_blocking_clean_mock,
+        config_mock,
+        git_mock,
+        _logger_mock,
+    ):
+        """Should fast-forward the apps through the git provider, and rebase locally
+        the ones whose next step branch has diverged."""
+        # Mocks
+        fake_config_app_1 = {"git": {"origin": "fake-git-origin-for-app-1"}}
+        fake_config_app_2 = {"git": {"origin": "fake-git-origin-for-app-2"}}
+        config_mock.list_apps_config.return_value.items.return_value = [
+            ("app-1", fake_config_app_1),
+            ("app-2", fake_config_app_2),
+        ]
+        fast_forward_app_mock.side_effect = [(True, "0.0.0-sha-cf021d1"), None]
+        git_mock.create_working_repository.return_value = "app-2-dir"
+        get_app_progress_report_mock.return_value = (True, "0.0.0-sha-78fe3d7")
+        config_mock.get_processes.return_value = []
+        config_mock.get_cronjobs.return_value = []
+        fake_project_config = {"workflow": ["step-1", "step-2"]}
+        git_provider = object()
+
+        # Test
+        result = advance_workflow(
+            "path/to/config", fake_project_config, "step-1", git_provider=git_provider
+        )
+
+        # Assertions
+        fast_forward_app_mock.assert_has_calls(
+            [
+                call("app-1", fake_config_app_1, "step-1", "step-2", git_provider),
+                call("app-2", fake_config_app_2, "step-1", "step-2", git_provider),
+            ]
+        )
+        git_mock.create_working_repository.assert_called_once_with(
+            "app-2", "fake-git-origin-for-app-2"
+        )
+        git_mock.rebase.assert_called_once_with("app-2-dir", "step-1", onto="0.0.0-sha-78fe3d7")
+        git_mock.push.assert_called_once_with("app-2-dir", ["refs/heads/step-2"])
+        non_blocking_clean_mock.assert_called_once_with("app-2-dir")
+        self.assertEqual(result[0], WorkflowAdvanceStatus.SUCCESS)
+        self.assertEqual(
+            [(report["name"], report["tag"]) for report in result[1]],
+            [("app-1", "0.0.0-sha-cf021d1"), ("app-2", "0.0.0-sha-78fe3d7")],
+        )
+
+    def _mock_pristine_repository(self, git_mock, next_step_hash):
+        git_mock.update_pristine_repository.return_value = "pristine-dir"
+        git_mock.get_last_tag.return_value = "0.0.0-sha-cf021d1"
+        git_mock.get_commit_hash_from_tag.return_value = "cf021d1"
+        git_mock.get_remote_branch_hash.return_value = next_step_hash
+        git_mock.parse_repository_url.return_value = ("org", "app-1")
+
+    @patch("nestor_api.lib.workflow.advance.git", autospec=True)
+    def test_fast_forward_app_up_to_date(self, git_mock):
+        """Should not update the next step branch if it is already on the last tag."""
+        self._mock_pristine_repository(git_mock, "cf021d1")
+        git_provider_mock = Mock()
+
+        result = fast_forward_app(
+            "app-1", {"git": {"origin": "app-1-origin"}}, "step-1", "step-2", git_provider_mock
+        )
+
+        git_mock.update_pristine_repository.assert_called_once_with("app-1", "app-1-origin")
+        git_mock.get_last_tag.assert_called_once_with("pristine-dir", "origin/step-1")
+        git_mock.get_commit_hash_from_tag.assert_called_once_with(
+            "pristine-dir", "0.0.0-sha-cf021d1"
+        )
+        git_mock.get_remote_branch_hash.assert_called_once_with("pristine-dir", "step-2")
+        self.assertEqual(git_provider_mock.method_calls, [])
+        self.assertEqual(result, (False, "0.0.0-sha-cf021d1"))
+
+    @patch("nestor_api.lib.workflow.advance.git", autospec=True)
+    def test_fast_forward_app_with_non_existing_next_step_branch(self, git_mock):
+        """Should create the next step branch on the last tag."""
+        self._mock_pristine_repository(git_mock, None)
+        git_provider_mock = Mock()
+
+        result = fast_forward_app(
+            "app-1", {"git": {"origin": "app-1-origin"}}, "step-1", "step-2", git_provider_mock
+        )
+
+        git_mock.parse_repository_url.assert_called_once_with("app-1-origin")
+        git_provider_mock.create_branch.assert_called_once_with("org", "app-1", "step-2", "cf021d1")
+        git_provider_mock.update_branch.assert_not_called()
+        self.assertEqual(result, (True, "0.0.0-sha-cf021d1"))
+
+    @patch("nestor_api.lib.workflow.advance.git", autospec=True)
+    def test_fast_forward_app(self, git_mock):
+        """Should fast-forward the next step branch to the last tag."""
+        self._mock_pristine_repository(git_mock, "78fe3d7")
+        git_mock.is_ancestor.return_value = True
+        git_provider_mock = Mock()
+
+        result = fast_forward_app(
+            "app-1", {"git": {"origin": "app-1-origin"}}, "step-1", "step-2", git_provider_mock
+        )
+
+        git_mock.is_ancestor.assert_called_once_with("pristine-dir", "78fe3d7", "cf021d1")
+        git_provider_mock.update_branch.assert_called_once_with("org", "app-1", "step-2", "cf021d1")
+        git_provider_mock.create_branch.assert_not_called()
+        git_mock.create_working_repository.assert_not_called()
+        self.assertEqual(result, (True, "0.0.0-sha-cf021d1"))
+
+    @patch("nestor_api.lib.workflow.advance.git", autospec=True)
+    def test_fast_forward_app_with_diverged_next_step_branch(self, git_mock):
+        """Should not update the next step branch when it cannot be fast-forwarded."""
+        self._mock_pristine_repository(git_mock, "78fe3d7")
+        git_mock.is_ancestor.return_value = False
+        git_provider_mock = Mock()
+
+        result = fast_forward_app(
+            "app-1", {"git": {"origin": "app-1-origin"}}, "step-1", "step-2", git_provider_mock
+        )
+
+        self.assertEqual(git_provider_mock.method_calls, [])
+        self.assertIsNone(result)
+
     @patch("nestor_api.lib.workflow.advance.git")
     def test_get_app_progress_report_with_app_ready_to_progress(self, git_mock):
         """Should generate a report indicating that the app is ready to progress."""
@@ -1,18 +1,21 @@
 from unittest import TestCase
 from unittest.mock import MagicMock, create_autospec, patch
 
-from github import AuthenticatedUser, Branch
+from github import AuthenticatedUser
 
 from nestor_api.adapters.git.abstract_git_provider import (
     AbstractGitProvider,
+    BranchRef,
+    BranchState,
     GitProviderError,
     GitResource,
     GitResourceNotFoundError,
 )
 from nestor_api.lib.workflow.init import (
-    _create_and_protect_branch,
+    _create_and_protect_branches,
     _get_workflow_branches,
     init_workflow,
+    init_workflows,
 )
 from nestor_api.lib.workflow.typings import WorkflowInitStatus
 
@@ -21,9 +24,9 @@ class TestWorkflow(TestCase):
     @patch("nestor_api.lib.workflow.init.Logger", autospec=True)
     @patch("nestor_api.lib.workflow.init.non_blocking_clean", autospec=True)
     @patch("nestor_api.lib.workflow.init.config", autospec=True)
-    @patch("nestor_api.lib.workflow.init._create_and_protect_branch", autospec=True)
+    @patch("nestor_api.lib.workflow.init._create_and_protect_branches", autospec=True)
     def test_init_workflow(
-        self, _create_and_protect_branch_mock, config_mock, non_blocking_clean_mock, _logger_mock
+        self, _create_and_protect_branches_mock, config_mock, non_blocking_clean_mock, _logger_mock
     ):
         """Should correctly initialize all branches."""
         # Mocks
@@ -35,20 +38,37 @@ class TestWorkflow(TestCase):
         user = MagicMock(spec=AuthenticatedUser.AuthenticatedUser)
         user.login = "some-user-login"
         git_provider_mock.get_user_info.return_value = user
-        master_branch = MagicMock(spec=Branch.Branch)
-        master_branch.commit.sha = "5ac5ee8"
-        git_provider_mock.get_branch.return_value = master_branch
-        _create_and_protect_branch_mock.side_effect = [
-            {"created": (True, True), "protected": (True, True)},
-            {"created": (False, True), "protected": (True, True)},
-            {"created": (False, True), "protected": (False, True)},
+        states = {
+            BranchRef("organization", "app-1", "master"): BranchState(True, "5ac5ee8", True),
+            BranchRef("organization", "app-1", "integration"): BranchState(False, None, False),
+            BranchRef("organization", "app-1", "staging"): BranchState(True, "5ac5ee8", False),
+            BranchRef("organization", "app-1", "production"): BranchState(True, "5ac5ee8", True),
+        }
+        git_provider_mock.get_branches.return_value = states
+        workflow_refs = [
+            BranchRef("organization", "app-1", "integration"),
+            BranchRef("organization", "app-1", "staging"),
+            BranchRef("organization", "app-1", "production"),
         ]
+        _create_and_protect_branches_mock.return_value = {
+            workflow_refs[0]: {"created": (True, True), "protected": (True, True)},
+            workflow_refs[1]: {"created": (False, True), "protected": (True, True)},
+            workflow_refs[2]: {"created": (False, True), "protected": (False, True)},
+        }
 
         # Test
         result = init_workflow("organization", "app-1", git_provider_mock)
 
         # Assertions
-        git_provider_mock.get_branch.assert_called_with("organization", "app-1", "master")
+        git_provider_mock.get_branches.assert_called_once_with(
+            [BranchRef("organization", "app-1", "master"), *workflow_refs]
+        )
+        _create_and_protect_branches_mock.assert_called_once_with(
+            {branch: "5ac5ee8" for branch in workflow_refs},
+            states,
+            "some-user-login",
+            git_provider_mock,
+        )
         non_blocking_clean_mock.assert_called_with("fake-path")
         self.assertEqual(
             result,
@@ -65,9 +85,9 @@ class TestWorkflow(TestCase):
     @patch("nestor_api.lib.workflow.init.Logger", autospec=True)
     @patch("nestor_api.lib.workflow.init.non_blocking_clean", autospec=True)
     @patch("nestor_api.lib.workflow.init.config", autospec=True)
-    @patch("nestor_api.lib.workflow.init._create_and_protect_branch", autospec=True)
+    @patch("nestor_api.lib.workflow.init._create_and_protect_branches", autospec=True)
     def test_init_workflow_without_master_branch(
-        self, _create_and_protect_branch_mock, config_mock, non_blocking_clean_mock, _logger_mock
+        self, _create_and_protect_branches_mock, config_mock, non_blocking_clean_mock, _logger_mock
     ):
         """Should return fail status and empty report."""
         # Mocks
@@ -79,13 +99,20 @@ class TestWorkflow(TestCase):
         user = MagicMock(spec=AuthenticatedUser.AuthenticatedUser)
         user.login = "some-user-login"
         git_provider_mock.get_user_info.return_value = user
-        git_provider_mock.get_branch.side_effect = GitResourceNotFoundError(GitResource.BRANCH)
+        git_provider_mock.get_branches.return_value = {
+            BranchRef("organization", "app-1", "master"): BranchState(False, None, False),
+            BranchRef("organization", "app-1", "integration"): BranchState(False, None, False),
+            BranchRef("organization", "app-1", "staging"): BranchState(False, None, False),
+            BranchRef("organization", "app-1", "production"): BranchState(False, None, False),
+        }
 
         # Test
         result = init_workflow("organization", "app-1", git_provider_mock)
 
         # Assertions
-        _create_and_protect_branch_mock.assert_not_called()
+        _create_and_protect_branches_mock.assert_called_once_with(
+            {}, git_provider_mock.get_branches.return_value, "some-user-login", git_provider_mock
+        )
         non_blocking_clean_mock.assert_called_with("fake-path")
         self.assertEqual(
             result, (WorkflowInitStatus.FAIL, {},),
@@ -94,9 +121,9 @@ class TestWorkflow(TestCase):
     @patch("nestor_api.lib.workflow.init.Logger", autospec=True)
     @patch("nestor_api.lib.workflow.init.non_blocking_clean", autospec=True)
     @patch("nestor_api.lib.workflow.init.config", autospec=True)
-    @patch("nestor_api.lib.workflow.init._create_and_protect_branch", autospec=True)
+    @patch("nestor_api.lib.workflow.init._create_and_protect_branches", autospec=True)
     def test_init_workflow_failing_to_create_or_protect_branch(
-        self, _create_and_protect_branch_mock, config_mock, non_blocking_clean_mock, _logger_mock
+        self, _create_and_protect_branches_mock, config_mock, non_blocking_clean_mock, _logger_mock
     ):
         """Should return failed report if something goes wrong when
         creating/protecting branches."""
@@ -109,16 +136,19 @@ class TestWorkflow(TestCase):
         user = MagicMock(spec=AuthenticatedUser.AuthenticatedUser)
         user.login = "some-user-login"
         git_provider_mock.get_user_info.return_value = user
-        master_branch = MagicMock(spec=Branch.Branch)
-        master_branch.commit.sha = "5ac5ee8"
-        git_provider_mock.get_branch.return_value = master_branch
-        _create_and_protect_branch_mock.side_effect = GitProviderError("error")
+        git_provider_mock.get_branches.return_value = {
+            BranchRef("organization", "app-1", "master"): BranchState(True, "5ac5ee8", True),
+            BranchRef("organization", "app-1", "integration"): BranchState(False, None, False),
+            BranchRef("organization", "app-1", "staging"): BranchState(False, None, False),
+            BranchRef("organization", "app-1", "production"): BranchState(False, None, False),
+        }
+        _create_and_protect_branches_mock.side_effect = GitProviderError("error")
 
         # Test
         result = init_workflow("organization", "app-1", git_provider_mock)
 
         # Assertions
-        git_provider_mock.get_branch.assert_called_with("organization", "app-1", "master")
+        _create_and_protect_branches_mock.assert_called_once()
         non_blocking_clean_mock.assert_called_with("fake-path")
         self.assertEqual(
             result, (WorkflowInitStatus.FAIL, {},),
@@ -141,94 +171,274 @@ class TestWorkflow(TestCase):
 
         # Assertions
         git_provider_mock.get_user_info.assert_not_called()
-        git_provider_mock.get_branch.assert_not_called()
-        git_provider_mock.create_branch.assert_not_called()
-        git_provider_mock.protect_branch.assert_not_called()
+        git_provider_mock.get_branches.assert_not_called()
+        git_provider_mock.create_branches.assert_not_called()
+        git_provider_mock.protect_branches.assert_not_called()
         non_blocking_clean_mock.assert_called_with("fake-path")
         self.assertEqual(result, (WorkflowInitStatus.SUCCESS, {}))
 
     @patch("nestor_api.lib.workflow.init.Logger", autospec=True)
-    def test_create_and_protect_branch_with_non_existing_branch(self, _logger_mock):
-        """Should create and protect branch."""
+    @patch("nestor_api.lib.workflow.init.config", autospec=True)
+    def test_init_workflows(self, config_mock, _logger_mock):
+        """Should initialize all the apps at once, sharing the configuration and the user login."""
+        # Mocks
+        config_mock.list_apps_config.return_value = {
+            "app-1": {"workflow": ["master", "staging"]},
+            "app-2": {"workflow": ["master", "staging"]},
+            "app-3": {},
+        }
+        git_provider_mock = create_autospec(spec=AbstractGitProvider)
+        user = MagicMock(spec=AuthenticatedUser.AuthenticatedUser)
+        user.login = "some-user-login"
+        git_provider_mock.get_user_info.return_value = user
+        app_1_master = BranchRef("organization", "app-1", "master")
+        app_1_staging = BranchRef("organization", "app-1", "staging")
+        app_2_master = BranchRef("organization", "app-2", "master")
+        app_2_staging = BranchRef("organization", "app-2", "staging")
+        git_provider_mock.get_branches.return_value = {
+            app_1_master: BranchState(True, "5ac5ee8", True),
+            app_1_staging: BranchState(False, None, False),
+            app_2_master: BranchState(True, "78fe3d7", True),
+            app_2_staging: BranchState(True, "78fe3d7", True),
+        }
+
+        # Test
+        result = init_workflows("organization", git_provider_mock, "fake-path")
+
+        # Assertions
+        config_mock.change_environment.assert_called_once_with("staging", "fake-path")
+        config_mock.list_apps_config.assert_called_once_with("fake-path")
+        git_provider_mock.get_user_info.assert_called_once()
+        git_provider_mock.get_branches.assert_called_once_with(
+            [app_1_master, app_2_master, app_1_staging, app_2_staging]
+        )
+        git_provider_mock.create_branches.assert_called_once_with({app_1_staging: "5ac5ee8"})
+        git_provider_mock.protect_branches.assert_called_once_with(
+            [app_1_staging], "some-user-login"
+        )
+        self.assertEqual(
+            result,
+            (
+                WorkflowInitStatus.SUCCESS,
+                {
+                    "app-1": (
+                        WorkflowInitStatus.SUCCESS,
+                        {"staging": {"created": (True, True), "protected": (True, True)}},
+                    ),
+                    "app-2": (
+                        WorkflowInitStatus.SUCCESS,
+                        {"staging": {"created": (False, True), "protected": (False, True)}},
+                    ),
+                    "app-3": (WorkflowInitStatus.SUCCESS, {}),
+                },
+            ),
+        )
+
+    @patch("nestor_api.lib.workflow.init.Logger", autospec=True)
+    @patch("nestor_api.lib.workflow.init.config", autospec=True)
+    def test_init_workflows_with_failing_app(self, config_mock, _logger_mock):
+        """Should initialize the apps one by one when it fails for all of them at once,
+        and only report the failing ones as failed."""
+        # Mocks
+        config_mock.list_apps_config.return_value = {
+            "app-1": {"workflow": ["master", "staging"]},
+            "app-2": {"workflow": ["master", "staging"]},
+        }
+        git_provider_mock = create_autospec(spec=AbstractGitProvider)
+        git_provider_mock.get_user_info.return_value = None
+
+        def get_branches(refs):
+            if len(refs) > 2 or refs[0].repository_name == "app-2":
+                raise GitResourceNotFoundError(GitResource.REPOSITORY)
+            return {
+                refs[0]: BranchState(True, "5ac5ee8", True),
+                refs[1]: BranchState(True, "5ac5ee8", True),
+            }
+
+        git_provider_mock.get_branches.side_effect = get_branches
+
+        # Test
+        result = init_workflows("organization", git_provider_mock, "fake-path")
+
+        # Assertions
+        self.assertEqual(git_provider_mock.get_branches.call_count, 3)
+        git_provider_mock.get_user_info.assert_called_once()
+        self.assertEqual(
+            result,
+            (
+                WorkflowInitStatus.FAIL,
+                {
+                    "app-1": (
+                        WorkflowInitStatus.SUCCESS,
+                        {"staging": {"created": (False, True), "protected": (False, True)}},
+                    ),
+                    "app-2": (WorkflowInitStatus.FAIL, {}),
+                },
+            ),
+        )
+
+    @patch("nestor_api.lib.workflow.init.Logger", autospec=True)
+    @patch("nestor_api.lib.workflow.init.config", autospec=True)
+    def test_init_workflows_with_filter_and_failure(self, config_mock, _logger_mock):
+        """Should only initialize the given apps, and fail if one of them fails."""
         # Mocks
+        config_mock.list_app_names.return_value = ["app-1", "app-2"]
+        config_mock.get_project_config.return_value = {"project": "config"}
+        config_mock.get_app_config.side_effect = lambda app_name, *_: {
+            "workflow": ["master", "staging"]
+        }
         git_provider_mock = create_autospec(spec=AbstractGitProvider)
-        git_provider_mock.get_branch.side_effect = GitResourceNotFoundError(GitResource.BRANCH)
-        branch = MagicMock(spec=Branch.Branch)
-        branch.protected = False
-        git_provider_mock.create_branch.return_value = branch
+        git_provider_mock.get_user_info.return_value = None
+        git_provider_mock.get_branches.side_effect = GitProviderError("error")
 
         # Test
-        result = _create_and_protect_branch(
-            "organization", "app-1", "staging", "5ac5ee8", "some-user-login", git_provider_mock
+        result = init_workflows("organization", git_provider_mock, "fake-path", ["app-1"])
+
+        # Assertions
+        config_mock.list_apps_config.assert_not_called()
+        config_mock.get_app_config.assert_called_once_with(
+            "app-1", "fake-path", {"project": "config"}
+        )
+        self.assertEqual(
+            result, (WorkflowInitStatus.FAIL, {"app-1": (WorkflowInitStatus.FAIL, {})})
+        )
+
+    @patch("nestor_api.lib.workflow.init.Logger", autospec=True)
+    @patch("nestor_api.lib.workflow.init.config", autospec=True)
+    def test_init_workflows_with_unknown_apps(self, config_mock, _logger_mock):
+        """Should report the apps without configuration as failed, without loading them."""
+        # Mocks
+        config_mock.list_app_names.return_value = ["app-1"]
+        config_mock.get_app_config.return_value = {}
+        git_provider_mock = create_autospec(spec=AbstractGitProvider)
+
+        # Test
+        result = init_workflows(
+            "organization", git_provider_mock, "fake-path", ["../secrets", "app-1", "unknown"]
         )
 
         # Assertions
-        git_provider_mock.get_branch.assert_called_once_with("organization", "app-1", "staging")
-        git_provider_mock.create_branch.assert_called_once_with(
-            "organization", "app-1", "staging", "5ac5ee8"
+        config_mock.list_app_names.assert_called_once_with("fake-path")
+        config_mock.get_app_config.assert_called_once_with(
+            "app-1", "fake-path", config_mock.get_project_config.return_value
         )
-        git_provider_mock.protect_branch.assert_called_once_with(
-            "organization", "app-1", "staging", "some-user-login"
+        self.assertEqual(
+            result,
+            (
+                WorkflowInitStatus.FAIL,
+                {
+                    "../secrets": (WorkflowInitStatus.FAIL, {}),
+                    "app-1": (WorkflowInitStatus.SUCCESS, {}),
+                    "unknown": (WorkflowInitStatus.FAIL, {}),
+                },
+            ),
         )
-        self.assertEqual(result, {"created": (True, True), "protected": (True, True)})
 
     @patch("nestor_api.lib.workflow.init.Logger", autospec=True)
-    def test_create_and_protect_branch_with_non_existing_repo(self, _logger_mock):
-        """Should raise an error."""
+    @patch("nestor_api.lib.workflow.init.config", autospec=True)
+    def test_init_workflows_without_user_login(self, config_mock, _logger_mock):
+        """Should fail all the apps when the user login cannot be retrieved."""
         # Mocks
+        config_mock.list_apps_config.return_value = {
+            "app-1": {"workflow": ["master", "staging"]},
+            "app-2": {},
+        }
         git_provider_mock = create_autospec(spec=AbstractGitProvider)
-        git_provider_mock.get_branch.side_effect = GitResourceNotFoundError(GitResource.REPOSITORY)
+        git_provider_mock.get_user_info.side_effect = GitProviderError("error")
 
         # Test
-        with self.assertRaises(GitResourceNotFoundError) as context:
-            _create_and_protect_branch(
-                "organization", "app-1", "staging", "5ac5ee8", "some-user-login", git_provider_mock
-            )
+        result = init_workflows("organization", git_provider_mock, "fake-path")
 
         # Assertions
-        self.assertEqual(context.exception.resource, GitResource.REPOSITORY)
+        git_provider_mock.get_branches.assert_not_called()
+        self.assertEqual(
+            result,
+            (
+                WorkflowInitStatus.FAIL,
+                {"app-1": (WorkflowInitStatus.FAIL, {}), "app-2": (WorkflowInitStatus.SUCCESS, {})},
+            ),
+        )
 
     @patch("nestor_api.lib.workflow.init.Logger", autospec=True)
-    def test_create_and_protect_branch_with_existing_protected_branch(self, _logger_mock):
-        """Should not modify branch."""
+    def test_create_and_protect_branches(self, _logger_mock):
+        """Should create the missing branches and protect the unprotected ones at once."""
         # Mocks
         git_provider_mock = create_autospec(spec=AbstractGitProvider)
-        staging_branch = MagicMock(spec=Branch.Branch)
-        staging_branch.protected = True
-        git_provider_mock.get_branch.return_value = staging_branch
+        integration = BranchRef("organization", "app-1", "integration")
+        staging = BranchRef("organization", "app-1", "staging")
+        production = BranchRef("organization", "app-2", "production")
+        states = {
+            integration: BranchState(False, None, False),
+            staging: BranchState(True, "5ac5ee8", False),
+            production: BranchState(False, None, False),
+        }
 
         # Test
-        result = _create_and_protect_branch(
-            "organization", "app-1", "staging", "5ac5ee8", "some-user-login", git_provider_mock
+        result = _create_and_protect_branches(
+            {integration: "5ac5ee8", staging: "5ac5ee8", production: "78fe3d7"},
+            states,
+            "some-user-login",
+            git_provider_mock,
         )
 
         # Assertions
-        git_provider_mock.get_branch.assert_called_once_with("organization", "app-1", "staging")
-        git_provider_mock.create_branch.assert_not_called()
-        git_provider_mock.protect_branch.assert_not_called()
-        self.assertEqual(result, {"created": (False, True), "protected": (False, True)})
+        git_provider_mock.create_branches.assert_called_once_with(
+            {integration: "5ac5ee8", production: "78fe3d7"}
+        )
+        git_provider_mock.protect_branches.assert_called_once_with(
+            [integration, staging, production], "some-user-login"
+        )
+        self.assertEqual(
+            result,
+            {
+                integration: {"created": (True, True), "protected": (True, True)},
+                staging: {"created": (False, True), "protected": (True, True)},
+                production: {"created": (True, True), "protected": (True, True)},
+            },
+        )
 
     @patch("nestor_api.lib.workflow.init.Logger", autospec=True)
-    def test_create_and_protect_branch_with_existing_unprotected_branch(self, _logger_mock):
-        """Should only protect the branch."""
+    def test_create_and_protect_branches_already_initialized(self, _logger_mock):
+        """Should not modify any branch."""
         # Mocks
         git_provider_mock = create_autospec(spec=AbstractGitProvider)
-        staging_branch = MagicMock(spec=Branch.Branch)
-        staging_branch.protected = False
-        git_provider_mock.get_branch.return_value = staging_branch
+        staging = BranchRef("organization", "app-1", "staging")
 
         # Test
-        result = _create_and_protect_branch(
-            "organization", "app-1", "staging", "5ac5ee8", "some-user-login", git_provider_mock
+        result = _create_and_protect_branches(
+            {staging: "5ac5ee8"},
+            {staging: BranchState(True, "5ac5ee8", True)},
+            "some-user-login",
+            git_provider_mock,
         )
 
         # Assertions
-        git_provider_mock.get_branch.assert_called_once_with("organization", "app-1", "staging")
-        git_provider_mock.create_branch.assert_not_called()
-        git_provider_mock.protect_branch.assert_called_once_with(
-            "organization", "app-1", "staging", "some-user-login"
+        git_provider_mock.create_branches.assert_not_called()
+        git_provider_mock.protect_branches.assert_not_called()
+        self.assertEqual(result, {staging: {"created": (False, True), "protected": (False, True)}})
+
+    @patch("nestor_api.lib.workflow.init.Logger", autospec=True)
+    def test_create_and_protect_branches_failing(self, _logger_mock):
+        """Should raise the provider errors."""
+        # Mocks
+        git_provider_mock = create_autospec(spec=AbstractGitProvider)
+        git_provider_mock.create_branches.side_effect = GitResourceNotFoundError(
+            GitResource.REPOSITORY
         )
-        self.assertEqual(result, {"created": (False, True), "protected": (True, True)})
+        staging = BranchRef("organization", "app-1", "staging")
+
+        # Test
+        with self.assertRaises(GitResourceNotFoundError) as context:
+            _create_and_protect_branches(
+                {staging: "5ac5ee8"},
+                {staging: BranchState(False, None, False)},
+                "some-user-login",
+                git_provider_mock,
+            )
+
+        # Assertions
+        self.assertEqual(context.exception.resource, GitResource.REPOSITORY)
+        git_provider_mock.protect_branches.assert_not_called()
 
     def test_get_workflow_branches(self):
         """Should return the list of workflow branches."""
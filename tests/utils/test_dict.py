@@ -38,3 +38,21 @@ class TestDictUtil(TestCase):
         self.assertEqual(dict_a, {1: "1a", 2: {3: ["a", "b"]}})
         self.assertEqual(dict_b, {1: "1b", 2: {3: ["c", "d"]}})
         self.assertEqual(result, {1: "1b", 2: {3: ["c", "d"]}})
+
+    def test_deep_merge_should_share_untouched_subtrees(self):
+        """Should only copy the dictionaries along the merged paths."""
+        untouched = {"c": {"d": "d"}}
+        merged_path = {"e": "e"}
+        source_value = {"g": "g"}
+        dict_a = {"a": untouched, "b": merged_path}
+        dict_b = {"b": {"f": "f"}, "h": source_value}
+
+        result = dict_utils.deep_merge(dict_a, dict_b)
+
+        self.assertEqual(
+            result, {"a": {"c": {"d": "d"}}, "b": {"e": "e", "f": "f"}, "h": {"g": "g"}}
+        )
+        self.assertIs(result["a"], untouched)
+        self.assertIs(result["h"], source_value)
+        self.assertIsNot(result["b"], merged_path)
+        self.assertEqual(merged_path, {"e": "e"})
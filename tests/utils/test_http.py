@@ -0,0 +1,26 @@
+from unittest import TestCase
+
+import nestor_api.utils.http as http_utils
+
+
+class _ApiError(http_utils.HttpApiError):
+    pass
+
+
+class TestHttpUtils(TestCase):
+    def test_raise_for_status_success(self):
+        http_utils.raise_for_status(200, b"not json")
+
+    def test_raise_for_status_with_json_message(self):
+        with self.assertRaises(_ApiError) as context:
+            http_utils.raise_for_status(404, b'{"message": "not found"}', _ApiError)
+
+        self.assertEqual(str(context.exception), "not found")
+        self.assertEqual(context.exception.status, 404)
+
+    def test_raise_for_status_with_raw_body(self):
+        with self.assertRaises(http_utils.HttpApiError) as context:
+            http_utils.raise_for_status(500, b"Internal error")
+
+        self.assertEqual(str(context.exception), "Internal error")
+        self.assertEqual(context.exception.status, 500)
@@ -0,0 +1,34 @@
+import threading
+from unittest import TestCase
+
+import nestor_api.utils.iterator as iterator_utils
+
+
+class TestIteratorUtils(TestCase):
+    def test_merge_in_threads(self):
+        result = list(
+            iterator_utils.merge_in_threads(
+                {"first": lambda: iter([1, 2]), "second": lambda: iter([3]), "empty": list}
+            )
+        )
+
+        self.assertCountEqual(result, [1, 2, 3])
+
+    def test_merge_in_threads_runs_each_iterable_in_its_thread(self):
+        thread_names = set()
+
+        def produce():
+            thread_names.add(threading.current_thread().name)
+            yield "item"
+
+        list(iterator_utils.merge_in_threads({"first": produce, "second": produce}))
+
+        self.assertEqual(thread_names, {"first", "second"})
+
+    def test_merge_in_threads_with_error(self):
+        def produce():
+            yield 1
+            raise ValueError("error")
+
+        with self.assertRaisesRegex(ValueError, "error"):
+            list(iterator_utils.merge_in_threads({"first": produce}))
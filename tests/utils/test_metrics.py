@@ -0,0 +1,110 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from nestor_api.utils.metrics import Counter, Gauge, Histogram, Registry
+
+
+class TestMetrics(TestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_gauge(self):
+        """Should set, increment and decrement the value of each set of labels."""
+        gauge = Gauge("some_gauge", "Some gauge", ["tool"], registry=self.registry)
+
+        gauge.set(5, tool="git")
+        gauge.inc(tool="git")
+        gauge.dec(3, tool="docker")
+
+        self.assertEqual(gauge.get(tool="git"), 6)
+        self.assertEqual(gauge.get(tool="docker"), -3)
+        self.assertEqual(gauge.get(tool="kubectl"), 0)
+
+    def test_counter(self):
+        """Should only be incremented."""
+        counter = Counter("some_counter", "Some counter", registry=self.registry)
+
+        counter.inc()
+        counter.inc(2.5)
+
+        self.assertEqual(counter.get(), 3.5)
+        with self.assertRaises(ValueError):
+            counter.inc(-1)
+
+    def test_labels_mismatch(self):
+        """Should refuse labels different from the declared ones."""
+        gauge = Gauge("some_gauge", "Some gauge", ["tool"], registry=self.registry)
+
+        with self.assertRaises(ValueError):
+            gauge.set(1)
+        with self.assertRaises(ValueError):
+            gauge.set(1, tool="git", command="push")
+
+    def test_register_twice(self):
+        """Should refuse two metrics with the same name."""
+        Gauge("some_metric", "Some metric", registry=self.registry)
+
+        with self.assertRaises(ValueError):
+            Counter("some_metric", "Some metric", registry=self.registry)
+
+    def test_expose(self):
+        """Should expose the metrics in the Prometheus text format."""
+        counter = Counter("b_counter", "Some counter", ["tool"], registry=self.registry)
+        gauge = Gauge("a_gauge", "Some gauge", registry=self.registry)
+        counter.inc(tool="git")
+        counter.inc(tool='say "hi"\n')
+        gauge.set(0.5)
+
+        self.assertEqual(
+            self.registry.expose(),
+            "# HELP a_gauge Some gauge\n"
+            "# TYPE a_gauge gauge\n"
+            "a_gauge 0.5\n"
+            "# HELP b_counter Some counter\n"
+            "# TYPE b_counter counter\n"
+            'b_counter{tool="git"} 1\n'
+            'b_counter{tool="say \\"hi\\"\\n"} 1\n',
+        )
+
+    def test_histogram(self):
+        """Should count the observations in cumulative buckets."""
+        histogram = Histogram(
+            "some_histogram", "Some histogram", ["tool"], registry=self.registry, buckets=[1, 5]
+        )
+
+        histogram.observe(0.5, tool="git")
+        histogram.observe(1, tool="git")
+        histogram.observe(3, tool="git")
+        histogram.observe(10, tool="git")
+
+        self.assertEqual(histogram.get(tool="git"), 4)
+        self.assertEqual(histogram.get_sum(tool="git"), 14.5)
+        self.assertEqual(
+            histogram.expose(),
+            "# HELP some_histogram Some histogram\n"
+            "# TYPE some_histogram histogram\n"
+            'some_histogram_bucket{tool="git",le="1"} 2\n'
+            'some_histogram_bucket{tool="git",le="5"} 3\n'
+            'some_histogram_bucket{tool="git",le="+Inf"} 4\n'
+            'some_histogram_sum{tool="git"} 14.5\n'
+            'some_histogram_count{tool="git"} 4\n',
+        )
+
+    @patch("nestor_api.utils.metrics.time.monotonic", autospec=True)
+    def test_histogram_time(self, monotonic_mock):
+        """Should observe the duration of a block of code."""
+        monotonic_mock.side_effect = [10, 12.5]
+        histogram = Histogram("some_histogram", "Some histogram", registry=self.registry)
+
+        with histogram.time():
+            pass
+
+        self.assertEqual(histogram.get(), 1)
+        self.assertEqual(histogram.get_sum(), 2.5)
+
+    def test_collectors(self):
+        """Should update the metrics before exposing them."""
+        gauge = Gauge("some_gauge", "Some gauge", registry=self.registry)
+        self.registry.add_collector(lambda: gauge.set(42))
+
+        self.assertIn("some_gauge 42\n", self.registry.expose())
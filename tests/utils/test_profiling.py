@@ -0,0 +1,132 @@
+import os
+import pstats
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from flask import Flask
+
+from nestor_api.utils import profiling
+
+
+def _profiled_function():
+    return sum(range(100))
+
+
+class TestProfiling(TestCase):
+    def setUp(self):
+        profiles_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(profiles_dir.cleanup)
+        self.profiles_path = profiles_dir.name
+        environ_patcher = patch.dict(
+            os.environ,
+            {
+                "NESTOR_PROFILES_PATH": self.profiles_path,
+                "NESTOR_PROFILING_TOKEN": "secret",
+                "NESTOR_PROFILING_ENABLED": "false",
+            },
+        )
+        environ_patcher.start()
+        self.addCleanup(environ_patcher.stop)
+
+    def test_is_authorized(self):
+        self.assertTrue(profiling.is_authorized("secret"))
+        self.assertFalse(profiling.is_authorized("not-the-secret"))
+        self.assertFalse(profiling.is_authorized(None))
+
+    @patch.dict(os.environ, {"NESTOR_PROFILING_TOKEN": ""})
+    def test_is_authorized_without_token(self):
+        """Should refuse everything when no token is configured."""
+        self.assertFalse(profiling.is_authorized(""))
+
+    def test_profile(self):
+        """Should save a pstats profile of the block of code."""
+        with profiling.profile("POST /api/builds/my-app"):
+            _profiled_function()
+
+        profiles = profiling.list_profiles()
+        self.assertEqual(len(profiles), 1)
+        self.assertRegex(profiles[0], r"^[0-9T]+-post-api-builds-my-app\.pstats$")
+        profile_path = profiling.get_profile_path(profiles[0])
+        stats = pstats.Stats(profile_path)
+        self.assertIn("_profiled_function", [function for _, _, function in stats.stats])
+        self.assertIn("_profiled_function", profiling.format_profile(profile_path))
+
+    @patch.dict(os.environ, {"NESTOR_PROFILES_MAX": "2"})
+    def test_profile_keeps_the_most_recent(self):
+        """Should remove the oldest profiles."""
+        for label in ["first", "second", "third"]:
+            with profiling.profile(label):
+                pass
+
+        profiles = profiling.list_profiles()
+        self.assertEqual(
+            [profile.split("-", 1)[1] for profile in profiles], ["third.pstats", "second.pstats"]
+        )
+
+    def test_get_profile_path(self):
+        """Should only give access to the saved profiles."""
+        with open(os.path.join(self.profiles_path, "20200101T000000-profile.pstats"), "w"):
+            pass
+
+        self.assertEqual(
+            profiling.get_profile_path("20200101T000000-profile.pstats"),
+            os.path.join(self.profiles_path, "20200101T000000-profile.pstats"),
+        )
+        self.assertIsNone(profiling.get_profile_path("20200101T000000-missing.pstats"))
+        self.assertIsNone(profiling.get_profile_path("../20200101T000000-profile.pstats"))
+
+    def test_background_job_not_profiled(self):
+        """Should not profile the job of a request that is not profiled."""
+        app = Flask(__name__)
+        profiling.init_app(app)
+
+        with app.test_request_context("/api/builds/my-app"):
+            app.preprocess_request()
+            job = profiling.background_job(_profiled_function, "build my-app")
+
+        self.assertIs(job, _profiled_function)
+
+    def test_background_job_profiled(self):
+        """Should profile the job started by a profiled request."""
+        app = Flask(__name__)
+        profiling.init_app(app)
+
+        with app.test_request_context(
+            "/api/builds/my-app", headers={profiling.PROFILE_HEADER: "secret"}
+        ):
+            app.preprocess_request()
+            self.assertTrue(profiling.is_request_profiled())
+            job = profiling.background_job(_profiled_function, "build my-app")
+            app.do_teardown_request()
+
+        self.assertEqual(job(), 4950)
+        profiles = profiling.list_profiles()
+        self.assertEqual(len(profiles), 2)
+        self.assertTrue(any(profile.endswith("-build-my-app.pstats") for profile in profiles))
+        self.assertTrue(
+            any(profile.endswith("-get-api-builds-my-app.pstats") for profile in profiles)
+        )
+
+    def test_request_profiling(self):
+        """Should profile the requests carrying the profiling token."""
+        app = Flask(__name__)
+        profiling.init_app(app)
+        app.route("/")(lambda: "OK")
+
+        app.test_client().get("/", headers={profiling.PROFILE_HEADER: "invalid"})
+        self.assertEqual(profiling.list_profiles(), [])
+
+        app.test_client().get("/", headers={profiling.PROFILE_HEADER: "secret"})
+        self.assertEqual(len(profiling.list_profiles()), 1)
+
+    @patch.dict(os.environ, {"NESTOR_PROFILING_ENABLED": "true"})
+    def test_request_profiling_always_enabled(self):
+        """Should profile every request."""
+        app = Flask(__name__)
+        profiling.init_app(app)
+        app.route("/")(lambda: "OK")
+
+        app.test_client().get("/")
+
+        self.assertEqual(len(profiling.list_profiles()), 1)
@@ -0,0 +1,155 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from nestor_api.utils import tracing
+
+
+@tracing.traced("child", app="app_name", tag="tag")
+def _traced_function(app_name, tag="latest"):  # pylint: disable=unused-argument
+    return tracing.get_current_span()
+
+
+@tracing.traced("job", start_trace=True, app="app_name")
+def _traced_job(app_name):
+    return _traced_function(app_name)
+
+
+@patch.dict(os.environ, {"NESTOR_TRACING_EXPORTER": "memory"})
+class TestTracing(TestCase):
+    def setUp(self):
+        tracing.MEMORY_EXPORTER.clear()
+
+    def test_start_span(self):
+        """Should record the spans of a trace with their parent."""
+        with tracing.start_span("root", app="my-app") as root:
+            self.assertIs(tracing.get_current_span(), root)
+            with tracing.start_span("child", count=2) as child:
+                tracing.set_attribute("cluster", "staging")
+            self.assertIs(tracing.get_current_span(), root)
+        self.assertIsNone(tracing.get_current_span())
+
+        spans = tracing.MEMORY_EXPORTER.get_traces()[0]
+        self.assertEqual(spans, [child, root])
+        self.assertEqual(child.trace_id, root.trace_id)
+        self.assertEqual(child.parent_span_id, root.span_id)
+        self.assertIsNone(root.parent_span_id)
+        self.assertEqual(root.attributes, {"app": "my-app"})
+        self.assertEqual(child.attributes, {"count": 2, "cluster": "staging"})
+        self.assertLessEqual(root.start_time, child.start_time)
+        self.assertLessEqual(child.end_time, root.end_time)
+
+    def test_start_span_error(self):
+        """Should record the error ending a span."""
+        with self.assertRaises(ValueError):
+            with tracing.start_span("root"):
+                raise ValueError("invalid")
+
+        span = tracing.MEMORY_EXPORTER.get_traces()[0][0]
+        self.assertEqual(span.error, "ValueError: invalid")
+
+    def test_traced_outside_of_a_trace(self):
+        """Should not record a span outside of a trace."""
+        self.assertIsNone(_traced_function("my-app"))
+        self.assertEqual(tracing.MEMORY_EXPORTER.get_traces(), [])
+
+    def test_traced(self):
+        """Should record a span with attributes taken from the arguments."""
+        child = _traced_job("my-app")
+
+        span, root = tracing.MEMORY_EXPORTER.get_traces()[0]
+        self.assertIs(span, child)
+        self.assertEqual(child.name, "child")
+        self.assertEqual(child.attributes, {"app": "my-app", "tag": "latest"})
+        self.assertEqual(child.parent_span_id, root.span_id)
+        self.assertEqual(root.name, "job")
+        self.assertEqual(root.attributes, {"app": "my-app"})
+
+    @patch.dict(os.environ, {"NESTOR_TRACING_EXPORTER": "none"})
+    def test_tracing_disabled(self):
+        """Should not export the traces."""
+        _traced_job("my-app")
+
+        self.assertEqual(tracing.MEMORY_EXPORTER.get_traces(), [])
+
+    def test_to_otlp(self):
+        """Should format the spans as an OTLP JSON export request."""
+        with tracing.start_span("root", app="my-app", retries=1, ratio=0.5, cached=True):
+            with tracing.start_span("child"):
+                pass
+        child, root = tracing.MEMORY_EXPORTER.get_traces()[0]
+
+        request = tracing.to_otlp([child, root])
+
+        [resource_spans] = request["resourceSpans"]
+        self.assertEqual(
+            resource_spans["resource"]["attributes"],
+            [{"key": "service.name", "value": {"stringValue": "nestor-api"}}],
+        )
+        [scope_spans] = resource_spans["scopeSpans"]
+        otlp_child, otlp_root = scope_spans["spans"]
+        self.assertEqual(
+            otlp_root,
+            {
+                "traceId": root.trace_id,
+                "spanId": root.span_id,
+                "name": "root",
+                "kind": 1,
+                "startTimeUnixNano": str(root.start_time),
+                "endTimeUnixNano": str(root.end_time),
+                "attributes": [
+                    {"key": "app", "value": {"stringValue": "my-app"}},
+                    {"key": "cached", "value": {"boolValue": True}},
+                    {"key": "ratio", "value": {"doubleValue": 0.5}},
+                    {"key": "retries", "value": {"intValue": "1"}},
+                ],
+                "status": {"code": 1},
+            },
+        )
+        self.assertEqual(otlp_child["parentSpanId"], root.span_id)
+        self.assertEqual(len(root.trace_id), 32)
+        self.assertEqual(len(root.span_id), 16)
+
+    def test_file_exporter(self):
+        """Should append each trace to the file."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "traces", "traces.jsonl")
+            with patch.dict(
+                os.environ, {"NESTOR_TRACING_EXPORTER": "file", "NESTOR_TRACING_FILE": path}
+            ):
+                _traced_job("app-1")
+                _traced_job("app-2")
+
+            with open(path) as file:
+                traces = [json.loads(line) for line in file]
+
+        self.assertEqual(len(traces), 2)
+        spans = traces[1]["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        self.assertEqual([span["name"] for span in spans], ["child", "job"])
+
+    @patch("nestor_api.utils.tracing.time.time_ns", autospec=True)
+    def test_format_summary(self, time_ns_mock):
+        """Should show the tree of spans and mark the critical path."""
+        time_ns_mock.side_effect = [
+            int(seconds * 1e9) for seconds in [0, 0, 1, 1, 4, 4, 4, 4, 5, 5]
+        ]
+        with tracing.start_span("build", app="my-app"):
+            with tracing.start_span("checkout"):
+                pass
+            with tracing.start_span("docker_build"):
+                with tracing.start_span("docker_push"):
+                    pass
+            with tracing.start_span("git_push"):
+                pass
+        spans = tracing.MEMORY_EXPORTER.get_traces()[0]
+
+        self.assertEqual(
+            tracing.format_summary(spans),
+            "* build 5.000s 100.0% [app=my-app]\n"
+            "    checkout 1.000s 20.0%\n"
+            "    docker_build 3.000s 60.0%\n"
+            "      docker_push 0.000s 0.0%\n"
+            "  * git_push 1.000s 20.0%",
+        )
@@ -17,6 +17,21 @@ class Configuration:
         """Returns the type of validation target"""
         return os.getenv("NESTOR_VALIDATION_TARGET")
 
+    @staticmethod
+    def get_validation_processes():
+        """Returns the number of processes used to validate the files"""
+        return int(os.getenv("NESTOR_VALIDATION_PROCESSES", "1"))
+
+    @staticmethod
+    def get_validation_since():
+        """Returns the git revision to compare with to only validate the changed files"""
+        return os.getenv("NESTOR_VALIDATION_SINCE")
+
+    @staticmethod
+    def get_validation_cache_path():
+        """Returns the path of the cache of the files previously found valid"""
+        return os.getenv("NESTOR_VALIDATION_CACHE_PATH")
+
 
 class SupportedValidations(Enum):
     """Enum of Supported validations by Nestor
@@ -30,3 +45,4 @@ class SupportedValidations(Enum):
 
     APPLICATIONS = "APPLICATIONS"
     PROJECTS = "PROJECTS"
+    ALL = "ALL"
@@ -1,16 +1,28 @@
 """Configuration files validator"""
 
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
 import os
 from pathlib import Path
+import subprocess
+from typing import Dict, List, Optional, Set, Tuple
 
 import jsonschema  # type: ignore
-from yaml.constructor import ConstructorError
+import yaml
 
 from validator.config.config import Configuration, SupportedValidations
 from validator.errors.errors import InvalidTargetPathError
 from validator.schemas.schema import SCHEMAS
 import yaml_lib
 
+# Validators already built, by name of their schema in SCHEMAS: building a validator checks
+# the schema against its meta-schema and creates a `$ref` resolver, which should only be done once.
+_validators: Dict[str, jsonschema.Draft7Validator] = {}
+
+# Hashes of the SCHEMAS, part of the keys of the validation cache
+_schema_hashes: Dict[str, str] = {}
+
 
 def is_yaml_file(file_name):
     """Verifies if a file ends in a valid yaml extension
@@ -40,18 +52,178 @@ def build_project_conf_path():
     return os.path.join(target_path, "project.yaml")
 
 
-def validate_file(file_path: str, schema: dict) -> str:
+def get_validator(schema_name: str) -> jsonschema.Draft7Validator:
+    """Returns the validator of a schema, building it on first use
+
+    Args:
+        schema_name (string): The name of the schema in SCHEMAS
+
+    Raises:
+        jsonschema.SchemaError: If the schema itself is invalid
+
+    Returns:
+        Draft7Validator: The validator of the schema
+    """
+    if schema_name not in _validators:
+        schema = SCHEMAS[schema_name]
+        jsonschema.Draft7Validator.check_schema(schema)
+        _validators[schema_name] = jsonschema.Draft7Validator(schema)
+    return _validators[schema_name]
+
+
+def validate_file(file_path: str, schema_name: str) -> None:
     """Validates a file with a given schema
 
     Args:
         file_path (string): The path to the file
-        schema (Dict): The schema format
+        schema_name (string): The name of the schema in SCHEMAS
 
-    Returns:
-        String: The validated file
+    Raises:
+        jsonschema.ValidationError: The most relevant error if the file is not valid
     """
     yaml_file = yaml_lib.read_yaml(file_path)
-    return jsonschema.validate(yaml_file, schema)
+    error = jsonschema.exceptions.best_match(get_validator(schema_name).iter_errors(yaml_file))
+    if error is not None:
+        raise error
+
+
+def collect_file_errors(file_path: str, schema_name: str) -> List[Exception]:
+    """Validates a file with a given schema and collects every error
+
+    Args:
+        file_path (string): The path to the file
+        schema_name (string): The name of the schema in SCHEMAS
+
+    Returns:
+        list: The YAML error if the file cannot be loaded, otherwise all the validation errors
+    """
+    try:
+        yaml_file = yaml_lib.read_yaml(file_path)
+    except yaml.YAMLError as yaml_error:
+        return [yaml_error]
+
+    return list(get_validator(schema_name).iter_errors(yaml_file))
+
+
+def list_app_files(apps_path: str) -> List[str]:
+    """Lists the application files of the /apps folder
+
+    Args:
+        apps_path (string): The path to the /apps folder
+
+    Returns:
+        list: The paths of the .yaml or .yml files of the folder
+    """
+    return [
+        os.path.join(apps_path, f.lower())
+        for f in sorted(os.listdir(apps_path))
+        if os.path.isfile(os.path.join(apps_path, f)) and not f.startswith(".") and is_yaml_file(f)
+    ]
+
+
+def list_target_files(validation_target: str, apps_path: str) -> List[Tuple[str, str]]:
+    """Lists the files to validate for a validation target
+
+    Args:
+        validation_target (string): One of the SupportedValidations
+        apps_path (string): The path to the /apps folder
+
+    Returns:
+        list: The (file path, schema name) of each file to validate
+    """
+    files: List[Tuple[str, str]] = []
+    if validation_target in (str(SupportedValidations.APPLICATIONS), str(SupportedValidations.ALL)):
+        files.extend(
+            (file_path, str(SupportedValidations.APPLICATIONS))
+            for file_path in list_app_files(apps_path)
+        )
+    if validation_target in (str(SupportedValidations.PROJECTS), str(SupportedValidations.ALL)):
+        files.append((build_project_conf_path(), str(SupportedValidations.PROJECTS)))
+    return files
+
+
+def list_changed_files(path: str, since: str) -> Set[str]:
+    """Lists the files of a git repository changed since a revision,
+    including the uncommitted and untracked ones
+
+    Args:
+        path (string): A path inside the git repository
+        since (string): The git revision to compare with
+
+    Returns:
+        set: The real paths of the changed files
+    """
+
+    def _git(*args: str, cwd: str) -> str:
+        return subprocess.run(
+            ["git", *args], cwd=cwd, check=True, stdout=subprocess.PIPE, universal_newlines=True
+        ).stdout
+
+    root = _git("rev-parse", "--show-toplevel", cwd=path).strip()
+    changed_files = _git("diff", "--name-only", since, "--", cwd=root).splitlines()
+    changed_files += _git("ls-files", "--others", "--exclude-standard", cwd=root).splitlines()
+    return {os.path.realpath(os.path.join(root, file_path)) for file_path in changed_files}
+
+
+def get_cache_key(file_path: str, schema_name: str) -> str:
+    """Returns the key of a file in the validation cache, which changes
+    whenever the content of the file or its schema changes
+
+    Args:
+        file_path (string): The path to the file
+        schema_name (string): The name of the schema in SCHEMAS
+
+    Returns:
+        string: The hash of the file content and the schema
+    """
+    if schema_name not in _schema_hashes:
+        serialized_schema = json.dumps(SCHEMAS[schema_name], sort_keys=True, default=str)
+        _schema_hashes[schema_name] = hashlib.sha256(serialized_schema.encode("utf-8")).hexdigest()
+
+    file_hash = hashlib.sha256(_schema_hashes[schema_name].encode("utf-8"))
+    with open(file_path, "rb") as file:
+        file_hash.update(file.read())
+    return file_hash.hexdigest()
+
+
+def read_cache(cache_path: Optional[str]) -> Dict[str, str]:
+    """Reads the keys of the files previously found valid, by file path"""
+    if cache_path is None or not os.path.isfile(cache_path):
+        return {}
+    with open(cache_path, "r", encoding="utf-8") as cache_file:
+        keys = json.load(cache_file)
+    # Ignore the caches written in another format
+    return keys if isinstance(keys, dict) else {}
+
+
+def write_cache(cache_path: str, keys: Dict[str, str]) -> None:
+    """Writes the keys of the files found valid, by file path"""
+    with open(cache_path, "w", encoding="utf-8") as cache_file:
+        json.dump(keys, cache_file, indent=2, sort_keys=True)
+
+
+def _collect_errors_job(file: Tuple[str, str]) -> List[Exception]:
+    file_path, schema_name = file
+    return collect_file_errors(file_path, schema_name)
+
+
+def collect_errors(files: List[Tuple[str, str]]) -> List[List[Exception]]:
+    """Validates files, across a pool of processes when NESTOR_VALIDATION_PROCESSES
+    is greater than 1
+
+    Args:
+        files (list): The (file path, schema name) of each file to validate
+
+    Returns:
+        list: The errors of each file, in the same order
+    """
+    processes = min(Configuration.get_validation_processes(), len(files))
+    if processes <= 1:
+        return [_collect_errors_job(file) for file in files]
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        chunksize = max(1, len(files) // (processes * 4))
+        return list(executor.map(_collect_errors_job, files, chunksize=chunksize))
 
 
 def validate_deployment_files() -> list:
@@ -60,12 +232,17 @@ def validate_deployment_files() -> list:
     This function executes a specific validation configured with NESTOR_VALIDATION_TARGET
     to a list of files in a given path configured with NESTOR_CONFIG_PATH.
 
+    With NESTOR_VALIDATION_SINCE, only the files changed since this git revision are
+    validated. With NESTOR_VALIDATION_CACHE_PATH, the files found valid are recorded
+    and not validated again until their content or their schema changes.
+
     Raises:
         Exception: If the configuration path has not been configured.
         Exception: If the configuration path does not exist
 
     Returns:
-        list: A list with errors, if empty there were no errors validating the files
+        list: The (file path, error) of each error, if empty there were no errors
+            validating the files
     """
     apps_path = build_apps_path()
     if not Path(apps_path).exists():
@@ -73,39 +250,42 @@ def validate_deployment_files() -> list:
             f"{apps_path} does not look like a valid configuration path. Verify the path exists"
         )
 
-    errors = []
     validation_target = Configuration.get_validation_target()
-
-    if validation_target == str(SupportedValidations.APPLICATIONS):
-        # Validate each application file
-
-        # We will only validate .yaml or .yml files
-        files_in_dir = [
-            f.lower()
-            for f in os.listdir(apps_path)
-            if os.path.isfile(os.path.join(apps_path, f))
-            and not f.startswith(".")
-            and is_yaml_file(f)
-        ]
-
-        for file in files_in_dir:
-            application_config_file_path = os.path.join(apps_path, file)
-            try:
-                validate_file(application_config_file_path, SCHEMAS[validation_target])
-            except ConstructorError as validation_error:
-                errors.append(validation_error)
-
-    elif validation_target == str(SupportedValidations.PROJECTS):
-        # Validate project.yaml
-        project_config_file_path = build_project_conf_path()
-        try:
-            validate_file(project_config_file_path, SCHEMAS[validation_target])
-        except ConstructorError as validation_error:
-            errors.append(validation_error)
-    else:
+    if validation_target not in [str(validation) for validation in SupportedValidations]:
         raise Exception(
             "There is no configuration to be validated. "
             + "Be sure to define a valid NESTOR_VALIDATION_TARGET"
         )
 
+    files = list_target_files(validation_target, apps_path)
+
+    since = Configuration.get_validation_since()
+    if since is not None:
+        changed_files = list_changed_files(apps_path, since)
+        files = [file for file in files if os.path.realpath(file[0]) in changed_files]
+
+    # Skip the files already found valid, with the same content and schema
+    cache_path = Configuration.get_validation_cache_path()
+    cached_keys = read_cache(cache_path)
+    files_keys: Dict[Tuple[str, str], str] = {}
+    if cache_path:
+        files_keys = {file: get_cache_key(*file) for file in files}
+        files = [
+            file for file in files if cached_keys.get(os.path.realpath(file[0])) != files_keys[file]
+        ]
+
+    errors: List[Tuple[str, Exception]] = []
+    for file, file_errors in zip(files, collect_errors(files)):
+        file_path = file[0]
+        errors.extend((file_path, error) for error in file_errors)
+        if cache_path:
+            # The files of the other targets, or not changed since, stay in the cache
+            if file_errors:
+                cached_keys.pop(os.path.realpath(file_path), None)
+            else:
+                cached_keys[os.path.realpath(file_path)] = files_keys[file]
+
+    if cache_path:
+        write_cache(cache_path, cached_keys)
+
     return errors